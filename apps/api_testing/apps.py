@@ -4,4 +4,9 @@ from django.apps import AppConfig
 class ApiTestingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.api_testing'
-    verbose_name = '接口测试'
\ No newline at end of file
+    verbose_name = '接口测试'
+
+    def ready(self):
+        """请求历史删除时清理外部存储的响应体"""
+        from apps.api_testing.signals import connect_signals
+        connect_signals()
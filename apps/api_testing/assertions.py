@@ -0,0 +1,179 @@
+"""
+接口断言执行
+断言规则先编译为断言计划（预解析 JSONPath、预处理期望值），按 ApiRequest 版本缓存复用；
+每个响应的 JSON 只解析一次，由所有断言共享
+"""
+import json
+import threading
+from collections import OrderedDict
+
+_UNSET = object()
+
+# 断言计划缓存：(请求ID, 更新时间) -> AssertionPlan
+_PLAN_CACHE_SIZE = 1024
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def get_response_json(response):
+    """解析响应JSON，每个响应只解析一次，结果缓存在响应对象上供断言和请求历史复用"""
+    cached = getattr(response, '_parsed_json', _UNSET)
+    if cached is _UNSET:
+        try:
+            cached = json.loads(response.text)
+        except json.JSONDecodeError as e:
+            cached = e
+        response._parsed_json = cached
+    if isinstance(cached, json.JSONDecodeError):
+        raise cached
+    return cached
+
+
+class AssertionPlan:
+    """编译后的断言计划"""
+
+    def __init__(self, assertions):
+        self.steps = [self._compile(assertion) for assertion in (assertions or [])]
+
+    @staticmethod
+    def _compile(assertion):
+        assertion_type = assertion.get('type')
+        expected = assertion.get('expected')
+        step = {
+            'name': assertion.get('name', '未命名断言'),
+            'type': assertion_type,
+            'expected': expected,
+            'assertion': assertion,
+        }
+
+        if assertion_type == 'contains':
+            step['pattern'] = str(expected)
+        elif assertion_type == 'equals':
+            step['pattern'] = str(expected).strip()
+        elif assertion_type == 'json_path':
+            json_path = assertion.get('json_path', '')
+            step['expected_str'] = str(expected)
+            step['matcher'] = None
+            step['compile_error'] = None
+            if not json_path:
+                step['compile_error'] = ValueError("JSON路径表达式不能为空")
+            else:
+                try:
+                    from jsonpath_ng import parse
+                    step['matcher'] = parse(json_path)
+                except Exception as e:
+                    step['compile_error'] = e
+        elif assertion_type == 'header':
+            step['header_name'] = assertion.get('header_name', '')
+            step['expected_value'] = assertion.get('expected_value')
+
+        return step
+
+    def evaluate(self, response, response_time=None):
+        """对响应执行全部断言，返回断言结果列表"""
+        return [self._evaluate_step(step, response, response_time) for step in self.steps]
+
+    @staticmethod
+    def _evaluate_step(step, response, response_time):
+        result = {
+            'name': step['name'],
+            'type': step['type'],
+            'passed': False,
+            'expected': step['expected'],
+            'actual': None,
+            'error': None
+        }
+
+        try:
+            assertion_type = step['type']
+            expected = step['expected']
+            actual = None
+            passed = False
+
+            if assertion_type == 'status_code':
+                actual = response.status_code
+                passed = actual == expected
+
+            elif assertion_type == 'response_time':
+                # 响应时间由调用方传入，兼容旧的 actual_time 写法
+                actual = response_time if response_time is not None else step['assertion'].get('actual_time')
+                passed = actual <= expected if actual else False
+
+            elif assertion_type == 'contains':
+                text = response.text or ''
+                actual = text[:200] + '...' if len(text) > 200 else text
+                passed = step['pattern'] in text
+
+            elif assertion_type == 'json_path':
+                try:
+                    # 检查响应是否为JSON格式
+                    content_type = response.headers.get('content-type', '').lower()
+                    if 'application/json' not in content_type:
+                        raise ValueError(f"响应不是JSON格式，Content-Type: {content_type}")
+
+                    response_json = get_response_json(response)
+
+                    if step['compile_error'] is not None:
+                        raise step['compile_error']
+
+                    matches = step['matcher'].find(response_json)
+                    actual = matches[0].value if matches else None
+                    passed = str(actual) == step['expected_str']
+                    result['actual'] = actual
+                except json.JSONDecodeError as e:
+                    actual = None
+                    passed = False
+                    result['error'] = f"JSON解析失败: {str(e)}"
+                except ImportError as e:
+                    actual = None
+                    passed = False
+                    result['error'] = f"缺少依赖库: {str(e)}，请安装jsonpath-ng"
+                except Exception as e:
+                    actual = None
+                    passed = False
+                    result['error'] = f"执行错误: {str(e)}"
+
+            elif assertion_type == 'header':
+                actual = response.headers.get(step['header_name'])
+                passed = actual == step['expected_value']
+
+            elif assertion_type == 'equals':
+                actual = response.text.strip()
+                passed = actual == step['pattern']
+
+            elif assertion_type == 'response_size':
+                actual = len(response.content)
+                passed = actual <= expected
+
+            # 确保在所有情况下都设置actual值
+            if result['actual'] is None:
+                result['actual'] = actual
+            result['passed'] = passed
+
+        except Exception as e:
+            result['error'] = str(e)
+            result['passed'] = False
+
+        return result
+
+
+def get_assertion_plan(api_request):
+    """获取接口的断言计划，按 (接口ID, 更新时间) 缓存，接口被修改后自动重新编译"""
+    key = (api_request.pk, api_request.updated_at)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = AssertionPlan(api_request.assertions)
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        if len(_plan_cache) > _PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def execute_assertions(response, assertions, response_time=None):
+    """执行断言验证"""
+    return AssertionPlan(assertions).evaluate(response, response_time)
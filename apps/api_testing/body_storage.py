@@ -0,0 +1,136 @@
+"""
+接口响应体外部存储
+超过内联阈值的响应体以 gzip 压缩后写入 MEDIA_ROOT 下的文件，
+按内容 SHA-256 寻址，相同内容只保存一份；请求历史中只保存相对路径。
+请求历史删除后，没有其他记录引用的文件随之删除；遗漏的文件由 cleanup_api_response_bodies 命令清理
+"""
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BODY_STORAGE_DIR = 'api_responses'
+CHUNK_SIZE = 1024 * 1024
+# 文件写入或复用后的保护时长（秒）：期间对应的请求历史可能尚未保存，不删除
+REUSE_GRACE_SECONDS = 300
+_QUERY_BATCH_SIZE = 500
+
+
+def should_store_externally(content):
+    """响应体是否超过内联阈值"""
+    return len(content) > settings.API_RESPONSE_INLINE_MAX_BYTES
+
+
+def save_body(content):
+    """保存响应体，返回相对 MEDIA_ROOT 的文件路径
+
+    先分块压缩写入临时文件并同时计算哈希，再原子性地移动到哈希路径；
+    目标文件已存在时直接复用
+    """
+    storage_root = os.path.join(settings.MEDIA_ROOT, BODY_STORAGE_DIR)
+    os.makedirs(storage_root, exist_ok=True)
+
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=storage_root, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw_file, gzip.GzipFile(fileobj=raw_file, mode='wb') as gz_file:
+            view = memoryview(content)
+            for offset in range(0, len(view), CHUNK_SIZE):
+                chunk = view[offset:offset + CHUNK_SIZE]
+                digest.update(chunk)
+                gz_file.write(chunk)
+
+        sha256 = digest.hexdigest()
+        relative_path = os.path.join(BODY_STORAGE_DIR, sha256[:2], f'{sha256}.gz')
+        absolute_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+        if os.path.exists(absolute_path):
+            os.remove(temp_path)
+            # 刷新修改时间，清理时不会删除刚被复用的文件
+            os.utime(absolute_path)
+        else:
+            os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+            os.replace(temp_path, absolute_path)
+        return relative_path
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def open_body(relative_path):
+    """以流的方式打开外部存储的响应体（解压后的字节流）"""
+    return gzip.open(os.path.join(settings.MEDIA_ROOT, relative_path), 'rb')
+
+
+def load_body(relative_path, encoding='utf-8'):
+    """读取外部存储的响应体文本"""
+    with open_body(relative_path) as body_file:
+        return body_file.read().decode(encoding or 'utf-8', errors='replace')
+
+
+def _recently_modified(path, grace_seconds):
+    return time.time() - os.path.getmtime(path) < grace_seconds
+
+
+def delete_body_if_unreferenced(relative_path):
+    """没有请求历史引用该文件时删除，返回是否已删除"""
+    from .models import RequestHistory
+
+    if not relative_path or RequestHistory.objects.filter(response_body_path=relative_path).exists():
+        return False
+    absolute_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    try:
+        if _recently_modified(absolute_path, REUSE_GRACE_SECONDS):
+            return False
+        os.remove(absolute_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def cleanup_unreferenced_bodies(min_age_seconds=REUSE_GRACE_SECONDS, dry_run=False):
+    """删除没有请求历史引用的响应体文件和遗留的临时文件
+
+    只处理修改时间早于 min_age_seconds 秒前的文件，返回 (删除的文件数, 释放的字节数)
+    """
+    from .models import RequestHistory
+
+    storage_root = os.path.join(settings.MEDIA_ROOT, BODY_STORAGE_DIR)
+    candidates = {}
+    for directory, _, filenames in os.walk(storage_root):
+        for filename in filenames:
+            absolute_path = os.path.join(directory, filename)
+            try:
+                if _recently_modified(absolute_path, min_age_seconds):
+                    continue
+            except FileNotFoundError:
+                continue
+            relative_path = os.path.relpath(absolute_path, settings.MEDIA_ROOT)
+            candidates[relative_path] = absolute_path
+
+    paths = list(candidates)
+    for offset in range(0, len(paths), _QUERY_BATCH_SIZE):
+        batch = [path for path in paths[offset:offset + _QUERY_BATCH_SIZE] if path.endswith('.gz')]
+        referenced = RequestHistory.objects.filter(response_body_path__in=batch).values_list(
+            'response_body_path', flat=True
+        )
+        for path in set(referenced):
+            candidates.pop(path, None)
+
+    removed, freed = 0, 0
+    for relative_path, absolute_path in candidates.items():
+        try:
+            size = os.path.getsize(absolute_path)
+            if not dry_run:
+                os.remove(absolute_path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += size
+    return removed, freed
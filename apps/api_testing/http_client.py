@@ -0,0 +1,156 @@
+"""
+接口测试 HTTP 会话层
+基于 httpx 连接池，同一次执行（或同一环境）内复用 TCP/TLS 连接，
+支持 keep-alive、HTTP/2（安装 h2 时自动启用），并统计每个请求的连接/TLS/首字节耗时
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available():
+    """检查是否安装了 HTTP/2 支持库 h2"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class RequestTimings:
+    """请求阶段耗时收集器
+
+    作为 httpcore 的 trace 回调使用，事件名形如 "connection.connect_tcp.started"、
+    "http11.receive_response_headers.complete"，按阶段记录耗时（毫秒）
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._started = {}
+        self.phases = {}
+        self.first_byte_at = None
+
+    def __call__(self, event_name, info):
+        phase, _, state = event_name.rpartition('.')
+        now = time.perf_counter()
+        if state == 'started':
+            self._started[phase] = now
+        elif state == 'complete' and phase in self._started:
+            self.phases[phase] = (now - self._started.pop(phase)) * 1000
+            if phase.endswith('receive_response_headers') and self.first_byte_at is None:
+                self.first_byte_at = now
+
+    def _phase(self, suffix):
+        return round(sum(value for name, value in self.phases.items() if name.endswith(suffix)), 2)
+
+    def as_dict(self, http_version=None):
+        connect = self._phase('connect_tcp') + self._phase('connect_unix_socket')
+        tls = self._phase('start_tls')
+        ttfb = (self.first_byte_at - self._start) * 1000 if self.first_byte_at else None
+        return {
+            'connect': connect,
+            'tls': tls,
+            'ttfb': round(ttfb, 2) if ttfb is not None else None,
+            'total': round((time.perf_counter() - self._start) * 1000, 2),
+            # 没有建连事件说明复用了连接池中的连接
+            'reused_connection': connect == 0 and tls == 0,
+            'http_version': http_version,
+        }
+
+
+class ApiHttpSession:
+    """带连接池的 HTTP 会话
+
+    httpx.Client 是线程安全的，可以在并发执行套件时由多个工作线程共享
+    """
+
+    def __init__(self, pool_size=None, http2=None, shared=False):
+        pool_size = pool_size or settings.API_HTTP_POOL_SIZE
+        if http2 is None:
+            http2 = settings.API_HTTP2_ENABLED
+        self.http2 = bool(http2) and _http2_available()
+        self.shared = shared
+        self.client = httpx.Client(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=settings.API_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+
+    @staticmethod
+    def _build_kwargs(timings, headers, params, json, data, timeout):
+        kwargs = {
+            'headers': headers,
+            'params': params,
+            'timeout': timeout,
+            'extensions': {'trace': timings},
+        }
+        if data is not None:
+            # 原始字符串/字节使用 content 发送，表单字典使用 data 发送
+            if isinstance(data, (str, bytes)):
+                kwargs['content'] = data
+            else:
+                kwargs['data'] = data
+        else:
+            kwargs['json'] = json
+        return kwargs
+
+    def request(self, method, url, headers=None, params=None, json=None, data=None, timeout=30):
+        """发送请求，返回的响应对象附带 timings 属性（各阶段耗时，毫秒）"""
+        timings = RequestTimings()
+        kwargs = self._build_kwargs(timings, headers, params, json, data, timeout)
+
+        response = self.client.request(method, url, **kwargs)
+        response.timings = timings.as_dict(http_version=response.http_version)
+        return response
+
+    @contextmanager
+    def stream(self, method, url, headers=None, params=None, json=None, data=None, timeout=30):
+        """以流的方式发送请求，响应体需通过 iter_bytes() 按块读取"""
+        timings = RequestTimings()
+        kwargs = self._build_kwargs(timings, headers, params, json, data, timeout)
+
+        with self.client.stream(method, url, **kwargs) as response:
+            response.timings = timings.as_dict(http_version=response.http_version)
+            yield response
+
+    def close(self):
+        if not self.shared:
+            self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_environment_sessions = {}
+_environment_sessions_lock = threading.Lock()
+
+
+def open_session(environment=None, pool_size=None):
+    """获取用于一次执行的 HTTP 会话
+
+    开启 API_HTTP_SHARE_ENVIRONMENT_SESSIONS 时，同一环境的执行共享一个长连接会话
+    （退出上下文时不关闭）；否则每次执行新建会话，执行结束后关闭
+    """
+    if environment is not None and settings.API_HTTP_SHARE_ENVIRONMENT_SESSIONS:
+        with _environment_sessions_lock:
+            session = _environment_sessions.get(environment.id)
+            if session is None:
+                session = ApiHttpSession(pool_size=pool_size, shared=True)
+                _environment_sessions[environment.id] = session
+                logger.info(f"为环境 {environment.id} 创建共享HTTP会话 (HTTP/2: {session.http2})")
+            return session
+
+    return ApiHttpSession(pool_size=pool_size)
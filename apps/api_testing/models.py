@@ -94,6 +94,8 @@ class ApiRequest(models.Model):
     pre_request_script = models.TextField(blank=True, verbose_name='请求前脚本')
     post_request_script = models.TextField(blank=True, verbose_name='请求后脚本')
     assertions = models.JSONField(default=list, verbose_name='断言规则')
+    stream_assertions = models.BooleanField(default=False, verbose_name='流式断言',
+                                            help_text='按块读取响应并增量执行断言，适用于大响应接口')
     order = models.IntegerField(default=0, verbose_name='排序')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='创建者')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
@@ -142,6 +144,9 @@ class RequestHistory(models.Model):
                                     verbose_name='使用环境')
     request_data = models.JSONField(verbose_name='请求数据')
     response_data = models.JSONField(null=True, blank=True, verbose_name='响应数据')
+    response_body_path = models.CharField(max_length=255, blank=True, default='', verbose_name='响应体文件',
+                                          help_text='超过内联阈值的响应体压缩存储路径（相对MEDIA_ROOT）')
+    response_size = models.IntegerField(null=True, blank=True, verbose_name='响应大小(字节)')
     status_code = models.IntegerField(null=True, blank=True, verbose_name='状态码')
     response_time = models.FloatField(null=True, blank=True, verbose_name='响应时间(ms)')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
@@ -168,6 +173,8 @@ class TestSuite(models.Model):
     requests = models.ManyToManyField(ApiRequest, through='TestSuiteRequest', verbose_name='包含请求')
     environment = models.ForeignKey(Environment, on_delete=models.SET_NULL, null=True, blank=True,
                                     verbose_name='执行环境')
+    parallel_enabled = models.BooleanField(default=False, verbose_name='并发执行')
+    max_workers = models.IntegerField(default=5, verbose_name='最大并发数')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_test_suites',
                                    verbose_name='创建者')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
@@ -190,6 +197,8 @@ class TestSuiteRequest(models.Model):
     order = models.IntegerField(default=0, verbose_name='执行顺序')
     assertions = models.JSONField(default=list, verbose_name='断言规则')
     enabled = models.BooleanField(default=True, verbose_name='是否启用')
+    is_sequential = models.BooleanField(default=False, verbose_name='顺序执行',
+                                        help_text='并发模式下，等待之前的请求完成后再单独执行')
 
     class Meta:
         db_table = 'api_test_suite_requests'
@@ -256,6 +265,12 @@ class ScheduledTask(models.Model):
         ('ONCE', '单次执行'),
     ]
 
+    MISFIRE_POLICY_CHOICES = [
+        ('SKIP', '跳过错过的运行'),
+        ('RUN_ONCE', '合并补跑一次'),
+        ('RUN_ALL', '逐次补跑（最多N次）'),
+    ]
+
     name = models.CharField(max_length=200, verbose_name='任务名称')
     description = models.TextField(blank=True, verbose_name='任务描述')
     task_type = models.CharField(max_length=20, choices=TASK_TYPE_CHOICES, verbose_name='任务类型')
@@ -270,6 +285,12 @@ class ScheduledTask(models.Model):
     # 单次执行时间
     execute_at = models.DateTimeField(null=True, blank=True, verbose_name='执行时间')
 
+    # 错过运行（调度器停机或过载）的补跑策略；晚于计划时间不超过宽限秒数的运行视为准点
+    misfire_policy = models.CharField(max_length=20, choices=MISFIRE_POLICY_CHOICES, default='RUN_ONCE',
+                                      verbose_name='错过运行策略')
+    misfire_grace_seconds = models.IntegerField(default=60, verbose_name='错过运行宽限秒数')
+    misfire_max_catchup = models.IntegerField(default=3, verbose_name='最多补跑次数')
+
     # 任务配置
     test_suite = models.ForeignKey('TestSuite', on_delete=models.CASCADE, null=True, blank=True,
                                    verbose_name='测试套件')
@@ -286,6 +307,11 @@ class ScheduledTask(models.Model):
     successful_runs = models.IntegerField(default=0, verbose_name='成功运行次数')
     failed_runs = models.IntegerField(default=0, verbose_name='失败运行次数')
 
+    # 调度租约：调度器领取到期任务后持有租约，分发完成后释放；租约过期说明调度器在分发中途退出，由其他调度器接管
+    lease_owner = models.CharField(max_length=100, blank=True, default='', verbose_name='租约持有者')
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name='租约过期时间')
+    leased_run_time = models.DateTimeField(null=True, blank=True, verbose_name='租约对应的计划运行时间')
+
     # 执行结果
     last_result = models.JSONField(default=dict, verbose_name='最后执行结果')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
@@ -304,6 +330,11 @@ class ScheduledTask(models.Model):
         verbose_name = '定时任务'
         verbose_name_plural = '定时任务'
         ordering = ['-created_at']
+        indexes = [
+            # 调度器按 next_run_time 查询到期任务
+            models.Index(fields=['status', 'next_run_time']),
+            models.Index(fields=['lease_expires_at']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_task_type_display()})"
@@ -348,8 +379,8 @@ class ScheduledTask(models.Model):
         else:
             self.failed_runs += 1
         self.last_run_time = timezone.now()
-        self.next_run_time = self.calculate_next_run()
-        self.save()
+        # 下次运行时间由调度器在领取任务时按补跑策略推进，这里只更新统计
+        self.save(update_fields=['total_runs', 'successful_runs', 'failed_runs', 'last_run_time'])
 
 
 class TaskExecutionLog(models.Model):
@@ -370,6 +401,10 @@ class TaskExecutionLog(models.Model):
     duration = models.FloatField(null=True, blank=True, verbose_name='执行时长(秒)')
     result = models.JSONField(default=dict, verbose_name='执行结果')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
+    priority = models.IntegerField(default=5, verbose_name='执行优先级')
+    queue_depth = models.IntegerField(default=0, verbose_name='提交时排队深度')
+    queue_wait = models.FloatField(null=True, blank=True, verbose_name='排队等待时长(秒)')
+    celery_task_id = models.CharField(max_length=255, blank=True, default='', verbose_name='Celery任务ID')
     executed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name='执行者')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
 
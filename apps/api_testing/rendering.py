@@ -0,0 +1,209 @@
+"""
+请求模板渲染
+把接口的 URL、请求头、参数和请求体编译为请求模板，环境变量 {{name}} 与动态函数 ${func()}
+在一次遍历中同时解析；不含占位符的字段在编译时即确定为静态值，之后的执行直接复用
+"""
+import re
+import threading
+from collections import OrderedDict
+
+# 动态函数占位符，表达式中允许嵌套环境变量，如 ${md5({{password}})}
+_FUNCTION_PATTERN = re.compile(r'\$\{((?:\{\{[^}]*\}\}|[^}])+)\}')
+_VARIABLE_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
+
+BODY_METHODS = ('POST', 'PUT', 'PATCH')
+
+# 请求模板缓存：(接口ID, 更新时间) -> RequestTemplate
+_TEMPLATE_CACHE_SIZE = 1024
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def normalize_variables(variables):
+    """把环境变量转换为 {变量名: 替换文本}，每次执行只转换一次"""
+    values = {}
+    for key, value in (variables or {}).items():
+        if isinstance(value, dict):
+            values[key] = str(value.get('currentValue', '') or value.get('initialValue', ''))
+        else:
+            values[key] = str(value) if value is not None else ''
+    return values
+
+
+def _substitute_variables(text, values):
+    return _VARIABLE_PATTERN.sub(lambda match: values.get(match.group(1), match.group(0)), text)
+
+
+class _TextTemplate:
+    """含占位符的字符串，编译为 (类型, 内容) 片段列表"""
+
+    __slots__ = ('segments',)
+
+    def __init__(self, segments):
+        self.segments = segments
+
+    def render(self, values, resolver):
+        parts = []
+        for kind, content in self.segments:
+            if kind == 'text':
+                parts.append(content)
+            elif kind == 'var':
+                value = values.get(content)
+                if value is None:
+                    parts.append(f'{{{{{content}}}}}')
+                elif '${' in value:
+                    # 变量值中的动态函数同样需要解析
+                    parts.append(resolver.resolve(value))
+                else:
+                    parts.append(value)
+            elif kind == 'func':
+                parts.append(resolver.resolve(content))
+            else:
+                # 表达式中引用了环境变量，先代入变量再解析
+                parts.append(resolver.resolve(_substitute_variables(content, values)))
+        return ''.join(parts)
+
+
+class _DictTemplate:
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def render(self, values, resolver):
+        return {key: _render(value, values, resolver) for key, value in self.items}
+
+
+class _ListTemplate:
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def render(self, values, resolver):
+        return [_render(item, values, resolver) for item in self.items]
+
+
+_DYNAMIC_TYPES = (_TextTemplate, _DictTemplate, _ListTemplate)
+
+
+def _compile_text(text):
+    if '{{' not in text and '${' not in text:
+        return text
+
+    segments = []
+    pos = 0
+
+    def add_text(chunk):
+        last = 0
+        for match in _VARIABLE_PATTERN.finditer(chunk):
+            if match.start() > last:
+                segments.append(('text', chunk[last:match.start()]))
+            segments.append(('var', match.group(1)))
+            last = match.end()
+        if last < len(chunk):
+            segments.append(('text', chunk[last:]))
+
+    for match in _FUNCTION_PATTERN.finditer(text):
+        add_text(text[pos:match.start()])
+        kind = 'func_with_vars' if '{{' in match.group(1) else 'func'
+        segments.append((kind, match.group(0)))
+        pos = match.end()
+    add_text(text[pos:])
+
+    if all(kind == 'text' for kind, _ in segments):
+        return text
+    return _TextTemplate(segments)
+
+
+def compile_value(data):
+    """编译任意 JSON 结构，不含占位符的部分原样返回（静态值）"""
+    if isinstance(data, str):
+        return _compile_text(data)
+    if isinstance(data, dict):
+        items = [(key, compile_value(value)) for key, value in data.items()]
+        if any(isinstance(value, _DYNAMIC_TYPES) for _, value in items):
+            return _DictTemplate(items)
+        return data
+    if isinstance(data, list):
+        items = [compile_value(item) for item in data]
+        if any(isinstance(item, _DYNAMIC_TYPES) for item in items):
+            return _ListTemplate(items)
+        return data
+    return data
+
+
+def _render(compiled, values, resolver):
+    if isinstance(compiled, _DYNAMIC_TYPES):
+        return compiled.render(values, resolver)
+    return compiled
+
+
+class RequestTemplate:
+    """编译后的请求模板"""
+
+    def __init__(self, method, url, headers=None, params=None, body=None):
+        self.method = method
+        self.url = compile_value(url or '')
+
+        # 请求头支持列表格式（带启用开关）和字典格式
+        header_items = []
+        if isinstance(headers, list):
+            for header_item in headers:
+                if header_item.get('enabled', True) and header_item.get('key'):
+                    header_items.append((header_item['key'], str(header_item.get('value', ''))))
+        elif headers:
+            header_items = [(key, str(value)) for key, value in headers.items()]
+        self.headers = [(key, compile_value(value)) for key, value in header_items]
+
+        self.params = [(key, compile_value(str(value))) for key, value in (params or {}).items()]
+
+        self.body_type = 'none'
+        self.body = None
+        if body and method in BODY_METHODS:
+            self.body_type = body.get('type', 'none')
+            body_content = body.get('data')
+            if self.body_type == 'json' and isinstance(body_content, (dict, list)):
+                self.body = compile_value(body_content)
+            elif self.body_type == 'raw' and isinstance(body_content, str):
+                self.body = compile_value(body_content)
+            elif self.body_type in ['form-data', 'x-www-form-urlencoded'] and isinstance(body_content, list):
+                self.body = compile_value(body_content)
+            else:
+                self.body = body_content
+
+    def render(self, variables, resolver):
+        """渲染请求，variables 为 normalize_variables 的结果
+
+        返回 {'url', 'headers', 'params', 'body_type', 'body'}
+        """
+        return {
+            'url': _render(self.url, variables, resolver),
+            'headers': {key: _render(value, variables, resolver) for key, value in self.headers},
+            'params': {key: _render(value, variables, resolver) for key, value in self.params},
+            'body_type': self.body_type,
+            'body': _render(self.body, variables, resolver),
+        }
+
+
+def get_request_template(api_request):
+    """获取接口的请求模板，按 (接口ID, 更新时间) 缓存，接口被修改后自动重新编译"""
+    key = (api_request.pk, api_request.updated_at)
+    with _template_cache_lock:
+        template = _template_cache.get(key)
+        if template is not None:
+            _template_cache.move_to_end(key)
+            return template
+
+    template = RequestTemplate(
+        api_request.method,
+        api_request.url,
+        headers=api_request.headers,
+        params=api_request.params,
+        body=api_request.body
+    )
+    with _template_cache_lock:
+        _template_cache[key] = template
+        if len(_template_cache) > _TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return template
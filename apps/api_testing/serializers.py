@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime
+import json
 
 
 class NullableDateField(serializers.DateField):
@@ -18,6 +19,7 @@ from .models import (
     ScheduledTask, TaskExecutionLog, NotificationLog,
     TaskNotificationSetting, OperationLog, AIServiceConfig,
 )
+from .body_storage import load_body
 
 User = get_user_model()
 
@@ -103,7 +105,7 @@ class ApiRequestSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'request_type', 'method', 'url',
             'headers', 'params', 'body', 'auth', 'pre_request_script',
-            'post_request_script', 'assertions', 'collection', 'order', 'created_by',
+            'post_request_script', 'assertions', 'stream_assertions', 'collection', 'order', 'created_by',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
@@ -164,7 +166,41 @@ class RequestHistorySerializer(serializers.ModelSerializer):
         model = RequestHistory
         fields = [
             'id', 'request', 'environment', 'request_data', 'response_data',
-            'status_code', 'response_time', 'error_message', 'assertions_results',
+            'status_code', 'response_time', 'response_size', 'error_message', 'assertions_results',
+            'executed_by', 'executed_at'
+        ]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # 外部存储的响应体在详情中还原
+        if instance.response_body_path and data.get('response_data'):
+            response_data = dict(data['response_data'])
+            try:
+                body = load_body(instance.response_body_path, response_data.get('body_encoding'))
+                response_data['body'] = body
+                content_type = (response_data.get('headers') or {}).get('content-type', '')
+                if content_type.startswith('application/json'):
+                    try:
+                        response_data['json'] = json.loads(body)
+                    except json.JSONDecodeError:
+                        pass
+            except OSError:
+                response_data['body'] = ''
+            data['response_data'] = response_data
+        return data
+
+
+class RequestHistoryListSerializer(serializers.ModelSerializer):
+    """请求历史列表序列化器（不包含响应数据和断言结果等大字段）"""
+    request = ApiRequestSerializer(read_only=True)
+    environment = EnvironmentSerializer(read_only=True)
+    executed_by = UserSerializer(read_only=True)
+
+    class Meta:
+        model = RequestHistory
+        fields = [
+            'id', 'request', 'environment', 'request_data',
+            'status_code', 'response_time', 'response_size', 'error_message',
             'executed_by', 'executed_at'
         ]
 
@@ -174,7 +210,7 @@ class TestSuiteRequestSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TestSuiteRequest
-        fields = ['id', 'request', 'order', 'assertions', 'enabled']
+        fields = ['id', 'request', 'order', 'assertions', 'enabled', 'is_sequential']
 
 
 class TestSuiteSerializer(serializers.ModelSerializer):
@@ -185,10 +221,16 @@ class TestSuiteSerializer(serializers.ModelSerializer):
         model = TestSuite
         fields = [
             'id', 'name', 'description', 'project', 'environment',
+            'parallel_enabled', 'max_workers',
             'suite_requests', 'created_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    def validate_max_workers(self, value):
+        if value < 1 or value > 50:
+            raise serializers.ValidationError('最大并发数必须在1到50之间')
+        return value
+
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
         return super().create(validated_data)
@@ -231,6 +273,7 @@ class ScheduledTaskSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'task_type', 'trigger_type',
             'cron_expression', 'interval_seconds', 'execute_at',
+            'misfire_policy', 'misfire_grace_seconds', 'misfire_max_catchup',
             'test_suite', 'test_suite_name', 'api_request', 'api_request_name',
             'environment', 'environment_name', 'status', 'last_run_time',
             'next_run_time', 'total_runs', 'successful_runs', 'failed_runs',
@@ -435,10 +478,10 @@ class TaskExecutionLogSerializer(serializers.ModelSerializer):
         model = TaskExecutionLog
         fields = [
             'id', 'task', 'task_name', 'status', 'start_time', 'end_time',
-            'result', 'error_message', 'executed_by', 'executed_by_name',
-            'created_at'
+            'result', 'error_message', 'priority', 'queue_depth', 'queue_wait', 'celery_task_id',
+            'executed_by', 'executed_by_name', 'created_at'
         ]
-        read_only_fields = ['created_at']
+        read_only_fields = ['priority', 'queue_depth', 'queue_wait', 'celery_task_id', 'created_at']
 
 
 # ================ 通知管理序列化器 ================
@@ -0,0 +1,30 @@
+"""
+请求历史删除后（事务提交后）删除不再被引用的外部响应体文件
+"""
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+
+from .body_storage import delete_body_if_unreferenced
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_body(relative_path):
+    try:
+        delete_body_if_unreferenced(relative_path)
+    except Exception as e:
+        logger.warning(f"删除响应体文件失败: {relative_path}, {e}")
+
+
+def _on_history_deleted(sender, instance, **kwargs):
+    relative_path = instance.response_body_path
+    if relative_path:
+        transaction.on_commit(lambda: _delete_body(relative_path))
+
+
+def connect_signals():
+    post_delete.connect(
+        _on_history_deleted, sender='api_testing.RequestHistory', dispatch_uid='api_response_body_cleanup'
+    )
@@ -0,0 +1,394 @@
+"""
+流式断言
+大响应按块读取并增量执行断言（contains、equals、response_size、简单JSONPath），
+所有断言有结论后立即停止读取；只保留固定大小的响应预览，内存占用与响应大小无关
+"""
+import codecs
+import re
+import time
+
+from django.conf import settings
+
+from .assertions import AssertionPlan
+
+# 简单JSONPath：$.a.b[0]['c']
+_PATH_TOKEN = re.compile(r"\.([A-Za-z_$][\w$-]*)|\[(\d+)\]|\[['\"]([^'\"]+)['\"]\]")
+
+# 与响应体无关的断言，在读取结束后直接用断言计划判定
+_STATIC_TYPES = ('status_code', 'response_time', 'header')
+
+
+def parse_simple_json_path(json_path):
+    """把简单JSONPath解析为路径列表（键或下标），不支持的语法返回None"""
+    path = (json_path or '').strip()
+    if not path.startswith('$'):
+        return None
+    components = []
+    pos = 1
+    while pos < len(path):
+        match = _PATH_TOKEN.match(path, pos)
+        if not match:
+            return None
+        key, index, quoted = match.groups()
+        if index is not None:
+            components.append(int(index))
+        else:
+            components.append(key if key is not None else quoted)
+        pos = match.end()
+    return components
+
+
+def _preview(text):
+    return text[:200] + '...' if len(text) > 200 else text
+
+
+class _Check:
+    """单个断言的增量判定状态"""
+
+    def __init__(self, step):
+        self.step = step
+        self.decided = False
+        self.passed = False
+        self.actual = None
+        self.error = None
+
+    def decide(self, passed, actual=None, error=None):
+        self.decided = True
+        self.passed = passed
+        self.actual = actual
+        self.error = error
+
+    def finish(self, evaluator):
+        pass
+
+    def result(self):
+        return {
+            'name': self.step['name'],
+            'type': self.step['type'],
+            'passed': self.passed,
+            'expected': self.step['expected'],
+            'actual': self.actual,
+            'error': self.error
+        }
+
+
+class _StaticCheck(_Check):
+    """状态码、响应时间、响应头断言：不依赖响应体"""
+
+    def __init__(self, step):
+        super().__init__(step)
+        self.decided = True
+        self._result = None
+
+    def finish(self, evaluator):
+        self._result = AssertionPlan._evaluate_step(self.step, evaluator.response, evaluator.response_time)
+
+    def result(self):
+        return self._result
+
+
+class _ContainsCheck(_Check):
+    def __init__(self, step):
+        super().__init__(step)
+        self.pattern = step['pattern']
+        self.head = ''
+        self.tail = ''
+
+    def feed_text(self, text):
+        if len(self.head) <= 200:
+            self.head += text[:201 - len(self.head)]
+        window = self.tail + text
+        if self.pattern in window:
+            self.decide(True, _preview(self.head))
+            return
+        keep = len(self.pattern) - 1
+        self.tail = window[-keep:] if keep > 0 else ''
+
+    def finish(self, evaluator):
+        if not self.decided:
+            self.decide(False, _preview(self.head))
+
+
+class _EqualsCheck(_Check):
+    """响应体去除首尾空白后与期望值完全相等"""
+
+    def __init__(self, step):
+        super().__init__(step)
+        self.expected = step['pattern']
+        self.started = False
+        self.pos = 0
+        self.head = ''
+
+    def feed_text(self, text):
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return
+            self.started = True
+        if len(self.head) <= 200:
+            self.head += text[:201 - len(self.head)]
+
+        if self.pos < len(self.expected):
+            count = min(len(text), len(self.expected) - self.pos)
+            if text[:count] != self.expected[self.pos:self.pos + count]:
+                self.decide(False, _preview(self.head.rstrip()))
+                return
+            self.pos += count
+            text = text[count:]
+        # 期望值已全部匹配，之后只允许出现空白
+        if text.strip():
+            self.decide(False, _preview(self.head.rstrip()))
+
+    def finish(self, evaluator):
+        if not self.decided:
+            self.decide(self.pos == len(self.expected), _preview(self.head.rstrip()))
+
+
+class _SizeCheck(_Check):
+    """响应大小断言：响应体字节数不超过期望值"""
+
+    def feed_size(self, size):
+        if size > self.step['expected']:
+            self.decide(False, size)
+
+    def finish(self, evaluator):
+        if not self.decided:
+            self.decide(evaluator.size <= self.step['expected'], evaluator.size)
+
+
+class _JsonPathCheck(_Check):
+    def __init__(self, step, components):
+        super().__init__(step)
+        self.components = components
+        self.builder = None
+        self.depth = 0
+
+    def feed_event(self, path, event, value):
+        if self.builder is not None:
+            self.builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                self.depth += 1
+            elif event in ('end_map', 'end_array'):
+                self.depth -= 1
+            if self.depth == 0:
+                self._decide_value(self.builder.value)
+            return
+
+        if path is None or path != self.components:
+            return
+        if event in ('start_map', 'start_array'):
+            import ijson
+            self.builder = ijson.ObjectBuilder()
+            self.builder.event(event, value)
+            self.depth = 1
+        else:
+            self._decide_value(value)
+
+    def _decide_value(self, actual):
+        self.decide(str(actual) == self.step['expected_str'], actual)
+
+    def finish(self, evaluator):
+        if not self.decided:
+            self._decide_value(None)
+
+
+class _JsonPathTracker:
+    """根据 ijson 事件流维护当前值所在的路径"""
+
+    def __init__(self):
+        self.stack = []
+
+    def _after_value(self):
+        if self.stack and self.stack[-1][0] == 'array':
+            self.stack[-1][1] += 1
+
+    def on_event(self, event, value):
+        """返回本事件开始的值所在路径；非值开始事件返回None"""
+        if event == 'map_key':
+            self.stack[-1][1] = value
+            return None
+        if event in ('end_map', 'end_array'):
+            self.stack.pop()
+            self._after_value()
+            return None
+
+        path = [frame[1] for frame in self.stack]
+        if event == 'start_map':
+            self.stack.append(['map', None])
+        elif event == 'start_array':
+            self.stack.append(['array', 0])
+        else:
+            self._after_value()
+        return path
+
+
+class StreamingAssertionEvaluator:
+    """流式断言执行器：feed() 按块输入响应体，全部断言有结论时返回True"""
+
+    def __init__(self, assertions, response):
+        self.response = response
+        self.response_time = None
+        self.size = 0
+        self.preview = bytearray()
+        self.preview_limit = settings.API_STREAM_PREVIEW_BYTES
+        self._decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+
+        self.checks = []
+        self._text_checks = []
+        self._size_checks = []
+        self._json_checks = []
+        content_type = response.headers.get('content-type', '').lower()
+
+        for assertion in assertions:
+            step = AssertionPlan._compile(assertion)
+            assertion_type = step['type']
+            if assertion_type in _STATIC_TYPES:
+                check = _StaticCheck(step)
+            elif assertion_type == 'contains':
+                check = _ContainsCheck(step)
+                self._text_checks.append(check)
+            elif assertion_type == 'equals':
+                check = _EqualsCheck(step)
+                self._text_checks.append(check)
+            elif assertion_type == 'response_size':
+                check = _SizeCheck(step)
+                self._size_checks.append(check)
+            elif assertion_type == 'json_path':
+                check = self._build_json_check(step, assertion, content_type)
+            else:
+                check = _Check(step)
+                check.decide(False)
+            self.checks.append(check)
+
+        self._json_tracker = None
+        self._json_events = None
+        self._json_parser = None
+        if any(not check.decided for check in self._json_checks):
+            self._start_json_parser()
+
+    def _build_json_check(self, step, assertion, content_type):
+        components = parse_simple_json_path(assertion.get('json_path', ''))
+        check = _JsonPathCheck(step, components)
+        if 'application/json' not in content_type:
+            check.decide(False, error=f"执行错误: 响应不是JSON格式，Content-Type: {content_type}")
+        elif not assertion.get('json_path'):
+            check.decide(False, error="执行错误: JSON路径表达式不能为空")
+        elif components is None:
+            check.decide(False, error=f"执行错误: 流式模式仅支持简单JSONPath（如 $.data.items[0].id）: {assertion.get('json_path')}")
+        self._json_checks.append(check)
+        return check
+
+    def _start_json_parser(self):
+        try:
+            import ijson
+        except ImportError as e:
+            self._fail_json_checks(f"缺少依赖库: {str(e)}，请安装ijson")
+            return
+        self._json_tracker = _JsonPathTracker()
+        self._json_events = ijson.sendable_list()
+        self._json_parser = ijson.parse_coro(self._json_events, use_float=True)
+
+    def _fail_json_checks(self, error):
+        for check in self._json_checks:
+            if not check.decided:
+                check.decide(False, error=error)
+        self._json_parser = None
+
+    @property
+    def done(self):
+        return all(check.decided for check in self.checks)
+
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if len(self.preview) < self.preview_limit:
+            self.preview += chunk[:self.preview_limit - len(self.preview)]
+
+        for check in self._size_checks:
+            if not check.decided:
+                check.feed_size(self.size)
+
+        pending_text = [check for check in self._text_checks if not check.decided]
+        if pending_text:
+            text = self._decoder.decode(chunk)
+            for check in pending_text:
+                check.feed_text(text)
+
+        if self._json_parser is not None:
+            try:
+                self._json_parser.send(chunk)
+            except Exception as e:
+                self._fail_json_checks(f"JSON解析失败: {str(e)}")
+            else:
+                self._dispatch_json_events()
+
+        return self.done
+
+    def _dispatch_json_events(self):
+        pending = [check for check in self._json_checks if not check.decided]
+        for prefix, event, value in self._json_events:
+            path = self._json_tracker.on_event(event, value)
+            for check in pending:
+                if not check.decided:
+                    check.feed_event(path, event, value)
+        del self._json_events[:]
+        if all(check.decided for check in self._json_checks):
+            self._json_parser = None
+
+    def finish(self, response_time, complete=True):
+        """读取结束后生成断言结果；complete 表示响应体是否已完整读取"""
+        self.response_time = response_time
+        if complete:
+            pending_text = [check for check in self._text_checks if not check.decided]
+            tail = self._decoder.decode(b'', final=True)
+            if tail:
+                for check in pending_text:
+                    check.feed_text(tail)
+            if self._json_parser is not None:
+                try:
+                    self._json_parser.close()
+                except Exception as e:
+                    self._fail_json_checks(f"JSON解析失败: {str(e)}")
+                else:
+                    self._dispatch_json_events()
+
+        for check in self.checks:
+            check.finish(self)
+        return [check.result() for check in self.checks]
+
+    def build_response_fields(self, complete):
+        """请求历史中保存的响应字段：只保存响应预览，不保存完整响应体"""
+        return {
+            'response_data': {
+                'headers': dict(self.response.headers),
+                'body': bytes(self.preview).decode(self.response.encoding or 'utf-8', errors='replace'),
+                'json': None,
+                'timings': getattr(self.response, 'timings', None),
+                'streamed': True,
+                'body_truncated': not complete or self.size > len(self.preview)
+            },
+            'response_body_path': '',
+            'response_size': self.size
+        }
+
+
+def stream_and_assert(session, assertions, **request_kwargs):
+    """流式发送请求并执行断言
+
+    返回 (response, response_time, assertions_results, response_fields)，
+    返回的响应已关闭，只能访问状态码、响应头和 timings
+    """
+    start_time = time.time()
+    with session.stream(**request_kwargs) as response:
+        evaluator = StreamingAssertionEvaluator(assertions, response)
+        complete = True
+        if not evaluator.done:
+            for chunk in response.iter_bytes(settings.API_STREAM_CHUNK_SIZE):
+                if evaluator.feed(chunk):
+                    complete = False
+                    break
+        else:
+            complete = False
+        response_time = (time.time() - start_time) * 1000
+
+    assertions_results = evaluator.finish(response_time, complete=complete)
+    return response, response_time, assertions_results, evaluator.build_response_fields(complete)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+API测试 Celery 任务
+定时任务（及手动立即执行）的执行投递到 api 队列，由独立的 API 执行节点处理
+"""
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+from django.utils import timezone
+import logging
+
+from apps.core.scheduler.queues import clear_queued
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    autoretry_for=(OperationalError, InterfaceError),
+    retry_backoff=True,
+    max_retries=3,
+    soft_time_limit=settings.CELERY_API_TASK_TIME_LIMIT,
+    time_limit=settings.CELERY_API_TASK_TIME_LIMIT + 60,
+)
+def execute_scheduled_api_task(self, task_id, execution_log_id, coalesce_key=None):
+    """
+    执行API测试定时任务
+
+    Args:
+        task_id: ScheduledTask 的 ID
+        execution_log_id: TaskExecutionLog 的 ID
+        coalesce_key: 投递时设置的排队标记，开始执行时清除，之后到期的运行可以再次投递
+    """
+    from .models import ScheduledTask, TaskExecutionLog
+    from .views import ScheduledTaskViewSet
+
+    if coalesce_key:
+        clear_queued(coalesce_key)
+
+    try:
+        task = ScheduledTask.objects.get(id=task_id)
+        execution_log = TaskExecutionLog.objects.get(id=execution_log_id)
+    except (ScheduledTask.DoesNotExist, TaskExecutionLog.DoesNotExist):
+        logger.warning(f"定时任务 {task_id} 或执行日志 {execution_log_id} 已删除，跳过执行")
+        return {'execution_log_id': execution_log_id, 'status': 'CANCELLED'}
+
+    execution_log.celery_task_id = self.request.id or ''
+    execution_log.queue_wait = (timezone.now() - execution_log.created_at).total_seconds()
+    execution_log.save(update_fields=['celery_task_id', 'queue_wait'])
+
+    try:
+        ScheduledTaskViewSet()._run_task(
+            task, execution_log, retry_db_errors=self.request.retries < self.max_retries
+        )
+    except SoftTimeLimitExceeded:
+        logger.error(f"API定时任务 {task.name} 执行超时")
+        execution_log.status = 'FAILED'
+        execution_log.end_time = timezone.now()
+        execution_log.error_message = f'执行超过时限 {settings.CELERY_API_TASK_TIME_LIMIT} 秒'
+        execution_log.save()
+        task.update_run_stats(success=False)
+        task.error_message = execution_log.error_message
+        task.save(update_fields=['error_message'])
+
+    return {'execution_log_id': execution_log.id, 'status': execution_log.status}
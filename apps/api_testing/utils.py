@@ -1,271 +1,254 @@
 import json
 import time
+from django.conf import settings
 from django.utils import timezone
 from .models import RequestHistory
 from .variable_resolver import VariableResolver
+from .http_client import open_session
+from .body_storage import should_store_externally, save_body
+from .assertions import execute_assertions, get_assertion_plan, get_response_json
+from .streaming import stream_and_assert
+from .rendering import get_request_template, normalize_variables
 
+def build_response_fields(response):
+    """构造请求历史中保存的响应相关字段
 
-def execute_assertions(response, assertions):
-    """执行断言验证"""
-    results = []
-    
-    for assertion in assertions:
-        result = {
-            'name': assertion.get('name', '未命名断言'),
-            'type': assertion.get('type'),
-            'passed': False,
-            'expected': assertion.get('expected'),
-            'actual': None,
-            'error': None
+    JSON响应复用断言阶段的解析结果；解析为对象/数组时不再重复保存原始body文本。
+    响应体超过内联阈值时写入外部压缩文件，行内只保存文件路径
+    """
+    content = response.content
+    response_data = {
+        'headers': dict(response.headers),
+        'timings': getattr(response, 'timings', None)
+    }
+
+    if should_store_externally(content):
+        response_data.update({
+            'body': '',
+            'json': None,
+            'body_external': True,
+            'body_encoding': response.encoding
+        })
+        return {
+            'response_data': response_data,
+            'response_body_path': save_body(content),
+            'response_size': len(content)
         }
-        
+
+    response_json = None
+    if response.headers.get('content-type', '').startswith('application/json'):
         try:
-            assertion_type = assertion.get('type')
-            expected = assertion.get('expected')
-            actual = None
-            passed = False
-            
-            if assertion_type == 'status_code':
-                actual = response.status_code
-                passed = actual == expected
-                
-            elif assertion_type == 'response_time':
-                # 响应时间断言在调用方处理
-                actual = assertion.get('actual_time')
-                passed = actual <= expected if actual else False
-                
-            elif assertion_type == 'contains':
-                text = response.text or ''
-                pattern = str(expected)
-                actual = text[:200] + '...' if len(text) > 200 else text
-                passed = pattern in str(text)
-                
-            elif assertion_type == 'json_path':
-                json_path = assertion.get('json_path', '')
-                expected_value = assertion.get('expected')
-                actual = None
-                passed = False
-                
-                try:
-                    # 检查响应是否为JSON格式
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'application/json' not in content_type:
-                        raise ValueError(f"响应不是JSON格式，Content-Type: {content_type}")
-                    
-                    response_json = json.loads(response.text)
-                    
-                    # 检查JSONPath表达式是否为空
-                    if not json_path:
-                        raise ValueError("JSON路径表达式不能为空")
-                    
-                    from jsonpath_ng import parse
-                    matches = parse(json_path).find(response_json)
-                    actual = matches[0].value if matches else None
-                    passed = str(actual) == str(expected_value)
-                    
-                    # 确保actual值被正确设置到result中
-                    result['actual'] = actual
-                except json.JSONDecodeError as e:
-                    actual = None
-                    passed = False
-                    result['error'] = f"JSON解析失败: {str(e)}"
-                    result['actual'] = actual
-                except ImportError as e:
-                    actual = None
+            response_json = get_response_json(response)
+        except json.JSONDecodeError:
+            response_json = None
+
+    response_data.update({
+        'body': '' if isinstance(response_json, (dict, list)) else response.text,
+        'json': response_json
+    })
+    return {
+        'response_data': response_data,
+        'response_body_path': '',
+        'response_size': len(content)
+    }
+
+
+def _perform_request(session, api_request, **request_kwargs):
+    """发送请求并执行接口断言
+
+    开启流式断言的接口按块读取响应并增量判定，否则读取完整响应后执行断言计划。
+    返回 (response, response_time, assertions_results, 请求历史中的响应字段)
+    """
+    if api_request.stream_assertions:
+        return stream_and_assert(session, api_request.assertions or [], **request_kwargs)
+
+    start_time = time.time()
+    response = session.request(**request_kwargs)
+    response_time = (time.time() - start_time) * 1000
+
+    # 使用按接口版本缓存的断言计划
+    assertions_results = get_assertion_plan(api_request).evaluate(response, response_time)
+    return response, response_time, assertions_results, build_response_fields(response)
+
+
+def _run_suite_request(suite_request, variables, resolver, session):
+    """执行套件中的单个请求
+
+    只做变量解析、HTTP请求和断言，不访问数据库，因此可以在工作线程中并发调用。
+    返回 {'result': 执行结果, 'history': 请求历史字段(请求失败时为None)}
+    """
+    api_request = suite_request.request
+
+    try:
+        # 一次遍历同时解析环境变量和动态函数
+        rendered = get_request_template(api_request).render(variables, resolver)
+        url = rendered['url']
+        headers = rendered['headers']
+        params = rendered['params']
+        body_data = rendered['body'] if rendered['body_type'] == 'json' else None
+
+        # 执行请求并验证断言
+        response, response_time, assertions_results, response_fields = _perform_request(
+            session,
+            api_request,
+            method=api_request.method,
+            url=url,
+            headers=headers,
+            params=params,
+            json=body_data,
+            timeout=30
+        )
+
+        # 检查所有断言是否通过
+        passed = True
+        error_message = ''
+
+        # 检查套件请求的断言
+        for assertion in suite_request.assertions:
+            if assertion.get('type') == 'status_code':
+                expected = assertion.get('value')
+                if response.status_code != expected:
                     passed = False
-                    result['error'] = f"缺少依赖库: {str(e)}，请安装jsonpath-ng"
-                    result['actual'] = actual
-                except Exception as e:
-                    actual = None
+                    error_message = f'状态码断言失败: 期望 {expected}, 实际 {response.status_code}'
+                    break
+
+        # 检查接口自身的断言
+        if passed and assertions_results:
+            for assertion_result in assertions_results:
+                if not assertion_result.get('passed', True):
                     passed = False
-                    result['error'] = f"执行错误: {str(e)}"
-                    result['actual'] = actual
-                    
-            elif assertion_type == 'header':
-                header_name = assertion.get('header_name', '')
-                expected_value = assertion.get('expected_value')
-                actual = response.headers.get(header_name)
-                passed = actual == expected_value
-                
-            elif assertion_type == 'equals':
-                actual = response.text.strip()
-                passed = actual == str(expected).strip()
-            
-            # 确保在所有情况下都设置actual值
-            if 'actual' not in result or result['actual'] is None:
-                result['actual'] = actual
-            result['passed'] = passed
-            
-        except Exception as e:
-            result['error'] = str(e)
-            result['passed'] = False
-        
-        results.append(result)
-    
-    return results
+                    error_message = f"断言失败: {assertion_result.get('name', '未命名断言')} - {assertion_result.get('error', '断言不通过')}"
+                    break
+
+        return {
+            'result': {
+                'name': api_request.name,
+                'method': api_request.method,
+                'url': url,
+                'status_code': response.status_code,
+                'response_time': response_time,
+                'passed': passed,
+                'error': error_message,
+                'assertions_results': assertions_results,
+                'timings': response.timings
+            },
+            'history': {
+                'request': api_request,
+                'request_data': {
+                    'url': url,
+                    'method': api_request.method,
+                    'headers': headers,
+                    'params': params,
+                    'body': body_data
+                },
+                **response_fields,
+                'status_code': response.status_code,
+                'response_time': response_time,
+                'assertions_results': assertions_results
+            }
+        }
+
+    except Exception as e:
+        return {
+            'result': {
+                'name': api_request.name,
+                'method': api_request.method,
+                'url': api_request.url,
+                'passed': False,
+                'error': str(e)
+            },
+            'history': None
+        }
+
+
+def _run_suite_requests_parallel(suite_requests, variables, resolver, session, max_workers):
+    """并发执行套件请求
+
+    未标记为顺序执行的请求提交到线程池并发执行；标记为顺序执行的请求作为屏障，
+    等待之前提交的请求全部完成后单独执行。返回结果的顺序与 suite_requests 一致。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    outcomes = [None] * len(suite_requests)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api-suite') as pool:
+        pending = []
+        for index, suite_request in enumerate(suite_requests):
+            if suite_request.is_sequential:
+                for pending_index, future in pending:
+                    outcomes[pending_index] = future.result()
+                pending = []
+                outcomes[index] = _run_suite_request(suite_request, variables, resolver, session)
+            else:
+                pending.append((index, pool.submit(_run_suite_request, suite_request, variables, resolver, session)))
+
+        for pending_index, future in pending:
+            outcomes[pending_index] = future.result()
+
+    return outcomes
 
 
 def execute_test_suite(test_suite, environment, executed_by):
     """执行测试套件并返回结果"""
     from .models import TestExecution, RequestHistory
-    import requests
-    import time
-    
+
+    execution = None
     try:
         # 创建变量解析器
         resolver = VariableResolver()
-        
+
+        # 获取套件中的请求（预加载关联请求，工作线程中不再访问数据库）
+        suite_requests = list(
+            test_suite.testsuiterequest_set.filter(enabled=True).select_related('request').order_by('order', 'id')
+        )
+
         # 创建执行记录
         execution = TestExecution.objects.create(
             test_suite=test_suite,
             status='RUNNING',
             start_time=timezone.now(),
+            total_requests=len(suite_requests),
             executed_by=executed_by
         )
-        
-        # 获取套件中的请求
-        suite_requests = test_suite.testsuiterequest_set.filter(enabled=True).order_by('order')
-        
-        execution.total_requests = suite_requests.count()
-        execution.save()
-        
+
+        # 解析环境变量
+        variables = normalize_variables(environment.variables if environment else None)
+
+        # 执行请求：并发模式下按线程池执行，否则逐个顺序执行；同一次执行共享连接池会话
+        max_workers = max(1, test_suite.max_workers or 1)
+        parallel = test_suite.parallel_enabled and max_workers > 1 and len(suite_requests) > 1
+        with open_session(environment, pool_size=max_workers if parallel else None) as session:
+            if parallel:
+                outcomes = _run_suite_requests_parallel(suite_requests, variables, resolver, session, max_workers)
+            else:
+                outcomes = [
+                    _run_suite_request(suite_request, variables, resolver, session)
+                    for suite_request in suite_requests
+                ]
+
         results = []
         passed_count = 0
         failed_count = 0
-        
-        # 执行每个请求
-        for suite_request in suite_requests:
-            api_request = suite_request.request
-            
-            try:
-                # 解析环境变量
-                variables = {}
-                if environment:
-                    variables.update(environment.variables)
-                
-                # 替换URL中的变量（先解析动态函数，再替换环境变量）
-                url = _replace_variables(api_request.url, variables)
-                url = resolver.resolve(url)
-                
-                # 准备请求头
-                headers = {}
-                if isinstance(api_request.headers, list):
-                    for header_item in api_request.headers:
-                        if header_item.get('enabled', True) and header_item.get('key'):
-                            key = header_item['key']
-                            value = _replace_variables(str(header_item.get('value', '')), variables)
-                            value = resolver.resolve(value)
-                            headers[key] = value
-                else:
-                    headers = api_request.headers.copy()
-                    for key, value in headers.items():
-                        headers[key] = _replace_variables(str(value), variables)
-                        headers[key] = resolver.resolve(headers[key])
-                
-                # 准备请求参数
-                params = api_request.params.copy() if api_request.params else {}
-                for key, value in params.items():
-                    params[key] = _replace_variables(str(value), variables)
-                    params[key] = resolver.resolve(params[key])
-                
-                # 准备请求体
-                body_data = None
-                if api_request.body and api_request.method in ['POST', 'PUT', 'PATCH']:
-                    if api_request.body.get('type') == 'json':
-                        body_data = api_request.body.get('data', {})
-                        body_data = _replace_variables_in_dict(body_data, variables)
-                        body_data = _resolve_variables_in_dict(body_data, resolver)
-                
-                # 执行请求
-                start_time = time.time()
-                response = requests.request(
-                    method=api_request.method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=body_data,
-                    timeout=30
-                )
-                end_time = time.time()
-                response_time = (end_time - start_time) * 1000
-                
-                # 执行断言验证
-                assertions = api_request.assertions or []
-                for assertion in assertions:
-                    if assertion.get('type') == 'response_time':
-                        assertion['actual_time'] = response_time
-                
-                assertions_results = execute_assertions(response, assertions)
-                
-                # 检查所有断言是否通过
-                passed = True
-                error_message = ''
-                
-                # 检查套件请求的断言
-                for assertion in suite_request.assertions:
-                    if assertion.get('type') == 'status_code':
-                        expected = assertion.get('value')
-                        if response.status_code != expected:
-                            passed = False
-                            error_message = f'状态码断言失败: 期望 {expected}, 实际 {response.status_code}'
-                            break
-                
-                # 检查接口自身的断言
-                if passed and assertions_results:
-                    for assertion_result in assertions_results:
-                        if not assertion_result.get('passed', True):
-                            passed = False
-                            error_message = f"断言失败: {assertion_result.get('name', '未命名断言')} - {assertion_result.get('error', '断言不通过')}"
-                            break
-                
-                if passed:
-                    passed_count += 1
-                else:
-                    failed_count += 1
-                
-                results.append({
-                    'name': api_request.name,
-                    'method': api_request.method,
-                    'url': url,
-                    'status_code': response.status_code,
-                    'response_time': response_time,
-                    'passed': passed,
-                    'error': error_message,
-                    'assertions_results': assertions_results
-                })
-                
-                # 保存请求历史
-                RequestHistory.objects.create(
-                    request=api_request,
-                    environment=environment,
-                    request_data={
-                        'url': url,
-                        'method': api_request.method,
-                        'headers': headers,
-                        '极速版params': params,
-                        'body': body_data
-                    },
-                    response_data={
-                        'headers': dict(response.headers),
-                        'body': response.text,
-                        'json': response.json() if response.headers.get('content-type', '').startswith('application/json') else None
-                    },
-                    status_code=response.status_code,
-                    response_time=response_time,
-                    assertions_results=assertions_results,
-                    executed_by=executed_by
-                )
-                
-            except Exception as e:
+        histories = []
+
+        for outcome in outcomes:
+            result = outcome['result']
+            if result['passed']:
+                passed_count += 1
+            else:
                 failed_count += 1
-                results.append({
-                    'name': api_request.name,
-                    'method': api_request.method,
-                    'url': api_request.url,
-                    'passed': False,
-                    'error': str(e)
-                })
-        
+            results.append(result)
+
+            # 请求历史先缓存，执行结束后批量写入
+            if outcome['history']:
+                histories.append(RequestHistory(
+                    environment=environment,
+                    executed_by=executed_by,
+                    **outcome['history']
+                ))
+
+        RequestHistory.objects.bulk_create(histories, batch_size=settings.API_HISTORY_BULK_BATCH_SIZE)
+
         # 更新执行结果
         execution.end_time = timezone.now()
         execution.passed_requests = passed_count
@@ -273,7 +256,7 @@ def execute_test_suite(test_suite, environment, executed_by):
         execution.status = 'COMPLETED' if failed_count == 0 else 'FAILED'
         execution.results = results
         execution.save()
-        
+
         return {
             'success': True,
             'execution_id': execution.id,
@@ -282,8 +265,13 @@ def execute_test_suite(test_suite, environment, executed_by):
             'total_count': execution.total_requests,
             'results': results
         }
-        
+
     except Exception as e:
+        # 执行记录已创建时标记为失败，避免一直停留在执行中
+        if execution is not None:
+            execution.status = 'FAILED'
+            execution.end_time = timezone.now()
+            execution.save(update_fields=['status', 'end_time'])
         return {
             'success': False,
             'error': str(e)
@@ -292,71 +280,32 @@ def execute_test_suite(test_suite, environment, executed_by):
 
 def execute_api_request(api_request, environment, executed_by):
     """执行单个API请求并返回结果"""
-    import requests
-    import time
-    
     try:
         # 创建变量解析器
         resolver = VariableResolver()
         
         # 解析环境变量
-        variables = {}
-        if environment:
-            variables.update(environment.variables)
+        variables = normalize_variables(environment.variables if environment else None)
         
-        # 替换URL中的变量（先解析动态函数，再替换环境变量）
-        url = _replace_variables(api_request.url, variables)
-        url = resolver.resolve(url)
+        # 一次遍历同时解析环境变量和动态函数
+        rendered = get_request_template(api_request).render(variables, resolver)
+        url = rendered['url']
+        headers = rendered['headers']
+        params = rendered['params']
+        body_data = rendered['body'] if rendered['body_type'] == 'json' else None
         
-        # 准备请求头
-        headers = {}
-        if isinstance(api_request.headers, list):
-            for header_item in api_request.headers:
-                if header_item.get('enabled', True) and header_item.get('key'):
-                    key = header_item['key']
-                    value = _replace_variables(str(header_item.get('value', '')), variables)
-                    value = resolver.resolve(value)
-                    headers[key] = value
-        else:
-            headers = api_request.headers.copy()
-            for key, value in headers.items():
-                headers[key] = _replace_variables(str(value), variables)
-                headers[key] = resolver.resolve(headers[key])
-        
-        # 准备请求参数
-        params = api_request.params.copy() if api_request.params else {}
-        for key, value in params.items():
-            params[key] = _replace_variables(str(value), variables)
-            params[key] = resolver.resolve(params[key])
-        
-        # 准备请求体
-        body_data = None
-        if api_request.body and api_request.method in ['POST', 'PUT', 'PATCH']:
-            if api_request.body.get('type') == 'json':
-                body_data = api_request.body.get('data', {})
-                body_data = _replace_variables_in_dict(body_data, variables)
-                body_data = _resolve_variables_in_dict(body_data, resolver)
-        
-        # 执行请求
-        start_time = time.time()
-        response = requests.request(
-            method=api_request.method,
-            url=url,
-            headers=headers,
-            params=params,
-            json=body_data,
-            timeout=30
-        )
-        end_time = time.time()
-        response_time = (end_time - start_time) * 1000
-        
-        # 执行断言验证
-        assertions = api_request.assertions or []
-        for assertion in assertions:
-            if assertion.get('type') == 'response_time':
-                assertion['actual_time'] = response_time
-        
-        assertions_results = execute_assertions(response, assertions)
+        # 执行请求并验证断言
+        with open_session(environment) as session:
+            response, response_time, assertions_results, response_fields = _perform_request(
+                session,
+                api_request,
+                method=api_request.method,
+                url=url,
+                headers=headers,
+                params=params,
+                json=body_data,
+                timeout=30
+            )
         
         # 保存请求历史
         history = RequestHistory.objects.create(
@@ -369,15 +318,11 @@ def execute_api_request(api_request, environment, executed_by):
                 'params': params,
                 'body': body_data
             },
-            response_data={
-                'headers': dict(response.headers),
-                'body': response.text,
-                'json': response.json() if response.headers.get('content-type', '').startswith('application/json') else None
-            },
             status_code=response.status_code,
             response_time=response_time,
             assertions_results=assertions_results,
-            executed_by=executed_by
+            executed_by=executed_by,
+            **response_fields
         )
         
         return {
@@ -386,11 +331,8 @@ def execute_api_request(api_request, environment, executed_by):
             'status_code': response.status_code,
             'response_time': response_time,
             'assertions_results': assertions_results,
-            'response_data': {
-                'headers': dict(response.headers),
-                'body': response.text,
-                'json': response.json() if response.headers.get('content-type', '').startswith('application/json') else None
-            }
+            'timings': response.timings,
+            'response_data': response_fields['response_data']
         }
         
     except Exception as e:
@@ -398,40 +340,3 @@ def execute_api_request(api_request, environment, executed_by):
             'success': False,
             'error': str(e)
         }
-
-
-def _replace_variables(text, variables):
-    """替换文本中的变量"""
-    if not isinstance(text, str):
-        return text
-    
-    result = text
-    for key, value in (variables or {}).items():
-        if isinstance(value, dict):
-            replacement = str(value.get('currentValue', '') or value.get('initialValue', ''))
-        else:
-            replacement = str(value) if value is not None else ''
-        result = result.replace(f'{{{{{key}}}}}', replacement)
-    return result
-
-def _replace_variables_in_dict(data, variables):
-    """递归替换字典中的变量"""
-    if isinstance(data, dict):
-        return {k: _replace_variables_in_dict(v, variables) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [_replace_variables_in_dict(item, variables) for item in data]
-    elif isinstance(data, str):
-        return _replace_variables(data, variables)
-    else:
-        return data
-
-def _resolve_variables_in_dict(data, resolver):
-    """递归解析字典中的动态函数占位符"""
-    if isinstance(data, dict):
-        return {k: _resolve_variables_in_dict(v, resolver) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [_resolve_variables_in_dict(item, resolver) for item in data]
-    elif isinstance(data, str):
-        return resolver.resolve(data)
-    else:
-        return data
@@ -6,12 +6,13 @@ from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.db import models
+from django.db import InterfaceError, OperationalError, close_old_connections, models
 from django.utils import timezone
 from django.http import HttpResponse, FileResponse, Http404, HttpResponseNotFound
 from django.views.static import serve
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from celery.exceptions import SoftTimeLimitExceeded
 import requests
 import time
 import os
@@ -30,7 +31,7 @@ from .models import (
 
 from .serializers import (
     ApiProjectSerializer, ApiCollectionSerializer, ApiRequestSerializer,
-    EnvironmentSerializer, RequestHistorySerializer, TestSuiteSerializer,
+    EnvironmentSerializer, RequestHistorySerializer, RequestHistoryListSerializer, TestSuiteSerializer,
     TestSuiteRequestSerializer, TestExecutionSerializer, UserSerializer,
     ScheduledTaskSerializer, TaskExecutionLogSerializer,
     NotificationLogSerializer, TaskNotificationSettingSerializer,
@@ -40,9 +41,14 @@ from .serializers import (
 
 logger = logging.getLogger(__name__)
 
-from .utils import execute_assertions
+from .utils import execute_test_suite, build_response_fields
+from .assertions import execute_assertions, get_assertion_plan
+from .http_client import open_session
 from .operation_logger import log_operation
 from .variable_resolver import VariableResolver
+from .rendering import RequestTemplate, get_request_template, normalize_variables
+from apps.core.scheduler import PRIORITY_HIGH, PRIORITY_NORMAL, get_executor_pool
+from apps.core.scheduler.queues import QUEUE_API, clear_queued, mark_queued, queue_length, use_celery
 from .serializers import (
     ApiProjectSerializer, ApiCollectionSerializer, ApiRequestSerializer,
     EnvironmentSerializer, RequestHistorySerializer, TestSuiteSerializer,
@@ -361,6 +367,7 @@ class ApiRequestViewSet(viewsets.ModelViewSet):
 
             # 解析环境变量
             variables = {}
+            env = None
             if environment_id:
                 env = Environment.objects.get(id=environment_id)
                 variables.update(env.variables)
@@ -372,93 +379,58 @@ class ApiRequestViewSet(viewsets.ModelViewSet):
             request_method = request.data.get('method', api_request.method)
             request_url = request.data.get('url', api_request.url)
 
-            # 替换URL中的变量（先解析动态函数，再替换环境变量）
-            url = self._replace_variables(request_url or '', variables)
-            url = resolver.resolve(url)
-            
-            # 准备请求头
-            headers = {}
-            if isinstance(request_headers, list):
-                for header_item in request_headers:
-                    if header_item.get('enabled', True) and header_item.get('key'):
-                        key = header_item['key']
-                        value = self._replace_variables(str(header_item.get('value', '')), variables)
-                        value = resolver.resolve(value)
-                        headers[key] = value
+            # 一次遍历同时解析环境变量和动态函数；未覆盖请求数据时复用接口缓存的请求模板
+            if any(field in request.data for field in ('params', 'headers', 'body', 'method', 'url')):
+                template = RequestTemplate(
+                    request_method,
+                    request_url,
+                    headers=request_headers,
+                    params=request_params,
+                    body=request_body
+                )
             else:
-                headers = request_headers.copy() if request_headers else {}
-                for key, value in headers.items():
-                    headers[key] = self._replace_variables(str(value), variables)
-                    headers[key] = resolver.resolve(headers[key])
-
-            # 准备请求参数
-            params = request_params.copy() if request_params else {}
-            for key, value in params.items():
-                params[key] = self._replace_variables(str(value), variables)
-                params[key] = resolver.resolve(params[key])
-
-            # 准备请求体
-            body_data = None
-            body_type = 'none'
-            if request_body and request_method in ['POST', 'PUT', 'PATCH']:
-                body_type = request_body.get('type', 'none')
-                body_content = request_body.get('data')
-
-                if body_type == 'json':
-                    if isinstance(body_content, dict):
-                        body_data = self._replace_variables_in_dict(body_content, variables)
-                        body_data = self._resolve_variables_in_dict(body_data, resolver)
-                    else:
-                        body_data = body_content
-                elif body_type == 'raw':
-                    if isinstance(body_content, str):
-                        body_data = self._replace_variables(body_content, variables)
-                        body_data = resolver.resolve(body_data)
-                    else:
-                        body_data = body_content
-                elif body_type in ['form-data', 'x-www-form-urlencoded']:
-                    if isinstance(body_content, list):
-                        body_data = self._replace_variables_in_dict(body_content, variables)
-                        body_data = self._resolve_variables_in_dict(body_data, resolver)
-                    else:
-                        body_data = body_content
-                else:
-                    body_data = body_content
+                template = get_request_template(api_request)
+            rendered = template.render(normalize_variables(variables), resolver)
+            url = rendered['url']
+            headers = rendered['headers']
+            params = rendered['params']
+            body_type = rendered['body_type']
+            body_data = rendered['body']
             
             # 执行请求
             start_time = time.time()
 
             # 根据请求体类型决定使用 data 还是 json 参数
-            if body_type == 'raw':
-                # raw 类型使用 data 参数，发送原始字符串
-                response = requests.request(
-                    method=request_method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    data=body_data,
-                    timeout=30
-                )
-            else:
-                # json 类型使用 json 参数，自动序列化
-                response = requests.request(
-                    method=request_method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=body_data,
-                    timeout=30
-                )
+            with open_session(env) as session:
+                if body_type == 'raw':
+                    # raw 类型使用 data 参数，发送原始字符串
+                    response = session.request(
+                        method=request_method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        data=body_data,
+                        timeout=30
+                    )
+                else:
+                    # json 类型使用 json 参数，自动序列化
+                    response = session.request(
+                        method=request_method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        json=body_data,
+                        timeout=30
+                    )
             end_time = time.time()
             
             response_time = (end_time - start_time) * 1000  # 转换为毫秒
             
-            # 执行断言验证
-            assertions = request.data.get('assertions', api_request.assertions) or []
-            for assertion in assertions:
-                if assertion.get('type') == 'response_time':
-                    assertion['actual_time'] = response_time
-            assertions_results = execute_assertions(response, assertions)
+            # 执行断言验证：前端传入未保存的断言时临时编译，否则使用缓存的断言计划
+            if 'assertions' in request.data:
+                assertions_results = execute_assertions(response, request.data.get('assertions') or [], response_time)
+            else:
+                assertions_results = get_assertion_plan(api_request).evaluate(response, response_time)
             
             # 保存请求历史
             history = RequestHistory.objects.create(
@@ -471,14 +443,10 @@ class ApiRequestViewSet(viewsets.ModelViewSet):
                     'params': params,
                     'body': body_data
                 },
-                response_data={
-                    'headers': dict(response.headers),
-                    'body': response.text,
-                    'json': response.json() if response.headers.get('content-type', '').startswith('application/json') else None
-                },
                 status_code=response.status_code,
                 response_time=response_time,
-                executed_by=request.user
+                executed_by=request.user,
+                **build_response_fields(response)
             )
             
             # 记录执行操作
@@ -513,42 +481,6 @@ class ApiRequestViewSet(viewsets.ModelViewSet):
             )
             
             return Response(RequestHistorySerializer(history).data, status=status.HTTP_400_BAD_REQUEST)
-    
-    def _replace_variables(self, text, variables):
-        """替换文本中的变量"""
-        if not isinstance(text, str):
-            return text
-        
-        result = text
-        for key, value in (variables or {}).items():
-            if isinstance(value, dict):
-                replacement = str(value.get('currentValue', '') or value.get('initialValue', ''))
-            else:
-                replacement = str(value) if value is not None else ''
-            result = result.replace(f'{{{{{key}}}}}', replacement)
-        return result
-    
-    def _replace_variables_in_dict(self, data, variables):
-        """递归替换字典中的变量"""
-        if isinstance(data, dict):
-            return {k: self._replace_variables_in_dict(v, variables) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._replace_variables_in_dict(item, variables) for item in data]
-        elif isinstance(data, str):
-            return self._replace_variables(data, variables)
-        else:
-            return data
-
-    def _resolve_variables_in_dict(self, data, resolver):
-        """递归解析字典中的动态函数占位符"""
-        if isinstance(data, dict):
-            return {k: self._resolve_variables_in_dict(v, resolver) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._resolve_variables_in_dict(item, resolver) for item in data]
-        elif isinstance(data, str):
-            return resolver.resolve(data)
-        else:
-            return data
 
 
 class EnvironmentViewSet(viewsets.ModelViewSet):
@@ -634,9 +566,14 @@ class RequestHistoryViewSet(viewsets.ModelViewSet):
     ordering = ['-executed_at']
     pagination_class = StandardPagination
     
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return RequestHistoryListSerializer
+        return RequestHistorySerializer
+
     def get_queryset(self):
         user = self.request.user
-        return RequestHistory.objects.filter(
+        queryset = RequestHistory.objects.filter(
             request__collection__project__in=ApiProject.objects.filter(
                 models.Q(owner=user) | models.Q(members=user)
             )
@@ -644,6 +581,10 @@ class RequestHistoryViewSet(viewsets.ModelViewSet):
             'request', 'environment', 'executed_by',
             'request__created_by', 'environment__created_by', 'environment__project'
         ).distinct()
+        if self.action == 'list':
+            # 列表不返回响应数据和断言结果，延迟加载大字段
+            queryset = queryset.defer('response_data', 'assertions_results')
+        return queryset
 
     @action(detail=False, methods=['post'], url_path='batch-delete')
     def batch_delete(self, request):
@@ -682,193 +623,23 @@ class TestSuiteViewSet(viewsets.ModelViewSet):
     def execute(self, request, pk=None):
         """执行测试套件"""
         test_suite = self.get_object()
-        
-        try:
-            # 创建执行记录
-            execution = TestExecution.objects.create(
-                test_suite=test_suite,
-                status='RUNNING',
-                start_time=timezone.now(),
-                executed_by=request.user
-            )
-            
-            # 获取套件中的请求
-            suite_requests = TestSuiteRequest.objects.filter(
-                test_suite=test_suite,
-                enabled=True
-            ).order_by('order')
-            
-            execution.total_requests = suite_requests.count()
-            execution.save()
-            
-            results = []
-            passed_count = 0
-            failed_count = 0
-            
-            # 创建变量解析器
-            resolver = VariableResolver()
 
-            # 执行每个请求
-            for suite_request in suite_requests:
-                api_request = suite_request.request
-                
-                try:
-                    # 解析环境变量
-                    variables = {}
-                    if test_suite.environment:
-                        variables.update(test_suite.environment.variables)
-                    
-                    # 替换URL中的变量（先解析动态函数，再替换环境变量）
-                    url = self._replace_variables(api_request.url, variables)
-                    url = resolver.resolve(url)
-
-                    # 准备请求头
-                    headers = {}
-                    # 支持新的数组格式和旧的对象格式
-                    if isinstance(api_request.headers, list):
-                        # 新的数组格式 [{"key": "Authorization", "value": "Bearer {{token}}", "enabled": true, "description": "..."}]
-                        for header_item in api_request.headers:
-                            if header_item.get('enabled', True) and header_item.get('key'):
-                                key = header_item['key']
-                                value = self._replace_variables(str(header_item.get('value', '')), variables)
-                                value = resolver.resolve(value)
-                                headers[key] = value
-                    else:
-                        # 旧的对象格式 {"Authorization": "Bearer {{token}}"}
-                        headers = api_request.headers.copy()
-                        for key, value in headers.items():
-                            headers[key] = self._replace_variables(str(value), variables)
-                            headers[key] = resolver.resolve(headers[key])
-
-                    params = api_request.params.copy()
-                    for key, value in params.items():
-                        params[key] = self._replace_variables(str(value), variables)
-                        params[key] = resolver.resolve(params[key])
-
-                    body_data = None
-                    if api_request.body and api_request.method in ['POST', 'PUT', 'PATCH']:
-                        if api_request.body.get('type') == 'json':
-                            body_data = api_request.body.get('data', {})
-                            body_data = self._replace_variables_in_dict(body_data, variables)
-                            body_data = self._resolve_variables_in_dict(body_data, resolver)
-
-                    # 执行请求
-                    start_time = time.time()
-                    response = requests.request(
-                        method=api_request.method,
-                        url=url,
-                        headers=headers,
-                        params=params,
-                        json=body_data,
-                        timeout=30
-                    )
-                    end_time = time.time()
-                    response_time = (end_time - start_time) * 1000
-                    
-                    # 执行断言验证
-                    assertions = api_request.assertions or []
-                    # 添加响应时间到断言中
-                    for assertion in assertions:
-                        if assertion.get('type') == 'response_time':
-                            assertion['actual_time'] = response_time
-                    
-                    # 使用共享的断言执行方法
-                    assertions_results = execute_assertions(response, assertions)
-                    
-                    # 检查所有断言是否通过
-                    passed = True
-                    error_message = ''
-                    
-                    # 检查套件请求的断言
-                    for assertion in suite_request.assertions:
-                        # 简单的状态码断言
-                        if assertion.get('type') == 'status_code':
-                            expected = assertion.get('value')
-                            if response.status_code != expected:
-                                passed = False
-                                error_message = f'状态码断言失败: 期望 {expected}, 实际 {response.status_code}'
-                                break
-                    
-                    # 检查接口自身的断言
-                    if passed and assertions_results:
-                        for assertion_result in assertions_results:
-                            if not assertion_result.get('passed', True):
-                                passed = False
-                                error_message = f"断言失败: {assertion_result.get('name', '未命名断言')} - {assertion_result.get('error', '断言不通过')}"
-                                break
-                    
-                    if passed:
-                        passed_count += 1
-                    else:
-                        failed_count += 1
-                    
-                    results.append({
-                        'name': api_request.name,
-                        'method': api_request.method,
-                        'url': url,
-                        'status_code': response.status_code,
-                        'response_time': response_time,
-                        'passed': passed,
-                        'error': error_message,
-                        'assertions_results': assertions_results
-                    })
-                    
-                    # 保存请求历史
-                    RequestHistory.objects.create(
-                        request=api_request,
-                        environment=test_suite.environment,
-                        request_data={
-                            'url': url,
-                            'method': api_request.method,
-                            'headers': headers,
-                            'params': params,
-                            'body': body_data
-                        },
-                        response_data={
-                            'headers': dict(response.headers),
-                            'body': response.text,
-                            'json': response.json() if response.headers.get('content-type', '').startswith('application/json') else None
-                        },
-                        status_code=response.status_code,
-                        response_time=response_time,
-                        assertions_results=assertions_results,
-                        executed_by=request.user
-                    )
-                    
-                except Exception as e:
-                    failed_count += 1
-                    results.append({
-                        'name': api_request.name,
-                        'method': api_request.method,
-                        'url': api_request.url,
-                        'passed': False,
-                        'error': str(e)
-                    })
-            
-            # 更新执行结果
-            execution.end_time = timezone.now()
-            execution.passed_requests = passed_count
-            execution.failed_requests = failed_count
-            execution.status = 'COMPLETED' if failed_count == 0 else 'FAILED'
-            execution.results = results
-            execution.save()
-            
-            # 记录执行操作
-            log_operation(
-                operation_type='execute',
-                resource_type='suite',
-                resource_id=test_suite.id,
-                resource_name=test_suite.name,
-                user=request.user
-            )
-            
-            return Response(TestExecutionSerializer(execution).data)
-            
-        except Exception as e:
-            execution.status = 'FAILED'
-            execution.end_time = timezone.now()
-            execution.save()
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # 使用共享的套件执行方法（支持并发执行模式）
+        result = execute_test_suite(test_suite, test_suite.environment, request.user)
+        if not result.get('success'):
+            return Response({'error': result.get('error')}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 记录执行操作
+        log_operation(
+            operation_type='execute',
+            resource_type='suite',
+            resource_id=test_suite.id,
+            resource_name=test_suite.name,
+            user=request.user
+        )
+
+        execution = TestExecution.objects.get(id=result['execution_id'])
+        return Response(TestExecutionSerializer(execution).data)
 
     def perform_create(self, serializer):
         """创建测试套件时记录日志"""
@@ -926,42 +697,6 @@ class TestSuiteViewSet(viewsets.ModelViewSet):
             
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-    
-    def _replace_variables(self, text, variables):
-        """替换文本中的变量"""
-        if not isinstance(text, str):
-            return text
-        
-        result = text
-        for key, value in (variables or {}).items():
-            if isinstance(value, dict):
-                replacement = str(value.get('currentValue', '') or value.get('initialValue', ''))
-            else:
-                replacement = str(value) if value is not None else ''
-            result = result.replace(f'{{{{{key}}}}}', replacement)
-        return result
-    
-    def _replace_variables_in_dict(self, data, variables):
-        """递归替换字典中的变量"""
-        if isinstance(data, dict):
-            return {k: self._replace_variables_in_dict(v, variables) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._replace_variables_in_dict(item, variables) for item in data]
-        elif isinstance(data, str):
-            return self._replace_variables(data, variables)
-        else:
-            return data
-    
-    def _resolve_variables_in_dict(self, data, resolver):
-        """递归解析字典中的动态函数占位符"""
-        if isinstance(data, dict):
-            return {k: self._resolve_variables_in_dict(v, resolver) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._resolve_variables_in_dict(item, resolver) for item in data]
-        elif isinstance(data, str):
-            return resolver.resolve(data)
-        else:
-            return data
 
 
 class TestSuiteRequestViewSet(viewsets.ModelViewSet):
@@ -1603,13 +1338,14 @@ class ScheduledTaskViewSet(viewsets.ModelViewSet):
             execution_log = TaskExecutionLog.objects.create(
                 task=task,
                 status='PENDING',
+                priority=PRIORITY_HIGH,
                 executed_by=request.user
             )
             logger.info(f"创建执行日志: {execution_log.id}")
             
-            # 异步执行任务
+            # 异步执行任务，手动执行优先于定时调度
             logger.info("调用 _execute_task_async 方法")
-            self._execute_task_async(task, execution_log)
+            self._execute_task_async(task, execution_log, priority=PRIORITY_HIGH)
             
             logger.info("任务开始执行")
             return Response(
@@ -1685,118 +1421,174 @@ class ScheduledTaskViewSet(viewsets.ModelViewSet):
         serializer = TaskExecutionLogSerializer(logs, many=True)
         return Response(serializer.data)
     
-    def _execute_task_async(self, task, execution_log):
-        """异步执行任务"""
-        import threading
-        from datetime import datetime
+    def _execute_task_async(self, task, execution_log, priority=PRIORITY_NORMAL, coalesce_key=None):
+        """异步执行任务：投递到 Celery api 队列，或在进程内有界执行池中排队执行
+
+        coalesce_key 不为空时，同一任务已在队列中等待则本次合并，不再重复执行；返回是否已投递
+        """
         
         # 添加测试日志
         import logging
         logger = logging.getLogger(__name__)
         logger.info("=== _execute_task_async 方法被调用 ===")
         
-        def execute():
+        if use_celery():
+            if coalesce_key and not mark_queued(coalesce_key, settings.CELERY_API_TASK_TIME_LIMIT):
+                self._cancel_coalesced(execution_log)
+                return False
+            from .tasks import execute_scheduled_api_task
             try:
-                # 更新执行状态
-                execution_log.status = 'RUNNING'
-                execution_log.start_time = timezone.now()
-                execution_log.save()
-                
-                # 执行任务
-                if task.task_type == 'TEST_SUITE':
-                    result = self._execute_test_suite(task)
-                elif task.task_type == 'API_REQUEST':
-                    result = self._execute_api_request(task)
-                else:
-                    raise ValueError(f"未知的任务类型: {task.task_type}")
-                
-                # 更新执行结果
-                execution_log.status = 'COMPLETED'
-                execution_log.end_time = timezone.now()
-                execution_log.result = result
-                execution_log.save()
-                
-                # 更新任务统计
-                task.update_run_stats(success=True)
-                task.last_result = result
-                task.save()
-                
-                logger.info("=== 开始检查发送成功通知 ===")
-                # 发送通知（如果配置了）
-                # 检查任务是否有通知设置
-                notification_setting = None
-                if hasattr(task, 'notification_settings'):
-                    try:
-                        notification_setting = task.notification_settings.first()
-                        logger.info(f"获取到通知设置: {notification_setting}")
-                        if notification_setting:
-                            logger.info(f"通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
-                        else:
-                            logger.info("没有找到通知设置")
-                    except Exception as e:
-                        logger.error(f"获取任务通知设置时出错: {e}")
-                        import traceback
-                        traceback.print_exc()
-                else:
-                    logger.info("任务没有notification_settings属性")
-                
-                if notification_setting and notification_setting.is_enabled:
-                    logger.info("通知设置已启用，准备发送成功通知")
-                    if notification_setting.notify_on_success:
-                        logger.info("调用 _send_notification 方法发送成功通知")
-                        self._send_notification(task, execution_log, success=True)
-                    else:
-                        logger.info("通知设置中未启用成功通知")
-                else:
-                    logger.info("通知设置未启用或不存在，跳过成功通知")
-                logger.info("=== 结束检查发送成功通知 ===")
-                
+                execution_log.priority = priority
+                execution_log.queue_depth = queue_length(QUEUE_API)
+                execution_log.save(update_fields=['priority', 'queue_depth'])
+                execute_scheduled_api_task.apply_async(
+                    args=[task.id, execution_log.id],
+                    kwargs={'coalesce_key': coalesce_key},
+                    priority=priority,
+                )
             except Exception as e:
-                # 记录执行失败
+                # 投递失败时清除排队标记，否则之后到期的运行都会被合并
+                if coalesce_key:
+                    clear_queued(coalesce_key)
                 execution_log.status = 'FAILED'
-                execution_log.end_time = timezone.now()
-                execution_log.error_message = str(e)
-                execution_log.save()
-                
-                # 更新任务统计
-                task.update_run_stats(success=False)
-                task.error_message = str(e)
-                task.save()
-                
-                logger.info("=== 开始检查发送失败通知 ===")
-                # 发送失败通知（如果配置了）
-                # 检查任务是否有通知设置
-                notification_setting = None
-                if hasattr(task, 'notification_settings'):
-                    try:
-                        notification_setting = task.notification_settings.first()
-                        logger.info(f"获取到通知设置（失败情况）: {notification_setting}")
-                        if notification_setting:
-                            logger.info(f"通知设置详情（失败情况） - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
-                        else:
-                            logger.info("没有找到通知设置（失败情况）")
-                    except Exception as e:
-                        logger.error(f"获取任务通知设置时出错（失败情况）: {e}")
-                        import traceback
-                        traceback.print_exc()
+                execution_log.error_message = f'投递到执行队列失败: {e}'
+                execution_log.save(update_fields=['status', 'error_message'])
+                raise
+            return True
+        
+        def record_queue_stats(job):
+            execution_log.priority = job.priority
+            execution_log.queue_depth = job.queue_depth
+            execution_log.queue_wait = job.wait_seconds
+            execution_log.save(update_fields=['priority', 'queue_depth', 'queue_wait'])
+        
+        job = get_executor_pool().submit(
+            'API', lambda: self._run_task(task, execution_log), priority=priority, name=task.name,
+            on_start=record_queue_stats, key=coalesce_key
+        )
+        if job is None:
+            self._cancel_coalesced(execution_log)
+            return False
+        return True
+    
+    def _cancel_coalesced(self, execution_log):
+        """同一任务已在队列中等待，本次到期合并"""
+        execution_log.status = 'CANCELLED'
+        execution_log.error_message = '同一任务已在队列中等待执行，本次到期已合并'
+        execution_log.save(update_fields=['status', 'error_message'])
+    
+    def _run_task(self, task, execution_log, retry_db_errors=False):
+        """执行定时任务，记录执行结果并发送通知
+
+        retry_db_errors 为 True 时（Celery 任务内且还可以重试），开始执行之前的数据库连接错误向上抛出由 Celery 重试，
+        其余情况按执行失败记录，重试时不会重复发送请求
+        """
+        started = False
+        try:
+            # 更新执行状态
+            execution_log.status = 'RUNNING'
+            execution_log.start_time = timezone.now()
+            execution_log.save()
+            
+            # 执行任务
+            started = True
+            if task.task_type == 'TEST_SUITE':
+                result = self._execute_test_suite(task)
+            elif task.task_type == 'API_REQUEST':
+                result = self._execute_api_request(task)
+            else:
+                raise ValueError(f"未知的任务类型: {task.task_type}")
+            
+            # 更新执行结果
+            execution_log.status = 'COMPLETED'
+            execution_log.end_time = timezone.now()
+            execution_log.result = result
+            execution_log.save()
+            
+            # 更新任务统计
+            task.update_run_stats(success=True)
+            task.last_result = result
+            task.save(update_fields=['last_result'])
+            
+            logger.info("=== 开始检查发送成功通知 ===")
+            # 发送通知（如果配置了）
+            # 检查任务是否有通知设置
+            notification_setting = None
+            if hasattr(task, 'notification_settings'):
+                try:
+                    notification_setting = task.notification_settings.first()
+                    logger.info(f"获取到通知设置: {notification_setting}")
+                    if notification_setting:
+                        logger.info(f"通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
+                    else:
+                        logger.info("没有找到通知设置")
+                except Exception as e:
+                    logger.error(f"获取任务通知设置时出错: {e}")
+                    import traceback
+                    traceback.print_exc()
+            else:
+                logger.info("任务没有notification_settings属性")
+            
+            if notification_setting and notification_setting.is_enabled:
+                logger.info("通知设置已启用，准备发送成功通知")
+                if notification_setting.notify_on_success:
+                    logger.info("调用 _send_notification 方法发送成功通知")
+                    self._send_notification(task, execution_log, success=True)
                 else:
-                    logger.info("任务没有notification_settings属性（失败情况）")
-                
-                if notification_setting and notification_setting.is_enabled:
-                    logger.info("通知设置已启用，准备发送失败通知")
-                    if notification_setting.notify_on_failure:
-                        logger.info("调用 _send_notification 方法发送失败通知")
-                        self._send_notification(task, execution_log, success=False)
+                    logger.info("通知设置中未启用成功通知")
+            else:
+                logger.info("通知设置未启用或不存在，跳过成功通知")
+            logger.info("=== 结束检查发送成功通知 ===")
+            
+        except SoftTimeLimitExceeded:
+            # 执行超时由 Celery 任务记录
+            raise
+        except Exception as e:
+            if isinstance(e, (OperationalError, InterfaceError)):
+                if retry_db_errors and not started:
+                    raise
+                # 关闭已失效的数据库连接，下面记录失败时重新连接
+                close_old_connections()
+            # 记录执行失败
+            execution_log.status = 'FAILED'
+            execution_log.end_time = timezone.now()
+            execution_log.error_message = str(e)
+            execution_log.save()
+            
+            # 更新任务统计
+            task.update_run_stats(success=False)
+            task.error_message = str(e)
+            task.save(update_fields=['error_message'])
+            
+            logger.info("=== 开始检查发送失败通知 ===")
+            # 发送失败通知（如果配置了）
+            # 检查任务是否有通知设置
+            notification_setting = None
+            if hasattr(task, 'notification_settings'):
+                try:
+                    notification_setting = task.notification_settings.first()
+                    logger.info(f"获取到通知设置（失败情况）: {notification_setting}")
+                    if notification_setting:
+                        logger.info(f"通知设置详情（失败情况） - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
                     else:
-                        logger.info("通知设置中未启用失败通知")
+                        logger.info("没有找到通知设置（失败情况）")
+                except Exception as e:
+                    logger.error(f"获取任务通知设置时出错（失败情况）: {e}")
+                    import traceback
+                    traceback.print_exc()
+            else:
+                logger.info("任务没有notification_settings属性（失败情况）")
+            
+            if notification_setting and notification_setting.is_enabled:
+                logger.info("通知设置已启用，准备发送失败通知")
+                if notification_setting.notify_on_failure:
+                    logger.info("调用 _send_notification 方法发送失败通知")
+                    self._send_notification(task, execution_log, success=False)
                 else:
-                    logger.info("通知设置未启用或不存在，跳过失败通知")
-                logger.info("=== 结束检查发送失败通知 ===")
-        
-        # 在新线程中执行
-        thread = threading.Thread(target=execute)
-        thread.daemon = True
-        thread.start()
+                    logger.info("通知设置中未启用失败通知")
+            else:
+                logger.info("通知设置未启用或不存在，跳过失败通知")
+            logger.info("=== 结束检查发送失败通知 ===")
     
     def _execute_test_suite(self, task):
         """执行测试套件"""
@@ -673,6 +673,11 @@ class AppScheduledTask(models.Model):
         ('INTERVAL', '固定间隔'),
         ('ONCE', '单次执行'),
     ]
+    MISFIRE_POLICY_CHOICES = [
+        ('SKIP', '跳过错过的运行'),
+        ('RUN_ONCE', '合并补跑一次'),
+        ('RUN_ALL', '逐次补跑（最多N次）'),
+    ]
     NOTIFICATION_TYPE_CHOICES = [
         ('email', '邮箱通知'),
         ('webhook', 'Webhook机器人'),
@@ -694,6 +699,12 @@ class AppScheduledTask(models.Model):
     interval_seconds = models.IntegerField(null=True, blank=True, verbose_name='间隔秒数')
     execute_at = models.DateTimeField(null=True, blank=True, verbose_name='执行时间')
 
+    # 错过运行（调度器停机或过载）的补跑策略；晚于计划时间不超过宽限秒数的运行视为准点
+    misfire_policy = models.CharField(max_length=20, choices=MISFIRE_POLICY_CHOICES, default='RUN_ONCE',
+                                      verbose_name='错过运行策略')
+    misfire_grace_seconds = models.IntegerField(default=60, verbose_name='错过运行宽限秒数')
+    misfire_max_catchup = models.IntegerField(default=3, verbose_name='最多补跑次数')
+
     # APP 特有配置
     device = models.ForeignKey(
         AppDevice, on_delete=models.SET_NULL, null=True, blank=True,
@@ -731,6 +742,11 @@ class AppScheduledTask(models.Model):
     last_result = models.JSONField(default=dict, verbose_name='最后执行结果')
     error_message = models.TextField(blank=True, default='', verbose_name='错误信息')
 
+    # 调度租约：调度器领取到期任务后持有租约，分发完成后释放；租约过期说明调度器在分发中途退出，由其他调度器接管
+    lease_owner = models.CharField(max_length=100, blank=True, default='', verbose_name='租约持有者')
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name='租约过期时间')
+    leased_run_time = models.DateTimeField(null=True, blank=True, verbose_name='租约对应的计划运行时间')
+
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='创建者')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
@@ -740,6 +756,11 @@ class AppScheduledTask(models.Model):
         verbose_name = 'APP定时任务'
         verbose_name_plural = 'APP定时任务'
         ordering = ['-created_at']
+        indexes = [
+            # 调度器按 next_run_time 查询到期任务
+            models.Index(fields=['status', 'next_run_time']),
+            models.Index(fields=['lease_expires_at']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_task_type_display()})"
@@ -339,6 +339,7 @@ class AppScheduledTaskSerializer(serializers.ModelSerializer):
             'task_type', 'task_type_display',
             'trigger_type', 'trigger_type_display',
             'cron_expression', 'interval_seconds', 'execute_at',
+            'misfire_policy', 'misfire_grace_seconds', 'misfire_max_catchup',
             'device', 'device_name',
             'app_package', 'app_package_name',
             'test_suite', 'test_suite_name',
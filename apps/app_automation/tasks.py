@@ -3,12 +3,15 @@
 APP自动化测试 Celery 任务
 """
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 import logging
 import os
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+from apps.core.scheduler.queues import clear_queued
+
 logger = logging.getLogger(__name__)
 
 
@@ -189,8 +192,12 @@ def send_execution_update(execution_id, status=None, progress=None, message=None
         logger.debug(f"发送执行状态更新失败: {e}")
 
 
-@shared_task
-def execute_app_test_task(execution_id, package_name: str = None, scheduled_task_id: int = None):
+@shared_task(
+    soft_time_limit=settings.CELERY_DEVICE_TASK_TIME_LIMIT,
+    time_limit=settings.CELERY_DEVICE_TASK_TIME_LIMIT + 60,
+)
+def execute_app_test_task(execution_id, package_name: str = None, scheduled_task_id: int = None,
+                          coalesce_key: str = None):
     """
     异步执行APP测试任务
     
@@ -198,7 +205,11 @@ def execute_app_test_task(execution_id, package_name: str = None, scheduled_task
         execution_id: AppTestExecution 的 ID
         package_name: 可选的应用包名
         scheduled_task_id: 可选的定时任务 ID（来自定时调度）
+        coalesce_key: 定时调度投递时设置的排队标记，开始执行时清除
     """
+    if coalesce_key:
+        clear_queued(coalesce_key)
+
     from django.conf import settings
     from .models import AppTestExecution, AppDevice
     from .executors.test_executor import AppTestExecutor
@@ -352,8 +363,11 @@ def execute_app_test_task(execution_id, package_name: str = None, scheduled_task
             logger.error(f"释放设备失败: {str(e)}")
 
 
-@shared_task
-def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled_task_id=None):
+@shared_task(
+    soft_time_limit=settings.CELERY_DEVICE_TASK_TIME_LIMIT,
+    time_limit=settings.CELERY_DEVICE_TASK_TIME_LIMIT + 60,
+)
+def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled_task_id=None, coalesce_key=None):
     """
     异步执行APP测试套件（顺序执行多个用例）
 
@@ -362,7 +376,11 @@ def execute_app_suite_task(suite_id, execution_ids, package_name=None, scheduled
         execution_ids: AppTestExecution ID 列表（按执行顺序）
         package_name: 可选的应用包名覆盖
         scheduled_task_id: 可选的定时任务 ID
+        coalesce_key: 定时调度投递时设置的排队标记，开始执行时清除
     """
+    if coalesce_key:
+        clear_queued(coalesce_key)
+
     from .models import AppTestSuite, AppTestExecution, AppDevice
     from .executors.test_executor import AppTestExecutor
 
@@ -5,3 +5,8 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = '核心功能'
+
+    def ready(self):
+        """任务变更时唤醒调度器"""
+        from apps.core.scheduler.signals import connect_signals
+        connect_signals()
@@ -0,0 +1,32 @@
+"""
+Django管理命令：清理不再被请求历史引用的接口响应体文件
+用法：python manage.py cleanup_api_response_bodies [--min-age 3600] [--dry-run]
+请求历史删除时会同步删除对应文件，本命令用于清理批量删除、异常中断等情况遗留的文件
+"""
+from django.core.management.base import BaseCommand
+
+from apps.api_testing.body_storage import REUSE_GRACE_SECONDS, cleanup_unreferenced_bodies
+
+
+class Command(BaseCommand):
+    help = '清理不再被请求历史引用的接口响应体文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=REUSE_GRACE_SECONDS,
+            help=f'只清理修改时间早于该秒数之前的文件，默认 {REUSE_GRACE_SECONDS}'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='只统计不删除'
+        )
+
+    def handle(self, *args, **options):
+        removed, freed = cleanup_unreferenced_bodies(options['min_age'], dry_run=options['dry_run'])
+        action = '可清理' if options['dry_run'] else '已清理'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {removed} 个响应体文件，共 {freed / 1024 / 1024:.2f} MB'
+        ))
@@ -1,16 +1,18 @@
 """
-Django管理命令：预下载所有WebDriver
+Django管理命令：预下载所有WebDriver，并写入驱动注册表
 用法：python manage.py download_webdrivers
+离线环境先把驱动放到 UI_WEBDRIVER_DIR 目录，再执行本命令校验并登记
 """
 from django.core.management.base import BaseCommand
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.edge.service import Service as EdgeService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
+from apps.ui_automation.webdriver_registry import browser_major_version, resolve_driver_path
 import time
 
+BROWSER_NAMES = {
+    'chrome': 'ChromeDriver',
+    'firefox': 'GeckoDriver (Firefox)',
+    'edge': 'EdgeDriver',
+}
+
 
 class Command(BaseCommand):
     help = '预下载所有浏览器的WebDriver驱动程序'
@@ -20,6 +22,7 @@ class Command(BaseCommand):
             '--browsers',
             nargs='+',
             default=['chrome', 'firefox', 'edge'],
+            choices=list(BROWSER_NAMES),
             help='指定要下载驱动的浏览器，默认下载所有'
         )
 
@@ -32,50 +35,23 @@ class Command(BaseCommand):
         success_count = 0
         failed_browsers = []
 
-        if 'chrome' in browsers:
-            self.stdout.write('正在下载 ChromeDriver...')
-            try:
-                start_time = time.time()
-                driver_path = ChromeDriverManager().install()
-                elapsed = time.time() - start_time
-                self.stdout.write(self.style.SUCCESS(
-                    f'✓ ChromeDriver 下载成功 (耗时: {elapsed:.1f}秒)'
-                ))
-                self.stdout.write(f'  路径: {driver_path}\n')
-                success_count += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'✗ ChromeDriver 下载失败: {str(e)}\n'))
-                failed_browsers.append(('Chrome', str(e)))
-
-        if 'firefox' in browsers:
-            self.stdout.write('正在下载 GeckoDriver (Firefox)...')
-            try:
-                start_time = time.time()
-                driver_path = GeckoDriverManager().install()
-                elapsed = time.time() - start_time
-                self.stdout.write(self.style.SUCCESS(
-                    f'✓ GeckoDriver 下载成功 (耗时: {elapsed:.1f}秒)'
-                ))
-                self.stdout.write(f'  路径: {driver_path}\n')
-                success_count += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'✗ GeckoDriver 下载失败: {str(e)}\n'))
-                failed_browsers.append(('Firefox', str(e)))
-
-        if 'edge' in browsers:
-            self.stdout.write('正在下载 EdgeDriver...')
+        for browser in browsers:
+            name = BROWSER_NAMES[browser]
+            self.stdout.write(f'正在下载 {name}...')
             try:
                 start_time = time.time()
-                driver_path = EdgeChromiumDriverManager().install()
+                # 忽略已登记的路径，重新解析并校验
+                driver_path = resolve_driver_path(browser, refresh=True)
                 elapsed = time.time() - start_time
                 self.stdout.write(self.style.SUCCESS(
-                    f'✓ EdgeDriver 下载成功 (耗时: {elapsed:.1f}秒)'
+                    f'✓ {name} 就绪 (耗时: {elapsed:.1f}秒)'
                 ))
+                self.stdout.write(f'  浏览器主版本: {browser_major_version(browser) or "未知"}')
                 self.stdout.write(f'  路径: {driver_path}\n')
                 success_count += 1
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f'✗ EdgeDriver 下载失败: {str(e)}\n'))
-                failed_browsers.append(('Edge', str(e)))
+                self.stdout.write(self.style.ERROR(f'✗ {name} 下载失败: {str(e)}\n'))
+                failed_browsers.append((name, str(e)))
 
         # 总结
         self.stdout.write('\n' + '='*60)
@@ -87,4 +63,4 @@ class Command(BaseCommand):
                 self.stdout.write(f'  - {browser}: {error}')
 
         self.stdout.write('\n' + '='*60)
-        self.stdout.write(self.style.SUCCESS('\n驱动程序已缓存，后续测试执行将会更快！'))
+        self.stdout.write(self.style.SUCCESS('\n驱动程序已登记到驱动注册表，后续测试执行直接使用，不再解析驱动！'))
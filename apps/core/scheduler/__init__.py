@@ -0,0 +1,15 @@
+"""
+统一定时任务调度
+API测试、UI自动化、APP自动化三个模块的定时任务由同一个调度核心驱动
+"""
+from .core import SchedulerCore
+from .executor import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, ExecutorPool, ExecutorQueueFull, get_executor_pool,
+)
+from .sources import TASK_SOURCES, TaskSource, get_task_source
+from .wakeup import notify_scheduler
+
+__all__ = [
+    'SchedulerCore', 'TASK_SOURCES', 'TaskSource', 'get_task_source', 'notify_scheduler',
+    'ExecutorPool', 'ExecutorQueueFull', 'get_executor_pool', 'PRIORITY_HIGH', 'PRIORITY_NORMAL', 'PRIORITY_LOW',
+]
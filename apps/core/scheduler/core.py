@@ -0,0 +1,247 @@
+"""
+事件驱动的调度核心
+内存中维护按 next_run_time 排序的小顶堆，休眠到最早的任务到期（或被唤醒）为止；
+到期后只通过 (status, next_run_time) 索引查询 next_run_time <= now 的任务并分发。
+
+支持多个调度器进程同时运行：到期任务先以 next_run_time 做原子比较更新（CAS）领取，
+领取成功的调度器同时获得租约，分发完成后释放；调度器在分发中途退出时租约过期，
+由其他调度器接管并重新分发。领取时按任务的补跑策略处理错过的运行（见 misfire 模块）
+"""
+import heapq
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .executor import get_executor_pool
+from .metrics import TickStats, record_tick
+from .misfire import plan_run
+from .queues import MODULE_QUEUES, queue_length, use_celery
+from .sources import TASK_SOURCES
+from .wakeup import WakeupListener
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerCore:
+    """统一定时任务调度核心
+
+    dispatchers: {来源标签: 分发函数(task) -> bool}，分发函数负责启动任务执行
+    """
+
+    def __init__(self, dispatchers, max_sleep=None, heap_size=None, worker_id=None):
+        self.dispatchers = dispatchers
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = settings.SCHEDULER_LEASE_SECONDS
+        self.claim_batch_size = settings.SCHEDULER_CLAIM_BATCH_SIZE
+        self.sources = [source for source in TASK_SOURCES if source.label in dispatchers]
+        self.max_sleep = max_sleep or settings.SCHEDULER_MAX_SLEEP
+        self.heap_size = heap_size or settings.SCHEDULER_HEAP_SIZE
+        self.heap = []
+        self.catchup_pending = False
+        self.stats = TickStats()
+        self.listener = WakeupListener()
+
+    def reload(self, now=None):
+        """从数据库加载每个来源最近的若干个任务到堆中"""
+        now = now or timezone.now()
+        heap = []
+        for source in self.sources:
+            for next_run_time, task_id in source.upcoming(now, self.heap_size):
+                heap.append((next_run_time, source.label, task_id))
+        heapq.heapify(heap)
+        self.heap = heap
+
+    def seconds_until_next(self, now=None):
+        """距离最早到期任务的秒数，不超过最长休眠时间"""
+        now = now or timezone.now()
+        # 还有逐次补跑的任务时尽快进入下一轮，每轮每个任务只补跑一次
+        if self.catchup_pending:
+            return min(1.0, self.max_sleep)
+        while self.heap and self.heap[0][0] <= now:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return self.max_sleep
+        return max(0.0, min(self.max_sleep, (self.heap[0][0] - now).total_seconds()))
+
+    def _claim_batch(self, source, now, claimed_ids):
+        """领取一批到期任务，返回 (候选数量, 需要分发的任务)
+
+        claimed_ids 为本轮已处理过的任务，逐次补跑的任务每轮只领取一次
+
+        数据库支持时在同一事务内用 SELECT ... FOR UPDATE SKIP LOCKED 锁定候选行，
+        其他调度器直接跳过这些行；不支持时仅依赖 claim 的比较更新保证只有一个调度器领取成功
+        """
+        queryset = source.due_tasks(now).filter(
+            Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now)
+        ).exclude(pk__in=claimed_ids)
+        claimed = []
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            candidates = list(queryset[:self.claim_batch_size])
+            for task in candidates:
+                claimed_ids.add(task.pk)
+                try:
+                    with transaction.atomic():
+                        plan = self.claim(source, task, now)
+                    if plan is None:
+                        continue
+                    self.stats.add_due(source.label, skipped=not plan.run)
+                    if plan.run:
+                        claimed.append((task, plan))
+                except Exception as e:
+                    logger.error(f"[{source.label}] 领取定时任务 {task.pk} 失败: {e}", exc_info=True)
+        return len(candidates), claimed
+
+    def claim(self, source, task, now):
+        """领取到期任务：以 next_run_time 做比较更新，按补跑策略推进下次运行时间并获取租约
+
+        返回 MisfirePlan；其他调度器已领取时返回None。plan.run 为False（跳过错过的运行）时不获取租约
+        """
+        scheduled_time = task.next_run_time
+        plan = plan_run(task, now)
+        if plan.run:
+            lease = {
+                'lease_owner': self.worker_id,
+                'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                'leased_run_time': plan.run_time,
+            }
+        else:
+            lease = {}
+        claimed = source.model.objects.filter(
+            Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now),
+            pk=task.pk,
+            status='ACTIVE',
+            next_run_time=scheduled_time,
+        ).update(next_run_time=plan.next_run_time, **lease)
+        if not claimed:
+            return None
+
+        if plan.missed:
+            action = '跳过' if not plan.run else '合并'
+            logger.warning(
+                f"[{source.label}] 定时任务 {task.pk} 错过 {plan.missed} 次运行，按策略 {task.misfire_policy} {action}"
+            )
+        if plan.next_run_time is not None and plan.next_run_time <= now:
+            self.catchup_pending = True
+
+        # 同步内存中的实例，避免分发函数整行保存时覆盖领取结果
+        task.next_run_time = plan.next_run_time
+        for field, value in lease.items():
+            setattr(task, field, value)
+        return plan
+
+    def release(self, source, task):
+        """分发完成，释放租约"""
+        source.model.objects.filter(pk=task.pk, lease_owner=self.worker_id).update(
+            lease_owner='', lease_expires_at=None, leased_run_time=None
+        )
+        task.lease_owner = ''
+        task.lease_expires_at = None
+        task.leased_run_time = None
+
+    def recover_expired(self, now=None):
+        """接管租约已过期的任务（原调度器在分发中途退出），重新分发对应的运行"""
+        now = now or timezone.now()
+        counts = {}
+        for source in self.sources:
+            recovered = 0
+            expired = source.active_tasks().exclude(lease_owner='').filter(lease_expires_at__lte=now)
+            for task in expired[:self.claim_batch_size]:
+                lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+                taken = source.model.objects.filter(
+                    pk=task.pk, lease_owner=task.lease_owner, lease_expires_at=task.lease_expires_at
+                ).update(lease_owner=self.worker_id, lease_expires_at=lease_expires_at)
+                if not taken:
+                    continue
+                logger.warning(
+                    f"[{source.label}] 接管调度器 {task.lease_owner} 过期的租约，重新分发任务 {task.pk}"
+                    f"（计划运行时间 {task.leased_run_time}）"
+                )
+                task.lease_owner = self.worker_id
+                task.lease_expires_at = lease_expires_at
+                run_time = task.leased_run_time
+                dispatched_at = timezone.now()
+                if self._dispatch(source, task):
+                    recovered += 1
+                    if run_time:
+                        self.stats.add_dispatched(source.label, task.pk, (dispatched_at - run_time).total_seconds())
+            counts[source.label] = recovered
+        return counts
+
+    def _dispatch(self, source, task):
+        try:
+            return self.dispatchers[source.label](task)
+        except Exception as e:
+            logger.error(f"[{source.label}] 分发定时任务 {task.pk} 失败: {e}", exc_info=True)
+            return False
+        finally:
+            self.release(source, task)
+
+    def run_due(self, now=None):
+        """领取并分发所有到期任务，返回 {来源标签: 启动数量}"""
+        now = now or timezone.now()
+        self.catchup_pending = False
+        counts = {}
+        for source in self.sources:
+            started = 0
+            claimed_ids = set()
+            while True:
+                candidate_count, claimed = self._claim_batch(source, now, claimed_ids)
+                # 事务提交后再分发，分发期间不持有行锁
+                for task, plan in claimed:
+                    dispatched_at = timezone.now()
+                    if self._dispatch(source, task):
+                        started += 1
+                        self.stats.add_dispatched(
+                            source.label, task.pk, (dispatched_at - plan.run_time).total_seconds()
+                        )
+                if candidate_count < self.claim_batch_size:
+                    break
+            counts[source.label] = started
+        return counts
+
+    def queue_depths(self):
+        """各模块执行队列中等待的任务数；APP 任务始终通过 Celery 执行"""
+        queued = {} if use_celery() else get_executor_pool().stats()['queued']
+        depths = {}
+        for source in self.sources:
+            if use_celery() or source.label == 'APP':
+                depths[source.label] = queue_length(MODULE_QUEUES[source.label])
+            else:
+                depths[source.label] = queued.get(source.label, 0)
+        return depths
+
+    def tick(self):
+        """执行一轮调度：接管过期租约、分发到期任务并重新加载堆，记录本轮指标"""
+        self.stats = TickStats()
+        counts = self.run_due()
+        for label, count in self.recover_expired().items():
+            counts[label] = counts.get(label, 0) + count
+        self.reload()
+        record_tick(self.stats, self.queue_depths(), self.worker_id)
+        return counts
+
+    def run_forever(self, on_tick=None):
+        """循环调度，直到 KeyboardInterrupt"""
+        self.listener.start()
+        try:
+            while True:
+                try:
+                    counts = self.tick()
+                    if on_tick is not None:
+                        on_tick(counts)
+                except Exception as e:
+                    logger.error(f"调度器运行出错: {e}", exc_info=True)
+                    time.sleep(1)
+                self.listener.wait(self.seconds_until_next())
+        finally:
+            self.listener.stop()
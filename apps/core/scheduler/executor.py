@@ -0,0 +1,162 @@
+"""
+有界任务执行池
+定时任务（以及手动立即执行）不再每个任务直接起一个线程，而是提交到执行池：
+全局和各模块分别限制并发数，超出的任务按优先级排队，有空位时优先级高、排队早的先执行。
+同一个定时任务在队列中还未开始时再次到期，合并为队列中已有的那一次执行
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 优先级：数值越小越先执行
+PRIORITY_HIGH = 0  # 手动立即执行
+PRIORITY_NORMAL = 5  # 定时调度
+PRIORITY_LOW = 9
+
+
+class ExecutorQueueFull(Exception):
+    """排队任务数已达上限"""
+
+
+class ExecutorJob:
+    """提交到执行池的一个任务"""
+
+    def __init__(self, module, func, priority, name, on_start, key=None):
+        self.module = module
+        self.key = key
+        self.func = func
+        self.priority = priority
+        self.name = name
+        self.on_start = on_start
+        self.queue_depth = 0  # 提交时前面排队的任务数
+        self.coalesced = 0  # 合并进来的重复提交次数
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+
+    @property
+    def wait_seconds(self):
+        """排队等待时长（秒）"""
+        if self.started_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.started_at - self.enqueued_at
+
+
+class ExecutorPool:
+    """按模块限流的优先级执行池
+
+    max_workers: 全局最大并发数
+    module_limits: {模块标签: 最大并发数}，未配置的模块只受全局限制
+    max_queue_size: 最大排队数，0 表示不限制
+    """
+
+    def __init__(self, max_workers, module_limits=None, max_queue_size=0):
+        self.max_workers = max_workers
+        self.module_limits = dict(module_limits or {})
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._running = {}
+        self._total_running = 0
+
+    def submit(self, module, func, priority=PRIORITY_NORMAL, name='', on_start=None, key=None):
+        """提交任务，返回 ExecutorJob
+
+        on_start(job) 在任务真正开始执行前于工作线程中调用，可用于记录排队深度和等待时长。
+        key 标识同一个定时任务：队列中已有相同 key 且尚未开始的任务时不再重复排队，返回None
+        """
+        job = ExecutorJob(module, func, priority, name, on_start, key)
+        with self._lock:
+            if key is not None:
+                for _, _, queued in self._queue:
+                    if queued.key == key:
+                        queued.coalesced += 1
+                        logger.info(f"[{module}] 任务 {name} 已在队列中等待执行，本次到期与其合并")
+                        return None
+            if self.max_queue_size and len(self._queue) >= self.max_queue_size:
+                raise ExecutorQueueFull(f"执行队列已满（{len(self._queue)}），任务 {name} 未能提交")
+            job.queue_depth = len(self._queue)
+            heapq.heappush(self._queue, (priority, next(self._sequence), job))
+            self._drain_locked()
+        if job.started_at is None:
+            logger.info(f"[{module}] 任务 {name} 进入等待队列，前面还有 {job.queue_depth} 个任务")
+        return job
+
+    def stats(self):
+        """当前运行和排队情况"""
+        with self._lock:
+            queued = {}
+            for _, _, job in self._queue:
+                queued[job.module] = queued.get(job.module, 0) + 1
+            return {
+                'running': dict(self._running),
+                'total_running': self._total_running,
+                'queued': queued,
+                'queue_depth': len(self._queue),
+            }
+
+    def _has_capacity(self, module):
+        limit = self.module_limits.get(module)
+        return limit is None or self._running.get(module, 0) < limit
+
+    def _drain_locked(self):
+        """在持有锁时按优先级启动有空位的排队任务；所属模块已满的任务留在队列中"""
+        blocked = []
+        while self._queue and self._total_running < self.max_workers:
+            item = heapq.heappop(self._queue)
+            job = item[2]
+            if not self._has_capacity(job.module):
+                blocked.append(item)
+                continue
+            self._running[job.module] = self._running.get(job.module, 0) + 1
+            self._total_running += 1
+            job.started_at = time.monotonic()
+            thread = threading.Thread(
+                target=self._run, args=(job,), name=f'executor-{job.module}', daemon=True
+            )
+            thread.start()
+        for item in blocked:
+            heapq.heappush(self._queue, item)
+
+    def _run(self, job):
+        try:
+            if job.on_start is not None:
+                try:
+                    job.on_start(job)
+                except Exception as e:
+                    logger.warning(f"[{job.module}] 记录任务 {job.name} 排队信息失败: {e}")
+            job.func()
+        except Exception as e:
+            logger.error(f"[{job.module}] 执行池任务 {job.name} 出错: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._running[job.module] -= 1
+                self._total_running -= 1
+                self._drain_locked()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_executor_pool():
+    """进程内共享的执行池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ExecutorPool(
+                    max_workers=settings.TASK_EXECUTOR_MAX_WORKERS,
+                    module_limits={
+                        'API': settings.TASK_EXECUTOR_API_LIMIT,
+                        'UI': settings.TASK_EXECUTOR_UI_LIMIT,
+                    },
+                    max_queue_size=settings.TASK_EXECUTOR_MAX_QUEUE_SIZE,
+                )
+    return _pool
@@ -0,0 +1,167 @@
+"""
+调度器指标
+每轮调度记录耗时、到期/分发/跳过的任务数和各执行队列的排队深度，每次分发记录调度延迟
+（实际分发时间减计划运行时间），写入 Redis 有序集合（按时间戳排序），超过保留时长的样本自动清理。
+多个调度器进程写入同一份数据，Web 进程读取后按时间分桶聚合
+"""
+import json
+import logging
+import time
+import uuid
+
+from django.conf import settings
+
+from .wakeup import get_redis
+
+logger = logging.getLogger(__name__)
+
+TICKS_KEY = 'testhub:scheduler:metrics:ticks'
+LAGS_KEY = 'testhub:scheduler:metrics:lags'
+
+
+class TickStats:
+    """一轮调度的统计"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.due = {}
+        self.dispatched = {}
+        self.skipped = {}
+        self.lags = []
+
+    def add_due(self, label, skipped=False):
+        self.due[label] = self.due.get(label, 0) + 1
+        if skipped:
+            self.skipped[label] = self.skipped.get(label, 0) + 1
+
+    def add_dispatched(self, label, task_id, lag_seconds):
+        self.dispatched[label] = self.dispatched.get(label, 0) + 1
+        self.lags.append((label, task_id, lag_seconds))
+
+    @property
+    def duration(self):
+        return time.monotonic() - self.started
+
+
+def _trim(pipe, key, now):
+    pipe.zremrangebyscore(key, '-inf', now - settings.SCHEDULER_METRICS_RETENTION_SECONDS)
+    pipe.zremrangebyrank(key, 0, -settings.SCHEDULER_METRICS_MAX_SAMPLES - 1)
+
+
+def record_tick(stats, queue_depths, worker_id=''):
+    """写入一轮调度的指标，Redis 不可用时忽略"""
+    now = time.time()
+    tick = {
+        'id': uuid.uuid4().hex[:8],
+        'ts': now,
+        'worker': worker_id,
+        'duration': round(stats.duration, 4),
+        'due': stats.due,
+        'dispatched': stats.dispatched,
+        'skipped': stats.skipped,
+        'queue_depth': queue_depths,
+    }
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.zadd(TICKS_KEY, {json.dumps(tick, separators=(',', ':')): now})
+        if stats.lags:
+            pipe.zadd(LAGS_KEY, {
+                json.dumps({'ts': now, 'source': label, 'task_id': task_id, 'lag': round(lag, 3)},
+                           separators=(',', ':')): now
+                for label, task_id, lag in stats.lags
+            })
+        _trim(pipe, TICKS_KEY, now)
+        _trim(pipe, LAGS_KEY, now)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"写入调度器指标失败: {e}")
+
+
+def _load(key, since):
+    return [json.loads(member) for member in get_redis().zrangebyscore(key, since, '+inf')]
+
+
+def _percentile(sorted_values, ratio):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(ratio * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _lag_summary(lags):
+    values = sorted(sample['lag'] for sample in lags)
+    if not values:
+        return {'count': 0, 'avg': None, 'p50': None, 'p95': None, 'max': None}
+    return {
+        'count': len(values),
+        'avg': round(sum(values) / len(values), 3),
+        'p50': _percentile(values, 0.5),
+        'p95': _percentile(values, 0.95),
+        'max': values[-1],
+    }
+
+
+def _sum_counts(ticks, field):
+    total = {}
+    for tick in ticks:
+        for label, count in tick.get(field, {}).items():
+            total[label] = total.get(label, 0) + count
+    return total
+
+
+def query_metrics(minutes=60, bucket_seconds=60, recent=50):
+    """读取最近 minutes 分钟的指标
+
+    返回汇总、按 bucket_seconds 分桶的时间序列和最近的若干条调度延迟样本
+    """
+    now = time.time()
+    since = now - minutes * 60
+    ticks = _load(TICKS_KEY, since)
+    lags = _load(LAGS_KEY, since)
+
+    buckets = {}
+    for tick in ticks:
+        start = int(tick['ts'] // bucket_seconds * bucket_seconds)
+        bucket = buckets.setdefault(start, {'ticks': [], 'lags': []})
+        bucket['ticks'].append(tick)
+    for sample in lags:
+        start = int(sample['ts'] // bucket_seconds * bucket_seconds)
+        bucket = buckets.setdefault(start, {'ticks': [], 'lags': []})
+        bucket['lags'].append(sample)
+
+    series = []
+    for start in sorted(buckets):
+        bucket_ticks = buckets[start]['ticks']
+        durations = [tick['duration'] for tick in bucket_ticks]
+        series.append({
+            'timestamp': start,
+            'ticks': len(bucket_ticks),
+            'tick_duration_avg': round(sum(durations) / len(durations), 4) if durations else None,
+            'tick_duration_max': max(durations) if durations else None,
+            'due': _sum_counts(bucket_ticks, 'due'),
+            'dispatched': _sum_counts(bucket_ticks, 'dispatched'),
+            'skipped': _sum_counts(bucket_ticks, 'skipped'),
+            # 排队深度取桶内最后一轮的采样值
+            'queue_depth': bucket_ticks[-1]['queue_depth'] if bucket_ticks else {},
+            'lag': _lag_summary(buckets[start]['lags']),
+        })
+
+    durations = sorted(tick['duration'] for tick in ticks)
+    latest = ticks[-1] if ticks else None
+    summary = {
+        'ticks': len(ticks),
+        'last_tick_at': latest['ts'] if latest else None,
+        'tick_duration_p95': _percentile(durations, 0.95),
+        'tick_duration_max': durations[-1] if durations else None,
+        'due': _sum_counts(ticks, 'due'),
+        'dispatched': _sum_counts(ticks, 'dispatched'),
+        'skipped': _sum_counts(ticks, 'skipped'),
+        'queue_depth': latest['queue_depth'] if latest else {},
+        'lag': _lag_summary(lags),
+        'workers': sorted({tick.get('worker', '') for tick in ticks} - {''}),
+    }
+    return {
+        'summary': summary,
+        'series': series,
+        'recent_lags': lags[-recent:][::-1],
+    }
@@ -0,0 +1,96 @@
+"""
+错过运行（misfire）处理
+调度器停机或过载时，任务的计划运行时间可能已经过去多个周期。领取任务时按任务的补跑策略决定
+本次是否分发，以及下次运行时间：
+
+- 晚于计划时间不超过宽限秒数：视为准点，执行一次，期间堆积的其他周期合并
+- SKIP：跳过所有错过的运行，直接推进到未来的下一个周期
+- RUN_ONCE：堆积的运行合并为一次执行，然后推进到未来的下一个周期
+- RUN_ALL：按时间顺序逐次补跑，最多补跑最近的 N 次；每次领取只分发一次，
+  下次运行时间指向下一个待补跑的周期，调度器在后续轮次中继续补跑
+"""
+import logging
+from collections import deque
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+# Cron 任务最多向后扫描的周期数，超过时直接从当前时间计算下次运行时间
+_MAX_SCAN = 10000
+
+
+class MisfirePlan:
+    """一次领取的处理结果
+
+    run: 是否分发本次运行
+    run_time: 本次运行对应的计划时间
+    next_run_time: 领取后写回的下次运行时间
+    missed: 被跳过或合并、不会再执行的周期数
+    """
+
+    def __init__(self, run, run_time, next_run_time, missed=0):
+        self.run = run
+        self.run_time = run_time
+        self.next_run_time = next_run_time
+        self.missed = missed
+
+
+def next_fire_time(task, after):
+    """计划中严格晚于 after 的下一次运行时间；单次任务返回None"""
+    if task.trigger_type == 'CRON' and task.cron_expression:
+        from croniter import croniter
+        try:
+            return croniter(task.cron_expression, after).get_next(type(after))
+        except Exception:
+            return None
+    if task.trigger_type == 'INTERVAL' and task.interval_seconds:
+        return after + timedelta(seconds=task.interval_seconds)
+    return None
+
+
+def _due_slots(task, scheduled, now, keep):
+    """计划时间 scheduled 起所有 <= now 的周期
+
+    返回 (周期总数, 最近的 keep 个周期, 未来的下一个周期)
+    """
+    if task.trigger_type == 'INTERVAL' and task.interval_seconds:
+        step = timedelta(seconds=task.interval_seconds)
+        elapsed = int((now - scheduled) / step)
+        first_kept = max(0, elapsed + 1 - keep)
+        recent = [scheduled + step * i for i in range(first_kept, elapsed + 1)]
+        return elapsed + 1, recent, scheduled + step * (elapsed + 1)
+
+    recent = deque([scheduled], maxlen=keep)
+    total = 1
+    cursor = next_fire_time(task, scheduled)
+    while cursor is not None and cursor <= now:
+        if total >= _MAX_SCAN:
+            logger.warning(f"定时任务 {task.pk} 错过的周期超过 {_MAX_SCAN} 个，从当前时间重新计算")
+            cursor = next_fire_time(task, now)
+            break
+        recent.append(cursor)
+        total += 1
+        cursor = next_fire_time(task, cursor)
+    return total, list(recent), cursor
+
+
+def plan_run(task, now):
+    """根据任务的补跑策略计算本次领取的处理方式"""
+    scheduled = task.next_run_time
+    policy = getattr(task, 'misfire_policy', 'RUN_ONCE') or 'RUN_ONCE'
+    grace = timedelta(seconds=max(0, getattr(task, 'misfire_grace_seconds', 0) or 0))
+    keep = max(1, getattr(task, 'misfire_max_catchup', 1) or 1) if policy == 'RUN_ALL' else 1
+
+    total, recent, upcoming = _due_slots(task, scheduled, now, keep)
+
+    if now - scheduled <= grace:
+        return MisfirePlan(True, scheduled, upcoming, missed=total - 1)
+
+    if policy == 'SKIP':
+        return MisfirePlan(False, scheduled, upcoming, missed=total)
+
+    if policy == 'RUN_ALL':
+        next_run_time = recent[1] if len(recent) > 1 else upcoming
+        return MisfirePlan(True, recent[0], next_run_time, missed=total - len(recent))
+
+    return MisfirePlan(True, scheduled, upcoming, missed=total - 1)
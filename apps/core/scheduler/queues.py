@@ -0,0 +1,67 @@
+"""
+任务执行队列
+API测试、UI自动化、APP自动化的执行分别投递到独立的 Celery 队列（api / browser / device），
+轻量的 API 执行节点和占用浏览器、设备的执行节点可以分别部署和扩容：
+
+    celery -A backend worker -Q api -c 8
+    celery -A backend worker -Q browser -c 2
+    celery -A backend worker -Q device --pool=solo
+
+TASK_EXECUTION_BACKEND 为 thread 时仍在当前进程的有界执行池中执行（未部署 Celery 的开发环境）
+"""
+import logging
+
+from django.conf import settings
+
+from .wakeup import get_redis
+
+logger = logging.getLogger(__name__)
+
+QUEUE_API = 'api'
+QUEUE_BROWSER = 'browser'
+QUEUE_DEVICE = 'device'
+
+# 模块标签 -> 队列
+MODULE_QUEUES = {
+    'API': QUEUE_API,
+    'UI': QUEUE_BROWSER,
+    'APP': QUEUE_DEVICE,
+}
+
+_QUEUED_KEY_PREFIX = 'testhub:scheduler:queued:'
+
+
+def use_celery():
+    """定时任务执行是否投递到 Celery"""
+    return settings.TASK_EXECUTION_BACKEND == 'celery'
+
+
+def queue_length(queue):
+    """队列中等待的消息数，查询失败时返回0"""
+    from celery import current_app
+    try:
+        with current_app.connection_for_read() as conn:
+            return conn.default_channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception as e:
+        logger.debug(f"查询队列 {queue} 长度失败: {e}")
+        return 0
+
+
+def mark_queued(key, ttl):
+    """标记任务已投递且尚未开始执行，已有标记时返回False（本次应合并）
+
+    Redis 不可用时不做合并，始终返回True
+    """
+    try:
+        return bool(get_redis().set(_QUEUED_KEY_PREFIX + key, 1, nx=True, ex=ttl))
+    except Exception as e:
+        logger.debug(f"设置任务排队标记失败: {e}")
+        return True
+
+
+def clear_queued(key):
+    """任务开始执行，清除排队标记"""
+    try:
+        get_redis().delete(_QUEUED_KEY_PREFIX + key)
+    except Exception as e:
+        logger.debug(f"清除任务排队标记失败: {e}")
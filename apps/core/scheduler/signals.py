@@ -0,0 +1,28 @@
+"""
+定时任务变更信号：任务保存或删除后（事务提交后）唤醒调度器
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .sources import TASK_SOURCES, get_source_for_model
+from .wakeup import notify_scheduler
+
+# 只更新这些字段时不影响调度时间，无需唤醒调度器
+_STATS_FIELDS = frozenset({
+    'last_run_time', 'total_runs', 'successful_runs', 'failed_runs', 'last_result', 'error_message',
+})
+
+
+def _on_task_changed(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= _STATS_FIELDS:
+        return
+    source = get_source_for_model(sender)
+    label = source.label if source else ''
+    transaction.on_commit(lambda: notify_scheduler(label))
+
+
+def connect_signals():
+    for source in TASK_SOURCES:
+        post_save.connect(_on_task_changed, sender=source.model_path, dispatch_uid=f'scheduler_wakeup_save_{source.label}')
+        post_delete.connect(_on_task_changed, sender=source.model_path, dispatch_uid=f'scheduler_wakeup_delete_{source.label}')
@@ -0,0 +1,55 @@
+"""
+定时任务来源
+各模块（API测试、UI自动化、APP自动化）的定时任务模型字段一致，调度器通过 TaskSource 统一查询
+"""
+from django.apps import apps as django_apps
+
+
+class TaskSource:
+    """一个模块的定时任务来源"""
+
+    def __init__(self, label, model_path):
+        self.label = label
+        self.model_path = model_path
+
+    @property
+    def model(self):
+        return django_apps.get_model(self.model_path)
+
+    def active_tasks(self):
+        return self.model.objects.filter(status='ACTIVE')
+
+    def due_tasks(self, now):
+        """已到期的任务，走 (status, next_run_time) 索引"""
+        return self.active_tasks().filter(next_run_time__lte=now).order_by('next_run_time')
+
+    def upcoming(self, now, limit):
+        """即将到期的任务 (next_run_time, id)，按时间升序"""
+        return list(
+            self.active_tasks()
+            .filter(next_run_time__gt=now)
+            .order_by('next_run_time')
+            .values_list('next_run_time', 'id')[:limit]
+        )
+
+
+TASK_SOURCES = (
+    TaskSource('API', 'api_testing.ScheduledTask'),
+    TaskSource('UI', 'ui_automation.UiScheduledTask'),
+    TaskSource('APP', 'app_automation.AppScheduledTask'),
+)
+
+
+def get_task_source(label):
+    for source in TASK_SOURCES:
+        if source.label == label:
+            return source
+    raise ValueError(f"未知的任务来源: {label}")
+
+
+def get_source_for_model(model):
+    """根据模型类查找任务来源，非定时任务模型返回None"""
+    for source in TASK_SOURCES:
+        if model._meta.label == source.model_path or model._meta.label_lower == source.model_path.lower():
+            return source
+    return None
@@ -0,0 +1,84 @@
+"""
+调度器唤醒
+定时任务被创建、修改、暂停或激活时通知调度器提前醒来重新计算休眠时间。
+同进程内通过 threading.Event 唤醒；跨进程（Web 进程 -> 调度器进程）通过 Redis 发布订阅唤醒，
+Redis 不可用时调度器退化为按最长休眠时间轮询
+"""
+import logging
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WAKEUP_CHANNEL = 'testhub:scheduler:wakeup'
+
+_local_event = threading.Event()
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                import redis
+                _redis_client = redis.Redis.from_url(
+                    settings.SCHEDULER_REDIS_URL,
+                    socket_connect_timeout=1,
+                    socket_timeout=1,
+                )
+    return _redis_client
+
+
+def notify_scheduler(source_label=''):
+    """唤醒调度器"""
+    _local_event.set()
+    try:
+        get_redis().publish(WAKEUP_CHANNEL, source_label or '')
+    except Exception as e:
+        logger.debug(f"发布调度器唤醒消息失败: {e}")
+
+
+class WakeupListener:
+    """调度器侧的唤醒监听：后台线程订阅 Redis 频道，收到消息后设置事件"""
+
+    def __init__(self):
+        self.event = _local_event
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._listen, name='scheduler-wakeup', daemon=True)
+        self._thread.start()
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(WAKEUP_CHANNEL)
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.event.set()
+            except Exception as e:
+                logger.warning(f"调度器唤醒订阅中断，稍后重试: {e}")
+                self._stopped.wait(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def wait(self, timeout):
+        """休眠直到超时或被唤醒，返回是否被唤醒"""
+        woken = self.event.wait(timeout)
+        self.event.clear()
+        return woken
+
+    def stop(self):
+        self._stopped.set()
+        self.event.set()
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+pytest 配置文件
+"""
+import os
+import django
+
+# 配置 Django 设置
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+django.setup()
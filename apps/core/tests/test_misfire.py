@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+错过运行（misfire）处理测试
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from apps.core.scheduler import misfire
+from apps.core.scheduler.misfire import _due_slots, plan_run
+
+START = datetime(2026, 1, 1, 8, 0, 0)
+
+
+def interval_task(next_run_time=START, seconds=60, policy='RUN_ONCE', grace=0, max_catchup=1):
+    return SimpleNamespace(
+        pk=1, trigger_type='INTERVAL', interval_seconds=seconds, cron_expression='',
+        next_run_time=next_run_time, misfire_policy=policy,
+        misfire_grace_seconds=grace, misfire_max_catchup=max_catchup,
+    )
+
+
+def cron_task(next_run_time=START, expression='*/5 * * * *', policy='RUN_ONCE', grace=0, max_catchup=1):
+    return SimpleNamespace(
+        pk=2, trigger_type='CRON', interval_seconds=None, cron_expression=expression,
+        next_run_time=next_run_time, misfire_policy=policy,
+        misfire_grace_seconds=grace, misfire_max_catchup=max_catchup,
+    )
+
+
+class TestDueSlots:
+    """到期周期的计算"""
+
+    def test_interval_slots(self):
+        now = START + timedelta(minutes=4, seconds=30)
+        total, recent, upcoming = _due_slots(interval_task(), START, now, keep=2)
+        assert total == 5
+        assert recent == [START + timedelta(minutes=3), START + timedelta(minutes=4)]
+        assert upcoming == START + timedelta(minutes=5)
+
+    def test_cron_slots(self):
+        now = START + timedelta(minutes=12)
+        total, recent, upcoming = _due_slots(cron_task(), START, now, keep=2)
+        assert total == 3
+        assert recent == [START + timedelta(minutes=5), START + timedelta(minutes=10)]
+        assert upcoming == START + timedelta(minutes=15)
+
+    def test_cron_scan_stops_at_max_scan(self, monkeypatch):
+        monkeypatch.setattr(misfire, '_MAX_SCAN', 3)
+        now = START + timedelta(hours=1, minutes=2)
+        total, recent, upcoming = _due_slots(cron_task(), START, now, keep=1)
+        assert total == 3
+        assert recent == [START + timedelta(minutes=10)]
+        # 超过扫描上限后直接从当前时间计算下次运行时间
+        assert upcoming == START + timedelta(hours=1, minutes=5)
+
+
+class TestPlanRun:
+    """按补跑策略计算本次领取的处理方式"""
+
+    @pytest.mark.parametrize('policy', ['SKIP', 'RUN_ONCE', 'RUN_ALL'])
+    def test_on_time_runs_once(self, policy):
+        plan = plan_run(interval_task(policy=policy, max_catchup=5), START)
+        assert plan.run
+        assert plan.run_time == START
+        assert plan.next_run_time == START + timedelta(minutes=1)
+        assert plan.missed == 0
+
+    @pytest.mark.parametrize('policy', ['SKIP', 'RUN_ONCE', 'RUN_ALL'])
+    def test_within_grace_runs_once_and_merges_missed(self, policy):
+        now = START + timedelta(minutes=2, seconds=10)
+        plan = plan_run(interval_task(policy=policy, grace=300, max_catchup=5), now)
+        assert plan.run
+        assert plan.run_time == START
+        assert plan.next_run_time == START + timedelta(minutes=3)
+        assert plan.missed == 2
+
+    def test_skip_beyond_grace(self):
+        now = START + timedelta(minutes=2, seconds=10)
+        plan = plan_run(interval_task(policy='SKIP', grace=30), now)
+        assert not plan.run
+        assert plan.next_run_time == START + timedelta(minutes=3)
+        assert plan.missed == 3
+
+    def test_run_once_beyond_grace(self):
+        now = START + timedelta(minutes=2, seconds=10)
+        plan = plan_run(interval_task(policy='RUN_ONCE'), now)
+        assert plan.run
+        assert plan.run_time == START
+        assert plan.next_run_time == START + timedelta(minutes=3)
+        assert plan.missed == 2
+
+    def test_run_all_catches_up_recent_slots_in_order(self):
+        now = START + timedelta(minutes=4, seconds=10)
+        plan = plan_run(interval_task(policy='RUN_ALL', max_catchup=3), now)
+        assert plan.run
+        # 只补跑最近的3个周期，从最早的开始，下次运行时间指向下一个待补跑的周期
+        assert plan.run_time == START + timedelta(minutes=2)
+        assert plan.next_run_time == START + timedelta(minutes=3)
+        assert plan.missed == 2
+
+    def test_run_all_last_slot_moves_to_future(self):
+        now = START + timedelta(seconds=90)
+        plan = plan_run(interval_task(next_run_time=START + timedelta(minutes=1), policy='RUN_ALL', max_catchup=3), now)
+        assert plan.run
+        assert plan.run_time == START + timedelta(minutes=1)
+        assert plan.next_run_time == START + timedelta(minutes=2)
+        assert plan.missed == 0
+
+    def test_cron_run_once(self):
+        now = START + timedelta(minutes=12)
+        plan = plan_run(cron_task(policy='RUN_ONCE'), now)
+        assert plan.run
+        assert plan.next_run_time == START + timedelta(minutes=15)
+        assert plan.missed == 2
+
+    def test_missing_policy_defaults_to_run_once(self):
+        task = interval_task()
+        task.misfire_policy = None
+        plan = plan_run(task, START + timedelta(minutes=2, seconds=10))
+        assert plan.run
+        assert plan.missed == 2
@@ -4,10 +4,11 @@ Core 应用路由
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import UnifiedNotificationConfigViewSet
+from .views import SchedulerMetricsViewSet, UnifiedNotificationConfigViewSet
 
 router = DefaultRouter()
 router.register(r'notification-configs', UnifiedNotificationConfigViewSet, basename='unified-notification-config')
+router.register(r'scheduler-metrics', SchedulerMetricsViewSet, basename='scheduler-metrics')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -6,6 +6,8 @@
 import re
 import sys
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 # 设置标准输出编码为 UTF-8，避免 Windows 系统上的编码问题
@@ -24,6 +26,115 @@ from apps.data_factory.tools.crontab_tools import CrontabTools
 from apps.data_factory.tools.image_tools import ImageTools
 
 
+# 数据工厂工具映射，模块加载时构建一次
+_RANDOM_TOOLS = {
+    'random_int': RandomTools.random_int,
+    'random_float': RandomTools.random_float,
+    'random_string': RandomTools.random_string,
+    'random_uuid': RandomTools.random_uuid,
+    'random_guid': RandomTools.random_uuid,
+    'random_mac': RandomTools.random_mac_address,
+    'random_mac_address': RandomTools.random_mac_address,
+    'random_ip': RandomTools.random_ip_address,
+    'random_ip_address': RandomTools.random_ip_address,
+    'random_date': RandomTools.random_date,
+    'random_boolean': RandomTools.random_boolean,
+    'random_color': RandomTools.random_color,
+    'random_password': RandomTools.random_password,
+    'random_sequence': RandomTools.random_sequence,
+}
+
+_TEST_DATA_TOOLS = {
+    'random_phone': TestDataTools.generate_chinese_phone,
+    'random_email': TestDataTools.generate_chinese_email,
+    'random_id_card': TestDataTools.generate_id_card,
+    'random_name': TestDataTools.generate_chinese_name,
+    'random_company': TestDataTools.generate_company_name,
+    'random_address': TestDataTools.generate_chinese_address,
+    'generate_chinese_name': TestDataTools.generate_chinese_name,
+    'generate_chinese_phone': TestDataTools.generate_chinese_phone,
+    'generate_chinese_email': TestDataTools.generate_chinese_email,
+    'generate_chinese_address': TestDataTools.generate_chinese_address,
+    'generate_id_card': TestDataTools.generate_id_card,
+    'generate_company_name': TestDataTools.generate_company_name,
+    'generate_bank_card': TestDataTools.generate_bank_card,
+    'generate_hk_id_card': TestDataTools.generate_hk_id_card,
+    'generate_business_license': TestDataTools.generate_business_license,
+    'generate_user_profile': TestDataTools.generate_user_profile,
+    'generate_coordinates': TestDataTools.generate_coordinates,
+}
+
+_STRING_TOOLS = {
+    'remove_whitespace': StringTools.remove_whitespace,
+    'replace_string': StringTools.replace_string,
+    'word_count': StringTools.word_count,
+    'regex_test': StringTools.regex_test,
+    'case_convert': StringTools.case_convert,
+}
+
+_ENCODING_TOOLS = {
+    'timestamp_convert': EncodingTools.timestamp_convert,
+    'base64_encode': EncodingTools.base64_encode,
+    'base64_decode': EncodingTools.base64_decode,
+    'url_encode': EncodingTools.url_encode,
+    'url_decode': EncodingTools.url_decode,
+    'unicode_convert': EncodingTools.unicode_convert,
+    'ascii_convert': EncodingTools.ascii_convert,
+    'color_convert': EncodingTools.color_convert,
+    'base_convert': EncodingTools.base_convert,
+    'generate_barcode': EncodingTools.generate_barcode,
+    'generate_qrcode': EncodingTools.generate_qrcode,
+    'decode_qrcode': EncodingTools.decode_qrcode,
+    'image_to_base64': ImageTools.image_to_base64,
+    'base64_to_image': ImageTools.base64_to_image,
+}
+
+_ENCRYPTION_TOOLS = {
+    'base64': EncryptionTools.base64_encode,
+    'md5': EncryptionTools.md5_hash,
+    'sha1': EncryptionTools.sha1_hash,
+    'sha256': EncryptionTools.sha256_hash,
+    'md5_hash': EncryptionTools.md5_hash,
+    'sha1_hash': EncryptionTools.sha1_hash,
+    'sha256_hash': EncryptionTools.sha256_hash,
+    'sha512_hash': EncryptionTools.sha512_hash,
+    'hash_comparison': EncryptionTools.hash_comparison,
+    'aes_encrypt': EncryptionTools.aes_encrypt,
+    'aes_decrypt': EncryptionTools.aes_decrypt,
+}
+
+_CRONTAB_TOOLS = {
+    'generate_expression': CrontabTools.generate_expression,
+    'parse_expression': CrontabTools.parse_expression,
+    'get_next_runs': CrontabTools.get_next_runs,
+    'validate_expression': CrontabTools.validate_expression,
+}
+
+# 动态函数占位符 ${function_name(args)} 与函数调用表达式
+_PLACEHOLDER_PATTERN = re.compile(r'\$\{([^}]+)\}')
+_CALL_PATTERN = re.compile(r'(\w+)\((.*)\)')
+
+# 模板编译缓存：模板字符串 -> 编译后的节点元组
+_TEMPLATE_CACHE_SIZE = 2048
+_template_cache = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+class _CallNode:
+    """模板中的函数调用节点，函数名和参数在编译时解析完成"""
+
+    __slots__ = ('func_name', 'args', 'raw')
+
+    def __init__(self, func_name, args, raw):
+        self.func_name = func_name
+        self.args = args
+        self.raw = raw
+
+    @property
+    def expression(self):
+        return self.raw[2:-1]
+
+
 class VariableResolver:
     """统一变量解析器 - 使用数据工厂工具"""
     
@@ -122,32 +233,76 @@ class VariableResolver:
     def resolve(self, text):
         """解析文本中的动态函数占位符
         
+        模板首次出现时编译为字面量/函数调用节点并缓存，之后直接执行编译结果；
+        不含 ${ 的静态文本直接返回
+        
         Args:
             text: 包含动态函数的文本，如 "Hello ${random_string(8)}"
             
         Returns:
             解析后的文本
         """
-        if not isinstance(text, str):
+        if not isinstance(text, str) or '${' not in text:
             return text
         
-        # 匹配 ${function_name(args)} 模式
-        pattern = r'\$\{([^}]+)\}'
+        nodes = self.compile(text)
+        if len(nodes) == 1 and isinstance(nodes[0], str):
+            return nodes[0]
         
-        def replace_func(match):
-            expression = match.group(1)
-            try:
-                return str(self._evaluate_expression(expression))
-            except Exception as e:
-                if isinstance(e, UnicodeEncodeError):
-                    return match.group(0)
-                try:
-                    print(f"[WARNING] Variable resolution failed: ${{{expression}}} - {str(e)}")
-                except UnicodeEncodeError:
-                    print(f"[WARNING] Variable resolution failed: ${{{expression}}}")
-                return match.group(0)
+        parts = []
+        for node in nodes:
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                parts.append(self._evaluate_node(node))
+        return ''.join(parts)
+    
+    def compile(self, text):
+        """把模板编译为节点元组（字面量字符串或 _CallNode），按模板字符串做 LRU 缓存"""
+        with _template_cache_lock:
+            nodes = _template_cache.get(text)
+            if nodes is not None:
+                _template_cache.move_to_end(text)
+                return nodes
         
-        return re.sub(pattern, replace_func, text)
+        nodes = []
+        pos = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > pos:
+                nodes.append(text[pos:match.start()])
+            nodes.append(self._compile_expression(match.group(1), match.group(0)))
+            pos = match.end()
+        if pos < len(text):
+            nodes.append(text[pos:])
+        nodes = tuple(nodes) or ('',)
+        
+        with _template_cache_lock:
+            _template_cache[text] = nodes
+            if len(_template_cache) > _TEMPLATE_CACHE_SIZE:
+                _template_cache.popitem(last=False)
+        return nodes
+    
+    def _compile_expression(self, expression, raw):
+        """解析函数名和参数，生成函数调用节点"""
+        match = _CALL_PATTERN.match(expression.strip())
+        if not match:
+            # 无参数函数
+            return _CallNode(expression.strip(), (), raw)
+        return _CallNode(match.group(1), tuple(self._parse_args(match.group(2))), raw)
+    
+    def _evaluate_node(self, node):
+        """执行函数调用节点，失败时保留原始占位符"""
+        try:
+            return str(self._call(node.func_name, list(node.args)))
+        except Exception as e:
+            if isinstance(e, UnicodeEncodeError):
+                return node.raw
+            expression = node.expression
+            try:
+                print(f"[WARNING] Variable resolution failed: ${{{expression}}} - {str(e)}")
+            except UnicodeEncodeError:
+                print(f"[WARNING] Variable resolution failed: ${{{expression}}}")
+            return node.raw
     
     def _evaluate_expression(self, expression):
         """评估单个表达式
@@ -158,18 +313,11 @@ class VariableResolver:
         Returns:
             函数执行结果
         """
-        # 解析函数名和参数
-        match = re.match(r'(\w+)\((.*)\)', expression.strip())
-        if not match:
-            # 无参数函数
-            func_name = expression.strip()
-            args = []
-        else:
-            func_name = match.group(1)
-            args_str = match.group(2)
-            args = self._parse_args(args_str)
-        
-        # 调用对应函数
+        node = self._compile_expression(expression, f'${{{expression}}}')
+        return self._call(node.func_name, list(node.args))
+    
+    def _call(self, func_name, args):
+        """调用对应函数"""
         if func_name in self.functions:
             return self.functions[func_name](func_name, args)
         else:
@@ -262,22 +410,7 @@ class VariableResolver:
     
     def _call_random_tool(self, func_name, args):
         """调用随机工具"""
-        tool_mapping = {
-            'random_int': RandomTools.random_int,
-            'random_float': RandomTools.random_float,
-            'random_string': RandomTools.random_string,
-            'random_uuid': RandomTools.random_uuid,
-            'random_guid': RandomTools.random_uuid,
-            'random_mac': RandomTools.random_mac_address,
-            'random_mac_address': RandomTools.random_mac_address,
-            'random_ip': RandomTools.random_ip_address,
-            'random_ip_address': RandomTools.random_ip_address,
-            'random_date': RandomTools.random_date,
-            'random_boolean': RandomTools.random_boolean,
-            'random_color': RandomTools.random_color,
-            'random_password': RandomTools.random_password,
-            'random_sequence': RandomTools.random_sequence,
-        }
+        tool_mapping = _RANDOM_TOOLS
         
         # 特殊处理 random_digits 和 random_letters
         if func_name == 'random_digits':
@@ -335,25 +468,7 @@ class VariableResolver:
     
     def _call_test_data_tool(self, func_name, args):
         """调用测试数据工具"""
-        tool_mapping = {
-            'random_phone': TestDataTools.generate_chinese_phone,
-            'random_email': TestDataTools.generate_chinese_email,
-            'random_id_card': TestDataTools.generate_id_card,
-            'random_name': TestDataTools.generate_chinese_name,
-            'random_company': TestDataTools.generate_company_name,
-            'random_address': TestDataTools.generate_chinese_address,
-            'generate_chinese_name': TestDataTools.generate_chinese_name,
-            'generate_chinese_phone': TestDataTools.generate_chinese_phone,
-            'generate_chinese_email': TestDataTools.generate_chinese_email,
-            'generate_chinese_address': TestDataTools.generate_chinese_address,
-            'generate_id_card': TestDataTools.generate_id_card,
-            'generate_company_name': TestDataTools.generate_company_name,
-            'generate_bank_card': TestDataTools.generate_bank_card,
-            'generate_hk_id_card': TestDataTools.generate_hk_id_card,
-            'generate_business_license': TestDataTools.generate_business_license,
-            'generate_user_profile': TestDataTools.generate_user_profile,
-            'generate_coordinates': TestDataTools.generate_coordinates,
-        }
+        tool_mapping = _TEST_DATA_TOOLS
         
         # 设置默认参数
         kwargs = {}
@@ -374,13 +489,7 @@ class VariableResolver:
     
     def _call_string_tool(self, func_name, args):
         """调用字符工具"""
-        tool_mapping = {
-            'remove_whitespace': StringTools.remove_whitespace,
-            'replace_string': StringTools.replace_string,
-            'word_count': StringTools.word_count,
-            'regex_test': StringTools.regex_test,
-            'case_convert': StringTools.case_convert,
-        }
+        tool_mapping = _STRING_TOOLS
         
         # 设置默认参数
         kwargs = {}
@@ -405,22 +514,7 @@ class VariableResolver:
     
     def _call_encoding_tool(self, func_name, args):
         """调用编码工具"""
-        tool_mapping = {
-            'timestamp_convert': EncodingTools.timestamp_convert,
-            'base64_encode': EncodingTools.base64_encode,
-            'base64_decode': EncodingTools.base64_decode,
-            'url_encode': EncodingTools.url_encode,
-            'url_decode': EncodingTools.url_decode,
-            'unicode_convert': EncodingTools.unicode_convert,
-            'ascii_convert': EncodingTools.ascii_convert,
-            'color_convert': EncodingTools.color_convert,
-            'base_convert': EncodingTools.base_convert,
-            'generate_barcode': EncodingTools.generate_barcode,
-            'generate_qrcode': EncodingTools.generate_qrcode,
-            'decode_qrcode': EncodingTools.decode_qrcode,
-            'image_to_base64': ImageTools.image_to_base64,
-            'base64_to_image': ImageTools.base64_to_image,
-        }
+        tool_mapping = _ENCODING_TOOLS
         
         # 设置默认参数
         kwargs = {}
@@ -465,19 +559,7 @@ class VariableResolver:
     
     def _call_encryption_tool(self, func_name, args):
         """调用加密工具"""
-        tool_mapping = {
-            'base64': EncryptionTools.base64_encode,
-            'md5': EncryptionTools.md5_hash,
-            'sha1': EncryptionTools.sha1_hash,
-            'sha256': EncryptionTools.sha256_hash,
-            'md5_hash': EncryptionTools.md5_hash,
-            'sha1_hash': EncryptionTools.sha1_hash,
-            'sha256_hash': EncryptionTools.sha256_hash,
-            'sha512_hash': EncryptionTools.sha512_hash,
-            'hash_comparison': EncryptionTools.hash_comparison,
-            'aes_encrypt': EncryptionTools.aes_encrypt,
-            'aes_decrypt': EncryptionTools.aes_decrypt,
-        }
+        tool_mapping = _ENCRYPTION_TOOLS
         
         # 设置默认参数
         kwargs = {}
@@ -500,12 +582,7 @@ class VariableResolver:
     
     def _call_crontab_tool(self, func_name, args):
         """调用Crontab工具"""
-        tool_mapping = {
-            'generate_expression': CrontabTools.generate_expression,
-            'parse_expression': CrontabTools.parse_expression,
-            'get_next_runs': CrontabTools.get_next_runs,
-            'validate_expression': CrontabTools.validate_expression,
-        }
+        tool_mapping = _CRONTAB_TOOLS
         
         # 设置默认参数
         kwargs = {}
@@ -10,6 +10,7 @@ from rest_framework import filters
 
 from .models import UnifiedNotificationConfig
 from .serializers import UnifiedNotificationConfigSerializer
+from .scheduler.metrics import query_metrics
 
 import logging
 logger = logging.getLogger(__name__)
@@ -58,3 +59,26 @@ class UnifiedNotificationConfigViewSet(viewsets.ModelViewSet):
         configs = UnifiedNotificationConfig.objects.filter(is_active=True)
         serializer = self.get_serializer(configs, many=True)
         return Response(serializer.data)
+
+
+class SchedulerMetricsViewSet(viewsets.ViewSet):
+    """定时任务调度器运行指标：调度延迟、每轮耗时、到期任务数和执行队列深度"""
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """查询最近一段时间的调度器指标
+
+        参数：minutes 查询最近多少分钟（默认60，最多1440），bucket 分桶秒数（默认60）
+        """
+        try:
+            minutes = min(max(int(request.query_params.get('minutes', 60)), 1), 1440)
+            bucket = min(max(int(request.query_params.get('bucket', 60)), 10), 3600)
+        except (TypeError, ValueError):
+            return Response({'error': 'minutes 和 bucket 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            data = query_metrics(minutes=minutes, bucket_seconds=bucket)
+        except Exception as e:
+            logger.error(f"读取调度器指标失败: {e}", exc_info=True)
+            return Response({'error': f'读取调度器指标失败: {str(e)}'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(data)
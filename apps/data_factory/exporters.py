@@ -0,0 +1,192 @@
+"""
+数据工厂流式导出
+按批惰性生成数据行，编码为 CSV / NDJSON / JSON 数组后分块输出，
+同时写入 MEDIA_ROOT 下的导出文件；内存占用只与单批大小有关，与总行数无关
+"""
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .tools.batch_tools import generate_batch
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = 'data_factory_exports'
+
+# 导出格式 -> (Content-Type, 文件扩展名)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson; charset=utf-8', 'ndjson'),
+    'json': ('application/json; charset=utf-8', 'json'),
+}
+
+
+def iter_values(tool_name, tool_category, input_data, count, execute_tool):
+    """按批惰性生成数据，每批最多 DATA_FACTORY_EXPORT_CHUNK_SIZE 条
+
+    支持向量化的工具整批生成，其余工具逐条调用 execute_tool
+    """
+    chunk_size = settings.DATA_FACTORY_EXPORT_CHUNK_SIZE
+    remaining = count
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        values = generate_batch(tool_name, input_data, size)
+        if values is None:
+            values = []
+            for _ in range(size):
+                result = execute_tool(tool_name, tool_category, input_data)
+                if 'error' not in result:
+                    values.append(result.get('result'))
+        remaining -= size
+        yield values
+
+
+def _json_default(value):
+    return str(value)
+
+
+class _CsvEncoder:
+    """对象按键展开为列（以第一行的键为表头），其余值写入 value 列"""
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.columns = None
+
+    def encode(self, values, first):
+        if self.columns is None and values:
+            sample = values[0]
+            self.columns = list(sample.keys()) if isinstance(sample, dict) else ['value']
+            # 带 BOM，便于 Excel 正确识别 UTF-8
+            self.buffer.write('\ufeff')
+            self.writer.writerow(self.columns)
+
+        for value in values:
+            if isinstance(value, dict):
+                self.writer.writerow([self._cell(value.get(column)) for column in self.columns])
+            else:
+                self.writer.writerow([self._cell(value)])
+
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False, default=_json_default)
+        return value
+
+    def finish(self, empty):
+        return ''
+
+
+class _NdjsonEncoder:
+    def encode(self, values, first):
+        return ''.join(json.dumps(value, ensure_ascii=False, default=_json_default) + '\n' for value in values)
+
+    def finish(self, empty):
+        return ''
+
+
+class _JsonArrayEncoder:
+    def encode(self, values, first):
+        items = ','.join(json.dumps(value, ensure_ascii=False, default=_json_default) for value in values)
+        if first:
+            return '[' + items
+        return ',' + items if items else ''
+
+    def finish(self, empty):
+        return '[]' if empty else ']'
+
+
+_ENCODERS = {
+    'csv': _CsvEncoder,
+    'ndjson': _NdjsonEncoder,
+    'json': _JsonArrayEncoder,
+}
+
+
+class StreamingExport:
+    """流式导出：迭代得到的字节块同时写入导出文件，完成后回调 on_complete(文件相对路径, 行数)"""
+
+    def __init__(self, value_batches, export_format, on_complete=None):
+        self.value_batches = value_batches
+        self.export_format = export_format
+        self.on_complete = on_complete
+        self.row_count = 0
+
+        extension = EXPORT_FORMATS[export_format][1]
+        self.relative_path = os.path.join(EXPORT_DIR, f'{uuid.uuid4().hex}.{extension}')
+        self.absolute_path = os.path.join(settings.MEDIA_ROOT, self.relative_path)
+
+    @property
+    def filename(self):
+        return os.path.basename(self.relative_path)
+
+    def __iter__(self):
+        os.makedirs(os.path.dirname(self.absolute_path), exist_ok=True)
+        encoder = _ENCODERS[self.export_format]()
+        completed = False
+        try:
+            with open(self.absolute_path, 'wb') as export_file:
+                first = True
+                for values in self.value_batches:
+                    if first and not values:
+                        continue
+                    chunk = encoder.encode(values, first).encode('utf-8')
+                    first = False
+                    self.row_count += len(values)
+                    if chunk:
+                        export_file.write(chunk)
+                        yield chunk
+
+                tail = encoder.finish(empty=first).encode('utf-8')
+                if tail:
+                    export_file.write(tail)
+                    yield tail
+            completed = True
+        finally:
+            # 客户端中断或生成失败时删除不完整的导出文件
+            if not completed and os.path.exists(self.absolute_path):
+                os.remove(self.absolute_path)
+
+        if self.on_complete is not None:
+            try:
+                self.on_complete(self.relative_path, self.row_count)
+            except Exception as e:
+                logger.error(f'保存导出记录失败: {str(e)}', exc_info=True)
+
+    async def as_async(self):
+        """ASGI 下使用的异步迭代器：每个字节块在线程中生成
+
+        StreamingHttpResponse 在 ASGI 下遇到同步迭代器会先把全部内容读入列表再发送，
+        大导出会占满内存，因此 ASGI 请求需要传入本方法返回的异步迭代器
+        """
+        chunks = iter(self)
+        next_chunk = sync_to_async(next)
+        try:
+            while True:
+                chunk = await next_chunk(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            # 客户端中断时关闭生成器，删除不完整的导出文件
+            await sync_to_async(chunks.close)()
+
+
+def open_export_file(relative_path):
+    """打开导出文件，路径不在导出目录下时返回None"""
+    export_root = os.path.realpath(os.path.join(settings.MEDIA_ROOT, EXPORT_DIR))
+    absolute_path = os.path.realpath(os.path.join(settings.MEDIA_ROOT, relative_path))
+    if not absolute_path.startswith(export_root + os.sep) or not os.path.exists(absolute_path):
+        return None
+    return open(absolute_path, 'rb')
@@ -33,6 +33,7 @@ class DataFactoryRecord(models.Model):
     tool_scenario = models.CharField(max_length=20, choices=TOOL_SCENARIOS, verbose_name='使用场景')
     input_data = models.JSONField(verbose_name='输入数据', null=True, blank=True)
     output_data = models.JSONField(verbose_name='输出数据')
+    output_file = models.CharField(max_length=255, blank=True, default='', verbose_name='输出文件')
     is_saved = models.BooleanField(default=True, verbose_name='是否保存')
     tags = models.JSONField(verbose_name='标签', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
@@ -14,10 +14,10 @@ class DataFactoryRecordSerializer(serializers.ModelSerializer):
         model = DataFactoryRecord
         fields = [
             'id', 'user', 'user_name', 'tool_name', 'tool_name_display', 'tool_category', 'tool_category_display',
-            'tool_scenario', 'tool_scenario_display', 'input_data', 'output_data',
+            'tool_scenario', 'tool_scenario_display', 'input_data', 'output_data', 'output_file',
             'is_saved', 'tags', 'created_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at']
+        read_only_fields = ['id', 'user', 'output_file', 'created_at']
 
     def get_tool_name_display(self, obj):
         """获取工具名称的显示名称"""
@@ -1,4 +1,74 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
 
-# Create your tests here.
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, override_settings
 
+from .exporters import StreamingExport
+from .tools.batch_tools import BatchTools
+from .tools.test_data_tools import TestDataTools
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StreamingExportAsgiTests(SimpleTestCase):
+    """ASGI 下流式导出必须逐块发送，不能先把整个文件读入内存"""
+
+    def _batches(self, consumed, count=5):
+        for index in range(count):
+            consumed.append(index)
+            yield [{'id': index * 2}, {'id': index * 2 + 1}]
+
+    def _consume(self, response, stop_after=None):
+        async def run():
+            chunks = []
+            iterator = response.__aiter__()
+            async for chunk in iterator:
+                chunks.append(chunk)
+                if stop_after is not None and len(chunks) >= stop_after:
+                    await iterator.aclose()
+                    break
+            return chunks
+        return asyncio.run(run())
+
+    def test_first_chunk_sent_before_all_batches_generated(self):
+        consumed = []
+        completed = []
+        export = StreamingExport(self._batches(consumed), 'ndjson',
+                                 on_complete=lambda path, rows: completed.append(rows))
+        response = StreamingHttpResponse(export.as_async())
+        self.assertTrue(response.is_async)
+
+        async def first_chunk():
+            iterator = response.__aiter__()
+            chunk = await iterator.__anext__()
+            batches_generated = len(consumed)
+            rest = [part async for part in iterator]
+            return chunk, batches_generated, rest
+
+        chunk, batches_generated, rest = asyncio.run(first_chunk())
+        self.assertEqual(chunk, b'{"id": 0}\n{"id": 1}\n')
+        self.assertEqual(batches_generated, 1)
+        self.assertEqual(len(rest), 4)
+        self.assertEqual(completed, [10])
+        with open(export.absolute_path, 'rb') as f:
+            self.assertEqual(f.read(), chunk + b''.join(rest))
+
+    def test_client_disconnect_removes_partial_file(self):
+        export = StreamingExport(self._batches([]), 'json')
+        chunks = self._consume(StreamingHttpResponse(export.as_async()), stop_after=2)
+        self.assertEqual(len(chunks), 2)
+        self.assertFalse(os.path.exists(export.absolute_path))
+
+
+class BatchToolsTests(SimpleTestCase):
+    """批量生成的结果结构必须与逐条生成一致"""
+
+    def test_coordinates_have_same_keys_as_single_generation(self):
+        single = TestDataTools.generate_coordinates()['result']
+        batch = BatchTools.generate_coordinates(count=3)['result']
+        self.assertEqual(len(batch), 3)
+        for item in batch:
+            self.assertEqual(set(item), set(single))
+            self.assertEqual(item['longitude_formatted'], f"{item['longitude']:.6f}°")
+            self.assertEqual(item['latitude_formatted'], f"{item['latitude']:.6f}°")
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# -----------------------------
+# @Software  : PyCharm
+# @FileName  : batch_tools.py
+# -----------------------------
+"""
+批量数据生成工具 - 基于NumPy向量化生成
+一次调用生成整批数据，用于批量生成和压测数据准备；
+参数与 RandomTools / TestDataTools 中的同名工具保持一致
+"""
+import logging
+import os
+import string
+from typing import Dict, Any, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 身份证前6位地区码（各省会城市市辖区）
+ID_CARD_AREA_CODES = (
+    110101, 110105, 120101, 130102, 140105, 150102, 210102, 220102, 230102, 310101,
+    310104, 320102, 330102, 340102, 350102, 360102, 370102, 410102, 420102, 430102,
+    440103, 440305, 450102, 460105, 500101, 510104, 520102, 530102, 540102, 610102,
+    620102, 630102, 640104, 650102,
+)
+ID_CARD_WEIGHTS = np.array([7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2])
+ID_CARD_CHECK_CODES = np.array(list('10X98765432'))
+
+# 手机号前3位号段
+PHONE_PREFIXES = (
+    130, 131, 132, 133, 134, 135, 136, 137, 138, 139, 150, 151, 152, 153, 155, 156,
+    157, 158, 159, 166, 173, 175, 176, 177, 178, 180, 181, 182, 183, 184, 185, 186,
+    187, 188, 189, 191, 198, 199,
+)
+
+CHAR_SETS = {
+    'all': string.ascii_letters + string.digits + string.punctuation,
+    'letters': string.ascii_letters,
+    'lowercase': string.ascii_lowercase,
+    'uppercase': string.ascii_uppercase,
+    'digits': string.digits,
+    'alphanumeric': string.ascii_letters + string.digits,
+    'hex': string.hexdigits.lower(),
+    'special': string.punctuation,
+}
+
+HEX_BYTES = np.array([f'{i:02x}' for i in range(256)])
+
+_rng = np.random.default_rng()
+
+
+def _join_columns(columns, separator=''):
+    """按列拼接字符串数组"""
+    result = columns[0]
+    for column in columns[1:]:
+        if separator:
+            result = np.char.add(result, separator)
+        result = np.char.add(result, column)
+    return result
+
+
+class BatchTools:
+    """批量数据生成工具类"""
+
+    @staticmethod
+    def random_int(min_val: int = 1, max_val: int = 100, count: int = 1) -> Dict[str, Any]:
+        """批量生成随机整数"""
+        result = _rng.integers(min_val, max_val, size=count, endpoint=True).tolist()
+        return {'success': True, 'result': result, 'count': len(result)}
+
+    @staticmethod
+    def random_float(min_val: float = 0.0, max_val: float = 1.0, precision: int = 2, count: int = 1) -> Dict[str, Any]:
+        """批量生成随机浮点数"""
+        result = np.round(_rng.uniform(min_val, max_val, size=count), precision).tolist()
+        return {'success': True, 'result': result, 'count': len(result)}
+
+    @staticmethod
+    def random_boolean(count: int = 1) -> Dict[str, Any]:
+        """批量生成随机布尔值"""
+        result = (_rng.random(count) < 0.5).tolist()
+        return {'success': True, 'result': result, 'count': len(result)}
+
+    @staticmethod
+    def random_string(length: int = 10, char_type: str = 'all', count: int = 1) -> Dict[str, Any]:
+        """批量生成随机字符串（不支持中文字符集）"""
+        if char_type not in CHAR_SETS:
+            return {'result': False, 'error': f'不支持的字符类型: {char_type}'}
+        chars = np.frombuffer(CHAR_SETS[char_type].encode('ascii'), dtype=np.uint8)
+        codes = chars[_rng.integers(0, len(chars), size=(count, length))]
+        result = codes.view(f'S{length}').ravel().astype(f'U{length}').tolist()
+        return {'success': True, 'result': result, 'count': len(result), 'string_length': length}
+
+    @staticmethod
+    def random_uuid(version: int = 4, count: int = 1) -> Dict[str, Any]:
+        """批量生成UUID（仅支持版本4）"""
+        if version != 4:
+            return {'result': False, 'error': f'批量生成不支持的UUID版本: {version}'}
+        raw = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+        raw[:, 6] = (raw[:, 6] & 0x0f) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3f) | 0x80
+        hex_parts = HEX_BYTES[raw]
+        groups = [_join_columns(list(hex_parts[:, start:end].T)) for start, end in ((0, 4), (4, 6), (6, 8), (8, 10), (10, 16))]
+        result = _join_columns(groups, '-').tolist()
+        return {'success': True, 'result': result, 'version': version, 'count': len(result)}
+
+    @staticmethod
+    def random_mac_address(separator: str = ':', count: int = 1) -> Dict[str, Any]:
+        """批量生成MAC地址（单播地址）"""
+        raw = _rng.integers(0, 256, size=(count, 6), dtype=np.uint8)
+        raw[:, 0] &= 0xfe
+        result = _join_columns(list(HEX_BYTES[raw].T), separator).tolist()
+        return {'success': True, 'result': result, 'count': len(result)}
+
+    @staticmethod
+    def random_ip_address(ip_version: int = 4, count: int = 1) -> Dict[str, Any]:
+        """批量生成IP地址"""
+        if ip_version == 4:
+            parts = _rng.integers(0, 256, size=(count, 4)).astype(str)
+            result = _join_columns(list(parts.T), '.').tolist()
+        elif ip_version == 6:
+            raw = _rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+            hex_parts = HEX_BYTES[raw]
+            groups = [np.char.add(hex_parts[:, i], hex_parts[:, i + 1]) for i in range(0, 16, 2)]
+            result = _join_columns(groups, ':').tolist()
+        else:
+            return {'result': False, 'error': f'不支持的IP版本: {ip_version}'}
+        return {'success': True, 'result': result, 'version': ip_version, 'count': len(result)}
+
+    @staticmethod
+    def random_date(start_date: str = '2024-01-01', end_date: str = '2024-12-31', count: int = 1,
+                    date_format: str = '%Y-%m-%d') -> Dict[str, Any]:
+        """批量生成随机日期"""
+        start = np.datetime64(start_date, 's')
+        span = int((np.datetime64(end_date, 's') - start).astype(np.int64))
+        values = start + _rng.integers(0, span, size=count, endpoint=True).astype('timedelta64[s]')
+        if date_format == '%Y-%m-%d':
+            result = np.datetime_as_string(values, unit='D').tolist()
+        elif date_format == '%Y-%m-%d %H:%M:%S':
+            result = np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ').tolist()
+        else:
+            result = [value.strftime(date_format) for value in values.astype(object)]
+        return {'success': True, 'result': result, 'count': len(result), 'format': date_format}
+
+    @staticmethod
+    def random_color(format: str = 'hex', count: int = 1) -> Dict[str, Any]:
+        """批量生成随机颜色（hex/rgb）"""
+        rgb = _rng.integers(0, 256, size=(count, 3), dtype=np.uint8)
+        if format == 'hex':
+            result = np.char.add('#', _join_columns(list(HEX_BYTES[rgb].T))).tolist()
+        elif format == 'rgb':
+            joined = _join_columns(list(rgb.astype(str).T), ', ')
+            result = np.char.add(np.char.add('rgb(', joined), ')').tolist()
+        else:
+            return {'result': False, 'error': f'批量生成不支持的格式: {format}'}
+        return {'success': True, 'result': result, 'count': len(result), 'format': format}
+
+    @staticmethod
+    def generate_chinese_phone(region: str = 'all', count: int = 1) -> Dict[str, Any]:
+        """批量生成中国手机号"""
+        prefixes = np.array(PHONE_PREFIXES, dtype=np.int64)[_rng.integers(0, len(PHONE_PREFIXES), size=count)]
+        numbers = prefixes * 10 ** 8 + _rng.integers(0, 10 ** 8, size=count)
+        result = numbers.astype(str).tolist()
+        return {'success': True, 'result': result, 'count': len(result)}
+
+    @staticmethod
+    def generate_id_card(count: int = 1) -> Dict[str, Any]:
+        """批量生成身份证号（18位，含校验码）"""
+        areas = np.array(ID_CARD_AREA_CODES, dtype=np.int64)[_rng.integers(0, len(ID_CARD_AREA_CODES), size=count)]
+
+        # 出生日期：1950-01-01 ~ 2005-12-31
+        start = np.datetime64('1950-01-01')
+        span = int((np.datetime64('2005-12-31') - start).astype(np.int64))
+        birthdays = start + _rng.integers(0, span, size=count, endpoint=True).astype('timedelta64[D]')
+        birth = np.char.replace(np.datetime_as_string(birthdays, unit='D'), '-', '').astype(np.int64)
+
+        sequence = _rng.integers(0, 1000, size=count)
+        body = areas * 10 ** 11 + birth * 10 ** 3 + sequence
+
+        digits = (body[:, None] // 10 ** np.arange(16, -1, -1, dtype=np.int64)) % 10
+        check_codes = ID_CARD_CHECK_CODES[(digits @ ID_CARD_WEIGHTS) % 11]
+        result = np.char.add(body.astype(str), check_codes).tolist()
+        return {'success': True, 'result': result, 'count': len(result)}
+
+    @staticmethod
+    def generate_coordinates(count: int = 1) -> Dict[str, Any]:
+        """批量生成经纬度（中国范围）"""
+        longitudes = np.round(_rng.uniform(73.0, 135.0, size=count), 6).tolist()
+        latitudes = np.round(_rng.uniform(18.0, 54.0, size=count), 6).tolist()
+        result = [
+            {
+                'longitude': longitude,
+                'latitude': latitude,
+                'longitude_formatted': f'{longitude:.6f}°',
+                'latitude_formatted': f'{latitude:.6f}°'
+            }
+            for longitude, latitude in zip(longitudes, latitudes)
+        ]
+        return {'success': True, 'result': result, 'count': len(result)}
+
+
+# 支持向量化批量生成的工具
+BATCH_TOOL_MAPPING = {
+    'random_int': BatchTools.random_int,
+    'random_float': BatchTools.random_float,
+    'random_boolean': BatchTools.random_boolean,
+    'random_string': BatchTools.random_string,
+    'random_uuid': BatchTools.random_uuid,
+    'random_mac_address': BatchTools.random_mac_address,
+    'random_ip_address': BatchTools.random_ip_address,
+    'random_date': BatchTools.random_date,
+    'random_color': BatchTools.random_color,
+    'generate_chinese_phone': BatchTools.generate_chinese_phone,
+    'generate_id_card': BatchTools.generate_id_card,
+    'generate_coordinates': BatchTools.generate_coordinates,
+}
+
+
+def generate_batch(tool_name: str, input_data: dict, count: int) -> List[Any] | None:
+    """向量化批量生成，返回结果列表；工具不支持批量生成或参数不适用时返回None"""
+    tool = BATCH_TOOL_MAPPING.get(tool_name)
+    if tool is None:
+        return None
+    kwargs = dict(input_data) if isinstance(input_data, dict) else {}
+    kwargs['count'] = count
+    try:
+        result = tool(**kwargs)
+    except TypeError:
+        # 输入参数与批量工具签名不一致，交由逐条生成处理
+        return None
+    except Exception as e:
+        logger.error(f'批量生成失败: {tool_name}, {str(e)}', exc_info=True)
+        return None
+    if 'error' in result:
+        return None
+    return result['result']
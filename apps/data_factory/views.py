@@ -11,16 +11,20 @@ from rest_framework.viewsets import GenericViewSet
 from django.contrib.auth.models import User
 from django.db.models import Q, Count
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
 from django.core.cache import cache
 from django.views.decorators.csrf import csrf_exempt
 from asgiref.sync import sync_to_async
 import asyncio
 
 import logging
+import os
 from pathlib import Path
 
 from .models import DataFactoryRecord
+from .exporters import EXPORT_FORMATS, StreamingExport, iter_values, open_export_file
 from .serializers import DataFactoryRecordSerializer, ToolExecuteSerializer
 from .tool_list import get_categories, get_tool_list
 from .tools.string_tools import StringTools
@@ -28,6 +32,7 @@ from .tools.encoding_tools import EncodingTools
 from .tools.random_tools import RandomTools
 from .tools.encryption_tools import EncryptionTools
 from .tools.test_data_tools import TestDataTools
+from .tools.batch_tools import generate_batch
 from .tools.json_tools import JsonTools
 from .tools.crontab_tools import CrontabTools
 from .tools.image_tools import ImageTools
@@ -52,7 +57,7 @@ class DataFactoryViewSet(viewsets.ModelViewSet):
         """获取当前用户的记录"""
         return DataFactoryRecord.objects.filter(user=self.request.user).only(
             'id', 'user', 'tool_name', 'tool_category', 'tool_scenario',
-            'input_data', 'output_data', 'is_saved', 'tags', 'created_at', 'updated_at'
+            'input_data', 'output_data', 'output_file', 'is_saved', 'tags', 'created_at', 'updated_at'
         ).order_by('-created_at')
 
     def filter_queryset(self, queryset):
@@ -163,8 +168,13 @@ class DataFactoryViewSet(viewsets.ModelViewSet):
             instance = self.get_object()
             logger.info(f'成功获取记录: ID={instance.id}, 用户ID={instance.user.id}')
             
-            # 删除记录
+            # 删除记录及其导出文件
+            output_file = instance.output_file
             instance.delete()
+            if output_file:
+                export_file = os.path.join(settings.MEDIA_ROOT, output_file)
+                if os.path.exists(export_file):
+                    os.remove(export_file)
             logger.info(f'成功删除记录: ID={kwargs.get("pk")}')
             
             # 清除相关缓存
@@ -642,12 +652,17 @@ class DataFactoryViewSet(viewsets.ModelViewSet):
                         pass  # 保存失败不影响返回结果
                 return Response(cached_result)
 
-        # 批量生成
-        results = []
-        for i in range(count):
-            result = self.execute_tool(tool_name, tool_category, input_data)
-            if 'error' not in result:
-                results.append(result)
+        # 批量生成：支持向量化的工具一次生成整批数据，其余工具逐条生成
+        count = int(count)
+        values = generate_batch(tool_name, input_data, count) if count > 1 else None
+        if values is not None:
+            results = [{'success': True, 'result': value} for value in values]
+        else:
+            results = []
+            for i in range(count):
+                result = self.execute_tool(tool_name, tool_category, input_data)
+                if 'error' not in result:
+                    results.append(result)
 
         # 构建响应数据
         response_data = {
@@ -678,6 +693,78 @@ class DataFactoryViewSet(viewsets.ModelViewSet):
 
         return Response(response_data)
 
+    @action(detail=False, methods=['post'])
+    def export(self, request):
+        """流式导出批量数据（CSV / NDJSON / JSON数组），记录中只保存导出文件路径"""
+        tool_name = request.data.get('tool_name')
+        tool_category = request.data.get('tool_category')
+        tool_scenario = request.data.get('tool_scenario')
+        input_data = request.data.get('input_data', {})
+        export_format = request.data.get('export_format', 'csv')
+
+        if not tool_name or not tool_category:
+            return Response(
+                {'error': '缺少必要参数: tool_name 或 tool_category'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'不支持的导出格式: {export_format}，可选: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            count = int(request.data.get('count', 10))
+        except (TypeError, ValueError):
+            return Response({'error': 'count 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+        if count < 1 or count > settings.DATA_FACTORY_EXPORT_MAX_ROWS:
+            return Response(
+                {'error': f'count 必须在 1 ~ {settings.DATA_FACTORY_EXPORT_MAX_ROWS} 之间'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request.user
+        is_saved = request.data.get('is_saved', True)
+
+        def save_record(relative_path, row_count):
+            if not is_saved:
+                return
+            DataFactoryRecord.objects.create(
+                user=user,
+                tool_name=tool_name,
+                tool_category=tool_category,
+                tool_scenario=tool_scenario,
+                input_data=input_data,
+                output_data={'file': relative_path, 'format': export_format, 'count': row_count},
+                output_file=relative_path,
+                is_saved=True
+            )
+            self.clear_user_cache(user.id)
+
+        streaming_export = StreamingExport(
+            iter_values(tool_name, tool_category, input_data, count, self.execute_tool),
+            export_format,
+            on_complete=save_record
+        )
+        # ASGI（daphne）下必须使用异步迭代器，否则 Django 会先把整个文件读入内存再发送
+        content = streaming_export.as_async() if isinstance(request._request, ASGIRequest) else streaming_export
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format][0])
+        response['Content-Disposition'] = f'attachment; filename="{tool_name}_{streaming_export.filename}"'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """下载记录关联的导出文件"""
+        record = self.get_object()
+        export_file = open_export_file(record.output_file) if record.output_file else None
+        if export_file is None:
+            return Response({'error': '导出文件不存在'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            export_file,
+            as_attachment=True,
+            filename=f'{record.tool_name}_{os.path.basename(record.output_file)}'
+        )
+
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """获取使用统计"""
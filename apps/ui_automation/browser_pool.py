@@ -0,0 +1,452 @@
+"""
+预热浏览器池
+进程内常驻若干个 Chromium 进程（开启远程调试端口），UI执行不再每次冷启动浏览器，
+而是通过 CDP 连接池中已运行的浏览器并新建独立的上下文，执行结束只关闭上下文、断开连接。
+
+- UI_BROWSER_POOL_SIZE: 池中最多常驻的浏览器数，0 表示不启用
+- UI_BROWSER_POOL_IDLE_TIMEOUT: 空闲超过该秒数的浏览器被关闭
+- UI_BROWSER_POOL_MAX_REUSE: 单个浏览器最多被租用的次数，达到后不再分配，归还后关闭重建
+- UI_BROWSER_POOL_HEALTH_INTERVAL: 后台巡检间隔，空闲浏览器的调试端口无响应时剔除
+
+Playwright 的 sync 对象不能跨线程使用，池中只管理浏览器进程，每个线程自己通过 CDP 连接。
+只支持 Chromium 内核（chrome / edge），firefox / webkit 以及池已满、启动失败时由调用方冷启动
+
+浏览器进程的生命周期与执行进程绑定：Linux 下通过 PR_SET_PDEATHSIG 在执行进程退出（包括被 SIGKILL）时结束浏览器，
+浏览器在独立的进程组中运行；池创建时清理已退出的执行进程遗留的浏览器进程组和 testhub-browser-* 临时目录
+"""
+import asyncio
+import atexit
+import ctypes
+import glob
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import urllib.request
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 与冷启动 Chromium 时的参数保持一致
+CHROMIUM_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--ignore-certificate-errors',
+    '--ignore-ssl-errors',
+    '--ignore-certificate-errors-spki-list',
+]
+
+_LAUNCH_TIMEOUT = 30
+_HEALTH_CHECK_TIMEOUT = 3
+
+_DIR_PREFIX = 'testhub-browser-'
+# 用户数据目录中记录执行进程和浏览器进程 PID 的文件
+_OWNER_FILE = 'testhub-owner.json'
+_PR_SET_PDEATHSIG = 1
+
+
+def _die_with_parent():
+    """子进程 exec 前执行：父进程（启动线程）退出时内核向浏览器发送 SIGKILL"""
+    ctypes.CDLL(None, use_errno=True).prctl(_PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _is_pool_browser(pid, user_data_dir):
+    """PID 仍是使用该用户数据目录的浏览器进程（防止 PID 被复用后误杀其他进程）"""
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            cmdline = f.read().decode(errors='replace')
+    except OSError:
+        return False
+    return f'--user-data-dir={user_data_dir}' in cmdline
+
+
+def cleanup_stale_browsers():
+    """清理已退出的执行进程遗留的浏览器进程组和用户数据目录，返回清理的目录数"""
+    removed = 0
+    for user_data_dir in glob.glob(os.path.join(tempfile.gettempdir(), f'{_DIR_PREFIX}*')):
+        try:
+            with open(os.path.join(user_data_dir, _OWNER_FILE), encoding='utf-8') as f:
+                owner = json.load(f)
+        except (OSError, ValueError):
+            owner = None
+        if owner is None:
+            # 没有记录文件：启动过程中被中断，目录创建超过启动时限后视为遗留
+            try:
+                if time.time() - os.path.getmtime(user_data_dir) < _LAUNCH_TIMEOUT:
+                    continue
+            except OSError:
+                continue
+        elif _pid_alive(owner.get('owner', 0)):
+            continue
+        else:
+            pid = owner.get('pid')
+            if pid and hasattr(os, 'killpg') and _is_pool_browser(pid, user_data_dir):
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                    logger.info(f"浏览器池清理遗留浏览器进程组 pid={pid}")
+                except OSError as e:
+                    logger.debug(f"结束遗留浏览器进程 {pid} 失败: {e}")
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+class PooledBrowser:
+    """池中的一个浏览器进程"""
+
+    def __init__(self, process, ws_endpoint, headless, user_data_dir):
+        self.process = process
+        self.ws_endpoint = ws_endpoint
+        self.headless = headless
+        self.user_data_dir = user_data_dir
+        self.uses = 0  # 累计租用次数
+        self.leases = 0  # 当前租用数
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def is_healthy(self):
+        """进程存活且调试端口有响应"""
+        if not self.alive:
+            return False
+        endpoint = urlparse(self.ws_endpoint)
+        try:
+            with urllib.request.urlopen(
+                f'http://{endpoint.netloc}/json/version', timeout=_HEALTH_CHECK_TIMEOUT
+            ) as response:
+                return json.loads(response.read()).get('webSocketDebuggerUrl') == self.ws_endpoint
+        except Exception:
+            return False
+
+    def terminate(self):
+        """关闭浏览器进程并清理用户数据目录"""
+        if self.alive:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                # 浏览器在独立进程组中运行，连同渲染等子进程一起结束
+                if hasattr(os, 'killpg'):
+                    try:
+                        os.killpg(self.process.pid, signal.SIGKILL)
+                    except OSError:
+                        self.process.kill()
+                else:
+                    self.process.kill()
+                self.process.wait()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class BrowserPool:
+    """带健康检查的 Chromium 浏览器池
+
+    size: 最多常驻的浏览器数
+    idle_timeout: 空闲关闭时长（秒），0 表示不按空闲关闭
+    max_reuse: 单个浏览器最多租用次数，0 表示不限制
+    health_interval: 后台巡检间隔（秒）
+    """
+
+    def __init__(self, size, idle_timeout=300, max_reuse=50, health_interval=30):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_reuse = max_reuse
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._browsers = []
+        self._launching = 0
+        self._janitor = None
+        self._closed = threading.Event()
+        # PR_SET_PDEATHSIG 在启动子进程的线程退出时触发，浏览器统一由常驻的启动线程创建
+        self._launcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser-pool-launcher')
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def _exhausted(self, browser):
+        return bool(self.max_reuse) and browser.uses >= self.max_reuse
+
+    def acquire(self, executable_path, headless):
+        """租用一个浏览器，返回 PooledBrowser；池已满且没有可用浏览器或启动失败时返回None
+
+        优先分配空闲的浏览器；都在使用中时池未满则启动新的，池已满则与租用数最少的共用（各自独立的上下文）
+        """
+        retired = None
+        with self._lock:
+            if not self.enabled or self._closed.is_set():
+                return None
+            self._start_janitor_locked()
+            candidates = [
+                browser for browser in self._browsers
+                if browser.headless == headless and browser.alive and not self._exhausted(browser)
+            ]
+            best = min(candidates, key=lambda browser: browser.leases, default=None)
+            full = len(self._browsers) + self._launching >= self.size
+            if best is not None and (best.leases == 0 or full):
+                self._lease_locked(best)
+                return best
+            if full:
+                # 池已满：腾出一个空闲的浏览器（无头模式不同或已达复用上限）给本次启动
+                retired = next((browser for browser in self._browsers if browser.leases == 0), None)
+                if retired is None:
+                    return None
+                self._browsers.remove(retired)
+            self._launching += 1
+
+        if retired is not None:
+            retired.terminate()
+        try:
+            browser = self._launch(executable_path, headless)
+        except Exception as e:
+            logger.warning(f"浏览器池启动 Chromium 失败: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._launching -= 1
+
+        with self._lock:
+            self._browsers.append(browser)
+            self._lease_locked(browser)
+        logger.info(f"浏览器池启动新浏览器 pid={browser.process.pid}，当前 {len(self._browsers)}/{self.size}")
+        return browser
+
+    def release(self, browser, broken=False):
+        """归还浏览器；broken 为 True（连接失败等）或已达复用上限且无人使用时关闭"""
+        with self._lock:
+            browser.leases = max(0, browser.leases - 1)
+            browser.last_used = time.monotonic()
+            retire = browser in self._browsers and (
+                broken or not browser.alive or (self._exhausted(browser) and browser.leases == 0)
+            )
+            if retire:
+                self._browsers.remove(browser)
+        if retire:
+            logger.info(f"浏览器池关闭浏览器 pid={browser.process.pid}（已租用 {browser.uses} 次）")
+            browser.terminate()
+
+    def stats(self):
+        """当前池中浏览器的情况"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'size': self.size,
+                'launching': self._launching,
+                'browsers': [
+                    {
+                        'pid': browser.process.pid,
+                        'headless': browser.headless,
+                        'alive': browser.alive,
+                        'uses': browser.uses,
+                        'leases': browser.leases,
+                        'idle_seconds': round(now - browser.last_used, 1) if browser.leases == 0 else 0,
+                    }
+                    for browser in self._browsers
+                ],
+            }
+
+    def shutdown(self):
+        """关闭池中所有浏览器（进程退出时调用）"""
+        self._closed.set()
+        with self._lock:
+            browsers, self._browsers = self._browsers, []
+        for browser in browsers:
+            browser.terminate()
+        self._launcher.shutdown(wait=False)
+
+    def _lease_locked(self, browser):
+        browser.uses += 1
+        browser.leases += 1
+        browser.last_used = time.monotonic()
+
+    def _launch(self, executable_path, headless):
+        """启动开启远程调试端口的 Chromium，等待其写出 DevToolsActivePort 后返回"""
+        user_data_dir = tempfile.mkdtemp(prefix=_DIR_PREFIX)
+        args = [
+            executable_path,
+            '--remote-debugging-port=0',
+            f'--user-data-dir={user_data_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--no-sandbox',
+            *CHROMIUM_ARGS,
+        ]
+        if headless:
+            args += ['--headless=new', '--hide-scrollbars', '--mute-audio']
+        args.append('about:blank')
+        process = self._launcher.submit(self._spawn, args).result()
+        try:
+            with open(os.path.join(user_data_dir, _OWNER_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'owner': os.getpid(), 'pid': process.pid}, f)
+        except OSError as e:
+            logger.debug(f"写入浏览器进程记录失败: {e}")
+
+        port_file = os.path.join(user_data_dir, 'DevToolsActivePort')
+        deadline = time.monotonic() + _LAUNCH_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                break
+            try:
+                with open(port_file) as f:
+                    lines = f.read().split()
+            except OSError:
+                lines = []
+            if len(lines) >= 2:
+                ws_endpoint = f'ws://127.0.0.1:{lines[0]}{lines[1]}'
+                return PooledBrowser(process, ws_endpoint, headless, user_data_dir)
+            time.sleep(0.1)
+
+        PooledBrowser(process, '', headless, user_data_dir).terminate()
+        raise RuntimeError(f'Chromium 未能在 {_LAUNCH_TIMEOUT} 秒内开启调试端口')
+
+    @staticmethod
+    def _spawn(args):
+        options = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+        if os.name == 'posix':
+            options['start_new_session'] = True
+        if sys.platform.startswith('linux'):
+            options['preexec_fn'] = _die_with_parent
+        return subprocess.Popen(args, **options)
+
+    def _start_janitor_locked(self):
+        if self._janitor is None or not self._janitor.is_alive():
+            self._janitor = threading.Thread(target=self._janitor_loop, name='browser-pool-janitor', daemon=True)
+            self._janitor.start()
+
+    def _janitor_loop(self):
+        while not self._closed.wait(self.health_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"浏览器池巡检出错: {e}", exc_info=True)
+
+    def check(self):
+        """剔除已退出的浏览器，关闭空闲超时或健康检查失败的空闲浏览器"""
+        now = time.monotonic()
+        with self._lock:
+            dead = [browser for browser in self._browsers if not browser.alive]
+            idle = [browser for browser in self._browsers if browser.alive and browser.leases == 0]
+            for browser in dead:
+                self._browsers.remove(browser)
+
+        retired = list(dead)
+        for browser in idle:
+            if self.idle_timeout and now - browser.last_used > self.idle_timeout:
+                reason = '空闲超时'
+            elif not browser.is_healthy():
+                reason = '健康检查失败'
+            else:
+                continue
+            with self._lock:
+                # 检查期间可能已被租出
+                if browser.leases or browser not in self._browsers:
+                    continue
+                self._browsers.remove(browser)
+            logger.info(f"浏览器池关闭浏览器 pid={browser.process.pid}：{reason}")
+            retired.append(browser)
+
+        for browser in retired:
+            browser.terminate()
+
+
+class BrowserLease:
+    """租用的浏览器上下文，close() 关闭上下文、断开连接并把浏览器归还给池"""
+
+    def __init__(self, browser, context, pooled=None, pool=None):
+        self.browser = browser
+        self.context = context
+        self.pooled = pooled
+        self._pool = pool
+        self._closed = False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self.context is not None:
+            try:
+                self.context.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器上下文失败: {e}")
+        try:
+            # 冷启动的浏览器关闭进程；CDP 连接的浏览器只断开连接
+            self.browser.close()
+        except Exception as e:
+            logger.debug(f"关闭浏览器连接失败: {e}")
+        if self.pooled is not None:
+            self._pool.release(self.pooled)
+
+
+def connect_pooled_browser(browser_type, headless):
+    """从池中租用 Chromium 并通过 CDP 连接（sync API）
+
+    browser_type 为 playwright.chromium，返回 (Browser, PooledBrowser)；池未启用或不可用时返回 (None, None)
+    """
+    pool = get_browser_pool()
+    pooled = pool.acquire(browser_type.executable_path, headless)
+    if pooled is None:
+        return None, None
+    try:
+        return browser_type.connect_over_cdp(pooled.ws_endpoint), pooled
+    except Exception as e:
+        logger.warning(f"连接池中浏览器失败，改为冷启动: {e}")
+        pool.release(pooled, broken=True)
+        return None, None
+
+
+async def connect_pooled_browser_async(browser_type, headless):
+    """connect_pooled_browser 的 async API 版本，启动浏览器时不阻塞事件循环"""
+    pool = get_browser_pool()
+    pooled = await asyncio.to_thread(pool.acquire, browser_type.executable_path, headless)
+    if pooled is None:
+        return None, None
+    try:
+        return await browser_type.connect_over_cdp(pooled.ws_endpoint), pooled
+    except Exception as e:
+        logger.warning(f"连接池中浏览器失败，改为冷启动: {e}")
+        pool.release(pooled, broken=True)
+        return None, None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """进程内共享的浏览器池"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool(
+                    size=settings.UI_BROWSER_POOL_SIZE,
+                    idle_timeout=settings.UI_BROWSER_POOL_IDLE_TIMEOUT,
+                    max_reuse=settings.UI_BROWSER_POOL_MAX_REUSE,
+                    health_interval=settings.UI_BROWSER_POOL_HEALTH_INTERVAL,
+                )
+                if _pool.enabled:
+                    try:
+                        cleanup_stale_browsers()
+                    except Exception as e:
+                        logger.warning(f"清理遗留浏览器失败: {e}")
+                atexit.register(_pool.shutdown)
+    return _pool
@@ -0,0 +1,51 @@
+"""
+登录状态缓存
+套件开启 cache_login_state 后第一个用例视为登录用例：执行通过后把浏览器上下文的 storage_state
+（cookies 和 localStorage）写入 Redis，按 项目 + 基础URL（执行环境）+ 登录用例及其步骤 区分。
+有效期内的套件执行和并行浏览器直接带着登录状态启动，跳过登录用例；
+带缓存状态启动的执行出现失败用例时删除缓存（登录状态可能已失效），下次重新登录
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+
+from apps.core.scheduler.wakeup import get_redis
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'testhub:ui:login_state:'
+
+
+def login_state_key(project_id, base_url, login_case):
+    """登录状态的缓存键，登录用例的步骤修改后自动换用新的键"""
+    steps = json.dumps(login_case['steps'], sort_keys=True, default=str, ensure_ascii=False)
+    digest = hashlib.sha1(f'{base_url}\n{steps}'.encode('utf-8')).hexdigest()[:16]
+    return f"{_KEY_PREFIX}{project_id}:{login_case['id']}:{digest}"
+
+
+def load_login_state(key):
+    """读取缓存的登录状态，不存在、已过期或 Redis 不可用时返回None"""
+    try:
+        value = get_redis().get(key)
+    except Exception as e:
+        logger.debug(f"读取登录状态缓存失败: {e}")
+        return None
+    return json.loads(value) if value else None
+
+
+def save_login_state(key, storage_state):
+    """缓存登录状态，有效期 UI_LOGIN_STATE_CACHE_TTL 秒"""
+    try:
+        get_redis().set(key, json.dumps(storage_state), ex=settings.UI_LOGIN_STATE_CACHE_TTL)
+    except Exception as e:
+        logger.debug(f"写入登录状态缓存失败: {e}")
+
+
+def invalidate_login_state(key):
+    """删除缓存的登录状态"""
+    try:
+        get_redis().delete(key)
+    except Exception as e:
+        logger.debug(f"删除登录状态缓存失败: {e}")
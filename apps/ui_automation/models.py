@@ -22,6 +22,9 @@ class UiProject(models.Model):
     end_date = models.DateField(null=True, blank=True, verbose_name='结束日期')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_ui_projects', verbose_name='负责人')
     members = models.ManyToManyField(User, blank=True, related_name='ui_projects', verbose_name='团队成员')
+    # 执行时的网络配置：拦截不需要的资源、回放静态资源，格式见 network_profile.py
+    network_profile = models.JSONField(default=dict, blank=True, verbose_name='网络配置',
+                                       help_text='{"block_resource_types": [...], "block_url_patterns": [...], "har_path": "...", "har_url_pattern": "..."}')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
@@ -417,6 +420,13 @@ class TestSuite(models.Model):
     passed_count = models.IntegerField(default=0, verbose_name='通过数')
     failed_count = models.IntegerField(default=0, verbose_name='失败数')
 
+    # 并行执行配置：parallel_workers > 1 时同时启动多个浏览器分摊用例
+    parallel_workers = models.IntegerField(default=1, verbose_name='并行浏览器数')
+    share_login_state = models.BooleanField(default=False, verbose_name='并行时共享登录状态',
+                                            help_text='先执行第一个用例（登录），保存登录状态供其他浏览器复用')
+    cache_login_state = models.BooleanField(default=False, verbose_name='缓存登录状态',
+                                            help_text='第一个用例作为登录用例，通过后缓存登录状态，有效期内的执行直接带登录状态启动并跳过登录用例')
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
@@ -658,6 +668,7 @@ class TestCaseExecution(models.Model):
         ('passed', '通过'),
         ('failed', '失败'),
         ('error', '错误'),
+        ('skipped', '跳过'),
     ]
 
     ENGINE_CHOICES = [
@@ -763,6 +774,12 @@ class UiScheduledTask(models.Model):
         ('ONCE', '单次执行'),
     ]
 
+    MISFIRE_POLICY_CHOICES = [
+        ('SKIP', '跳过错过的运行'),
+        ('RUN_ONCE', '合并补跑一次'),
+        ('RUN_ALL', '逐次补跑（最多N次）'),
+    ]
+
     name = models.CharField(max_length=200, verbose_name='任务名称')
     description = models.TextField(blank=True, verbose_name='任务描述')
     task_type = models.CharField(max_length=20, choices=TASK_TYPE_CHOICES, verbose_name='任务类型')
@@ -777,6 +794,12 @@ class UiScheduledTask(models.Model):
     # 单次执行时间
     execute_at = models.DateTimeField(null=True, blank=True, verbose_name='执行时间')
 
+    # 错过运行（调度器停机或过载）的补跑策略；晚于计划时间不超过宽限秒数的运行视为准点
+    misfire_policy = models.CharField(max_length=20, choices=MISFIRE_POLICY_CHOICES, default='RUN_ONCE',
+                                      verbose_name='错过运行策略')
+    misfire_grace_seconds = models.IntegerField(default=60, verbose_name='错过运行宽限秒数')
+    misfire_max_catchup = models.IntegerField(default=3, verbose_name='最多补跑次数')
+
     # 任务配置
     project = models.ForeignKey('UiProject', on_delete=models.CASCADE, verbose_name='关联项目')
     test_suite = models.ForeignKey('TestSuite', on_delete=models.CASCADE, null=True, blank=True,
@@ -811,6 +834,11 @@ class UiScheduledTask(models.Model):
     successful_runs = models.IntegerField(default=0, verbose_name='成功运行次数')
     failed_runs = models.IntegerField(default=0, verbose_name='失败运行次数')
 
+    # 调度租约：调度器领取到期任务后持有租约，分发完成后释放；租约过期说明调度器在分发中途退出，由其他调度器接管
+    lease_owner = models.CharField(max_length=100, blank=True, default='', verbose_name='租约持有者')
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name='租约过期时间')
+    leased_run_time = models.DateTimeField(null=True, blank=True, verbose_name='租约对应的计划运行时间')
+
     # 执行结果
     last_result = models.JSONField(default=dict, verbose_name='最后执行结果')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
@@ -824,6 +852,11 @@ class UiScheduledTask(models.Model):
         verbose_name = 'UI定时任务'
         verbose_name_plural = 'UI定时任务'
         ordering = ['-created_at']
+        indexes = [
+            # 调度器按 next_run_time 查询到期任务
+            models.Index(fields=['status', 'next_run_time']),
+            models.Index(fields=['lease_expires_at']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_task_type_display()})"
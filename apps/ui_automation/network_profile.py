@@ -0,0 +1,158 @@
+"""
+网络配置（资源拦截与静态资源回放）
+回归执行不需要的统计脚本、字体、视频、第三方追踪请求在每次页面加载时都会下载，既拖慢执行又带来不确定性。
+项目的 network_profile 配置（与 UI_NETWORK_* 全局默认值合并）：
+- block_resource_types: 拦截的资源类型，如 ["font", "media"]（Playwright 资源类型）
+- block_url_patterns: 拦截的URL通配符，如 ["*google-analytics.com*", "*.mp4"]
+- har_path / har_url_pattern: 从 UI_NETWORK_HAR_DIR 下的 HAR 文件回放匹配的静态资源，HAR 中没有的请求照常访问网络
+
+Playwright 通过浏览器上下文的 route 拦截；Selenium 通过 CDP 的 Network.setBlockedURLs 拦截，
+只支持 Chrome / Edge，资源类型按文件扩展名转换为URL通配符，不支持 HAR 回放
+"""
+import fnmatch
+import logging
+import os
+import re
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_TYPES = (
+    'document', 'stylesheet', 'image', 'media', 'font', 'script', 'texttrack',
+    'xhr', 'fetch', 'eventsource', 'websocket', 'manifest', 'other',
+)
+
+# Selenium 无法按资源类型拦截，转换为扩展名通配符
+_RESOURCE_TYPE_EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'bmp', 'avif'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': ('mp4', 'webm', 'ogg', 'mp3', 'wav', 'm4a', 'mov', 'm3u8'),
+    'stylesheet': ('css',),
+    'script': ('js',),
+}
+
+
+class NetworkProfile:
+    """合并后的网络配置"""
+
+    def __init__(self, block_resource_types=(), block_url_patterns=(), har_path=None, har_url_pattern=None):
+        self.block_resource_types = frozenset(block_resource_types)
+        self.block_url_patterns = tuple(block_url_patterns)
+        self._url_regex = re.compile(
+            '|'.join(fnmatch.translate(pattern) for pattern in self.block_url_patterns)
+        ) if self.block_url_patterns else None
+        self.har_path = har_path
+        self.har_url_pattern = har_url_pattern
+
+    @property
+    def blocks(self):
+        return bool(self.block_resource_types or self._url_regex)
+
+    def should_block(self, resource_type, url):
+        if resource_type in self.block_resource_types:
+            return True
+        return bool(self._url_regex and self._url_regex.match(url))
+
+    def selenium_patterns(self):
+        """Network.setBlockedURLs 使用的URL通配符"""
+        patterns = list(self.block_url_patterns)
+        for resource_type in sorted(self.block_resource_types):
+            patterns.extend(f'*.{extension}*' for extension in _RESOURCE_TYPE_EXTENSIONS.get(resource_type, ()))
+        return patterns
+
+
+def validate_network_profile(value):
+    """校验项目的 network_profile 配置，返回错误信息列表"""
+    if not value:
+        return []
+    if not isinstance(value, dict):
+        return ['网络配置必须是JSON对象']
+    errors = []
+    resource_types = value.get('block_resource_types', [])
+    if not isinstance(resource_types, list):
+        errors.append('block_resource_types 必须是列表')
+    else:
+        unknown = [item for item in resource_types if item not in RESOURCE_TYPES]
+        if unknown:
+            errors.append(f"不支持的资源类型: {', '.join(map(str, unknown))}")
+    patterns = value.get('block_url_patterns', [])
+    if not isinstance(patterns, list) or not all(isinstance(item, str) and item for item in patterns):
+        errors.append('block_url_patterns 必须是非空字符串列表')
+    har_path = value.get('har_path')
+    if har_path and _resolve_har_path(har_path) is None:
+        errors.append(f"HAR 文件必须位于 {settings.UI_NETWORK_HAR_DIR} 目录下: {har_path}")
+    return errors
+
+
+def _resolve_har_path(har_path):
+    """HAR 文件路径相对 UI_NETWORK_HAR_DIR 解析，不允许指向目录之外"""
+    base = os.path.realpath(settings.UI_NETWORK_HAR_DIR)
+    path = os.path.realpath(os.path.join(base, har_path))
+    return path if path.startswith(base + os.sep) else None
+
+
+def get_network_profile(project):
+    """合并全局默认值和项目配置，没有任何拦截或回放时返回None"""
+    config = (getattr(project, 'network_profile', None) or {}) if project is not None else {}
+    resource_types = [*settings.UI_NETWORK_BLOCK_RESOURCE_TYPES, *config.get('block_resource_types', [])]
+    patterns = [*settings.UI_NETWORK_BLOCK_URL_PATTERNS, *config.get('block_url_patterns', [])]
+
+    har_path = None
+    if config.get('har_path'):
+        har_path = _resolve_har_path(config['har_path'])
+        if har_path is None or not os.path.isfile(har_path):
+            logger.warning(f"HAR 文件不存在或不在 {settings.UI_NETWORK_HAR_DIR} 目录下，跳过静态资源回放: {config['har_path']}")
+            har_path = None
+
+    profile = NetworkProfile(
+        dict.fromkeys(resource_types), dict.fromkeys(patterns), har_path, config.get('har_url_pattern') or None
+    )
+    if not profile.blocks and profile.har_path is None:
+        return None
+    return profile
+
+
+def _route_handler(profile):
+    def handle(route):
+        request = route.request
+        if profile.should_block(request.resource_type, request.url):
+            return route.abort('blockedbyclient')
+        # 交给后注册的 HAR 回放或直接访问网络；async API 下返回协程，由 Playwright 等待
+        return route.fallback()
+    return handle
+
+
+def apply_network_profile(context, profile):
+    """为 Playwright（sync API）浏览器上下文应用网络配置"""
+    if profile is None:
+        return
+    # 后注册的路由先匹配：拦截规则先执行，未拦截的请求交给 HAR 回放
+    if profile.har_path:
+        context.route_from_har(profile.har_path, url=profile.har_url_pattern, not_found='fallback')
+    if profile.blocks:
+        context.route('**/*', _route_handler(profile))
+
+
+async def apply_network_profile_async(context, profile):
+    """为 Playwright（async API）浏览器上下文应用网络配置"""
+    if profile is None:
+        return
+    if profile.har_path:
+        await context.route_from_har(profile.har_path, url=profile.har_url_pattern, not_found='fallback')
+    if profile.blocks:
+        await context.route('**/*', _route_handler(profile))
+
+
+def apply_network_profile_selenium(driver, profile):
+    """通过 CDP 为 Selenium（Chrome / Edge）应用拦截规则"""
+    if profile is None or not profile.blocks:
+        return
+    if not hasattr(driver, 'execute_cdp_cmd'):
+        logger.info(f"{type(driver).__name__} 不支持 CDP，跳过网络资源拦截")
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': profile.selenium_patterns()})
+    except Exception as e:
+        logger.warning(f"应用网络资源拦截失败: {e}")
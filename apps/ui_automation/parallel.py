@@ -0,0 +1,38 @@
+"""
+UI测试用例并行执行的任务分配
+用例按套件顺序轮流分配到各浏览器的本地队列，浏览器从自己队列的头部取用例；
+自己的队列取空后，从剩余用例最多的队列尾部"窃取"，耗时长的用例不会拖住整个套件
+"""
+import threading
+from collections import deque
+
+
+class WorkStealingQueue:
+    """按工作线程划分的工作窃取队列"""
+
+    def __init__(self, items, workers):
+        self._lock = threading.Lock()
+        self._queues = [deque() for _ in range(workers)]
+        for index, item in enumerate(items):
+            self._queues[index % workers].append(item)
+        self.stolen = 0
+
+    def take(self, worker_index):
+        """取下一个用例，所有队列都为空时返回None"""
+        with self._lock:
+            own = self._queues[worker_index]
+            if own:
+                return own.popleft()
+            victim = max(self._queues, key=len)
+            if not victim:
+                return None
+            self.stolen += 1
+            return victim.pop()
+
+    def drain(self):
+        """取出所有未执行的用例（所有工作线程都退出后使用）"""
+        with self._lock:
+            remaining = [item for queue in self._queues for item in queue]
+            for queue in self._queues:
+                queue.clear()
+            return remaining
@@ -0,0 +1,116 @@
+"""
+UI执行截图外部存储
+截图压缩为 WebP（或 JPEG）写入 MEDIA_ROOT 下的文件并生成缩略图，执行记录中只保存访问URL和元数据，
+不再把 base64 的 data: URL 写进数据库。按内容 SHA-256 寻址，相同截图只保存一份。
+Pillow 不可用时原样保存 PNG，不生成缩略图
+"""
+import base64
+import hashlib
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+SCREENSHOT_DIR = 'ui_screenshots'
+
+_PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+
+def _write(relative_path, content):
+    """原子性地写入文件，目标文件已存在时直接复用"""
+    absolute_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    if os.path.exists(absolute_path):
+        return
+    directory = os.path.dirname(absolute_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, absolute_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer, format=_PIL_FORMATS[image_format], quality=settings.UI_SCREENSHOT_QUALITY)
+    return buffer.getvalue()
+
+
+def _url(relative_path):
+    return settings.MEDIA_URL + relative_path.replace(os.sep, '/')
+
+
+def save_screenshot(image_bytes, description='', **extra):
+    """保存一张截图（PNG 字节），返回写入执行记录的截图信息
+
+    返回 {'url', 'thumbnail_url', 'format', 'width', 'height', 'size', 'description', 'timestamp', ...}，
+    extra 中的字段（如 step_number）原样附加
+    """
+    sha256 = hashlib.sha256(image_bytes).hexdigest()
+    base_path = os.path.join(SCREENSHOT_DIR, timezone.now().strftime('%Y%m%d'), sha256[:2], sha256)
+    image_format = settings.UI_SCREENSHOT_FORMAT if settings.UI_SCREENSHOT_FORMAT in _PIL_FORMATS else 'webp'
+    width = height = None
+    thumbnail_url = None
+
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    if Image is None:
+        image_format = 'png'
+        content = image_bytes
+    else:
+        image = Image.open(io.BytesIO(image_bytes))
+        image.load()
+        width, height = image.size
+        content = _encode(image, image_format)
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail((settings.UI_SCREENSHOT_THUMBNAIL_WIDTH, settings.UI_SCREENSHOT_THUMBNAIL_WIDTH * 4))
+        thumbnail_path = f'{base_path}_thumb.{_EXTENSIONS[image_format]}'
+        _write(thumbnail_path, _encode(thumbnail, image_format))
+        thumbnail_url = _url(thumbnail_path)
+
+    relative_path = f'{base_path}.{_EXTENSIONS[image_format]}'
+    _write(relative_path, content)
+    return {
+        'url': _url(relative_path),
+        'thumbnail_url': thumbnail_url or _url(relative_path),
+        'format': image_format,
+        'width': width,
+        'height': height,
+        'size': len(content),
+        'description': description,
+        'timestamp': timezone.now().isoformat(),
+        **extra,
+    }
+
+
+def externalize_screenshots(screenshots):
+    """把截图列表中 base64 data: URL 形式的截图转存为文件，其余条目原样保留"""
+    result = []
+    for screenshot in screenshots or []:
+        url = screenshot.get('url') if isinstance(screenshot, dict) else None
+        if not url or not url.startswith('data:image/'):
+            result.append(screenshot)
+            continue
+        try:
+            image_bytes = base64.b64decode(url.split(',', 1)[1])
+            stored = save_screenshot(image_bytes)
+        except Exception as e:
+            result.append({**screenshot, 'url': None, 'error': f'截图保存失败: {str(e)}'})
+            continue
+        result.append({**screenshot, **{key: stored[key] for key in (
+            'url', 'thumbnail_url', 'format', 'width', 'height', 'size'
+        )}})
+    return result
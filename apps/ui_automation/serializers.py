@@ -9,6 +9,7 @@ from .models import (
     AICase, AIExecutionRecord
 )
 from django.contrib.auth import get_user_model
+from .network_profile import validate_network_profile
 
 User = get_user_model()
 
@@ -32,13 +33,22 @@ class UiProjectSerializer(serializers.ModelSerializer):
 class UiProjectCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = UiProject
-        fields = ('name', 'description', 'status', 'base_url', 'start_date', 'end_date', 'owner', 'members')
+        fields = ('name', 'description', 'status', 'base_url', 'start_date', 'end_date', 'owner', 'members',
+                  'network_profile')
+
+    def validate_network_profile(self, value):
+        """验证网络配置格式"""
+        errors = validate_network_profile(value)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return value
 
 
-class UiProjectUpdateSerializer(serializers.ModelSerializer):
+class UiProjectUpdateSerializer(UiProjectCreateSerializer):
     class Meta:
         model = UiProject
-        fields = ('name', 'description', 'status', 'base_url', 'start_date', 'end_date', 'members')
+        fields = ('name', 'description', 'status', 'base_url', 'start_date', 'end_date', 'members',
+                  'network_profile')
 
 
 class LocatorStrategySerializer(serializers.ModelSerializer):
@@ -201,14 +211,14 @@ class TestSuiteSerializer(serializers.ModelSerializer):
 class TestSuiteCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = TestSuite
-        fields = ('id', 'project', 'name', 'description')
+        fields = ('id', 'project', 'name', 'description', 'parallel_workers', 'share_login_state', 'cache_login_state')
         read_only_fields = ('id',)
 
 
 class TestSuiteUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = TestSuite
-        fields = ('name', 'description')
+        fields = ('name', 'description', 'parallel_workers', 'share_login_state', 'cache_login_state')
 
 
 class TestSuiteWithScriptsSerializer(serializers.ModelSerializer):
@@ -642,6 +652,7 @@ class UiScheduledTaskSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'task_type', 'task_type_display',
             'trigger_type', 'trigger_type_display', 'cron_expression',
             'interval_seconds', 'execute_at', 'project', 'project_name',
+            'misfire_policy', 'misfire_grace_seconds', 'misfire_max_catchup',
             'test_suite', 'test_suite_name', 'test_cases',
             'engine', 'browser', 'headless',
             'notify_on_success', 'notify_on_failure', 'notification_type', 'notification_type_display', 'notify_emails',
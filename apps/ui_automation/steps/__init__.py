@@ -0,0 +1,24 @@
+"""
+UI步骤执行核心
+Playwright 引擎、Selenium 引擎和套件执行器共用的步骤执行逻辑：
+- locators: 元素定位器预编译
+- registry: 按 action_type 查表分发的动作处理函数
+- adapters: Playwright / Selenium 引擎适配器
+- waits: 智能等待（等待页面稳定代替固定等待）
+- timeouts: 按项目历史耗时学习的自适应超时
+- healing: 主定位器失效时使用备用定位器（定位器自愈）
+"""
+from .adapters import PlaywrightAdapter, SeleniumAdapter
+from .healing import candidate_locators
+from .locators import CompiledLocator, compile_locator
+from .registry import StepOutcome, StepSpec, action, run_step, run_sync
+from .timeouts import adaptive_timeout, flush_durations, record_duration
+from .waits import pause, settle
+
+__all__ = [
+    'CompiledLocator', 'compile_locator',
+    'StepSpec', 'StepOutcome', 'action', 'run_step', 'run_sync',
+    'PlaywrightAdapter', 'SeleniumAdapter',
+    'pause', 'settle', 'adaptive_timeout', 'record_duration', 'flush_durations',
+    'candidate_locators',
+]
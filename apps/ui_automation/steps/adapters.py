@@ -0,0 +1,432 @@
+"""
+UI步骤引擎适配器
+把动作处理函数需要的浏览器操作映射到具体引擎。所有方法都是协程，参数中的 locator 为预编译的
+CompiledLocator，spec 为 StepSpec（提供超时、强制操作等设置）
+"""
+import asyncio
+import inspect
+import logging
+import time
+
+from playwright.async_api import Page as AsyncPage
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from selenium.common.exceptions import (
+    ElementNotInteractableException, NoSuchElementException, StaleElementReferenceException, TimeoutException
+)
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select, WebDriverWait
+
+from .registry import run_sync
+from .waits import PROBE_SCRIPT_BODY, pause
+
+logger = logging.getLogger(__name__)
+
+# 依次派发完整的鼠标事件链，部分组件只监听 mousedown
+_MOUSE_EVENT_CHAIN_JS = """
+element => {
+    ['mousedown', 'mouseup', 'click'].forEach(type => element.dispatchEvent(
+        new MouseEvent(type, { bubbles: true, cancelable: true, view: window })
+    ));
+}
+"""
+
+_PLAYWRIGHT_PROBE_JS = f"() => {{{PROBE_SCRIPT_BODY}}}"
+_SELENIUM_PROBE_JS = f"return (function () {{{PROBE_SCRIPT_BODY}}})();"
+
+_MEANINGLESS_MESSAGES = {'', 'Message', 'Message:'}
+
+
+async def _resolve(value):
+    """async API 返回协程需要 await，sync API 直接返回结果"""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class PlaywrightAdapter:
+    """Playwright 适配器，同时支持 sync API 和 async API 的 Page"""
+
+    name = 'Playwright'
+
+    def __init__(self, page):
+        self.page = page
+
+    async def offload(self, func, *args):
+        """执行会阻塞的调用（读写 Redis 等）：async API 下放到线程中执行，不阻塞事件循环"""
+        if isinstance(self.page, AsyncPage):
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def _locate(self, locator, first=True, visible_only=True):
+        if locator.playwright_factory:
+            target = getattr(self.page, locator.playwright_factory)(locator.playwright_selector)
+        elif visible_only and locator.visible_only:
+            target = self.page.locator(f'{locator.playwright_selector} >> visible=true')
+        else:
+            target = self.page.locator(locator.playwright_selector)
+        # 定位器可能匹配多个元素，操作时取第一个，避免 strict mode violation
+        return target.first if first else target
+
+    async def _prepare(self, target, spec):
+        if spec.just_switched_tab:
+            # 刚切换标签页：确保页面在前台并把元素滚动到视口内
+            await _resolve(self.page.bring_to_front())
+            try:
+                await _resolve(target.scroll_into_view_if_needed(timeout=5000))
+            except Exception as e:
+                logger.debug(f"滚动到元素失败: {e}")
+        if spec.force:
+            # 强制操作只要求元素在 DOM 中，不要求可见
+            try:
+                await _resolve(target.wait_for(state='attached', timeout=spec.timeout_ms))
+            except Exception:
+                pass
+
+    async def sleep(self, seconds):
+        # wait_for_timeout 在等待期间继续处理页面事件，sync API 下不能用 time.sleep
+        await _resolve(self.page.wait_for_timeout(seconds * 1000))
+
+    async def probe(self):
+        return await _resolve(self.page.evaluate(_PLAYWRIGHT_PROBE_JS))
+
+    async def screenshot(self):
+        return await _resolve(self.page.screenshot())
+
+    async def title(self):
+        return await _resolve(self.page.title())
+
+    def current_tab(self):
+        return self.page
+
+    async def tabs(self):
+        return list(self.page.context.pages)
+
+    async def activate_tab(self, page):
+        await _resolve(page.bring_to_front())
+        # 新标签页可能仍在加载，等待网络空闲，超时则至少等到 DOM 加载完成
+        try:
+            await _resolve(page.wait_for_load_state('networkidle', timeout=10000))
+        except Exception:
+            try:
+                await _resolve(page.wait_for_load_state('domcontentloaded', timeout=5000))
+            except Exception as e:
+                logger.debug(f"等待新标签页加载超时，继续执行: {e}")
+        self.page = page
+        await pause(self, 1.5)
+
+    async def click(self, locator, spec):
+        target = self._locate(locator)
+        await self._prepare(target, spec)
+        await _resolve(target.click(timeout=spec.timeout_ms, force=spec.force))
+
+    async def select_option(self, locator, spec):
+        selector = f'xpath={locator.select_selector}' if locator.is_xpath else locator.select_selector
+        await _resolve(self.page.locator(selector).select_option(value=locator.option_value, timeout=spec.timeout_ms))
+
+    async def click_select_trigger(self, locator, spec):
+        container = self._locate(locator)
+        trigger = container.locator('.el-select__wrapper, input').first
+        try:
+            await _resolve(container.wait_for(state='visible', timeout=spec.timeout_ms))
+            await _resolve(trigger.click(timeout=spec.timeout_ms))
+            method = 'Playwright原生点击内部触发器 + 等待展开'
+        except Exception as e:
+            logger.warning(f"Playwright 点击下拉框触发器失败，改用事件链: {e}")
+            await _resolve(trigger.evaluate(_MOUSE_EVENT_CHAIN_JS))
+            method = '事件链点击内部触发器 + 等待展开'
+        # 等待下拉框展开动画
+        await pause(self, 0.5)
+        return method
+
+    async def click_dropdown_option(self, locator, spec):
+        # 等待下拉框完全展开并渲染
+        await pause(self, 0.8)
+        candidates = self._locate(locator, first=False, visible_only=False)
+        await _resolve(candidates.first.wait_for(state='attached', timeout=spec.timeout_ms))
+
+        count = await _resolve(candidates.count())
+        method = None
+        for i in range(count):
+            candidate = candidates.nth(i)
+            if not await _resolve(candidate.is_visible()):
+                continue
+            try:
+                await _resolve(candidate.click(timeout=spec.timeout_ms))
+                method = f'iterative-click(index={i})'
+                break
+            except Exception as e:
+                logger.warning(f"点击第 {i + 1} 个下拉框选项失败: {e}")
+        if method is None:
+            logger.warning("未找到可见的下拉框选项元素，强制点击第一个")
+            await _resolve(candidates.first.click(force=True, timeout=spec.timeout_ms))
+            method = 'fallback-force-click'
+
+        # 多选下拉框选择后不会自动关闭，点击空白处关闭
+        await pause(self, 0.5)
+        try:
+            if await _resolve(self.page.locator('.el-select-dropdown').first.is_visible()):
+                await _resolve(self.page.click('body', position={'x': 10, 'y': 10}, timeout=3000))
+                method += ' + 自动关闭'
+        except Exception:
+            pass
+        return method, count
+
+    async def fill(self, locator, value, spec):
+        target = self._locate(locator)
+        await self._prepare(target, spec)
+        await _resolve(target.fill(value, timeout=spec.timeout_ms, force=spec.force))
+
+    async def text(self, locator, spec):
+        return await _resolve(self._locate(locator).inner_text(timeout=spec.timeout_ms))
+
+    async def wait_for(self, locator, spec, state):
+        target = self._locate(locator, visible_only=state == 'visible')
+        await _resolve(target.wait_for(state=state, timeout=spec.timeout_ms))
+
+    async def hover(self, locator, spec):
+        await _resolve(self._locate(locator).hover(timeout=spec.timeout_ms, force=spec.force))
+
+    async def scroll(self, locator, spec):
+        await _resolve(self._locate(locator).scroll_into_view_if_needed(timeout=spec.timeout_ms))
+
+    async def is_visible(self, locator, spec):
+        return await _resolve(self._locate(locator).is_visible())
+
+    async def count(self, locator):
+        return await _resolve(self._locate(locator, first=False, visible_only=False).count())
+
+    async def first_present(self, locators):
+        """返回第一个在页面中匹配到元素的定位器，不等待"""
+        for locator in locators:
+            try:
+                if await self.count(locator):
+                    return locator
+            except Exception as e:
+                logger.debug(f"检查定位器 {locator.description} 失败: {e}")
+        return None
+
+    def describe_error(self, error):
+        """返回 (是否超时, 错误信息)"""
+        message = getattr(error, 'message', None) or str(error)
+        error_type = type(error).__name__
+        if error_type not in message and error_type != 'Exception':
+            message = f"{error_type}: {message}"
+        is_timeout = isinstance(error, PlaywrightTimeoutError) or 'Timeout' in message
+        return is_timeout, message
+
+
+class SeleniumAdapter:
+    """Selenium WebDriver 适配器"""
+
+    name = 'Selenium'
+
+    # 元素过期（Stale Element）时的最大重试次数
+    max_retries = 3
+
+    _CONDITIONS = {
+        'presence': EC.presence_of_element_located,
+        'visible': EC.visibility_of_element_located,
+        'clickable': EC.element_to_be_clickable,
+    }
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def offload(self, func, *args):
+        return func(*args)
+
+    def _find(self, locator, spec, condition='presence'):
+        target = (locator.selenium_by, locator.selenium_value)
+        return WebDriverWait(self.driver, spec.timeout_seconds).until(self._CONDITIONS[condition](target))
+
+    def _with_element(self, locator, spec, condition, operation):
+        """定位元素并执行操作，元素过期时等待页面 DOM 稳定后重新定位"""
+        element = self._find(locator, spec, condition)
+        for attempt in range(self.max_retries):
+            try:
+                return operation(element)
+            except StaleElementReferenceException:
+                if attempt == self.max_retries - 1:
+                    raise
+                delay = 1.0 if attempt == 0 else 1.5
+                logger.warning(f"⚠️ 元素过期（Stale Element），{delay}秒后重新定位... (尝试 {attempt + 2}/{self.max_retries})")
+                self._pause(delay)
+                element = self._find(locator, spec, condition)
+                self._pause(0.3)
+
+    @staticmethod
+    def _displayed(element):
+        try:
+            return element.is_displayed()
+        except StaleElementReferenceException:
+            return False
+
+    def _js_click(self, element):
+        self.driver.execute_script("arguments[0].click();", element)
+
+    def _pause(self, seconds):
+        # 在同步的元素操作回调中使用
+        run_sync(pause(self, seconds))
+
+    async def sleep(self, seconds):
+        time.sleep(seconds)
+
+    async def probe(self):
+        return self.driver.execute_script(_SELENIUM_PROBE_JS)
+
+    async def screenshot(self):
+        return self.driver.get_screenshot_as_png()
+
+    async def title(self):
+        return self.driver.title
+
+    def current_tab(self):
+        return self.driver.current_window_handle
+
+    async def tabs(self):
+        return list(self.driver.window_handles)
+
+    async def activate_tab(self, handle):
+        self.driver.switch_to.window(handle)
+
+    async def click(self, locator, spec):
+        def operation(element):
+            # 强制操作或元素不可见时使用 JavaScript 点击
+            if spec.force or not element.is_displayed():
+                self._js_click(element)
+                return
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
+            self._pause(0.3)
+            try:
+                element.click()
+            except ElementNotInteractableException:
+                self._js_click(element)
+
+        self._with_element(locator, spec, 'presence' if spec.force else 'clickable', operation)
+
+    async def select_option(self, locator, spec):
+        by = By.XPATH if locator.is_xpath else By.CSS_SELECTOR
+        element = WebDriverWait(self.driver, spec.timeout_seconds).until(
+            EC.presence_of_element_located((by, locator.select_selector))
+        )
+        Select(element).select_by_value(locator.option_value)
+
+    async def click_select_trigger(self, locator, spec):
+        def operation(container):
+            try:
+                container.find_element(By.CSS_SELECTOR, '.el-select__wrapper, input').click()
+                return '点击内部触发器 + 等待展开'
+            except (NoSuchElementException, ElementNotInteractableException):
+                container.click()
+                return '点击容器 + 等待展开'
+
+        method = self._with_element(locator, spec, 'presence', operation)
+        await pause(self, 0.5)
+        return method
+
+    async def click_dropdown_option(self, locator, spec):
+        # 可能同时存在多个同名选项（有的隐藏有的显示），轮询找到可见的那个
+        deadline = time.time() + spec.timeout_seconds
+        while True:
+            elements = self.driver.find_elements(locator.selenium_by, locator.selenium_value)
+            visible = next((element for element in elements if self._displayed(element)), None)
+            if visible is not None or time.time() > deadline:
+                break
+            time.sleep(0.5)
+        if visible is None:
+            raise TimeoutException(f"未找到可见的下拉框选项 (匹配到 {len(elements)} 个元素)")
+
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", visible)
+        await pause(self, 0.3)
+        try:
+            visible.click()
+            method = 'iterative-click'
+        except (ElementNotInteractableException, StaleElementReferenceException):
+            self._js_click(visible)
+            method = 'javascript-click'
+        return method, len(elements)
+
+    async def fill(self, locator, value, spec):
+        def operation(element):
+            if spec.force or not element.is_displayed():
+                # 使用 JavaScript 设置值并触发 input / change 事件
+                self.driver.execute_script("""
+                    arguments[0].value = arguments[1];
+                    arguments[0].dispatchEvent(new Event('input', { bubbles: true }));
+                    arguments[0].dispatchEvent(new Event('change', { bubbles: true }));
+                """, element, value)
+                return
+            element.clear()
+            element.send_keys(value)
+
+        self._with_element(locator, spec, 'presence', operation)
+
+    async def text(self, locator, spec):
+        return self._with_element(locator, spec, 'presence', lambda element: element.text)
+
+    async def wait_for(self, locator, spec, state):
+        self._find(locator, spec, 'visible' if state == 'visible' else 'presence')
+
+    async def hover(self, locator, spec):
+        def operation(element):
+            if spec.force or not element.is_displayed():
+                self.driver.execute_script(
+                    "arguments[0].dispatchEvent(new MouseEvent('mouseover', "
+                    "{ view: window, bubbles: true, cancelable: true }));",
+                    element
+                )
+                return
+            ActionChains(self.driver).move_to_element(element).perform()
+
+        self._with_element(locator, spec, 'presence', operation)
+
+    async def scroll(self, locator, spec):
+        def operation(element):
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
+            self._pause(0.3)
+
+        self._with_element(locator, spec, 'presence', operation)
+
+    async def is_visible(self, locator, spec):
+        elements = self.driver.find_elements(locator.selenium_by, locator.selenium_value)
+        return any(self._displayed(element) for element in elements)
+
+    async def count(self, locator):
+        return len(self.driver.find_elements(locator.selenium_by, locator.selenium_value))
+
+    async def first_present(self, locators):
+        """返回第一个在页面中匹配到元素的定位器，不等待"""
+        # 临时关闭隐式等待，避免每个找不到元素的定位器都等满隐式等待时长
+        implicit_wait = self.driver.timeouts.implicit_wait
+        self.driver.implicitly_wait(0)
+        try:
+            for locator in locators:
+                try:
+                    if self.driver.find_elements(locator.selenium_by, locator.selenium_value):
+                        return locator
+                except Exception as e:
+                    logger.debug(f"检查定位器 {locator.description} 失败: {e}")
+            return None
+        finally:
+            self.driver.implicitly_wait(implicit_wait)
+
+    def describe_error(self, error):
+        """返回 (是否超时, 错误信息)；Selenium 异常的 str() 常常只有 'Message:'，依次尝试 msg / args / stacktrace"""
+        error_type = type(error).__name__
+        message = ''
+        candidates = [getattr(error, 'msg', None), error.args[0] if error.args else None, str(error)]
+        for candidate in candidates:
+            text = str(candidate).strip() if candidate else ''
+            if text not in _MEANINGLESS_MESSAGES:
+                message = text
+                break
+        if not message and getattr(error, 'stacktrace', None):
+            message = f"详细堆栈:\n{''.join(error.stacktrace)[:300]}"
+        is_timeout = isinstance(error, TimeoutException)
+        if not message:
+            message = '等待元素超时' if is_timeout else f"未知错误 (异常类型: {error_type})"
+        if error_type not in message and error_type != 'Exception':
+            message = f"{error_type}: {message}"
+        return is_timeout, message
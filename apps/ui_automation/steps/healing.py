@@ -0,0 +1,115 @@
+"""
+定位器自愈
+元素配置了备用定位器（Element.backup_locators）时，步骤执行前轮询主定位器和全部备用定位器，
+最先在页面中找到元素的定位器用于本次操作，主定位器失效时不再等满超时才失败。
+步骤成功后把实际生效的定位器按元素记入 Redis，之后的执行优先尝试它；主定位器重新生效时清除记录。
+记录在进程内缓存一段时间，同一次执行中每个元素只读取一次 Redis，读写 Redis 通过 adapter.offload 进行，不阻塞事件循环
+"""
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from apps.core.scheduler.wakeup import get_redis
+
+from .locators import compile_locator
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'testhub:ui:locator_winner:'
+_POLL_INTERVAL = 0.1
+_CACHE_TTL = 60
+
+# 进程内缓存 {element_id: (过期时间, (strategy, value) 或 None)}
+_winner_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _key(element_id):
+    return f'{_KEY_PREFIX}{element_id}'
+
+
+def _cache_winner(element_id, winner):
+    with _cache_lock:
+        _winner_cache[element_id] = (time.monotonic() + _CACHE_TTL, winner)
+
+
+def load_winner(element_id):
+    """元素上次生效的定位器 (strategy, value)，缓存未过期时不读取 Redis"""
+    with _cache_lock:
+        cached = _winner_cache.get(element_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    try:
+        value = get_redis().get(_key(element_id))
+    except Exception as e:
+        logger.debug(f"读取定位器自愈记录失败: {e}")
+        value = None
+    winner = tuple(json.loads(value)) if value else None
+    _cache_winner(element_id, winner)
+    return winner
+
+
+def candidate_locators(element):
+    """元素的候选定位器列表：主定位器在前，然后是备用定位器（去重）"""
+    primary = compile_locator(element.get('locator_strategy'), element.get('locator_value'))
+    backups = [
+        compile_locator(backup.get('strategy'), backup.get('value'))
+        for backup in element.get('backup_locators') or []
+        if isinstance(backup, dict) and backup.get('value')
+    ]
+    if not backups or not settings.UI_LOCATOR_HEALING:
+        return [primary]
+
+    candidates = {}
+    for locator in (primary, *backups):
+        candidates.setdefault(locator.description, locator)
+    return list(candidates.values())
+
+
+async def prefer_remembered(adapter, spec):
+    """把上次生效的定位器移到候选列表最前"""
+    if spec.element_id is None:
+        return
+    winner = await adapter.offload(load_winner, spec.element_id)
+    preferred = next((locator for locator in spec.candidates if (locator.strategy, locator.value) == winner), None)
+    if preferred is not None and preferred is not spec.candidates[0]:
+        spec.candidates.remove(preferred)
+        spec.candidates.insert(0, preferred)
+        spec.locator = preferred
+
+
+async def resolve_locator(adapter, spec, wait=True):
+    """按顺序轮询候选定位器，返回最先找到元素的定位器；wait 为 False 时只检查一次，都找不到返回None"""
+    deadline = time.monotonic() + (spec.timeout_seconds if wait else 0)
+    while True:
+        winner = await adapter.first_present(spec.candidates)
+        if winner is not None or time.monotonic() >= deadline:
+            return winner
+        await adapter.sleep(_POLL_INTERVAL)
+
+
+async def remember_locator(adapter, spec):
+    """步骤成功后记录实际生效的定位器，与上次记录相同时不写 Redis"""
+    if spec.element_id is None or spec.locator is spec.candidates[0]:
+        return
+    if spec.locator is spec.primary_locator:
+        winner = None
+    else:
+        winner = (spec.locator.strategy, spec.locator.value)
+    _cache_winner(spec.element_id, winner)
+    await adapter.offload(_save_winner, spec.element_id, winner)
+
+
+def _save_winner(element_id, winner):
+    key = _key(element_id)
+    try:
+        if winner is None:
+            get_redis().delete(key)
+        else:
+            value = json.dumps(list(winner), ensure_ascii=False)
+            get_redis().set(key, value, ex=settings.UI_LOCATOR_HEALING_CACHE_TTL)
+    except Exception as e:
+        logger.debug(f"写入定位器自愈记录失败: {e}")
@@ -0,0 +1,141 @@
+"""
+元素定位器预编译
+同一个元素（定位策略 + 定位值）只解析一次：Playwright 选择器、Selenium 的 (By, value)、
+原生 select / el-select 触发器 / 下拉框选项的识别结果都在编译时算好，执行步骤时直接取用
+"""
+import re
+from functools import lru_cache
+
+from selenium.webdriver.common.by import By
+
+# Playwright 中以 get_by_* 方法定位的策略
+_PLAYWRIGHT_FACTORIES = {
+    'text': 'get_by_text',
+    'placeholder': 'get_by_placeholder',
+    'role': 'get_by_role',
+    'label': 'get_by_label',
+    'title': 'get_by_title',
+    'test-id': 'get_by_test_id',
+}
+
+_SELENIUM_BY = {
+    'id': By.ID,
+    'css': By.CSS_SELECTOR,
+    'css selector': By.CSS_SELECTOR,
+    'xpath': By.XPATH,
+    'name': By.NAME,
+    'class': By.CLASS_NAME,
+    'class name': By.CLASS_NAME,
+    'tag': By.TAG_NAME,
+    'tag name': By.TAG_NAME,
+    'link text': By.LINK_TEXT,
+    'partial link text': By.PARTIAL_LINK_TEXT,
+}
+
+# Selenium 没有对应定位方式的策略，转换为 CSS 属性选择器
+_SELENIUM_ATTRIBUTES = {
+    'placeholder': 'placeholder',
+    'role': 'role',
+    'title': 'title',
+    'test-id': 'data-testid',
+    'label': 'aria-label',
+}
+
+_OPTION_VALUE_PATTERNS = (
+    re.compile(r'option\[value=["\']([^"\']+)["\']\]'),
+    re.compile(r'option\[@value=["\']([^"\']+)["\']\]'),
+)
+
+
+class CompiledLocator:
+    """预编译的元素定位器"""
+
+    __slots__ = (
+        'strategy', 'value', 'is_xpath',
+        'playwright_factory', 'playwright_selector', 'visible_only',
+        'selenium_by', 'selenium_value',
+        'native_select', 'select_selector', 'option_value',
+        'select_trigger', 'dropdown_option',
+    )
+
+    def __init__(self, strategy, value):
+        self.strategy = strategy
+        self.value = value
+        lowered = value.lower()
+
+        # 值以 // 或 xpath= 开头时，无论配置的策略是什么都按 XPath 处理
+        self.is_xpath = strategy == 'xpath' or value.startswith(('//', '(/', 'xpath='))
+        xpath = value[6:] if value.startswith('xpath=') else value
+
+        # Playwright
+        self.playwright_factory = None
+        if self.is_xpath:
+            self.playwright_selector = f'xpath={xpath}'
+        elif strategy == 'id':
+            self.playwright_selector = f'#{value}'
+        elif strategy == 'name':
+            self.playwright_selector = f'[name="{value}"]'
+        elif strategy in _PLAYWRIGHT_FACTORIES:
+            self.playwright_factory = _PLAYWRIGHT_FACTORIES[strategy]
+            self.playwright_selector = value
+        else:
+            self.playwright_selector = value
+        # el-select 相关的定位器可能同时匹配隐藏的弹层，只取可见元素
+        self.visible_only = self.playwright_factory is None and (
+            'dropdown' in lowered or 'el-select' in lowered
+        ) and 'visible=true' not in lowered
+
+        # Selenium
+        if self.is_xpath:
+            self.selenium_by, self.selenium_value = By.XPATH, xpath
+        elif strategy == 'text':
+            self.selenium_by, self.selenium_value = By.XPATH, f"//*[contains(text(), '{value}')]"
+        elif strategy in _SELENIUM_ATTRIBUTES:
+            self.selenium_by = By.CSS_SELECTOR
+            self.selenium_value = f'[{_SELENIUM_ATTRIBUTES[strategy]}="{value}"]'
+        else:
+            self.selenium_by = _SELENIUM_BY.get(strategy, By.CSS_SELECTOR)
+            self.selenium_value = value
+
+        # 原生 HTML select 的 option：改用 select_option / Select 选择
+        self.native_select = (
+            'option[' in value or ' > option' in value or '//option' in value
+            or ('select' in lowered and 'option' in lowered)
+        )
+        self.select_selector = None
+        self.option_value = None
+        if self.native_select:
+            self.option_value = next(
+                (match.group(1) for match in (pattern.search(value) for pattern in _OPTION_VALUE_PATTERNS) if match),
+                '1'
+            )
+            if self.is_xpath:
+                # 去掉末尾的 option 部分，保留 select 自身的谓词
+                self.select_selector = re.sub(r'/+option(\[[^\]]*\])?\s*$', '', xpath)
+            else:
+                selector = re.sub(r'\s*>\s*option\[.*?\]', '', value)
+                self.select_selector = re.sub(r'\s+option\[.*?\]', '', selector)
+
+        # el-select 容器（下拉框触发器），需要点击内部真正的触发器
+        self.select_trigger = (
+            'el-select' in lowered and 'ancestor::' in lowered
+            and '//li' not in value and 'el-select-dropdown' not in lowered
+        )
+
+        # 下拉框选项：可能同时存在多个同名选项（隐藏的旧弹层），需要找到可见的那个
+        self.dropdown_option = not self.select_trigger and (
+            'dropdown' in lowered
+            or 'role="option"' in lowered
+            or (self.is_xpath and '//li' in value)
+            or ('li' in lowered and ('ul' in lowered or 'ol' in lowered))
+        )
+
+    @property
+    def description(self):
+        return f'{self.strategy}={self.value}'
+
+
+@lru_cache(maxsize=2048)
+def compile_locator(strategy, value):
+    """编译元素定位器，相同的定位策略和定位值直接返回缓存结果"""
+    return CompiledLocator((strategy or 'css').lower(), value or '')
@@ -0,0 +1,394 @@
+"""
+UI步骤动作注册表
+每种 action_type 对应一个处理函数，执行步骤时按 action_type 查表分发；
+处理函数只描述动作语义（识别下拉框、断言、日志格式等），浏览器操作全部交给引擎适配器完成，
+Playwright（sync / async）和 Selenium 共用同一套处理函数。
+
+处理函数和适配器方法都是协程：async API 直接 await；sync API 和 Selenium 的适配器方法内部
+是同步调用、不会挂起，由 run_sync 在当前线程驱动执行，不需要事件循环
+"""
+import logging
+import time
+
+from django.conf import settings
+
+from apps.core.variable_resolver import resolve_variables
+
+from .healing import candidate_locators, prefer_remembered, remember_locator, resolve_locator
+from .locators import compile_locator
+from .timeouts import adaptive_timeout, record_duration
+from .waits import pause, settle
+
+logger = logging.getLogger(__name__)
+
+_ACTIONS = {}
+
+
+def action(name, requires_element=True):
+    """注册步骤动作处理函数，requires_element 为 True 的动作必须配置元素"""
+    def decorator(func):
+        func.requires_element = requires_element
+        _ACTIONS[name] = func
+        return func
+    return decorator
+
+
+class StepSpec:
+    """一次步骤执行所需的全部参数：变量已解析、定位器已编译、超时已换算"""
+
+    def __init__(self, action_type, input_value=None, assert_type=None, assert_value=None, wait_time=None,
+                 element=None, just_switched_tab=False, project_id=None):
+        self.action_type = action_type
+        self.project_id = project_id
+        self.input_value = input_value
+        self.resolved_input = resolve_variables(input_value) if input_value else input_value
+        self.assert_type = assert_type
+        self.assert_value = assert_value
+        self.resolved_assert = resolve_variables(assert_value) if assert_value else assert_value
+        self.wait_time = wait_time
+        self.just_switched_tab = just_switched_tab
+        self.started_at = time.time()
+
+        element = element or {}
+        self.element_id = element.get('id')
+        if element.get('locator_value'):
+            self.primary_locator = compile_locator(element.get('locator_strategy'), element.get('locator_value'))
+            # 候选定位器（主定位器 + 备用定位器），执行时先尝试上次生效的定位器
+            self.candidates = candidate_locators(element)
+        else:
+            self.primary_locator, self.candidates = None, []
+        self.locator = self.candidates[0] if self.candidates else None
+        self.element_name = element.get('name') or ('未知元素' if self.locator else '页面')
+        # 强制操作：跳过可见性检查（用于 visibility:hidden 的元素）
+        self.force = bool(element.get('force_action'))
+
+        # 超时：优先使用元素的 wait_timeout（秒），其次步骤的 wait_time（毫秒），至少5秒
+        element_wait_timeout = element.get('wait_timeout')
+        if element_wait_timeout:
+            self.timeout_ms = max(element_wait_timeout * 1000, 5000)
+        elif wait_time:
+            self.timeout_ms = max(wait_time, 5000)
+        else:
+            self.timeout_ms = 5000
+        # 刚切换标签页时新页面可能仍在渲染，放宽到至少10秒
+        if just_switched_tab:
+            self.timeout_ms = max(self.timeout_ms, 10000)
+        # 按项目历史耗时放宽超时在 run_step 中进行（可能需要读取 Redis）
+
+    @classmethod
+    def from_model(cls, step, element_data, project_id=None):
+        """由 TestCaseStep 对象和元素数据字典构造"""
+        return cls(
+            step.action_type, step.input_value, step.assert_type, step.assert_value, step.wait_time,
+            element_data, project_id=project_id,
+        )
+
+    @classmethod
+    def from_data(cls, step_data, project_id=None):
+        """由执行器预先准备的步骤数据字典构造"""
+        return cls(
+            step_data['action_type'], step_data.get('input_value'), step_data.get('assert_type'),
+            step_data.get('assert_value'), step_data.get('wait_time'), step_data.get('element'),
+            just_switched_tab=step_data.get('_just_switched_tab', False), project_id=project_id,
+        )
+
+    @property
+    def timeout_seconds(self):
+        return self.timeout_ms / 1000
+
+    @property
+    def locator_description(self):
+        return self.locator.description if self.locator else '无'
+
+    def elapsed(self):
+        return round(time.time() - self.started_at, 2)
+
+
+class StepOutcome:
+    """步骤执行结果
+
+    screenshot 为截图的 PNG 字节（截图步骤），switched_page 为切换后的标签页（Playwright 页面或 Selenium 窗口句柄）
+    """
+
+    def __init__(self, success, log, screenshot=None, result=None, switched_page=None, resolved_value=None):
+        self.success = success
+        self.log = log
+        self.screenshot = screenshot
+        self.result = result
+        self.switched_page = switched_page
+        self.resolved_value = resolved_value
+
+
+async def run_step(adapter, spec):
+    """按 action_type 查表执行步骤，异常转换为失败结果"""
+    handler = _ACTIONS.get(spec.action_type)
+    if handler is None:
+        return StepOutcome(False, f"⚠ 未知的操作类型: {spec.action_type}")
+    if handler.requires_element and spec.locator is None:
+        return StepOutcome(False, f"✗ 步骤缺少元素定位器（操作类型: {spec.action_type}）")
+    healing = handler.requires_element and len(spec.candidates) > 1
+    try:
+        if handler.requires_element:
+            # 按项目历史耗时放宽超时，读取 Redis 时不阻塞事件循环
+            spec.timeout_ms = await adapter.offload(
+                adaptive_timeout, spec.project_id, spec.action_type, spec.timeout_ms
+            )
+        if healing:
+            await prefer_remembered(adapter, spec)
+            # 存在/可见断言本身不等待元素，只检查一次
+            wait = not (spec.action_type == 'assert' and spec.assert_type in ('exists', 'isVisible'))
+            winner = await resolve_locator(adapter, spec, wait)
+            if winner is None and wait:
+                return _not_found(spec)
+            spec.locator = winner or spec.locator
+        outcome = await handler(adapter, spec)
+    except Exception as e:
+        return _failure(adapter, spec, e)
+    if outcome.success and handler.requires_element:
+        record_duration(spec.project_id, spec.action_type, time.time() - spec.started_at)
+        if healing:
+            await remember_locator(adapter, spec)
+            if spec.locator is not spec.primary_locator:
+                outcome.log += f"\n  - 定位器自愈: 使用备用定位器（主定位器: {spec.primary_locator.description}）"
+    return outcome
+
+
+def run_sync(coroutine):
+    """驱动同步适配器的步骤协程执行完毕并返回结果"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError('同步适配器的步骤协程不应挂起')
+
+
+def _failure(adapter, spec, error):
+    is_timeout, message = adapter.describe_error(error)
+    log = f"✗ 操作超时\n" if is_timeout else f"✗ 执行失败\n"
+    log += f"  - 元素: '{spec.element_name}'\n"
+    log += f"  - 定位器: {spec.locator_description}\n"
+    if is_timeout:
+        log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒\n"
+    log += f"  - 错误: {message}"
+    logger.warning(f"{adapter.name} 步骤执行失败: {message[:500]}")
+    return StepOutcome(False, log)
+
+
+def _not_found(spec):
+    log = f"✗ 操作超时\n"
+    log += f"  - 元素: '{spec.element_name}'\n"
+    log += f"  - 定位器: 主定位器和备用定位器均未找到元素\n"
+    for locator in spec.candidates:
+        log += f"    · {locator.description}\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(False, log)
+
+
+def _variable_line(raw, resolved):
+    return f"  - 变量解析: '{raw}' => '{resolved}'\n" if resolved != raw else ''
+
+
+@action('wait', requires_element=False)
+async def wait(adapter, spec):
+    wait_seconds = spec.wait_time / 1000 if spec.wait_time else 1
+    if settings.UI_AUTO_WAIT:
+        # 智能等待：等待时长作为上限，页面稳定后提前结束
+        settled = await settle(adapter, wait_seconds)
+        result = '页面已稳定' if settled else '已达等待上限'
+        return StepOutcome(True, f"✓ 智能等待完成（{result}，上限 {wait_seconds} 秒）- 耗时 {spec.elapsed()}秒")
+    await adapter.sleep(wait_seconds)
+    return StepOutcome(True, f"✓ 固定等待 {wait_seconds} 秒完成 - 耗时 {spec.elapsed()}秒")
+
+
+@action('screenshot', requires_element=False)
+async def screenshot(adapter, spec):
+    image = await adapter.screenshot()
+    log = f"✓ 截图成功\n"
+    log += f"  - 截图范围: 整个页面\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log, screenshot=image)
+
+
+@action('switchTab', requires_element=False)
+async def switch_tab(adapter, spec):
+    """切换标签页：指定索引时等待该标签页出现，否则等待一个不是当前页的新标签页"""
+    timeout = max(spec.wait_time / 1000, 5.0) if spec.wait_time else 5.0
+    value = spec.resolved_input
+    index = int(value) if value and str(value).isdigit() else None
+    current = adapter.current_tab()
+    deadline = time.time() + timeout
+
+    while True:
+        tabs = await adapter.tabs()
+        others = [tab for tab in tabs if tab != current]
+        if index is not None and 0 <= index < len(tabs):
+            target = tabs[index]
+            break
+        if index is None and others:
+            target = others[-1]
+            break
+        if time.time() > deadline:
+            if not others:
+                raise Exception(f"切换标签页失败: 在 {timeout} 秒内未检测到新标签页打开 (当前页面数: {len(tabs)})")
+            target = others[-1]
+            break
+        await adapter.sleep(0.5)
+
+    await adapter.activate_tab(target)
+    log = f"✓ 切换标签页成功\n"
+    log += f"  - 目标索引: {tabs.index(target)}\n"
+    log += f"  - 页面标题: {await adapter.title()}\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log, switched_page=target)
+
+
+@action('click')
+async def click(adapter, spec):
+    locator = spec.locator
+
+    if locator.native_select:
+        # 原生 HTML select 的 option 改用选择下拉框，失败时再按普通点击处理
+        try:
+            await adapter.select_option(locator, spec)
+            log = f"✓ 选择下拉框选项 '{spec.element_name}' 成功\n"
+            log += f"  - Select定位器: {locator.select_selector}\n"
+            log += f"  - 选中值: {locator.option_value}\n"
+            log += f"  - 执行时间: {spec.elapsed()}秒"
+            return StepOutcome(True, log)
+        except Exception as e:
+            logger.warning(f"原生select选择失败，改为普通点击: {e}")
+
+    if locator.select_trigger:
+        method = await adapter.click_select_trigger(locator, spec)
+        log = f"✓ 点击下拉框触发器 '{spec.element_name}' 成功\n"
+        log += f"  - 定位器: {locator.description}\n"
+        log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+        log += f"  - 特殊处理: {method}\n"
+        log += f"  - 执行时间: {spec.elapsed()}秒"
+        return StepOutcome(True, log)
+
+    if locator.dropdown_option or '选项' in spec.element_name:
+        method, count = await adapter.click_dropdown_option(locator, spec)
+        log = f"✓ 点击下拉框选项 '{spec.element_name}' 成功\n"
+        log += f"  - 定位器: {locator.description}\n"
+        log += f"  - 匹配数量: {count}\n"
+        log += f"  - 执行方法: {method}\n"
+        log += f"  - 执行时间: {spec.elapsed()}秒"
+        return StepOutcome(True, log)
+
+    await adapter.click(locator, spec)
+    log = f"✓ 点击元素 '{spec.element_name}' 成功\n"
+    log += f"  - 定位器: {locator.description}\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    if spec.force:
+        log += f"  - 强制操作: 是（跳过可见性检查）\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log)
+
+
+@action('fill')
+async def fill(adapter, spec):
+    value = spec.resolved_input or ''
+    await adapter.fill(spec.locator, value, spec)
+    execution_time = spec.elapsed()
+    # 输入后短暂等待，给 Vue/React 等框架处理表单验证的时间
+    await pause(adapter, 0.3)
+
+    log = f"✓ 在元素 '{spec.element_name}' 中输入文本成功\n"
+    log += f"  - 定位器: {spec.locator.description}\n"
+    log += _variable_line(spec.input_value, value)
+    log += f"  - 输入内容: '{value}'\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    if spec.force:
+        log += f"  - 强制操作: 是（忽略可见性检查）\n"
+    log += f"  - 执行时间: {execution_time}秒"
+    resolved_value = value if value != spec.input_value else None
+    return StepOutcome(True, log, resolved_value=resolved_value)
+
+
+@action('getText')
+async def get_text(adapter, spec):
+    text = await adapter.text(spec.locator, spec)
+    log = f"✓ 获取元素 '{spec.element_name}' 的文本成功\n"
+    log += f"  - 定位器: {spec.locator.description}\n"
+    log += f"  - 文本内容: '{text}'\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log, result=text)
+
+
+@action('waitFor')
+async def wait_for(adapter, spec):
+    # 下拉框选项可能处于隐藏状态，只要求出现在 DOM 中
+    state = 'attached' if spec.locator.dropdown_option else 'visible'
+    await adapter.wait_for(spec.locator, spec, state)
+    log = f"✓ 等待元素 '{spec.element_name}' 出现成功\n"
+    log += f"  - 定位器: {spec.locator.description}\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    log += f"  - 等待时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log)
+
+
+@action('hover')
+async def hover(adapter, spec):
+    await adapter.hover(spec.locator, spec)
+    log = f"✓ 在元素 '{spec.element_name}' 上悬停成功\n"
+    log += f"  - 定位器: {spec.locator.description}\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    if spec.force:
+        log += f"  - 强制操作: 是（忽略可见性检查）\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log)
+
+
+@action('scroll')
+async def scroll(adapter, spec):
+    await adapter.scroll(spec.locator, spec)
+    log = f"✓ 滚动到元素 '{spec.element_name}' 成功\n"
+    log += f"  - 定位器: {spec.locator.description}\n"
+    log += f"  - 超时设置: {spec.timeout_seconds}秒\n"
+    log += f"  - 执行时间: {spec.elapsed()}秒"
+    return StepOutcome(True, log)
+
+
+@action('assert')
+async def assert_(adapter, spec):
+    expected = spec.resolved_assert
+    variable_line = _variable_line(spec.assert_value, expected)
+
+    if spec.assert_type == 'textContains':
+        text = await adapter.text(spec.locator, spec)
+        if expected in text:
+            log = f"✓ 断言通过: 文本包含 '{expected}'\n{variable_line}"
+            log += f"  - 实际文本: '{text}'\n"
+            log += f"  - 超时设置: {spec.timeout_seconds}秒"
+            return StepOutcome(True, log)
+        log = f"✗ 断言失败: 文本不包含 '{expected}'\n{variable_line}"
+        log += f"  - 实际文本: '{text}'"
+        return StepOutcome(False, log)
+
+    if spec.assert_type == 'textEquals':
+        text = await adapter.text(spec.locator, spec)
+        if text == expected:
+            log = f"✓ 断言通过: 文本等于 '{expected}'\n{variable_line}"
+            log += f"  - 超时设置: {spec.timeout_seconds}秒"
+            return StepOutcome(True, log)
+        log = f"✗ 断言失败: 文本不等于 '{expected}'\n{variable_line}"
+        log += f"  - 期望: '{expected}'\n"
+        log += f"  - 实际: '{text}'"
+        return StepOutcome(False, log)
+
+    if spec.assert_type == 'isVisible':
+        if await adapter.is_visible(spec.locator, spec):
+            return StepOutcome(True, f"✓ 断言通过: 元素 '{spec.element_name}' 可见")
+        return StepOutcome(False, f"✗ 断言失败: 元素 '{spec.element_name}' 不可见")
+
+    if spec.assert_type == 'exists':
+        if await adapter.count(spec.locator) > 0:
+            return StepOutcome(True, f"✓ 断言通过: 元素 '{spec.element_name}' 存在")
+        return StepOutcome(False, f"✗ 断言失败: 元素 '{spec.element_name}' 不存在")
+
+    return StepOutcome(False, f"⚠ 未知的断言类型: {spec.assert_type}")
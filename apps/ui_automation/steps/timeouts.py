@@ -0,0 +1,89 @@
+"""
+自适应超时
+按 项目 + 操作类型 在 Redis 中保留最近的成功步骤耗时，样本足够后以 P95 × UI_ADAPTIVE_TIMEOUT_FACTOR
+作为该类步骤的元素等待超时（不超过 UI_ADAPTIVE_TIMEOUT_MAX）。
+学习到的超时只会放宽、不会收紧配置的超时：慢环境不再因为固定的5秒超时误报失败。
+Redis 不可用时按配置的超时执行
+
+步骤耗时先缓存在进程内，执行结束时由引擎调用 flush_durations 一次写入 Redis，步骤执行时不访问 Redis
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from apps.core.scheduler.wakeup import get_redis
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = 'testhub:ui:step_durations:'
+_HISTORY_SIZE = 200
+_CACHE_TTL = 60
+
+# 进程内缓存 {key: (过期时间, P95)}，避免每个步骤都读取 Redis
+_p95_cache = {}
+
+# 等待写入 Redis 的步骤耗时 {key: [秒]}
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def _key(project_id, action_type):
+    return f'{_KEY_PREFIX}{project_id}:{action_type}'
+
+
+def record_duration(project_id, action_type, seconds):
+    """记录一次成功步骤的耗时（秒），只写入进程内缓冲区"""
+    if not settings.UI_ADAPTIVE_TIMEOUT or project_id is None:
+        return
+    with _pending_lock:
+        durations = _pending.setdefault(_key(project_id, action_type), [])
+        durations.append(round(seconds, 3))
+        del durations[:-_HISTORY_SIZE]
+
+
+def flush_durations():
+    """把缓冲的步骤耗时一次写入 Redis，每次执行结束时调用"""
+    with _pending_lock:
+        if not _pending:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key, durations in pending.items():
+            pipe.lpush(key, *durations)
+            pipe.ltrim(key, 0, _HISTORY_SIZE - 1)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"记录步骤耗时失败: {e}")
+
+
+def _p95(key):
+    now = time.monotonic()
+    cached = _p95_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    try:
+        durations = sorted(float(value) for value in get_redis().lrange(key, 0, -1))
+    except Exception as e:
+        logger.debug(f"读取步骤耗时失败: {e}")
+        durations = []
+    p95 = None
+    if durations and len(durations) >= settings.UI_ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+        p95 = durations[math.ceil(len(durations) * 0.95) - 1]
+    _p95_cache[key] = (now + _CACHE_TTL, p95)
+    return p95
+
+
+def adaptive_timeout(project_id, action_type, timeout_ms):
+    """根据历史耗时返回该步骤的超时（毫秒），不小于配置的 timeout_ms"""
+    if not settings.UI_ADAPTIVE_TIMEOUT or project_id is None:
+        return timeout_ms
+    p95 = _p95(_key(project_id, action_type))
+    if p95 is None:
+        return timeout_ms
+    learned = min(p95 * settings.UI_ADAPTIVE_TIMEOUT_FACTOR, settings.UI_ADAPTIVE_TIMEOUT_MAX) * 1000
+    return max(timeout_ms, int(learned))
@@ -0,0 +1,71 @@
+"""
+智能等待
+开启 UI_AUTO_WAIT 后，步骤中的固定等待改为“等待页面稳定”，原来的等待时长作为上限：
+页面加载完成、没有进行中的 fetch / XHR 请求、DOM 持续 UI_AUTO_WAIT_QUIET_MS 毫秒无变化即视为稳定，提前继续执行。
+
+稳定性探针第一次执行时在页面中安装 MutationObserver 和请求计数（每个文档安装一次），
+之后每次执行只读取状态，Playwright 和 Selenium 共用同一段脚本
+"""
+import time
+
+from django.conf import settings
+
+# 探针函数体，返回 {ready, pending, quiet}
+PROBE_SCRIPT_BODY = """
+    const state = window.__testhubWait || (window.__testhubWait = (() => {
+        const s = { pending: 0, lastMutation: performance.now() };
+        new MutationObserver(() => { s.lastMutation = performance.now(); }).observe(
+            document, { subtree: true, childList: true, attributes: true, characterData: true }
+        );
+        if (window.fetch) {
+            const fetch = window.fetch;
+            window.fetch = function () {
+                s.pending++;
+                const done = () => { s.pending--; };
+                const promise = fetch.apply(this, arguments);
+                promise.then(done, done);
+                return promise;
+            };
+        }
+        const send = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            s.pending++;
+            this.addEventListener('loadend', () => { s.pending--; }, { once: true });
+            return send.apply(this, arguments);
+        };
+        return s;
+    })());
+    return {
+        ready: document.readyState === 'complete',
+        pending: state.pending,
+        quiet: performance.now() - state.lastMutation,
+    };
+"""
+
+_POLL_INTERVAL = 0.05
+
+
+async def settle(adapter, max_seconds):
+    """等待页面稳定，最多等待 max_seconds 秒；稳定返回True，达到上限返回False"""
+    deadline = time.monotonic() + max_seconds
+    quiet_ms = settings.UI_AUTO_WAIT_QUIET_MS
+    while True:
+        try:
+            state = await adapter.probe()
+        except Exception:
+            # 页面正在跳转，执行上下文已销毁
+            state = None
+        if state and state['ready'] and state['pending'] <= 0 and state['quiet'] >= quiet_ms:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await adapter.sleep(min(_POLL_INTERVAL, remaining))
+
+
+async def pause(adapter, seconds):
+    """固定等待 seconds 秒；开启智能等待时作为上限，页面稳定后提前返回"""
+    if settings.UI_AUTO_WAIT:
+        await settle(adapter, seconds)
+    else:
+        await adapter.sleep(seconds)
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+UI自动化 Celery 任务
+定时任务的执行投递到 browser 队列，由部署了浏览器的执行节点处理
+"""
+from celery import shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections
+import logging
+import sys
+
+from apps.core.scheduler.queues import clear_queued
+
+logger = logging.getLogger(__name__)
+
+
+@worker_process_init.connect
+def preload_webdrivers(**kwargs):
+    """执行进程启动时在后台解析 Selenium 驱动，首次执行不再等待驱动解析"""
+    from .webdriver_registry import preload_drivers
+    preload_drivers()
+
+
+@worker_process_shutdown.connect
+def shutdown_browser_pool(**kwargs):
+    """执行进程退出时关闭本进程的预热浏览器，避免遗留 Chromium 进程"""
+    from .browser_pool import get_browser_pool
+    get_browser_pool().shutdown()
+
+
+def _record_failed_run(task, error):
+    """记录一次失败的执行"""
+    task.refresh_from_db()
+    task.failed_runs += 1
+    task.error_message = str(error)
+    task.last_result = {
+        'status': 'failed',
+        'error': str(error)
+    }
+    task.save(update_fields=['failed_runs', 'error_message', 'last_result'])
+
+
+def run_scheduled_suite(task, retry_db_errors=False):
+    """执行定时任务配置的测试套件，更新任务结果并发送通知
+
+    retry_db_errors 为 True 时（Celery 任务内且还可以重试），开始执行套件之前的数据库连接错误向上抛出由 Celery 重试，
+    其余情况按执行失败记录，重试时不会重复执行套件
+    """
+    from .test_executor import TestExecutor
+
+    started = False
+    try:
+        test_suite = task.test_suite
+        test_case_count = test_suite.suite_test_cases.count()
+
+        executor = TestExecutor(
+            test_suite=test_suite,
+            engine=task.engine,
+            browser=task.browser,
+            headless=task.headless,
+            executed_by=task.created_by
+        )
+        started = True
+        executor.run()
+
+        # 测试完成后，重新加载任务并更新结果
+        task.refresh_from_db()
+        task.successful_runs += 1
+        task.last_result = {
+            'status': 'success',
+            'test_case_count': test_case_count
+        }
+        task.save(update_fields=['successful_runs', 'last_result'])
+
+        logger.info(f"UI定时任务 {task.name} 执行成功")
+
+        # 发送成功通知
+        print("       === 开始检查发送成功通知 ===")
+        notification_setting = None
+        if hasattr(task, 'notification_settings'):
+            try:
+                notification_setting = task.notification_settings.first()
+                print(f"       获取到通知设置: {notification_setting}")
+                if notification_setting:
+                    print(f"       通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
+                else:
+                    print("       没有找到通知设置")
+            except Exception as e:
+                print(f"       获取任务通知设置时出错: {e}", file=sys.stderr)
+                import traceback
+                traceback.print_exc()
+        else:
+            print("       任务没有notification_settings属性")
+
+        if notification_setting and notification_setting.is_enabled:
+            print("       通知设置已启用，准备发送成功通知")
+            if notification_setting.notify_on_success:
+                print("       调用 _send_task_notification 方法发送成功通知")
+                try:
+                    from apps.ui_automation.views import UiScheduledTaskViewSet
+                    viewset = UiScheduledTaskViewSet()
+                    viewset._send_task_notification(task, success=True)
+                    print("       ✓ 成功通知已发送")
+                except Exception as e:
+                    print(f"       ✗ 发送UI定时任务 {task.name} 成功通知失败: {e}", file=sys.stderr)
+            else:
+                print("       通知设置中未启用成功通知")
+        else:
+            print("       通知设置未启用或不存在，跳过成功通知")
+        print("       === 结束检查发送成功通知 ===")
+
+    except Exception as e:
+        if isinstance(e, (OperationalError, InterfaceError)):
+            if retry_db_errors and not started:
+                raise
+            # 关闭已失效的数据库连接，下面记录失败时重新连接
+            close_old_connections()
+        logger.error(f"UI定时任务 {task.name} 执行失败: {e}", exc_info=True)
+        _record_failed_run(task, e)
+
+        # 发送失败通知
+        print("       === 开始检查发送失败通知 ===")
+        notification_setting = None
+        if hasattr(task, 'notification_settings'):
+            try:
+                notification_setting = task.notification_settings.first()
+                print(f"       获取到通知设置（失败情况）: {notification_setting}")
+                if notification_setting:
+                    print(f"       通知设置详情（失败情况） - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
+                else:
+                    print("       没有找到通知设置（失败情况）")
+            except Exception as notify_error:
+                print(f"       获取任务通知设置时出错（失败情况）: {notify_error}", file=sys.stderr)
+                import traceback
+                traceback.print_exc()
+        else:
+            print("       任务没有notification_settings属性（失败情况）")
+
+        if notification_setting and notification_setting.is_enabled:
+            print("       通知设置已启用，准备发送失败通知")
+            if notification_setting.notify_on_failure:
+                print("       调用 _send_task_notification 方法发送失败通知")
+                try:
+                    from apps.ui_automation.views import UiScheduledTaskViewSet
+                    viewset = UiScheduledTaskViewSet()
+                    viewset._send_task_notification(task, success=False)
+                    print("       ✓ 失败通知已发送")
+                except Exception as notify_error:
+                    print(f"       ✗ 发送UI定时任务 {task.name} 失败通知失败: {notify_error}", file=sys.stderr)
+            else:
+                print("       通知设置中未启用失败通知")
+        else:
+            print("       通知设置未启用或不存在，跳过失败通知")
+        print("       === 结束检查发送失败通知 ===")
+
+
+def run_scheduled_cases(task, retry_db_errors=False):
+    """逐个执行定时任务配置的测试用例（每个用例使用临时测试套件），更新任务结果并发送通知
+
+    只有开始执行用例之前的数据库连接错误会交给 Celery 重试（retry_db_errors 为 True 时），
+    之后的数据库错误按用例失败记录，重试时不会重复执行已完成的用例
+    """
+    from .models import TestCase as UiTestCase, TestSuite
+    from .test_executor import TestExecutor
+
+    try:
+        test_cases_list = list(UiTestCase.objects.filter(id__in=task.test_cases))
+    except (OperationalError, InterfaceError) as e:
+        if retry_db_errors:
+            raise
+        close_old_connections()
+        logger.error(f"UI定时任务 {task.name} 加载测试用例失败: {e}")
+        _record_failed_run(task, e)
+        return
+    test_case_count = len(test_cases_list)
+
+    success_count = 0
+    failed_count = 0
+    results = []
+
+    for test_case in test_cases_list:
+        temp_suite = None
+        try:
+            # 创建临时测试套件
+            temp_suite = TestSuite.objects.create(
+                project=task.project,
+                name=f"[临时] {test_case.name}"
+            )
+
+            # 添加测试用例到临时套件
+            temp_suite.test_cases.add(test_case)
+
+            # 更新套件执行状态
+            temp_suite.execution_status = 'running'
+            temp_suite.save()
+
+            # 使用 TestExecutor 执行
+            executor = TestExecutor(
+                test_suite=temp_suite,
+                engine=task.engine,
+                browser=task.browser,
+                headless=task.headless,
+                executed_by=task.created_by
+            )
+            executor.run()
+
+            # 检查执行结果
+            temp_suite.refresh_from_db()
+            suite_executions = temp_suite.executions.all()
+
+            if suite_executions.exists():
+                last_execution = suite_executions.first()
+
+                if last_execution.status == 'SUCCESS':
+                    success_count += 1
+                    results.append({
+                        'case_id': test_case.id,
+                        'case_name': test_case.name,
+                        'status': 'success'
+                    })
+                else:
+                    failed_count += 1
+                    results.append({
+                        'case_id': test_case.id,
+                        'case_name': test_case.name,
+                        'status': 'failed',
+                        'error': last_execution.error_message
+                    })
+
+        except Exception as e:
+            if isinstance(e, (OperationalError, InterfaceError)):
+                close_old_connections()
+            logger.error(f"执行测试用例 {test_case.name} 失败: {e}")
+            failed_count += 1
+            results.append({
+                'case_id': test_case.id,
+                'case_name': test_case.name,
+                'status': 'failed',
+                'error': str(e)
+            })
+        finally:
+            # 删除临时测试套件
+            if temp_suite:
+                try:
+                    temp_suite.delete()
+                except Exception as e:
+                    logger.warning(f"删除临时测试套件 {temp_suite.name} 失败: {e}")
+
+    # 更新任务执行结果；用例已全部执行，数据库错误不再交给 Celery 重试
+    try:
+        task.refresh_from_db()
+        task.successful_runs += 1
+        task.last_result = {
+            'status': 'success' if failed_count == 0 else 'partial_success',
+            'test_case_count': test_case_count,
+            'success_count': success_count,
+            'failed_count': failed_count,
+            'results': results
+        }
+        task.save(update_fields=['successful_runs', 'last_result'])
+    except (OperationalError, InterfaceError) as e:
+        logger.error(f"UI定时任务 {task.name} 保存执行结果失败: {e}")
+        return
+
+    logger.info(f"UI定时任务 {task.name} 执行完成: 成功{success_count}, 失败{failed_count}")
+
+    # 发送通知
+    success = (failed_count == 0)
+    if success:
+        print("       === 开始检查发送成功通知 ===")
+    else:
+        print("       === 开始检查发送失败通知 ===")
+
+    notification_setting = None
+    if hasattr(task, 'notification_settings'):
+        try:
+            notification_setting = task.notification_settings.first()
+            print(f"       获取到通知设置: {notification_setting}")
+            if notification_setting:
+                if success:
+                    print(f"       通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 成功通知: {notification_setting.notify_on_success}")
+                else:
+                    print(f"       通知设置详情 - ID: {notification_setting.id}, 是否启用: {notification_setting.is_enabled}, 失败通知: {notification_setting.notify_on_failure}")
+            else:
+                print("       没有找到通知设置")
+        except Exception as e:
+            print(f"       获取任务通知设置时出错: {e}", file=sys.stderr)
+            import traceback
+            traceback.print_exc()
+    else:
+        print("       任务没有notification_settings属性")
+
+    if notification_setting and notification_setting.is_enabled:
+        print("       通知设置已启用，准备发送通知")
+        if success and notification_setting.notify_on_success:
+            print("       调用 _send_task_notification 方法发送成功通知")
+            try:
+                from apps.ui_automation.views import UiScheduledTaskViewSet
+                viewset = UiScheduledTaskViewSet()
+                viewset._send_task_notification(task, success=True)
+                print(f"       ✓ 成功通知已发送 (成功:{success_count}, 失败:{failed_count})")
+            except Exception as e:
+                print(f"       ✗ 发送UI定时任务 {task.name} 成功通知失败: {e}", file=sys.stderr)
+        elif not success and notification_setting.notify_on_failure:
+            print("       调用 _send_task_notification 方法发送失败通知")
+            try:
+                from apps.ui_automation.views import UiScheduledTaskViewSet
+                viewset = UiScheduledTaskViewSet()
+                viewset._send_task_notification(task, success=False)
+                print(f"       ✓ 失败通知已发送 (成功:{success_count}, 失败:{failed_count})")
+            except Exception as e:
+                print(f"       ✗ 发送UI定时任务 {task.name} 失败通知失败: {e}", file=sys.stderr)
+        else:
+            if success:
+                print("       通知设置中未启用成功通知")
+            else:
+                print("       通知设置中未启用失败通知")
+    else:
+        print("       通知设置未启用或不存在，跳过通知")
+
+    if success:
+        print("       === 结束检查发送成功通知 ===")
+    else:
+        print("       === 结束检查发送失败通知 ===")
+
+
+def run_scheduled_ui_task(task, retry_db_errors=False):
+    """按任务类型执行UI定时任务，retry_db_errors 只在 Celery 任务中传入"""
+    if task.task_type == 'TEST_SUITE':
+        run_scheduled_suite(task, retry_db_errors)
+    elif task.task_type == 'TEST_CASE':
+        run_scheduled_cases(task, retry_db_errors)
+    else:
+        logger.error(f"UI定时任务 {task.name} 的任务类型未知: {task.task_type}")
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    autoretry_for=(OperationalError, InterfaceError),
+    retry_backoff=True,
+    max_retries=3,
+    soft_time_limit=settings.CELERY_BROWSER_TASK_TIME_LIMIT,
+    time_limit=settings.CELERY_BROWSER_TASK_TIME_LIMIT + 60,
+)
+def execute_scheduled_ui_task(self, task_id, coalesce_key=None):
+    """
+    执行UI自动化定时任务
+
+    Args:
+        task_id: UiScheduledTask 的 ID
+        coalesce_key: 投递时设置的排队标记，开始执行时清除，之后到期的运行可以再次投递
+    """
+    from .models import UiScheduledTask
+
+    if coalesce_key:
+        clear_queued(coalesce_key)
+
+    try:
+        task = UiScheduledTask.objects.get(id=task_id)
+    except UiScheduledTask.DoesNotExist:
+        logger.warning(f"UI定时任务 {task_id} 已删除，跳过执行")
+        return {'task_id': task_id, 'status': 'cancelled'}
+
+    run_scheduled_ui_task(task, retry_db_errors=self.request.retries < self.max_retries)
+    task.refresh_from_db(fields=['last_result'])
+    return {'task_id': task_id, 'status': (task.last_result or {}).get('status', '')}
+
+
+def run_ui_suite(test_suite, engine, browser, headless, executed_by):
+    """执行测试套件（套件页面手动执行），执行异常时把套件状态置为失败"""
+    from .test_executor import TestExecutor
+
+    logger.info(f"[测试套件] 开始执行: {test_suite.name} (ID: {test_suite.id}), "
+                f"engine={engine}, browser={browser}, headless={headless}")
+    try:
+        executor = TestExecutor(
+            test_suite=test_suite,
+            engine=engine,
+            browser=browser,
+            headless=headless,
+            executed_by=executed_by
+        )
+        executor.run()
+        logger.info(f"[测试套件] 执行完成: {test_suite.name}")
+    except Exception as e:
+        logger.error(f"[测试套件] 执行异常: {test_suite.name}: {e}", exc_info=True)
+        try:
+            test_suite.execution_status = 'failed'
+            test_suite.save(update_fields=['execution_status'])
+        except Exception as save_error:
+            logger.error(f"[测试套件] 更新状态失败: {save_error}")
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    soft_time_limit=settings.CELERY_BROWSER_TASK_TIME_LIMIT,
+    time_limit=settings.CELERY_BROWSER_TASK_TIME_LIMIT + 60,
+)
+def execute_ui_suite_task(self, suite_id, engine, browser, headless, user_id=None):
+    """
+    执行测试套件（套件页面手动执行）
+
+    Args:
+        suite_id: TestSuite 的 ID
+        engine / browser / headless: 执行配置
+        user_id: 执行人
+    """
+    from django.contrib.auth import get_user_model
+    from .models import TestSuite
+
+    try:
+        test_suite = TestSuite.objects.get(id=suite_id)
+    except TestSuite.DoesNotExist:
+        logger.warning(f"测试套件 {suite_id} 已删除，跳过执行")
+        return {'suite_id': suite_id, 'status': 'cancelled'}
+
+    executed_by = get_user_model().objects.filter(id=user_id).first() if user_id else None
+    run_ui_suite(test_suite, engine, browser, headless, executed_by)
+    test_suite.refresh_from_db(fields=['execution_status'])
+    return {'suite_id': suite_id, 'status': test_suite.execution_status}
@@ -2,37 +2,59 @@
 UI自动化测试执行服务
 支持 Playwright 和 Selenium 测试引擎
 """
+import copy
+import platform
+import threading
 import time
 import json
 from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
 from django.db import connection
 from playwright.sync_api import sync_playwright
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.safari.options import Options as SafariOptions
 from selenium.webdriver.edge.options import Options as EdgeOptions
 
+from .browser_pool import BrowserLease, connect_pooled_browser, get_browser_pool
+from .login_state import invalidate_login_state, load_login_state, login_state_key, save_login_state
+from .network_profile import apply_network_profile, apply_network_profile_selenium, get_network_profile
 from .models import (
     TestSuite, TestExecution, TestCase, TestCaseStep,
     TestCaseExecution, Element
 )
-from .variable_resolver import resolve_variables
+from .parallel import WorkStealingQueue
+from .screenshot_storage import save_screenshot
+from .steps import PlaywrightAdapter, SeleniumAdapter, StepSpec, flush_durations, pause, run_step, run_sync
+from .webdriver_registry import start_driver
 
 
 class TestExecutor:
     """测试执行器基类"""
 
-    def __init__(self, test_suite, engine='playwright', browser='chrome', headless=False, executed_by=None):
+    def __init__(self, test_suite, engine='playwright', browser='chrome', headless=False, executed_by=None,
+                 parallel_workers=None, share_login_state=None, cache_login_state=None):
         self.test_suite = test_suite
         self.engine = engine
         self.browser = browser
         self.headless = headless
         self.executed_by = executed_by
+        # 并行浏览器数和是否共享登录状态，未指定时使用套件配置
+        if parallel_workers is None:
+            parallel_workers = getattr(test_suite, 'parallel_workers', 1) or 1
+        self.parallel_workers = max(1, min(int(parallel_workers), settings.UI_PARALLEL_MAX_WORKERS))
+        if share_login_state is None:
+            share_login_state = getattr(test_suite, 'share_login_state', False)
+        self.share_login_state = share_login_state
+        if cache_login_state is None:
+            cache_login_state = getattr(test_suite, 'cache_login_state', False)
+        self.cache_login_state = cache_login_state
+        self.login_state_key = None
+        # 项目的网络配置（资源拦截、静态资源回放），每个浏览器上下文 / WebDriver 创建后应用
+        self.network_profile = get_network_profile(test_suite.project)
         self.execution = None
         self.test_cases = []
         self.results = []
@@ -134,6 +156,8 @@ class TestExecutor:
                     error_msg=f"执行失败: {str(e)}\n\n{traceback.format_exc()}"
                 )
         finally:
+            # 本次执行缓冲的步骤耗时写入 Redis
+            flush_durations()
             # 确保关闭数据库连接
             print(f"[TestExecutor] 关闭数据库连接...")
             connection.close()
@@ -213,7 +237,10 @@ class TestExecutor:
                         'id': step.element.id,
                         'name': step.element.name,
                         'locator_value': step.element.locator_value,
-                        'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css'
+                        'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css',
+                        'wait_timeout': step.element.wait_timeout,
+                        'force_action': step.element.force_action,
+                        'backup_locators': step.element.backup_locators
                     }
 
                 case_data['steps'].append(step_data)
@@ -240,30 +267,33 @@ class TestExecutor:
         # 执行每个测试用例，复用同一个浏览器上下文避免重复登录
         print(f"准备执行 {len(test_cases_data)} 个测试用例")
 
+        # 第一个用例作为登录用例：有缓存的登录状态时带着登录状态启动，跳过登录用例
+        storage_state = None
+        if self.cache_login_state and test_cases_data:
+            login_case = test_cases_data[0]
+            self.login_state_key = login_state_key(
+                self.test_suite.project.id, self.test_suite.project.base_url, login_case
+            )
+            storage_state = load_login_state(self.login_state_key)
+            if storage_state is not None:
+                print(f"✓ 复用缓存的登录状态，跳过登录用例: {login_case['name']}")
+                self._skip_login_case(login_case, case_executions[login_case['id']])
+                skipped += 1
+                test_cases_data = test_cases_data[1:]
+
+        if self.parallel_workers > 1 and len(test_cases_data) > 1:
+            passed, failed, skipped = self.run_playwright_parallel(test_cases_data, case_executions, storage_state)
+            self._finish_login_state(storage_state, failed)
+            duration = time.time() - start_time
+            status = 'SUCCESS' if failed == 0 else 'FAILED'
+            self.update_execution_result(status, passed, failed, skipped, duration)
+            return
+
         with sync_playwright() as p:
-            # 只启动一次浏览器
-            if self.browser == 'firefox':
-                browser = p.firefox.launch(headless=self.headless)
-            elif self.browser == 'safari':
-                browser = p.webkit.launch(headless=self.headless)
-            else:  # chrome or edge
-                # 添加防检测参数和忽略证书错误参数
-                browser = p.chromium.launch(
-                    headless=self.headless,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                        '--ignore-certificate-errors',
-                        '--ignore-ssl-errors',
-                        '--ignore-certificate-errors-spki-list'
-                    ]
-                )
+            # 只租用一次浏览器，只创建一次上下文和页面
+            lease = self._open_playwright_session(p, storage_state)
             print(f"✓ 浏览器已启动")
-
-            # 只创建一次上下文和页面
-            self.context = browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-            )
+            self.context = lease.context
             self.current_page = self.context.new_page()
             print(f"✓ 浏览器上下文已创建")
 
@@ -271,45 +301,19 @@ class TestExecutor:
             if self.test_suite.project.base_url:
                 try:
                     print(f"正在导航到: {self.test_suite.project.base_url}")
-
-                    # 检测是否在Linux服务器环境
-                    import platform
-                    is_linux = platform.system() == 'Linux'
-
-                    # 使用 networkidle 等待页面加载完成
-                    self.current_page.goto(self.test_suite.project.base_url, wait_until='networkidle',
-                                                   timeout=30000)
-
-                    # 额外等待，确保动态内容加载（Vue/React等SPA应用）
-                    # 服务器无头模式需要更长的等待时间
-                    extra_wait = 3 if is_linux else 2
-                    time.sleep(extra_wait)
-
-                    print(
-                        f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面加载完成，额外{extra_wait}秒)")
+                    # 使用 networkidle 等待页面加载完成，并额外等待动态内容加载
+                    self._goto_base_url()
+                    print(f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面加载完成)")
                 except Exception as e:
                     print(f"✗ 导航失败: {str(e)}")
                     # 导航失败，所有用例都失败
                     for case_data in test_cases_data:
-                        self.results.append({
-                            'test_case_id': case_data['id'],
-                            'test_case_name': case_data['name'],
-                            'status': 'failed',
-                            'steps': [],
-                            'error': f"导航到基础URL失败: {str(e)}",
-                            'start_time': datetime.now().isoformat(),
-                            'end_time': datetime.now().isoformat(),
-                            'screenshots': []
-                        })
+                        self._fail_unexecuted_case(
+                            case_data, case_executions[case_data['id']], f"导航到基础URL失败: {str(e)}"
+                        )
                         failed += 1
-                        # 更新执行记录
-                        case_execution = case_executions[case_data['id']]
-                        case_execution.status = 'failed'
-                        case_execution.started_at = timezone.now()
-                        case_execution.finished_at = timezone.now()
-                        case_execution.error_message = f"导航到基础URL失败: {str(e)}"
-                        case_execution.save()
-                    browser.close()
+                    lease.close()
+                    self._finish_login_state(storage_state, failed)
                     return
 
             # 遍历执行每个测试用例（复用同一个上下文）
@@ -318,69 +322,20 @@ class TestExecutor:
                 print(f"正在执行第 {i}/{len(test_cases_data)} 个用例: {case_data['name']}")
                 print(f"{'=' * 60}")
 
-                # 记录用例实际开始执行时间
-                case_execution = case_executions[case_data['id']]
-                case_execution.started_at = timezone.now()
-                case_execution.status = 'running'
-                case_execution.save()
-
-                try:
-                    # 执行测试用例（复用 self.current_page）
-                    print(f"🔍 准备执行用例，检查 self.current_page: {self.current_page is not None}")
-                    print(f"📌 当前页面 URL: {self.current_page.url}")
-                    case_result = self.execute_test_case_playwright_no_db(case_data)
-                    self.results.append(case_result)
-                    print(f"✓ 用例执行完成，状态: {case_result['status']}")
-
-                    # 立即更新该用例的执行记录（包含准确的执行时间）
-                    case_execution = case_executions[case_data['id']]
-                    case_execution.status = case_result['status']
-                    case_execution.finished_at = timezone.now()
-                    case_execution.execution_time = (
-                                case_execution.finished_at - case_execution.started_at).total_seconds()
-                    case_execution.execution_logs = json.dumps(case_result['steps'], ensure_ascii=False)
-                    if case_result['error']:
-                        case_execution.error_message = case_result['error']
-                    if case_result.get('screenshots'):
-                        case_execution.screenshots = case_result['screenshots']
-                    case_execution.save()
-
-                    print(f"⏱️  执行时长: {case_execution.execution_time:.2f}秒")
-
-                    if case_result['status'] == 'passed':
-                        passed += 1
-                    elif case_result['status'] == 'failed':
-                        failed += 1
-                    else:
-                        skipped += 1
-
-                except Exception as e:
-                    print(f"✗ 用例执行出现异常: {str(e)}")
-                    # 记录异常
-                    self.results.append({
-                        'test_case_id': case_data['id'],
-                        'test_case_name': case_data['name'],
-                        'status': 'failed',
-                        'steps': [],
-                        'error': f"用例执行异常: {str(e)}",
-                        'start_time': datetime.now().isoformat(),
-                        'end_time': datetime.now().isoformat(),
-                        'screenshots': []
-                    })
+                case_result = self._run_case_playwright(case_data, case_executions[case_data['id']])
+                if i == 1 and self.login_state_key and storage_state is None:
+                    self._save_login_state(case_result)
+                if case_result['status'] == 'passed':
+                    passed += 1
+                elif case_result['status'] == 'failed':
                     failed += 1
+                else:
+                    skipped += 1
 
-                    # 更新执行记录
-                    case_execution = case_executions[case_data['id']]
-                    case_execution.status = 'failed'
-                    case_execution.finished_at = timezone.now()
-                    case_execution.execution_time = (
-                                case_execution.finished_at - case_execution.started_at).total_seconds()
-                    case_execution.error_message = f"用例执行异常: {str(e)}"
-                    case_execution.save()
-
-            # 所有用例执行完成后，关闭浏览器
-            browser.close()
+            # 所有用例执行完成后，关闭浏览器（池中的浏览器只关闭上下文并归还）
+            lease.close()
             print(f"✓ 浏览器已关闭\n")
+        self._finish_login_state(storage_state, failed)
 
         # 注意：每个用例的执行记录已在执行过程中实时更新，不需要在这里统一更新
 
@@ -388,6 +343,272 @@ class TestExecutor:
         status = 'SUCCESS' if failed == 0 else 'FAILED'
         self.update_execution_result(status, passed, failed, skipped, duration)
 
+    def _launch_playwright_browser(self, p):
+        """启动 Playwright 浏览器"""
+        if self.browser == 'firefox':
+            return p.firefox.launch(headless=self.headless)
+        if self.browser == 'safari':
+            return p.webkit.launch(headless=self.headless)
+        # chrome or edge：添加防检测参数和忽略证书错误参数
+        return p.chromium.launch(
+            headless=self.headless,
+            args=[
+                '--disable-blink-features=AutomationControlled',
+                '--ignore-certificate-errors',
+                '--ignore-ssl-errors',
+                '--ignore-certificate-errors-spki-list'
+            ]
+        )
+
+    def _open_playwright_session(self, p, storage_state=None):
+        """打开浏览器上下文，返回 BrowserLease
+
+        chrome / edge 从预热的浏览器池租用已运行的浏览器，firefox、safari 或池不可用时冷启动
+        """
+        browser, pooled = None, None
+        if self.browser not in ('firefox', 'safari'):
+            browser, pooled = connect_pooled_browser(p.chromium, self.headless)
+        if browser is None:
+            browser = self._launch_playwright_browser(p)
+        try:
+            context = self._new_playwright_context(browser, storage_state)
+        except Exception:
+            BrowserLease(browser, None, pooled, get_browser_pool()).close()
+            raise
+        return BrowserLease(browser, context, pooled, get_browser_pool())
+
+    def _new_playwright_context(self, browser, storage_state=None):
+        """创建浏览器上下文并应用网络配置，storage_state 为已保存的登录状态（cookies 和 localStorage）"""
+        context = browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+            storage_state=storage_state
+        )
+        try:
+            apply_network_profile(context, self.network_profile)
+        except Exception:
+            context.close()
+            raise
+        return context
+
+    def _goto_base_url(self):
+        """当前页面导航到项目基础URL并等待动态内容加载"""
+        base_url = self.test_suite.project.base_url
+        if not base_url:
+            return
+        self.current_page.goto(base_url, wait_until='networkidle', timeout=30000)
+        # 额外等待，确保动态内容加载（Vue/React等SPA应用），服务器无头模式需要更长的等待时间；
+        # 开启智能等待时页面稳定后提前结束
+        run_sync(pause(PlaywrightAdapter(self.current_page), 3 if platform.system() == 'Linux' else 2))
+
+    def _run_case_playwright(self, case_data, case_execution):
+        """在当前页面执行一个用例并实时更新其执行记录，返回用例结果"""
+        # 记录用例实际开始执行时间
+        case_execution.started_at = timezone.now()
+        case_execution.status = 'running'
+        case_execution.save()
+
+        try:
+            # 执行测试用例（复用 self.current_page）
+            print(f"🔍 准备执行用例，检查 self.current_page: {self.current_page is not None}")
+            print(f"📌 当前页面 URL: {self.current_page.url}")
+            case_result = self.execute_test_case_playwright_no_db(case_data)
+            self.results.append(case_result)
+            print(f"✓ 用例执行完成，状态: {case_result['status']}")
+
+            # 立即更新该用例的执行记录（包含准确的执行时间）
+            case_execution.status = case_result['status']
+            case_execution.finished_at = timezone.now()
+            case_execution.execution_time = (
+                        case_execution.finished_at - case_execution.started_at).total_seconds()
+            case_execution.execution_logs = json.dumps(case_result['steps'], ensure_ascii=False)
+            if case_result['error']:
+                case_execution.error_message = case_result['error']
+            if case_result.get('screenshots'):
+                case_execution.screenshots = case_result['screenshots']
+            case_execution.save()
+
+            print(f"⏱️  执行时长: {case_execution.execution_time:.2f}秒")
+            return case_result
+
+        except Exception as e:
+            print(f"✗ 用例执行出现异常: {str(e)}")
+            # 记录异常
+            case_result = {
+                'test_case_id': case_data['id'],
+                'test_case_name': case_data['name'],
+                'status': 'failed',
+                'steps': [],
+                'error': f"用例执行异常: {str(e)}",
+                'start_time': datetime.now().isoformat(),
+                'end_time': datetime.now().isoformat(),
+                'screenshots': []
+            }
+            self.results.append(case_result)
+
+            # 更新执行记录
+            case_execution.status = 'failed'
+            case_execution.finished_at = timezone.now()
+            case_execution.execution_time = (
+                        case_execution.finished_at - case_execution.started_at).total_seconds()
+            case_execution.error_message = f"用例执行异常: {str(e)}"
+            case_execution.save()
+            return case_result
+
+    def _fail_unexecuted_case(self, case_data, case_execution, error):
+        """标记未能执行的用例为失败"""
+        self.results.append({
+            'test_case_id': case_data['id'],
+            'test_case_name': case_data['name'],
+            'status': 'failed',
+            'steps': [],
+            'error': error,
+            'start_time': datetime.now().isoformat(),
+            'end_time': datetime.now().isoformat(),
+            'screenshots': []
+        })
+        case_execution.status = 'failed'
+        case_execution.started_at = timezone.now()
+        case_execution.finished_at = timezone.now()
+        case_execution.error_message = error
+        case_execution.save()
+
+    def _skip_login_case(self, case_data, case_execution):
+        """登录用例由缓存的登录状态代替，记为跳过"""
+        self.results.append({
+            'test_case_id': case_data['id'],
+            'test_case_name': case_data['name'],
+            'status': 'skipped',
+            'steps': [],
+            'error': None,
+            'start_time': datetime.now().isoformat(),
+            'end_time': datetime.now().isoformat(),
+            'screenshots': []
+        })
+        case_execution.status = 'skipped'
+        case_execution.started_at = timezone.now()
+        case_execution.finished_at = timezone.now()
+        case_execution.execution_time = 0
+        case_execution.execution_logs = '复用缓存的登录状态，未执行登录用例'
+        case_execution.save()
+
+    def _save_login_state(self, case_result):
+        """登录用例通过后缓存当前上下文的登录状态"""
+        if case_result['status'] != 'passed':
+            return
+        try:
+            save_login_state(self.login_state_key, self.context.storage_state())
+            print("✓ 已缓存登录状态")
+        except Exception as e:
+            print(f"⚠️  缓存登录状态失败: {str(e)}")
+
+    def _finish_login_state(self, storage_state, failed):
+        """带缓存的登录状态启动的执行出现失败用例时，登录状态可能已失效，删除缓存"""
+        if storage_state is not None and failed and self.login_state_key:
+            invalidate_login_state(self.login_state_key)
+            print("⚠️  执行中有失败用例，已删除缓存的登录状态，下次执行重新登录")
+
+    def run_playwright_parallel(self, test_cases_data, case_executions, storage_state=None):
+        """多个浏览器并行执行用例，返回 (passed, failed, skipped)
+
+        sync 版 Playwright 不能跨线程使用，每个工作线程启动独立的 Playwright 并租用各自的浏览器，
+        每个浏览器内的用例仍复用同一个上下文；用例通过工作窃取队列分配。
+        storage_state 为缓存的登录状态，所有浏览器直接带着登录状态启动
+        """
+        workers = min(self.parallel_workers, len(test_cases_data))
+        print(f"并行执行 {len(test_cases_data)} 个测试用例，浏览器数: {workers}")
+
+        remaining = list(test_cases_data)
+        if storage_state is None and (self.share_login_state or self.login_state_key):
+            # 第一个用例作为登录用例先执行，保存登录状态供所有浏览器复用
+            login_case = remaining.pop(0)
+            storage_state = self._run_login_case_playwright(login_case, case_executions[login_case['id']])
+
+        queue = WorkStealingQueue(remaining, workers)
+        threads = [
+            threading.Thread(
+                target=self._playwright_worker,
+                args=(index, queue, case_executions, storage_state),
+                name=f'ui-parallel-{index + 1}'
+            )
+            for index in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 所有浏览器都未能启动或导航时，剩余用例直接标记为失败
+        for case_data in queue.drain():
+            self._fail_unexecuted_case(
+                case_data, case_executions[case_data['id']], '所有浏览器均启动或导航失败，用例未执行'
+            )
+        print(f"✓ 并行执行完成，窃取用例次数: {queue.stolen}")
+
+        # 结果按套件中的用例顺序排列（跳过的登录用例不在 test_cases_data 中，排在最前）
+        order = {case_data['id']: index for index, case_data in enumerate(test_cases_data)}
+        self.results.sort(key=lambda result: order.get(result['test_case_id'], -1))
+
+        passed = sum(1 for result in self.results if result['status'] == 'passed')
+        failed = sum(1 for result in self.results if result['status'] == 'failed')
+        skipped = len(self.results) - passed - failed
+        return passed, failed, skipped
+
+    def _run_login_case_playwright(self, case_data, case_execution):
+        """执行登录用例，成功时返回浏览器上下文的登录状态，失败返回None"""
+        print(f"先执行登录用例: {case_data['name']}")
+        with sync_playwright() as p:
+            lease = self._open_playwright_session(p)
+            try:
+                self.context = lease.context
+                self.current_page = self.context.new_page()
+                try:
+                    self._goto_base_url()
+                except Exception as e:
+                    self._fail_unexecuted_case(case_data, case_execution, f"导航到基础URL失败: {str(e)}")
+                    return None
+                case_result = self._run_case_playwright(case_data, case_execution)
+                if case_result['status'] != 'passed':
+                    print("⚠️  登录用例未通过，其他浏览器不共享登录状态")
+                    return None
+                print("✓ 已保存登录状态")
+                storage_state = self.context.storage_state()
+                if self.login_state_key:
+                    save_login_state(self.login_state_key, storage_state)
+                return storage_state
+            finally:
+                lease.close()
+
+    def _playwright_worker(self, worker_index, queue, case_executions, storage_state):
+        """并行执行的工作线程：租用独立的浏览器上下文，循环从队列领取用例执行"""
+        label = f"[浏览器 {worker_index + 1}]"
+        # 每个线程使用独立的页面状态，执行结果写入共享的 results
+        worker = copy.copy(self)
+        try:
+            with sync_playwright() as p:
+                lease = worker._open_playwright_session(p, storage_state)
+                try:
+                    worker.context = lease.context
+                    worker.current_page = worker.context.new_page()
+                    try:
+                        worker._goto_base_url()
+                    except Exception as e:
+                        print(f"✗ {label} 导航失败: {str(e)}，剩余用例交由其他浏览器执行")
+                        return
+                    while True:
+                        case_data = queue.take(worker_index)
+                        if case_data is None:
+                            break
+                        print(f"{label} 执行用例: {case_data['name']}")
+                        worker._run_case_playwright(case_data, case_executions[case_data['id']])
+                finally:
+                    lease.close()
+        except Exception as e:
+            print(f"✗ {label} 浏览器启动失败: {str(e)}")
+        finally:
+            # 工作线程结束时关闭本线程的数据库连接
+            connection.close()
+
     def execute_test_case_playwright_no_db(self, case_data):
         """使用 Playwright 执行单个测试用例（不访问数据库）
 
@@ -442,13 +663,9 @@ class TestExecutor:
                 # 步骤执行完后添加短暂延迟，确保页面状态稳定
                 # 特别是点击操作后，可能触发动画、下拉框展开等
                 if step_result['success'] and step_data['action_type'] in ['click', 'fill', 'hover']:
-                    import asyncio
-                    import time as sync_time
-                    # 点击操作后等待更长时间（下拉框展开动画）
-                    if step_data['action_type'] == 'click':
-                        self.current_page.wait_for_timeout(800)  # 等待800ms，确保下拉框完全展开
-                    else:
-                        self.current_page.wait_for_timeout(300)  # 其他操作等待300ms
+                    # 点击操作后等待更长时间（下拉框展开动画），开启智能等待时以此为上限
+                    delay = 0.8 if step_data['action_type'] == 'click' else 0.3
+                    run_sync(pause(PlaywrightAdapter(self.current_page), delay))
 
                 # 如果步骤失败，捕获失败截图
                 if not step_result['success']:
@@ -458,7 +675,6 @@ class TestExecutor:
 
                     # 捕获失败截图（改进版）
                     try:
-                        import base64
                         # 检查页面对象是否有效
                         if not self.current_page:
                             print(f"⚠️  self.current_page 为 None，无法截图")
@@ -471,22 +687,15 @@ class TestExecutor:
                         screenshot_bytes = self.current_page.screenshot(timeout=5000)  # 5秒超时
                         print(f"   截图字节大小: {len(screenshot_bytes)} bytes")
 
-                        screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                        print(f"   Base64 编码大小: {len(screenshot_base64)} characters")
-
-                        # 验证 base64 编码是否有效
-                        if len(screenshot_base64) < 100:
-                            raise Exception(f"Base64 编码异常短 ({len(screenshot_base64)} chars)，可能截图失败")
-
-                        screenshot_url = f'data:image/png;base64,{screenshot_base64}'
-                        result['screenshots'].append({
-                            'url': screenshot_url,
-                            'description': f'步骤 {step_data["step_number"]} 失败截图: {step_data.get("description", "")}',
-                            'step_number': step_data['step_number'],
-                            'timestamp': datetime.now().isoformat()
-                        })
+                        # 压缩后写入文件，执行记录只保存URL
+                        screenshot = save_screenshot(
+                            screenshot_bytes,
+                            description=f'步骤 {step_data["step_number"]} 失败截图: {step_data.get("description", "")}',
+                            step_number=step_data['step_number']
+                        )
+                        result['screenshots'].append(screenshot)
                         print(f"✓ 失败截图已捕获 (步骤 {step_data['step_number']})")
-                        print(f"   截图 URL 长度: {len(screenshot_url)} characters")
+                        print(f"   截图文件: {screenshot['url']} ({screenshot['size']} bytes)")
                     except Exception as screenshot_error:
                         error_msg = f"捕获失败截图失败: {str(screenshot_error)}"
                         print(f"⚠️  {error_msg}")
@@ -511,12 +720,10 @@ class TestExecutor:
                         print(f"⚠️  self.current_page 为 None，无法捕获成功截图")
                         raise Exception("页面对象已失效")
 
-                    # 等待页面跳转完成（2秒）
-                    import time
+                    # 等待页面跳转完成（最多2秒）
                     print(f"⏱️  等待页面跳转完成...")
-                    time.sleep(2)
+                    run_sync(pause(PlaywrightAdapter(self.current_page), 2))
 
-                    import base64
                     print(f"🔍 开始捕获成功截图...")
                     print(f"   当前page对象URL: {self.current_page.url}")
                     print(f"   当前page对象标题: {self.current_page.title()}")
@@ -524,19 +731,14 @@ class TestExecutor:
                     screenshot_bytes = self.current_page.screenshot(timeout=5000)
                     print(f"   截图字节大小: {len(screenshot_bytes)} bytes")
 
-                    screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                    print(f"   Base64 编码大小: {len(screenshot_base64)} characters")
-
-                    if len(screenshot_base64) >= 100:
-                        screenshot_url = f'data:image/png;base64,{screenshot_base64}'
-                        result['screenshots'].append({
-                            'url': screenshot_url,
-                            'description': '测试执行成功 - 最终页面截图',
-                            'step_number': len(case_data['steps']) + 1,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                        print(f"✓ 成功截图已捕获")
-                        print(f"   截图 URL 长度: {len(screenshot_url)} characters")
+                    screenshot = save_screenshot(
+                        screenshot_bytes,
+                        description='测试执行成功 - 最终页面截图',
+                        step_number=len(case_data['steps']) + 1
+                    )
+                    result['screenshots'].append(screenshot)
+                    print(f"✓ 成功截图已捕获")
+                    print(f"   截图文件: {screenshot['url']} ({screenshot['size']} bytes)")
                 except Exception as screenshot_error:
                     error_msg = f"捕获成功截图失败: {str(screenshot_error)}"
                     print(f"⚠️  {error_msg}")
@@ -549,28 +751,15 @@ class TestExecutor:
 
             # 捕获异常截图（改进版）
             try:
-                import base64
                 # 增加超时设置，避免截图等待时间过长
                 print(f"🔍 开始捕获异常截图...")
                 screenshot_bytes = self.current_page.screenshot(timeout=5000)  # 5秒超时
                 print(f"   截图字节大小: {len(screenshot_bytes)} bytes")
 
-                screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
-                print(f"   Base64 编码大小: {len(screenshot_base64)} characters")
-
-                # 验证 base64 编码是否有效
-                if len(screenshot_base64) < 100:
-                    raise Exception(f"Base64 编码异常短 ({len(screenshot_base64)} chars)，可能截图失败")
-
-                screenshot_url = f'data:image/png;base64,{screenshot_base64}'
-                result['screenshots'].append({
-                    'url': screenshot_url,
-                    'description': f'异常截图: {str(e)}',
-                    'step_number': None,
-                    'timestamp': datetime.now().isoformat()
-                })
+                screenshot = save_screenshot(screenshot_bytes, description=f'异常截图: {str(e)}', step_number=None)
+                result['screenshots'].append(screenshot)
                 print(f"✓ 异常截图已捕获")
-                print(f"   截图 URL 长度: {len(screenshot_url)} characters")
+                print(f"   截图文件: {screenshot['url']} ({screenshot['size']} bytes)")
             except Exception as screenshot_error:
                 error_msg = f"捕获异常截图失败: {str(screenshot_error)}"
                 print(f"⚠️  {error_msg}")
@@ -654,667 +843,43 @@ class TestExecutor:
 
         Args:
             step_data: 预先准备的步骤数据字典
-            
+
         Note:
-            使用 self.current_page 作为当前活动页面
+            使用 self.current_page 作为当前活动页面，switchTab 后更新为切换到的页面
         """
-        import time
-        start_time = time.time()
+        adapter = PlaywrightAdapter(self.current_page)
+        outcome = run_sync(run_step(adapter, StepSpec.from_data(step_data, project_id=self.test_suite.project_id)))
+        step_result = self._build_step_result(step_data, outcome)
+        if outcome.switched_page is not None:
+            self.current_page = adapter.page
+            step_result['switched_page'] = adapter.page
+        return step_result
 
+    def _build_step_result(self, step_data, outcome):
+        """把步骤执行结果转换为写入执行日志的字典"""
         step_result = {
             'step_number': step_data['step_number'],
             'action_type': step_data['action_type'],
             'description': step_data['description'],
-            'success': False,
-            'error': None
+            'success': outcome.success,
+            'error': None if outcome.success else outcome.log
         }
-
-        try:
-            # 获取元素定位器
-            if step_data['element']:
-                element = step_data['element']
-                locator_value = element['locator_value']
-                locator_strategy = element['locator_strategy'].lower()
-                element_name = element.get('name', '未知元素')
-
-                # 根据定位策略构造 Playwright 选择器
-                if locator_strategy in ['css', 'css selector']:
-                    selector = locator_value
-                elif locator_strategy == 'xpath':
-                    selector = f'xpath={locator_value}'
-                elif locator_strategy == 'id':
-                    selector = f'#{locator_value}'
-                elif locator_strategy == 'name':
-                    selector = f'[name="{locator_value}"]'
-                elif locator_strategy == 'text':
-                    selector = f'text={locator_value}'
-                else:
-                    selector = locator_value
-
-                # 根据操作类型执行动作
-                if step_data['action_type'] == 'click':
-                    # 检测是否是原生HTML select的option元素（优先检测，因为option元素特殊）
-                    is_native_select_option = (
-                            (
-                                        'option[' in locator_value or ' > option' in locator_value or '//option' in locator_value) or
-                            ('select' in locator_value.lower() and 'option' in locator_value.lower())
-                    )
-
-                    # 对于原生HTML select的option，使用select_option方法
-                    if is_native_select_option:
-                        print(f"[Playwright-调试] 检测到原生HTML select元素，使用select_option方法...")
-
-                        # 提取option的value值
-                        import re
-                        option_value_match = re.search(r'option\[value=["\']([^"\']+)["\']\]', locator_value)
-                        option_value_xpath_match = re.search(r'option\[@value=["\']([^"\']+)["\']\]', locator_value)
-
-                        option_value = None
-                        if option_value_match:
-                            option_value = option_value_match.group(1)
-                        elif option_value_xpath_match:
-                            option_value = option_value_xpath_match.group(1)
-                        else:
-                            option_value = '1'  # 默认值
-
-                        # 构造select元素的定位器（去掉option部分）
-                        select_locator_value = re.sub(r'\s*>\s*option\[.*?\]', '', locator_value)
-                        select_locator_value = re.sub(r'\s+option\[.*?\]', '', select_locator_value)
-                        select_locator_value = re.sub(r'//option\[.*?\]', '', select_locator_value)
-
-                        print(f"[Playwright-调试] Select定位器: {select_locator_value}, Option值: {option_value}")
-
-                        try:
-                            # 构造select元素的locator
-                            if locator_strategy.lower() == 'xpath':
-                                select_match = re.match(r'^(//.*?select)(?:/option)?', locator_value)
-                                if select_match:
-                                    select_locator_value = select_match.group(1)
-                                else:
-                                    select_locator_value = locator_value.split('/')[0]
-                                select_locator = self.current_page.locator(f"xpath={select_locator_value}")
-                            else:
-                                select_locator = self.current_page.locator(select_locator_value)
-
-                            # 使用select_option方法
-                            select_locator.select_option(value=option_value, timeout=step_data['wait_time'])
-
-                            execution_time = round(time.time() - start_time, 2)
-                            step_result['success'] = True
-                            print(f"✓ 选择下拉框选项成功 (select_option方法)")
-                            # 成功处理select，跳过后续逻辑
-                            native_select_handled = True
-                        except Exception as e:
-                            print(f"✗ select_option失败: {e}")
-                            # 如果失败，继续尝试普通点击
-                            native_select_handled = False
-                    else:
-                        native_select_handled = False
-
-                    # 只有当原生select处理失败或不是原生select时，才继续后续逻辑
-                    if not native_select_handled:
-                        # 检测是否是下拉框选项（需要特殊处理）
-                        # 简化逻辑：只要是 XPath 的 //li 元素，或包含特定关键词，就认为是下拉框选项
-                        is_dropdown_option = (
-                            # 条件1: XPath 定位的 li 元素（最常见的下拉框选项）
-                                (locator_strategy.lower() == 'xpath' and '//li' in locator_value) or
-                                # 条件2: CSS 或 XPath 包含 el-select-dropdown
-                                'el-select-dropdown' in locator_value.lower() or
-                                # 条件3: 包含 role="option"
-                                'role="option"' in locator_value.lower() or
-                                # 条件4: 包含 li 标签且看起来像列表项
-                                ('li' in locator_value.lower() and (
-                                            'ul' in locator_value.lower() or 'ol' in locator_value.lower()))
-                        )
-
-                        # 检测是否是 el-select 容器（下拉框触发器）
-                        is_select_trigger = (
-                                'el-select' in locator_value.lower() and
-                                'ancestor::' in locator_value and
-                                '//li' not in locator_value
-                        )
-
-                        if is_select_trigger:
-                            # el-select 容器：需要点击内部的真正触发器
-                            import time as sync_time
-
-                            # 使用 JavaScript 查找并点击内部的可点击元素
-                            if locator_strategy.lower() == 'xpath':
-                                js_code = f"""
-                                    (() => {{
-                                        const xpath = {repr(locator_value)};
-                                        const result = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
-                                        const selectEl = result.singleNodeValue;
-
-                                        if (!selectEl) return {{ success: false, error: '未找到 el-select 容器' }};
-
-                                        // 查找内部的触发器（按优先级）
-                                        let trigger = selectEl.querySelector('.el-select__wrapper') ||
-                                                     selectEl.querySelector('input') ||
-                                                     selectEl.querySelector('.el-input__inner');
-
-                                        if (trigger) {{
-                                            trigger.click();
-                                            return {{ success: true, method: 'inner-trigger', element: trigger.className }};
-                                        }} else {{
-                                            // 如果找不到内部触发器，直接点击容器
-                                            selectEl.click();
-                                            return {{ success: true, method: 'container', element: selectEl.className }};
-                                        }}
-                                    }})()
-                                """
-                            else:
-                                js_code = f"""
-                                    (() => {{
-                                        const selectEl = document.querySelector({repr(locator_value)});
-
-                                        if (!selectEl) return {{ success: false, error: '未找到 el-select 容器' }};
-
-                                        let trigger = selectEl.querySelector('.el-select__wrapper') ||
-                                                     selectEl.querySelector('input') ||
-                                                     selectEl.querySelector('.el-input__inner');
-
-                                        if (trigger) {{
-                                            trigger.click();
-                                            return {{ success: true, method: 'inner-trigger', element: trigger.className }};
-                                        }} else {{
-                                            selectEl.click();
-                                            return {{ success: true, method: 'container', element: selectEl.className }};
-                                        }}
-                                    }})()
-                                """
-
-                            js_result = self.current_page.evaluate(js_code)
-
-                            if js_result.get('success'):
-                                self.current_page.wait_for_timeout(800)  # 等待下拉框展开
-                                step_result['success'] = True
-                            else:
-                                step_result['error'] = f"✗ 下拉框触发器点击失败: {js_result.get('error')}"
-
-                        elif is_dropdown_option:
-                            # 下拉框选项：使用 Playwright 原生方法（更可靠）
-                            # 之前使用 JS click() 可能无法触发 Element Plus 的事件监听
-                            self.current_page.wait_for_timeout(800)  # 等待下拉框展开
-
-                            print(f"[Playwright-调试] 下拉框选项处理: {locator_strategy}={locator_value}")
-
-                            # 构造基础定位器（移除 Playwright 特有的伪类，因为我们要手动遍历）
-                            base_locator_value = locator_value.replace(' >> visible=true', '')
-
-                            try:
-                                if locator_strategy.lower() == 'xpath':
-                                    if not base_locator_value.startswith('xpath='):
-                                        candidates = self.current_page.locator(f"xpath={base_locator_value}")
-                                    else:
-                                        candidates = self.current_page.locator(base_locator_value)
-                                elif locator_strategy.lower() in ['css', 'css selector']:
-                                    candidates = self.current_page.locator(base_locator_value)
-                                else:
-                                    # 其他策略暂按 CSS 处理
-                                    candidates = self.current_page.locator(base_locator_value)
-
-                                # 获取匹配元素数量
-                                count = candidates.count()
-                                print(f"[Playwright-调试] 找到 {count} 个匹配元素")
-
-                                found_visible = False
-                                last_error = None
-
-                                for i in range(count):
-                                    try:
-                                        candidate = candidates.nth(i)
-                                        if candidate.is_visible():
-                                            print(f"[Playwright-调试] 第 {i} 个元素可见，尝试点击...")
-                                            # 使用 Playwright 的 click，它会触发完整的鼠标事件链
-                                            candidate.click(timeout=2000)
-                                            found_visible = True
-                                            step_result['success'] = True
-                                            print(f"[Playwright-调试] 点击成功")
-                                            break
-                                    except Exception as e:
-                                        print(f"[Playwright-调试] 点击第 {i} 个元素失败: {e}")
-                                        last_error = e
-
-                                if not found_visible:
-                                    error_msg = f"未找到可见的下拉框选项 (匹配到 {count} 个元素)"
-                                    if last_error:
-                                        error_msg += f", 最后一次错误: {str(last_error)}"
-                                    step_result['error'] = error_msg
-                                    step_result['success'] = False
-
-                            except Exception as e:
-                                step_result['error'] = f"下拉框选项处理异常: {str(e)}"
-                                step_result['success'] = False
-
-                            # 检查并关闭多选下拉框（如果还在显示）
-                            if step_result['success']:
-                                try:
-                                    if self.current_page.locator('.el-select-dropdown').first.is_visible():
-                                        # 点击空白处关闭
-                                        self.current_page.click('body', position={'x': 10, 'y': 10}, timeout=3000)
-                                        self.current_page.wait_for_timeout(500)
-                                except:
-                                    pass
-
-                            # 已移除调试面板代码
-                        else:
-                            # 普通元素：正常点击
-                            # 如果刚切换了标签页，增加超时时间并滚动到元素
-                            if step_data.get('_just_switched_tab'):
-                                print(f"  ⚠️  刚切换标签页，增加元素等待时间和滚动")
-
-                                # 关键修复：确保页面保持在前台！
-                                self.current_page.bring_to_front()
-                                print(f"  ✓ 页面已置于前台")
-
-                                # 先尝试滚动到元素（确保元素在视口内）
-                                try:
-                                    self.current_page.locator(selector).scroll_into_view_if_needed(timeout=5000)
-                                    print(f"  ✓ 元素已滚动到视口")
-                                except Exception as e:
-                                    print(f"  ⚠️  滚动失败: {str(e)[:50]}")
-
-                                # 使用更长的超时时间（至少10秒）
-                                extended_timeout = max(step_data['wait_time'], 10000)
-                                self.current_page.click(selector, timeout=extended_timeout)
-                                print(f"  ✓ 点击成功（超时: {extended_timeout}ms）")
-                            else:
-                                self.current_page.click(selector, timeout=step_data['wait_time'])
-                            step_result['success'] = True
-
-                elif step_data['action_type'] == 'fill':
-                    # 解析输入值中的变量表达式
-                    resolved_value = resolve_variables(step_data['input_value'])
-
-                    # 如果刚切换了标签页，增加超时时间
-                    if step_data.get('_just_switched_tab'):
-                        # 确保页面保持在前台
-                        self.current_page.bring_to_front()
-                        extended_timeout = max(step_data['wait_time'], 10000)
-                        self.current_page.fill(selector, resolved_value, timeout=extended_timeout)
-                    else:
-                        self.current_page.fill(selector, resolved_value, timeout=step_data['wait_time'])
-
-                    step_result['success'] = True
-                    # 记录解析后的值（用于调试）
-                    if resolved_value != step_data['input_value']:
-                        step_result['resolved_value'] = resolved_value
-                        print(f"  ✓ 变量解析: {step_data['input_value']} -> {resolved_value}")
-
-
-                elif step_data['action_type'] == 'getText':
-                    text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
-                    step_result['result'] = text
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'waitFor':
-                    # 检测是否是下拉框选项（下拉框选项可能是隐藏的）
-                    is_dropdown_option_wait = (
-                            (locator_strategy.lower() == 'xpath' and '//li' in locator_value) or
-                            'el-select-dropdown' in locator_value.lower() or
-                            'role="option"' in locator_value.lower() or
-                            ('li' in locator_value.lower() and (
-                                        'ul' in locator_value.lower() or 'ol' in locator_value.lower()))
-                    )
-
-                    if is_dropdown_option_wait:
-                        # 对于下拉框选项，只等待元素在DOM中（attached），不要求可见
-                        self.current_page.wait_for_selector(selector, state='attached', timeout=step_data['wait_time'])
-                    else:
-                        # 普通元素：等待可见
-                        self.current_page.wait_for_selector(selector, timeout=step_data['wait_time'])
-
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'hover':
-                    self.current_page.hover(selector, timeout=step_data['wait_time'])
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'scroll':
-                    self.current_page.locator(selector).scroll_into_view_if_needed()
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'screenshot':
-                    screenshot_path = f'screenshots/step_{step_data["step_number"]}.png'
-                    self.current_page.screenshot(path=screenshot_path)
-                    step_result['screenshot'] = screenshot_path
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'assert':
-                    # 解析断言值中的变量
-                    resolved_assert_value = resolve_variables(step_data['assert_value'])
-                    if resolved_assert_value != step_data['assert_value']:
-                        print(f"  ✓ 断言变量解析: {step_data['assert_value']} -> {resolved_assert_value}")
-
-                    # 执行断言
-                    if step_data['assert_type'] == 'textContains':
-                        text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
-                        if resolved_assert_value in text:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息，与playwright_engine.py保持一致
-                            log = f"✗ 断言失败: 文本不包含 '{resolved_assert_value}'\n"
-                            log += f"  - 实际文本: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'textEquals':
-                        text = self.current_page.text_content(selector, timeout=step_data['wait_time'])
-                        if text == resolved_assert_value:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息
-                            log = f"✗ 断言失败: 文本不等于 '{resolved_assert_value}'\n"
-                            log += f"  - 期望: '{resolved_assert_value}'\n"
-                            log += f"  - 实际: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'isVisible':
-                        is_visible = self.current_page.is_visible(selector)
-                        step_result['success'] = is_visible
-                        if not is_visible:
-                            step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不可见"
-                    elif step_data['assert_type'] == 'exists':
-                        count = self.current_page.locator(selector).count()
-                        step_result['success'] = count > 0
-                        if count == 0:
-                            step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不存在"
-
-                elif step_data['action_type'] == 'wait':
-                    self.current_page.wait_for_timeout(step_data['wait_time'])
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'switchTab':
-                    # 切换标签页 - 同步版本
-                    import time as sync_time
-
-                    # 获取超时时间
-                    # 强制使用至少5秒的超时时间，确保有足够时间等待新标签页打开
-                    user_wait = step_data.get('wait_time', 0) or 0
-                    if user_wait > 0:
-                        timeout = max(user_wait / 1000, 5.0)
-                    else:
-                        timeout = 5.0
-
-                    print(f"🔄 开始执行切换标签页 (超时: {timeout}s)...")
-                    start_wait = sync_time.time()
-                    current_page = self.current_page
-                    target_index = -1
-
-                    # 轮询等待新标签页
-                    # 轮询等待新标签页
-                    while True:
-                        pages = self.current_page.context.pages
-                        target_index = -1  # 默认切换到最新标签页
-                        should_switch = False
-
-                        # 调试日志：打印当前页面状态
-                        print(f"  [Debug] 当前页面列表 (数量: {len(pages)}):")
-                        for idx, p in enumerate(pages):
-                            is_current = " (Current)" if p == current_page else ""
-                            try:
-                                print(f"    {idx}: {p.url} - {p.title()}{is_current}")
-                            except Exception as e:
-                                print(f"    {idx}: [Error getting info] {str(e)}")
-
-                        if step_data['input_value'] and str(step_data['input_value']).isdigit():
-                            # 指定索引的情况
-                            idx = int(step_data['input_value'])
-                            if 0 <= idx < len(pages):
-                                target_index = idx
-                                should_switch = True
-                        else:
-                            # 自动模式：寻找一个不是当前页面的新页面
-                            # 优先找列表末尾的（通常是新的）
-                            candidates = [p for p in pages if p != current_page]
-                            if candidates:
-                                should_switch = True
-                            elif len(pages) > 1:
-                                # 如果有多个页面但都是 current_page (理论上不可能)，或者 current_page 不在 pages 里
-                                # 只要页面数量增加，就应该切换
-                                should_switch = True
-
-                        if should_switch:
-                            break
-
-                        if sync_time.time() - start_wait > timeout:
-                            # 超时了
-                            break
-
-                        # 关键修改：使用 wait_for_timeout 代替 time.sleep
-                        # time.sleep 会阻塞线程，导致 Playwright 无法接收新页面事件
-                        self.current_page.wait_for_timeout(500)
-
-                    # 获取目标页面
-                    pages = self.current_page.context.pages
-                    if target_index == -1:
-                        # 自动模式
-                        candidates = [p for p in pages if p != current_page]
-                        if candidates:
-                            # 切换到最新的一个非当前页面
-                            target_page = candidates[-1]
-                            final_target_index = pages.index(target_page)
-                        else:
-                            # 如果没有找到新页面
-                            if len(pages) > 1:
-                                # 备选：如果有多个页面，切换到最后一个
-                                target_page = pages[-1]
-                                final_target_index = len(pages) - 1
-                            else:
-                                raise Exception(
-                                    f"切换标签页失败: 在 {timeout} 秒内未检测到新标签页打开 (当前页面数: {len(pages)})")
-                    else:
-                        target_page = pages[target_index]
-                        final_target_index = target_index
-
-                    # 将目标页面设为当前活动页面
-                    target_page.bring_to_front()
-
-                    # 等待页面稳定
-                    # 新标签页可能需要时间加载和渲染
-                    try:
-                        # 等待网络空闲状态（页面加载完成）
-                        target_page.wait_for_load_state('networkidle', timeout=10000)  # 增加到10秒
-                        print(f"  - 页面加载状态: networkidle")
-                    except Exception as e:
-                        # 如果networkidle超时，至少等待domcontentloaded
-                        try:
-                            target_page.wait_for_load_state('domcontentloaded', timeout=5000)  # 增加到5秒
-                            print(f"  - 页面加载状态: domcontentloaded")
-                        except Exception as e2:
-                            print(f"  - 页面加载状态: 超时，继续执行 ({str(e2)[:50]})")
-
-                    # 额外等待一小段时间，确保页面完全稳定
-                    target_page.wait_for_timeout(1500)  # 使用 wait_for_timeout 代替 sleep
-
-                    # 验证页面确实已切换
-                    print(f"  - 当前活动页面URL: {target_page.url}")
-                    print(f"  - 页面是否可见: {target_page.is_visible('body') if target_page else 'Unknown'}")
-
-                    # 关键修复：直接更新实例变量！
-                    self.current_page = target_page
-                    step_result['switched_page'] = target_page
-                    step_result['success'] = True
-
-                    print(f"✓ 切换标签页成功")
-                    print(f"  - 目标索引: {final_target_index}")
-                    print(f"  - 页面标题: {self.current_page.title()}")
-                    print(f"  - self.current_page已更新为新页面")
-
-                else:
-                    step_result['error'] = f'⚠ 未知的操作类型: {step_data["action_type"]}'
-
-            else:
-                # 没有元素的步骤（如等待、切换标签页）
-                if step_data['action_type'] == 'wait':
-                    self.current_page.wait_for_timeout(step_data['wait_time'])
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'switchTab':
-                    # 切换标签页 - 同步版本（无需元素）
-                    import time as sync_time
-
-                    # 获取超时时间
-                    # 强制使用至少5秒的超时时间，确保有足够时间等待新标签页打开
-                    user_wait = step_data.get('wait_time', 0) or 0
-                    if user_wait > 0:
-                        timeout = max(user_wait / 1000, 5.0)
-                    else:
-                        timeout = 5.0
-
-                    print(f"🔄 开始执行切换标签页 (超时: {timeout}s)...")
-                    start_wait = sync_time.time()
-                    current_page = self.current_page
-                    target_index = -1
-
-                    # 轮询等待新标签页
-                    # 轮询等待新标签页
-                    while True:
-                        pages = self.current_page.context.pages
-                        target_index = -1  # 默认切换到最新标签页
-                        should_switch = False
-
-                        # 调试日志：打印当前页面状态
-                        print(f"  [Debug] 当前页面列表 (数量: {len(pages)}):")
-                        for idx, p in enumerate(pages):
-                            is_current = " (Current)" if p == current_page else ""
-                            try:
-                                print(f"    {idx}: {p.url} - {p.title()}{is_current}")
-                            except Exception as e:
-                                print(f"    {idx}: [Error getting info] {str(e)}")
-
-                        if step_data['input_value'] and str(step_data['input_value']).isdigit():
-                            # 指定索引的情况
-                            idx = int(step_data['input_value'])
-                            if 0 <= idx < len(pages):
-                                target_index = idx
-                                should_switch = True
-                        else:
-                            # 自动模式：寻找一个不是当前页面的新页面
-                            # 优先找列表末尾的（通常是新的）
-                            candidates = [p for p in pages if p != current_page]
-                            if candidates:
-                                should_switch = True
-                            elif len(pages) > 1:
-                                # 如果有多个页面但都是 current_page (理论上不可能)，或者 current_page 不在 pages 里
-                                # 只要页面数量增加，就应该切换
-                                should_switch = True
-
-                        if should_switch:
-                            break
-
-                        if sync_time.time() - start_wait > timeout:
-                            # 超时了
-                            break
-
-                        # 关键修改：使用 wait_for_timeout 代替 time.sleep
-                        self.current_page.wait_for_timeout(500)
-
-                    # 获取目标页面
-                    pages = self.current_page.context.pages
-                    if target_index == -1:
-                        # 自动模式
-                        candidates = [p for p in pages if p != current_page]
-                        if candidates:
-                            # 切换到最新的一个非当前页面
-                            target_page = candidates[-1]
-                            final_target_index = pages.index(target_page)
-                        else:
-                            # 如果没有找到新页面
-                            if len(pages) > 1:
-                                # 备选：如果有多个页面，切换到最后一个
-                                target_page = pages[-1]
-                                final_target_index = len(pages) - 1
-                            else:
-                                raise Exception(
-                                    f"切换标签页失败: 在 {timeout} 秒内未检测到新标签页打开 (当前页面数: {len(pages)})")
-                    else:
-                        target_page = pages[target_index]
-                        final_target_index = target_index
-
-                    # 将目标页面设为当前活动页面
-                    target_page.bring_to_front()
-
-                    # 等待页面稳定
-                    try:
-                        # 等待网络空闲状态（页面加载完成）
-                        target_page.wait_for_load_state('networkidle', timeout=10000)  # 增加到10秒
-                        print(f"  - 页面加载状态: networkidle")
-                    except Exception as e:
-                        # 如果networkidle超时，至少等待domcontentloaded
-                        try:
-                            target_page.wait_for_load_state('domcontentloaded', timeout=5000)  # 增加到5秒
-                            print(f"  - 页面加载状态: domcontentloaded")
-                        except Exception as e2:
-                            print(f"  - 页面加载状态: 超时，继续执行 ({str(e2)[:50]})")
-
-                    # 额外等待一小段时间，确保页面完全稳定
-                    target_page.wait_for_timeout(1500)  # 使用 wait_for_timeout 代替 sleep
-
-                    # 验证页面确实已切换
-                    print(f"  - 当前活动页面URL: {target_page.url}")
-                    print(f"  - 页面是否可见: {target_page.is_visible('body') if target_page else 'Unknown'}")
-
-                    # 关键修复：直接更新实例变量！
-                    self.current_page = target_page
-                    step_result['switched_page'] = target_page
-                    step_result['success'] = True
-
-                    print(f"✓ 切换标签页成功")
-                    print(f"  - 目标索引: {final_target_index}")
-                    print(f"  - 页面标题: {self.current_page.title()}")
-                    print(f"  - self.current_page已更新为新页面")
-
-        except Exception as e:
-            # 格式化为详细的错误信息，与playwright_engine.py保持一致
-            execution_time = round(time.time() - start_time, 2)
-
-            # 提取详细的错误信息（改进版）
-            error_str = str(e)
-            error_type = type(e).__name__
-
-            # 尝试提取更详细的 Playwright 异常信息
+        if outcome.result is not None:
+            step_result['result'] = outcome.result
+        if outcome.resolved_value is not None:
+            step_result['resolved_value'] = outcome.resolved_value
+            print(f"  ✓ 变量解析: {step_data['input_value']} -> {outcome.resolved_value}")
+        if outcome.screenshot is not None:
             try:
-                # Playwright 异常可能包含更详细的信息
-                if hasattr(e, 'message') and e.message:
-                    error_str = e.message
-                # TimeoutError 通常有更详细的描述
-                elif hasattr(e, 'args') and e.args:
-                    error_str = str(e.args[0]) if len(e.args) > 0 else error_str
-            except:
-                pass  # 如果提取失败，使用原始 error_str
-
-            # 添加异常类型信息（如果还没有）
-            if error_type not in error_str and error_type != 'Exception':
-                error_str = f"{error_type}: {error_str}"
-
-            # 判断是否是超时错误
-            if 'Timeout' in error_str or 'timeout' in error_str:
-                element_name = step_data['element'].get('name', '未知元素') if step_data.get('element') else '页面'
-                locator_info = f"{step_data['element']['locator_strategy']}={step_data['element']['locator_value']}" if step_data.get(
-                    'element') else '无'
-
-                log = f"✗ 操作超时\n"
-                log += f"  - 元素: '{element_name}'\n"
-                log += f"  - 定位器: {locator_info}\n"
-                log += f"  - 超时时间: {execution_time}秒\n"
-                log += f"  - 错误: {error_str}"
-                step_result['error'] = log
-            else:
-                element_name = step_data['element'].get('name', '未知元素') if step_data.get('element') else '页面'
-                locator_info = f"{step_data['element']['locator_strategy']}={step_data['element']['locator_value']}" if step_data.get(
-                    'element') else '无'
-
-                log = f"✗ 执行失败\n"
-                log += f"  - 元素: '{element_name}'\n"
-                log += f"  - 定位器: {locator_info}\n"
-                log += f"  - 执行时间: {execution_time}秒\n"
-                log += f"  - 错误: {error_str}"
-                step_result['error'] = log
-
-            # 打印详细日志便于调试
-            print(f"❌ Playwright 步骤执行失败:")
-            print(f"   异常类型: {error_type}")
-            print(f"   错误信息: {error_str[:500]}")  # 限制长度避免刷屏
-
+                step_result['screenshot'] = save_screenshot(
+                    outcome.screenshot,
+                    description=f'步骤 {step_data["step_number"]} 截图',
+                    step_number=step_data['step_number']
+                )['url']
+            except Exception as e:
+                print(f"⚠️  保存步骤截图失败: {str(e)}")
+        if not outcome.success:
+            print(f"❌ 步骤 {step_data['step_number']} 执行失败:\n{outcome.log}")
         return step_result
 
     def run_with_selenium(self):
@@ -1355,7 +920,10 @@ class TestExecutor:
                         'id': step.element.id,
                         'name': step.element.name,
                         'locator_value': step.element.locator_value,
-                        'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css'
+                        'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css',
+                        'wait_timeout': step.element.wait_timeout,
+                        'force_action': step.element.force_action,
+                        'backup_locators': step.element.backup_locators
                     }
 
                 case_data['steps'].append(step_data)
@@ -1499,12 +1067,12 @@ class TestExecutor:
                         except:
                             pass  # 即使超时也继续执行
 
-                        # 额外等待，确保动态内容加载（Vue/React等SPA应用）
+                        # 额外等待，确保动态内容加载（Vue/React等SPA应用），开启智能等待时页面稳定后提前结束
                         extra_wait = 3 if is_linux else 2
-                        time.sleep(extra_wait)
+                        run_sync(pause(SeleniumAdapter(driver), extra_wait))
 
                         print(
-                            f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面加载完成，额外{extra_wait}秒)")
+                            f"✓ 成功导航到: {self.test_suite.project.base_url} (已等待页面加载完成，额外最多{extra_wait}秒)")
                     except Exception as e:
                         print(f"✗ 导航失败: {str(e)}")
                         # 导航失败，记录错误并继续下一个用例
@@ -1599,19 +1167,7 @@ class TestExecutor:
 
     def create_selenium_driver(self):
         """创建 Selenium WebDriver"""
-        from selenium.webdriver.chrome.service import Service as ChromeService
-        from selenium.webdriver.firefox.service import Service as FirefoxService
-        from selenium.webdriver.edge.service import Service as EdgeService
-        from webdriver_manager.chrome import ChromeDriverManager
-        from webdriver_manager.firefox import GeckoDriverManager
-        from webdriver_manager.microsoft import EdgeChromiumDriverManager
         from apps.ui_automation.selenium_engine import SeleniumTestEngine
-        import os
-
-        # 配置webdriver_manager使用本地缓存，避免每次下载
-        # 缓存目录：~/.wdm
-        os.environ['WDM_LOG_LEVEL'] = '0'  # 减少日志输出
-        os.environ['WDM_PRINT_FIRST_LINE'] = 'False'  # 不打印首行信息
 
         # 检查浏览器是否可用
         is_available, error_msg = SeleniumTestEngine.check_browser_available(self.browser)
@@ -1685,9 +1241,8 @@ class TestExecutor:
             options.add_argument('--disable-renderer-backgrounding')
             options.add_argument('--disable-device-discovery-notifications')
 
-            # 使用缓存优先策略
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
+            # 驱动路径由驱动注册表解析并缓存
+            driver = start_driver('chrome', lambda service: webdriver.Chrome(service=service, options=options))
         elif self.browser == 'firefox':
             options = FirefoxOptions()
             if self.headless:
@@ -1710,9 +1265,8 @@ class TestExecutor:
             options.set_preference('extensions.update.enabled', False)
             options.set_preference('extensions.update.autoUpdateDefault', False)
 
-            # 使用缓存优先策略
-            service = FirefoxService(GeckoDriverManager().install())
-            driver = webdriver.Firefox(service=service, options=options)
+            # 驱动路径由驱动注册表解析并缓存
+            driver = start_driver('firefox', lambda service: webdriver.Firefox(service=service, options=options))
         elif self.browser == 'safari':
             # Safari 不支持 headless 模式
             # 需要先启用：sudo safaridriver --enable
@@ -1741,9 +1295,8 @@ class TestExecutor:
             options.add_argument('--disable-dev-shm-usage')
             options.add_argument('--window-size=1920,1080')
 
-            # 使用缓存优先策略
-            service = EdgeService(EdgeChromiumDriverManager().install())
-            driver = webdriver.Edge(service=service, options=options)
+            # 驱动路径由驱动注册表解析并缓存
+            driver = start_driver('edge', lambda service: webdriver.Edge(service=service, options=options))
         else:
             # 默认使用Chrome
             options = ChromeOptions()
@@ -1775,10 +1328,10 @@ class TestExecutor:
             options.add_argument('--disable-features=TranslateUI')  # 禁用翻译提示
             options.add_argument('--disable-infobars')  # 禁用信息栏
 
-            # 使用缓存优先策略
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
+            # 驱动路径由驱动注册表解析并缓存
+            driver = start_driver('chrome', lambda service: webdriver.Chrome(service=service, options=options))
 
+        apply_network_profile_selenium(driver, self.network_profile)
         return driver
 
     def execute_test_case_selenium_no_db(self, driver, case_data):
@@ -1807,11 +1360,9 @@ class TestExecutor:
                 # 步骤执行完后添加短暂延迟，确保页面状态稳定
                 # 特别是点击操作后，可能触发动画、下拉框展开等
                 if step_result['success'] and step_data['action_type'] in ['click', 'fill', 'hover']:
-                    # 点击操作后等待更长时间（下拉框展开动画）
-                    if step_data['action_type'] == 'click':
-                        time.sleep(0.8)  # 等待800ms，确保下拉框完全展开
-                    else:
-                        time.sleep(0.3)  # 其他操作等待300ms
+                    # 点击操作后等待更长时间（下拉框展开动画），开启智能等待时以此为上限
+                    delay = 0.8 if step_data['action_type'] == 'click' else 0.3
+                    run_sync(pause(SeleniumAdapter(driver), delay))
 
                 # 如果步骤失败,捕获失败截图
                 if not step_result['success']:
@@ -1821,15 +1372,12 @@ class TestExecutor:
 
                     # 捕获失败截图
                     try:
-                        import base64
                         screenshot_bytes = driver.get_screenshot_as_png()
-                        screenshot_base64 = base64.b64encode(screenshot_bytes).decode()
-                        result['screenshots'].append({
-                            'url': f'data:image/png;base64,{screenshot_base64}',
-                            'description': f'步骤 {step_data["step_number"]} 失败截图: {step_data.get("description", "")}',
-                            'step_number': step_data['step_number'],
-                            'timestamp': datetime.now().isoformat()
-                        })
+                        result['screenshots'].append(save_screenshot(
+                            screenshot_bytes,
+                            description=f'步骤 {step_data["step_number"]} 失败截图: {step_data.get("description", "")}',
+                            step_number=step_data['step_number']
+                        ))
                     except Exception as screenshot_error:
                         print(f"捕获失败截图失败: {str(screenshot_error)}")
 
@@ -1838,27 +1386,20 @@ class TestExecutor:
             # 所有步骤都成功，捕获最终截图
             if result['status'] == 'passed':
                 try:
-                    # 等待页面跳转完成（2秒）
-                    import time
+                    # 等待页面跳转完成（最多2秒）
                     print(f"⏱️  等待页面跳转完成...")
-                    time.sleep(2)
+                    run_sync(pause(SeleniumAdapter(driver), 2))
 
-                    import base64
                     print(f"🔍 开始捕获成功截图...")
                     screenshot_bytes = driver.get_screenshot_as_png()
                     print(f"   截图字节大小: {len(screenshot_bytes)} bytes")
 
-                    screenshot_base64 = base64.b64encode(screenshot_bytes).decode()
-                    print(f"   Base64 编码大小: {len(screenshot_base64)} characters")
-
-                    if len(screenshot_base64) >= 100:
-                        result['screenshots'].append({
-                            'url': f'data:image/png;base64,{screenshot_base64}',
-                            'description': '测试执行成功 - 最终页面截图',
-                            'step_number': len(case_data['steps']) + 1,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                        print(f"✓ 成功截图已捕获")
+                    result['screenshots'].append(save_screenshot(
+                        screenshot_bytes,
+                        description='测试执行成功 - 最终页面截图',
+                        step_number=len(case_data['steps']) + 1
+                    ))
+                    print(f"✓ 成功截图已捕获")
                 except Exception as screenshot_error:
                     error_msg = f"捕获成功截图失败: {str(screenshot_error)}"
                     print(f"⚠️  {error_msg}")
@@ -1871,15 +1412,10 @@ class TestExecutor:
 
             # 捕获异常截图
             try:
-                import base64
                 screenshot_bytes = driver.get_screenshot_as_png()
-                screenshot_base64 = base64.b64encode(screenshot_bytes).decode()
-                result['screenshots'].append({
-                    'url': f'data:image/png;base64,{screenshot_base64}',
-                    'description': f'异常截图: {str(e)}',
-                    'step_number': None,
-                    'timestamp': datetime.now().isoformat()
-                })
+                result['screenshots'].append(save_screenshot(
+                    screenshot_bytes, description=f'异常截图: {str(e)}', step_number=None
+                ))
             except Exception as screenshot_error:
                 print(f"捕获异常截图失败: {str(screenshot_error)}")
 
@@ -1951,565 +1487,5 @@ class TestExecutor:
             driver: Selenium WebDriver对象
             step_data: 预先准备的步骤数据字典
         """
-        from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
-        start_time = time.time()
-
-        step_result = {
-            'step_number': step_data['step_number'],
-            'action_type': step_data['action_type'],
-            'description': step_data['description'],
-            'success': False,
-            'error': None
-        }
-
-        try:
-            if step_data['element']:
-                element = step_data['element']
-                locator_value = element['locator_value']
-                locator_strategy = element['locator_strategy'].lower()
-                element_name = element.get('name', '未知元素')
-
-                # 根据定位策略获取元素
-                wait = WebDriverWait(driver, step_data['wait_time'] / 1000)
-
-                # 自动修正定位策略：如果值以 // 开头，强制使用 XPath
-                if locator_value.startswith('//') or locator_value.startswith('xpath='):
-                    locator_strategy = 'xpath'
-                    if locator_value.startswith('xpath='):
-                        locator_value = locator_value[6:]
-
-                # 根据定位策略构造 Playwright 选择器
-                if locator_strategy in ['css', 'css selector']:
-                    by = By.CSS_SELECTOR
-                elif locator_strategy == 'xpath':
-                    by = By.XPATH
-                elif locator_strategy == 'id':
-                    by = By.ID
-                elif locator_strategy == 'name':
-                    by = By.NAME
-                elif locator_strategy in ['class', 'class name']:
-                    by = By.CLASS_NAME
-                elif locator_strategy in ['tag', 'tag name']:
-                    by = By.TAG_NAME
-                elif locator_strategy == 'link text':
-                    by = By.LINK_TEXT
-                elif locator_strategy == 'partial link text':
-                    by = By.PARTIAL_LINK_TEXT
-                else:
-                    by = By.CSS_SELECTOR
-
-                # 定义重试次数（用于所有操作类型）
-                max_retries = 3
-
-                # 根据操作类型选择合适的等待条件
-                if step_data['action_type'] == 'click':
-                    # 检测是否是原生HTML select的option元素（优先检测）
-                    is_native_select_option = (
-                            (
-                                        'option[' in locator_value or ' > option' in locator_value or '//option' in locator_value) or
-                            ('select' in locator_value.lower() and 'option' in locator_value.lower())
-                    )
-
-                    # 对于原生HTML select的option，使用Selenium的select类
-                    if is_native_select_option:
-                        from selenium.webdriver.support.ui import Select
-                        print(f"[Selenium-调试] 检测到原生HTML select元素，使用Select类...")
-
-                        # 提取option的value值
-                        import re
-                        option_value_match = re.search(r'option\[value=["\']([^"\']+)["\']\]', locator_value)
-                        option_value_xpath_match = re.search(r'option\[@value=["\']([^"\']+)["\']\]', locator_value)
-
-                        option_value = None
-                        if option_value_match:
-                            option_value = option_value_match.group(1)
-                        elif option_value_xpath_match:
-                            option_value = option_value_xpath_match.group(1)
-                        else:
-                            option_value = '1'  # 默认值
-
-                        # 构造select元素的定位器（去掉option部分）
-                        select_locator_value = re.sub(r'\s*>\s*option\[.*?\]', '', locator_value)
-                        select_locator_value = re.sub(r'\s+option\[.*?\]', '', select_locator_value)
-                        select_locator_value = re.sub(r'//option\[.*?\]', '', select_locator_value)
-
-                        print(f"[Selenium-调试] Select定位器: {select_locator_value}, Option值: {option_value}")
-
-                        try:
-                            # 查找select元素
-                            select_element = wait.until(EC.presence_of_element_located((by, select_locator_value)))
-
-                            # 使用Select类选择选项
-                            select_obj = Select(select_element)
-                            select_obj.select_by_value(option_value)
-
-                            step_result['success'] = True
-                            print(f"✓ 选择下拉框选项成功 (Select.select_by_value)")
-                            # 成功处理select，跳过后续逻辑
-                            native_select_handled = True
-                        except Exception as e:
-                            print(f"✗ Select类失败: {e}")
-                            # 如果失败，继续尝试普通点击
-                            native_select_handled = False
-                    else:
-                        native_select_handled = False
-
-                    # 只有当原生select处理失败或不是原生select时，才继续后续逻辑
-                    if not native_select_handled:
-                        # 点击操作：等待元素可点击（解决 stale element 问题）
-                        # 通过定位器特征自动识别下拉框选项
-                        is_dropdown_option = (
-                                'dropdown' in locator_value.lower() or
-                                'el-select' in locator_value.lower() or
-                                'role="option"' in element_name.lower() or
-                                '下拉' in element_name or
-                                '选项' in element_name or
-                                'el-select-dropdown__item' in locator_value.lower() or
-                                ('//li' in locator_value and 'span=' in locator_value)  # XPath 下拉框模式
-                        )
-
-                        if is_dropdown_option:
-                            # 下拉框选项：特殊处理，遍历所有匹配元素找到可见的那个
-                            print(f"  检测到下拉框选项（定位器匹配），尝试查找可见元素...")
-
-                            # 自定义等待逻辑：轮询查找可见元素
-                            end_time = time.time() + (step_data['wait_time'] / 1000)
-                            found_visible = False
-
-                            while time.time() < end_time:
-                                try:
-                                    # 查找所有匹配元素
-                                    elements = driver.find_elements(by, locator_value)
-                                    for el in elements:
-                                        if el.is_displayed():
-                                            element_obj = el
-                                            found_visible = True
-                                            print(f"  ✓ 找到可见的下拉框选项")
-                                            break
-
-                                    if found_visible:
-                                        break
-
-                                    time.sleep(0.5)
-                                except:
-                                    time.sleep(0.5)
-
-                            if not found_visible:
-                                # 如果没找到可见元素，回退到默认行为（可能会抛出超时）
-                                print(f"  ⚠️ 未找到可见的下拉框选项，尝试默认等待...")
-                                element_obj = wait.until(EC.visibility_of_element_located((by, locator_value)))
-                        else:
-                            element_obj = wait.until(EC.element_to_be_clickable((by, locator_value)))
-                    else:
-                        # 其他操作：等待元素出现
-                        element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-
-                    # click操作的实际执行逻辑（使用 stale element 重试机制）
-                    for attempt in range(max_retries):
-                        try:
-                            # 每次重试都重新查找元素（解决stale element问题）
-                            if attempt > 0:
-                                print(f"⚠️  重新查找元素（Stale Element 重试）... (尝试 {attempt + 1}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定（对于 Vue/React 应用很重要）
-                                wait_time = 1.0 if attempt == 1 else 1.5  # 第一次重试等1秒，第二次重试等1.5秒
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                # 重新定位元素
-                                if is_dropdown_option:
-                                    element_obj = wait.until(EC.visibility_of_element_located((by, locator_value)))
-                                else:
-                                    element_obj = wait.until(EC.element_to_be_clickable((by, locator_value)))
-                                # 等待元素状态稳定
-                                time.sleep(0.3)
-                                print(f"✓ 元素重新定位成功")
-
-                            # 对于下拉框选项，先滚动到可视区域
-                            if 'dropdown' in locator_value.lower() or 'el-select' in locator_value.lower() or '下拉' in element_name or '选项' in element_name:
-                                try:
-                                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
-                                                          element_obj)
-                                    time.sleep(0.3)  # 等待滚动完成
-                                except:
-                                    pass
-
-                            # 如果是 el-select 容器，尝试点击内部的可点击区域
-                            if 'el-select' in locator_value.lower() and 'ancestor::' in locator_value.lower():
-                                # 这是点击 el-select 容器，需要找到真正的触发器
-                                try:
-                                    # 尝试找到并点击内部的 input 或 wrapper
-                                    clickable = element_obj.find_element(By.CSS_SELECTOR, '.el-select__wrapper, input')
-                                    clickable.click()
-                                except:
-                                    # 如果找不到，直接点击容器
-                                    element_obj.click()
-                            else:
-                                element_obj.click()
-
-                            step_result['success'] = True
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期，正在重试... ({attempt + 1}/{max_retries})")
-                                # 继续下一次循环，会重新查找元素
-                                continue
-                            else:
-                                raise
-                        except Exception as click_error:
-                            # 如果是下拉框选项且点击失败，尝试使用 JavaScript 点击
-                            if attempt < max_retries - 1 and (
-                                    'not visible' in str(click_error).lower() or 'not interactable' in str(
-                                    click_error).lower()):
-                                print(f"⚠️  元素不可交互，尝试使用 JavaScript 点击... ({attempt + 1}/{max_retries})")
-                                try:
-                                    driver.execute_script("arguments[0].click();", element_obj)
-                                    step_result['success'] = True
-                                    break
-                                except:
-                                    if attempt < max_retries - 1:
-                                        time.sleep(0.5)
-                                        # 重新定位
-                                        if 'dropdown' in locator_value.lower() or 'el-select' in locator_value.lower():
-                                            element_obj = wait.until(
-                                                EC.visibility_of_element_located((by, locator_value)))
-                                        else:
-                                            element_obj = wait.until(EC.element_to_be_clickable((by, locator_value)))
-                                    else:
-                                        raise
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'fill':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    # 解析输入值中的变量表达式
-                    resolved_value = resolve_variables(step_data['input_value'])
-
-                    for attempt in range(max_retries):
-                        try:
-                            element_obj.clear()
-                            element_obj.send_keys(resolved_value)
-                            step_result['success'] = True
-
-                            # 记录解析后的值（用于调试）
-                            if resolved_value != step_data['input_value']:
-                                step_result['resolved_value'] = resolved_value
-                                print(f"  ✓ 变量解析: {step_data['input_value']} -> {resolved_value}")
-
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定
-                                wait_time = 1.0 if attempt == 0 else 1.5
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                                time.sleep(0.3)  # 确保元素状态稳定
-                                print(f"✓ 元素重新定位成功")
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'getText':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    for attempt in range(max_retries):
-                        try:
-                            text = element_obj.text
-                            step_result['result'] = text
-                            step_result['success'] = True
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定
-                                wait_time = 1.0 if attempt == 0 else 1.5
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                                time.sleep(0.3)  # 确保元素状态稳定
-                                print(f"✓ 元素重新定位成功")
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'hover':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    for attempt in range(max_retries):
-                        try:
-                            ActionChains(driver).move_to_element(element_obj).perform()
-                            step_result['success'] = True
-                            break
-                        except StaleElementReferenceException:
-                            if attempt < max_retries - 1:
-                                print(f"⚠️  元素过期（Stale Element），正在重试... (尝试 {attempt + 2}/{max_retries})")
-                                # 增加等待时间，让页面 DOM 稳定
-                                wait_time = 1.0 if attempt == 0 else 1.5
-                                print(f"等待 {wait_time}秒 让页面稳定...")
-                                time.sleep(wait_time)
-                                element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                                time.sleep(0.3)  # 确保元素状态稳定
-                                print(f"✓ 元素重新定位成功")
-                            else:
-                                raise
-
-                elif step_data['action_type'] == 'screenshot':
-                    screenshot_path = f'screenshots/step_{step_data["step_number"]}.png'
-                    driver.save_screenshot(screenshot_path)
-                    step_result['screenshot'] = screenshot_path
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'assert':
-                    # 先定位元素
-                    element_obj = wait.until(EC.presence_of_element_located((by, locator_value)))
-                    
-                    # 解析断言值中的变量
-                    resolved_assert_value = resolve_variables(step_data['assert_value'])
-                    if resolved_assert_value != step_data['assert_value']:
-                        print(f"  ✓ 断言变量解析: {step_data['assert_value']} -> {resolved_assert_value}")
-
-                    if step_data['assert_type'] == 'textContains':
-                        text = element_obj.text
-                        if resolved_assert_value in text:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息，与selenium_engine.py保持一致
-                            log = f"✗ 断言失败: 文本不包含 '{resolved_assert_value}'\n"
-                            log += f"  - 实际文本: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'textEquals':
-                        text = element_obj.text
-                        if text == resolved_assert_value:
-                            step_result['success'] = True
-                        else:
-                            # 格式化为详细的错误信息
-                            log = f"✗ 断言失败: 文本不等于 '{resolved_assert_value}'\n"
-                            log += f"  - 期望: '{resolved_assert_value}'\n"
-                            log += f"  - 实际: '{text}'"
-                            step_result['error'] = log
-                    elif step_data['assert_type'] == 'isVisible':
-                        is_visible = element_obj.is_displayed()
-                        step_result['success'] = is_visible
-                        if not is_visible:
-                            step_result['error'] = f"✗ 断言失败: 元素 '{element_name}' 不可见"
-                    elif step_data['assert_type'] == 'exists':
-                        # 元素已经找到，说明存在
-                        step_result['success'] = True
-
-            else:
-                if step_data['action_type'] == 'wait':
-                    time.sleep(step_data['wait_time'] / 1000)
-                    step_result['success'] = True
-
-                elif step_data['action_type'] == 'switchTab':
-                    # Selenium 切换标签页逻辑
-                    try:
-                        # 获取当前所有窗口句柄
-                        handles = driver.window_handles
-
-                        # 简单的策略：切换到最后一个窗口（通常是新打开的）
-                        # 如果指定了索引，则切换到指定索引
-                        target_index = -1
-                        if step_data.get('input_value') and str(step_data['input_value']).isdigit():
-                            target_index = int(step_data['input_value'])
-
-                        if target_index >= 0 and target_index < len(handles):
-                            driver.switch_to.window(handles[target_index])
-                        else:
-                            driver.switch_to.window(handles[-1])
-
-                        step_result['success'] = True
-                        print(f"✓ Selenium 切换标签页成功 (Handle Count: {len(handles)})")
-                    except Exception as e:
-                        step_result['error'] = f"切换标签页失败: {str(e)}"
-                        step_result['success'] = False
-
-        except TimeoutException as e:
-            # 格式化为详细的错误信息，与selenium_engine.py保持一致
-            execution_time = round(time.time() - start_time, 2)
-            element_name = step_data['element'].get('name', '未知元素') if step_data.get('element') else '页面'
-            locator_info = f"{step_data['element']['locator_strategy']}={step_data['element']['locator_value']}" if step_data.get(
-                'element') else '无'
-
-            # 获取超时设置（从element或step）
-            timeout_seconds = 10  # 默认值
-            if step_data.get('element') and step_data['element'].get('wait_timeout'):
-                timeout_seconds = step_data['element']['wait_timeout']
-            elif step_data.get('wait_time'):
-                timeout_seconds = step_data['wait_time'] / 1000
-
-            # 提取TimeoutException的完整堆栈信息（类似Playwright的显示方式）
-            error_parts = []
-
-            # 1. 基本错误信息
-            base_msg = str(e).strip()
-            if base_msg and base_msg not in ['', 'Message:', 'Message: ', 'Message']:
-                error_parts.append(base_msg)
-            else:
-                # 如果str(e)为空，说明是标准的超时异常
-                error_parts.append(f"TimeoutException: 等待元素超时")
-
-            # 2. 尝试从msg属性获取详细信息
-            if hasattr(e, 'msg') and e.msg:
-                msg_str = str(e.msg).strip()
-                if msg_str and msg_str not in ['', 'Message:', 'Message: ', 'Message']:
-                    if msg_str not in error_parts:
-                        error_parts.append(msg_str)
-
-            # 3. 从args获取
-            if hasattr(e, 'args') and len(e.args) > 0 and e.args[0]:
-                args_str = str(e.args[0]).strip()
-                if args_str and args_str not in ['', 'Message:', 'Message: ', 'Message']:
-                    if args_str not in error_parts:
-                        error_parts.append(args_str)
-
-            # 4. 如果有stacktrace，添加堆栈信息（类似Playwright的格式）
-            if hasattr(e, 'stacktrace') and e.stacktrace:
-                stacktrace_str = str(e.stacktrace).strip()
-                if stacktrace_str:
-                    error_parts.append(f"\nSelenium堆栈跟踪:\n{stacktrace_str}")
-
-            # 4.5. 添加Python的traceback信息（这个总是可用的）
-            try:
-                import traceback
-                tb_lines = traceback.format_tb(e.__traceback__)
-                if tb_lines:
-                    # 只取最后2层堆栈（最相关的部分）
-                    relevant_tb = tb_lines[-2:] if len(tb_lines) >= 2 else tb_lines
-                    tb_str = ''.join(relevant_tb).strip()
-                    if tb_str:
-                        # 提取等待条件信息（从堆栈中）
-                        wait_condition = "未知条件"
-                        if 'EC.visibility_of_element_located' in tb_str:
-                            wait_condition = "等待元素可见 (visibility_of_element_located)"
-                        elif 'EC.element_to_be_clickable' in tb_str:
-                            wait_condition = "等待元素可点击 (element_to_be_clickable)"
-                        elif 'EC.presence_of_element_located' in tb_str:
-                            wait_condition = "等待元素存在 (presence_of_element_located)"
-
-                        error_parts.append(f"\n等待条件: {wait_condition}")
-                        error_parts.append(f"\n调用堆栈:\n{tb_str}")
-            except:
-                pass
-
-            # 5. 如果仍然没有有用信息，提供操作类型相关的提示
-            if len(error_parts) == 0 or (len(error_parts) == 1 and 'TimeoutException' in error_parts[0]):
-                # 添加操作相关的上下文
-                action_type_str = step_data.get('action_type', '') if isinstance(step_data, dict) else ''
-                if action_type_str == 'click':
-                    error_parts.append(f"等待元素可点击失败（超时{timeout_seconds}秒）")
-                elif action_type_str == 'fill':
-                    error_parts.append(f"等待输入框可用失败（超时{timeout_seconds}秒）")
-                elif action_type_str == 'waitFor':
-                    error_parts.append(f"等待元素出现失败（超时{timeout_seconds}秒）")
-
-            # 合并所有错误信息
-            error_msg = '\n'.join(error_parts)
-
-            log = f"✗ 操作超时\n"
-            log += f"  - 元素: '{element_name}'\n"
-            log += f"  - 定位器: {locator_info}\n"
-            log += f"  - 超时设置: {timeout_seconds}秒\n"
-            log += f"  - 实际用时: {execution_time}秒\n"
-            log += f"  - 错误详情: {error_msg}"
-            step_result['error'] = log
-
-        except Exception as e:
-            # 格式化为详细的错误信息，与selenium_engine.py保持一致
-            execution_time = round(time.time() - start_time, 2)
-            element_name = step_data['element'].get('name', '未知元素') if step_data.get('element') else '页面'
-            locator_info = f"{step_data['element']['locator_strategy']}={step_data['element']['locator_value']}" if step_data.get(
-                'element') else '无'
-
-            # 提取详细的错误信息（改进版 - 添加调试日志）
-            error_type = type(e).__name__
-            error_msg = ""
-
-            # 🔍 调试：打印异常对象的所有信息
-            print(f"=" * 60)
-            print(f"🔍 Selenium 异常调试信息 (test_executor):")
-            print(f"  异常类型: {error_type}")
-            print(f"  str(e): {repr(str(e))}")
-            print(f"  hasattr msg: {hasattr(e, 'msg')}")
-            if hasattr(e, 'msg'):
-                print(f"  e.msg 值: {repr(e.msg)}")
-                print(f"  e.msg 类型: {type(e.msg)}")
-            print(f"  hasattr args: {hasattr(e, 'args')}")
-            if hasattr(e, 'args'):
-                print(f"  e.args 长度: {len(e.args)}")
-                print(f"  e.args 内容: {e.args}")
-            print(f"  hasattr stacktrace: {hasattr(e, 'stacktrace')}")
-            if hasattr(e, 'stacktrace'):
-                print(f"  e.stacktrace 前200字符: {str(e.stacktrace)[:200]}")
-            print(f"  dir(e): {[attr for attr in dir(e) if not attr.startswith('_')]}")
-            print(f"=" * 60)
-
-            # 定义无意义的错误信息列表
-            meaningless_messages = ['', 'Message', 'Message:', 'Message: ', 'Message:\n']
-
-            # 尝试提取更详细的 Selenium 异常信息（使用优先级策略）
-            try:
-                # 优先级1: 从 msg 属性获取（Selenium 异常的主要信息源）
-                if hasattr(e, 'msg') and e.msg:
-                    temp = str(e.msg).strip()
-                    if temp not in meaningless_messages:
-                        error_msg = temp
-                        print(f"✓ 从 e.msg 提取到错误: {error_msg[:100]}")
-
-                # 优先级2: 从 args 获取
-                if not error_msg and hasattr(e, 'args') and len(e.args) > 0 and e.args[0]:
-                    temp = str(e.args[0]).strip()
-                    if temp not in meaningless_messages:
-                        error_msg = temp
-                        print(f"✓ 从 e.args[0] 提取到错误: {error_msg[:100]}")
-
-                # 优先级3: 使用 str(e)，但排除无意义的值
-                if not error_msg:
-                    temp = str(e).strip()
-                    if temp not in meaningless_messages:
-                        error_msg = temp
-                        print(f"✓ 从 str(e) 提取到错误: {error_msg[:100]}")
-
-                # 优先级4: 从 stacktrace 提取
-                if not error_msg and hasattr(e, 'stacktrace') and e.stacktrace:
-                    error_msg = f"详细堆栈:\n{e.stacktrace[:300]}"
-                    print(f"✓ 从 e.stacktrace 提取到错误")
-
-                # 优先级5: 从 __dict__ 提取有用信息
-                if not error_msg and hasattr(e, '__dict__'):
-                    useful_attrs = {k: v for k, v in e.__dict__.items()
-                                    if
-                                    v is not None and not k.startswith('_') and k not in ['msg', 'args', 'stacktrace']}
-                    if useful_attrs:
-                        error_msg = f"异常属性: {useful_attrs}"
-                        print(f"✓ 从 e.__dict__ 提取到错误")
-
-                # 如果还是没有，使用默认信息
-                if not error_msg:
-                    error_msg = f"未知错误 (异常类型: {error_type})"
-                    print(f"⚠️ 无法提取任何有用信息，使用默认错误消息")
-
-            except Exception as extract_error:
-                print(f"⚠️  提取错误信息时出错: {extract_error}")
-                error_msg = f"无法提取详细错误信息 (异常类型: {error_type})"
-
-            # 添加异常类型前缀（如果还没有）
-            if error_type not in error_msg and error_type != 'Exception':
-                error_msg = f"{error_type}: {error_msg}"
-
-            log = f"✗ 执行失败\n"
-            log += f"  - 元素: '{element_name}'\n"
-            log += f"  - 定位器: {locator_info}\n"
-            log += f"  - 执行时间: {execution_time}秒\n"
-            log += f"  - 错误: {error_msg}"
-            step_result['error'] = log
-
-            # 打印详细日志便于调试
-            print(f"❌ Selenium 步骤执行失败:")
-            print(f"   异常类型: {error_type}")
-            print(f"   错误信息: {error_msg[:500]}")  # 限制长度避免刷屏
-
-        return step_result
+        outcome = run_sync(run_step(SeleniumAdapter(driver), StepSpec.from_data(step_data, project_id=self.test_suite.project_id)))
+        return self._build_step_result(step_data, outcome)
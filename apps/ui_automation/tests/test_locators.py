@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+元素定位器预编译测试
+"""
+import pytest
+from selenium.webdriver.common.by import By
+
+from apps.ui_automation.steps.locators import compile_locator
+
+
+class TestNativeSelect:
+    """原生 HTML select 的 option 识别"""
+
+    def test_xpath_option_with_value(self):
+        locator = compile_locator('xpath', "//select[@name='city']/option[@value='sh']")
+        assert locator.native_select
+        assert locator.select_selector == "//select[@name='city']"
+        assert locator.option_value == 'sh'
+        assert not locator.select_trigger
+
+    def test_css_option_with_value(self):
+        locator = compile_locator('css', 'select#city > option[value="bj"]')
+        assert locator.native_select
+        assert locator.select_selector == 'select#city'
+        assert locator.option_value == 'bj'
+
+    def test_option_without_value_defaults_to_first(self):
+        locator = compile_locator('xpath', '//select[@id="city"]//option')
+        assert locator.native_select
+        assert locator.select_selector == '//select[@id="city"]'
+        assert locator.option_value == '1'
+
+
+class TestElementSelect:
+    """el-select 触发器和下拉框选项的识别"""
+
+    def test_el_select_container_is_trigger(self):
+        locator = compile_locator('xpath', "//label[text()='城市']/ancestor::div[contains(@class,'el-select')]")
+        assert locator.select_trigger
+        assert not locator.dropdown_option
+        assert not locator.native_select
+        assert locator.visible_only
+
+    @pytest.mark.parametrize('value', [
+        "//div[contains(@class,'el-select-dropdown')]//li/span[text()='上海']",
+        "//ul[@class='menu']//li[2]",
+    ])
+    def test_dropdown_option(self, value):
+        locator = compile_locator('xpath', value)
+        assert locator.dropdown_option
+        assert not locator.select_trigger
+
+    def test_el_select_with_li_is_option_not_trigger(self):
+        locator = compile_locator('xpath', "//div[contains(@class,'el-select')]/ancestor::form//li[1]")
+        assert not locator.select_trigger
+        assert locator.dropdown_option
+
+    def test_css_role_option(self):
+        locator = compile_locator('css', '[role="option"]:nth-child(2)')
+        assert locator.dropdown_option
+        assert not locator.native_select
+
+    def test_plain_element(self):
+        locator = compile_locator('id', 'submit')
+        assert not (locator.native_select or locator.select_trigger or locator.dropdown_option)
+        assert locator.playwright_selector == '#submit'
+        assert (locator.selenium_by, locator.selenium_value) == (By.ID, 'submit')
+
+
+def test_compiled_locator_is_cached():
+    assert compile_locator('xpath', '//a') is compile_locator('xpath', '//a')
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+并行执行任务分配（工作窃取队列）测试
+"""
+import threading
+
+from apps.ui_automation.parallel import WorkStealingQueue
+
+
+def test_items_distributed_round_robin():
+    queue = WorkStealingQueue(range(5), workers=2)
+    assert [queue.take(0), queue.take(0), queue.take(0)] == [0, 2, 4]
+    assert [queue.take(1), queue.take(1)] == [1, 3]
+    assert queue.stolen == 0
+
+
+def test_idle_worker_steals_from_tail_of_longest_queue():
+    queue = WorkStealingQueue(range(9), workers=3)
+    # 工作线程 0 的队列 [0, 3, 6]，取空后从最长队列的尾部窃取
+    assert [queue.take(0) for _ in range(3)] == [0, 3, 6]
+    assert queue.take(1) == 1
+    assert queue.take(0) == 8
+    assert queue.stolen == 1
+    # 被窃取的队列仍从头部按顺序执行
+    assert [queue.take(2) for _ in range(2)] == [2, 5]
+
+
+def test_take_returns_none_when_all_queues_empty():
+    queue = WorkStealingQueue(['a'], workers=2)
+    assert queue.take(1) == 'a'
+    assert queue.take(0) is None
+    assert queue.take(1) is None
+
+
+def test_drain_returns_remaining_items_and_empties_queues():
+    queue = WorkStealingQueue(range(6), workers=2)
+    queue.take(0)
+    assert sorted(queue.drain()) == [1, 2, 3, 4, 5]
+    assert queue.drain() == []
+    assert queue.take(0) is None
+
+
+def test_concurrent_workers_take_each_item_once():
+    items = list(range(200))
+    queue = WorkStealingQueue(items, workers=4)
+    taken = [[] for _ in range(4)]
+
+    def worker(index):
+        while True:
+            item = queue.take(index)
+            if item is None:
+                return
+            taken[index].append(item)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(item for items_taken in taken for item in items_taken) == items
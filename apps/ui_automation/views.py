@@ -43,6 +43,10 @@ from .serializers import (
     AICaseSerializer, AIExecutionRecordSerializer
 )
 from .operation_logger import log_operation
+from .screenshot_storage import externalize_screenshots
+from .network_profile import get_network_profile
+from apps.core.scheduler import PRIORITY_HIGH, get_executor_pool
+from apps.core.scheduler.queues import use_celery
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -786,42 +790,18 @@ class TestSuiteViewSet(viewsets.ModelViewSet):
         # 记录运行操作
         log_operation('run', 'suite', test_suite.id, test_suite.name, request.user)
 
-        # 在后台线程中执行测试
-        import threading
-        import traceback
-        from .test_executor import TestExecutor
-
-        def run_test():
-            try:
-                print(f"[测试套件] 开始执行: {test_suite.name} (ID: {test_suite.id})")
-                print(f"[测试套件] 配置: engine={engine}, browser={browser}, headless={headless}")
-
-                executor = TestExecutor(
-                    test_suite=test_suite,
-                    engine=engine,
-                    browser=browser,
-                    headless=headless,
-                    executed_by=request.user
-                )
-                executor.run()
-
-                print(f"[测试套件] 执行完成: {test_suite.name}")
-            except Exception as e:
-                print(f"[测试套件] 执行异常: {test_suite.name}")
-                print(f"[测试套件] 错误: {str(e)}")
-                traceback.print_exc()
+        # 投递到 browser 队列执行（TASK_EXECUTION_BACKEND 为 thread 时在进程内执行池中执行）
+        from .tasks import execute_ui_suite_task, run_ui_suite
 
-                # 更新套件状态为失败
-                try:
-                    test_suite.execution_status = 'failed'
-                    test_suite.save()
-                    print(f"[测试套件] 已更新状态为失败")
-                except Exception as save_error:
-                    print(f"[测试套件] 更新状态失败: {save_error}")
-
-        # 启动后台线程执行测试
-        thread = threading.Thread(target=run_test, daemon=False)
-        thread.start()
+        if use_celery():
+            execute_ui_suite_task.apply_async(
+                args=[test_suite.id, engine, browser, headless, request.user.id], priority=PRIORITY_HIGH
+            )
+        else:
+            get_executor_pool().submit(
+                'UI', lambda: run_ui_suite(test_suite, engine, browser, headless, request.user),
+                priority=PRIORITY_HIGH, name=test_suite.name
+            )
 
         return Response({
             'message': '测试套件开始执行',
@@ -1241,6 +1221,7 @@ class TestCaseViewSet(viewsets.ModelViewSet):
         try:
             # 获取执行引擎选择，默认使用playwright
             engine_type = request.data.get('engine', 'playwright')
+            network_profile = get_network_profile(test_case.project)
 
             # 创建执行记录
             execution = TestCaseExecution.objects.create(
@@ -1311,8 +1292,10 @@ class TestCaseViewSet(viewsets.ModelViewSet):
                 # 获取元素数据
                 if step.element:
                     step_data['element_data'] = {
+                        'id': step.element.id,
                         'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css',
                         'locator_value': step.element.locator_value,
+                        'backup_locators': step.element.backup_locators,  # 主定位器失效时尝试的备用定位器
                         'name': step.element.name,
                         'wait_timeout': step.element.wait_timeout,  # 添加元素的等待超时设置（秒）
                         'force_action': step.element.force_action  # 添加强制操作选项
@@ -1353,7 +1336,8 @@ class TestCaseViewSet(viewsets.ModelViewSet):
                     headless = request.data.get('headless', False)
 
                     # 创建Selenium引擎实例
-                    engine = SeleniumTestEngine(browser_type=browser_type, headless=headless)
+                    engine = SeleniumTestEngine(browser_type=browser_type, headless=headless, project_id=test_case.project_id,
+                                                network_profile=network_profile)
 
                     try:
                         # 启动浏览器
@@ -1526,9 +1510,8 @@ class TestCaseViewSet(viewsets.ModelViewSet):
                             execution_logs.append(f"========== 执行完成 ({step_count} 个步骤全部通过) ==========")
                             
                             # 测试执行成功，等待页面稳定后捕获最终截图
-                            import time
                             execution_logs.append("  ⏱ 等待页面跳转完成...")
-                            time.sleep(2)
+                            engine.wait_for_stable(2)
                             
                             try:
                                 screenshot_base64 = engine.capture_screenshot()
@@ -1577,7 +1560,8 @@ class TestCaseViewSet(viewsets.ModelViewSet):
                         headless = request.data.get('headless', False)
 
                         # 创建Playwright引擎实例
-                        engine = PlaywrightTestEngine(browser_type=browser_type, headless=headless)
+                        engine = PlaywrightTestEngine(browser_type=browser_type, headless=headless, project_id=test_case.project_id,
+                                                      network_profile=network_profile)
 
                         try:
                             # 启动浏览器
@@ -1765,9 +1749,8 @@ class TestCaseViewSet(viewsets.ModelViewSet):
                                 execution_logs.append(f"========== 执行完成 ({step_count} 个步骤全部通过) ==========")
                                 
                                 # 测试执行成功，等待页面稳定后捕获最终截图
-                                import asyncio
                                 execution_logs.append("  ⏱ 等待页面跳转完成...")
-                                await asyncio.sleep(2)
+                                await engine.wait_for_stable(2)
                                 
                                 try:
                                     screenshot_base64 = await engine.capture_screenshot()
@@ -1832,7 +1815,7 @@ class TestCaseViewSet(viewsets.ModelViewSet):
             execution.execution_logs = json.dumps(step_results, ensure_ascii=False)
             execution.execution_time = total_time
             execution.finished_at = timezone.now()
-            execution.screenshots = screenshots
+            execution.screenshots = externalize_screenshots(screenshots)
             execution.save()
             logger.info(f"[调试] 执行结果已保存: execution.status = {execution.status}")
 
@@ -2088,12 +2071,10 @@ class UiScheduledTaskViewSet(viewsets.ModelViewSet):
         task = self.get_object()
 
         try:
-            # 更新任务执行时间和次数
+            # 更新任务执行时间和次数；下次运行时间和执行租约由调度器维护，这里不覆盖
             task.last_run_time = timezone.now()
             task.total_runs += 1
-            # 重新计算下次运行时间
-            task.next_run_time = task.calculate_next_run()
-            task.save()
+            task.save(update_fields=['last_run_time', 'total_runs'])
 
             # 根据任务类型执行不同的逻辑
             if task.task_type == 'TEST_SUITE':
@@ -2115,45 +2096,7 @@ class UiScheduledTaskViewSet(viewsets.ModelViewSet):
                 test_suite.execution_status = 'running'
                 test_suite.save()
 
-                # 在后台线程中执行测试
-                import threading
-                from .test_executor import TestExecutor
-
-                def run_test():
-                    try:
-                        executor = TestExecutor(
-                            test_suite=test_suite,
-                            engine=task.engine,
-                            browser=task.browser,
-                            headless=task.headless,
-                            executed_by=task.created_by
-                        )
-                        executor.run()
-
-                        # 更新任务执行结果
-                        task.successful_runs += 1
-                        task.last_result = {'status': 'success', 'message': '测试套件执行成功'}
-                        task.error_message = ''
-                        task.save()
-
-                        # 发送成功通知
-                        self._send_task_notification(task, success=True)
-
-                    except Exception as e:
-                        task.failed_runs += 1
-                        task.last_result = {'status': 'failed', 'message': str(e)}
-                        task.error_message = str(e)
-                        test_suite.execution_status = 'failed'
-                        test_suite.save()
-                        task.save()
-
-                        # 发送失败通知
-                        self._send_task_notification(task, success=False)
-
-                # 启动后台线程执行测试
-                thread = threading.Thread(target=run_test)
-                thread.daemon = True
-                thread.start()
+                self._submit_task(task)
 
                 log_operation('run', 'scheduled_task', task.id, task.name, request.user)
 
@@ -2184,309 +2127,7 @@ class UiScheduledTaskViewSet(viewsets.ModelViewSet):
                         'error': '找不到配置的测试用例'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-                # 在后台线程中执行测试用例
-                import threading
-
-                def run_test_cases():
-                    """在后台线程中执行测试用例"""
-                    success_count = 0
-                    failed_count = 0
-
-                    try:
-                        for test_case in test_cases:
-                            # 创建执行记录
-                            execution = TestCaseExecution.objects.create(
-                                test_case=test_case,
-                                project=task.project,
-                                execution_source='scheduled',
-                                status='running',
-                                engine=task.engine,
-                                browser=task.browser,
-                                headless=task.headless,
-                                created_by=task.created_by,
-                                started_at=timezone.now()
-                            )
-
-                            # 实际执行测试用例
-                            try:
-                                logger.info(f"开始执行定时任务的测试用例: {test_case.name} (ID: {test_case.id})")
-
-                                start_time = time.time()
-
-                                # 获取测试用例的所有步骤
-                                test_steps = list(test_case.steps.all().order_by('step_number'))
-
-                                # 预先获取所有步骤的数据
-                                steps_data = []
-                                for step in test_steps:
-                                    step_data = {
-                                        'step': step,
-                                        'action_type': step.action_type,
-                                        'description': step.description,
-                                        'input_value': step.input_value,
-                                        'wait_time': step.wait_time,
-                                        'assert_type': step.assert_type,
-                                        'assert_value': step.assert_value,
-                                    }
-
-                                    if step.element:
-                                        step_data['element_data'] = {
-                                            'locator_strategy': step.element.locator_strategy.name if step.element.locator_strategy else 'css',
-                                            'locator_value': step.element.locator_value,
-                                            'name': step.element.name,
-                                            'wait_timeout': step.element.wait_timeout,
-                                            'force_action': step.element.force_action
-                                        }
-                                    else:
-                                        step_data['element_data'] = None
-
-                                    steps_data.append(step_data)
-
-                                # 存储步骤执行结果和截图
-                                step_results = []
-                                screenshots = []
-                                execution_logs = []
-                                execution_result = {'status': 'passed', 'error_message': None}
-
-                                # 根据引擎类型执行
-                                if task.engine == 'selenium':
-                                    from .selenium_engine import SeleniumTestEngine
-
-                                    # 检查浏览器是否可用
-                                    is_available, error_msg = SeleniumTestEngine.check_browser_available(task.browser)
-                                    if not is_available:
-                                        execution.status = 'failed'
-                                        execution.error_message = error_msg
-                                        execution.execution_logs = json.dumps([{
-                                            'step_number': 0,
-                                            'action_type': '浏览器检查',
-                                            'description': '执行前浏览器环境检查',
-                                            'success': False,
-                                            'error': error_msg
-                                        }], ensure_ascii=False)
-                                        execution.finished_at = timezone.now()
-                                        execution.save()
-                                        failed_count += 1
-                                        continue
-
-                                    # 创建Selenium引擎实例并执行
-                                    engine = SeleniumTestEngine(browser_type=task.browser, headless=task.headless)
-
-                                    try:
-                                        # 启动浏览器
-                                        engine.start()
-                                        execution_logs.append("✓ 浏览器启动成功")
-
-                                        # 导航到项目基础URL
-                                        if test_case.project.base_url:
-                                            success, nav_log = engine.navigate(test_case.project.base_url)
-                                            execution_logs.append(nav_log)
-                                            if not success:
-                                                execution_result['status'] = 'failed'
-                                                execution_result['error_message'] = "导航到测试页面失败"
-                                                raise Exception("导航到测试页面失败")
-
-                                        # 执行测试步骤
-                                        for i, step_info in enumerate(steps_data, 1):
-                                            step = step_info['step']
-                                            action_type = step_info['action_type']
-                                            element_data = step_info['element_data']
-
-                                            success, step_log, screenshot_base64 = engine.execute_step(step,
-                                                                                                       element_data or {})
-
-                                            step_results.append({
-                                                'step_number': i,
-                                                'action_type': action_type,
-                                                'description': step_info['description'] or '',
-                                                'success': success,
-                                                'error': None if success else step_log
-                                            })
-
-                                            if not success:
-                                                execution_result['status'] = 'failed'
-                                                execution_result['error_message'] = step_log
-
-                                                if not screenshot_base64:
-                                                    screenshot_base64 = engine.capture_screenshot()
-
-                                                if screenshot_base64:
-                                                    screenshots.append({
-                                                        'url': screenshot_base64,
-                                                        'description': f'步骤 {i} 失败截图',
-                                                        'step_number': i,
-                                                        'timestamp': timezone.now().isoformat()
-                                                    })
-
-                                                break
-
-                                            if action_type == 'screenshot' and screenshot_base64:
-                                                screenshots.append({
-                                                    'url': screenshot_base64,
-                                                    'description': f'步骤 {i}: {step_info["description"] or "手动截图"}',
-                                                    'step_number': i,
-                                                    'timestamp': timezone.now().isoformat()
-                                                })
-
-                                    finally:
-                                        engine.stop()
-
-                                else:  # Playwright
-                                    import asyncio
-                                    from asgiref.sync import sync_to_async
-                                    from .playwright_engine import PlaywrightTestEngine
-
-                                    async def run_playwright_test():
-                                        browser_map = {
-                                            'chrome': 'chromium',
-                                            'firefox': 'firefox',
-                                            'safari': 'webkit'
-                                        }
-                                        browser_type = browser_map.get(task.browser, 'chromium')
-
-                                        engine = PlaywrightTestEngine(browser_type=browser_type, headless=task.headless)
-
-                                        try:
-                                            # 启动浏览器
-                                            await engine.start()
-                                            execution_logs.append("✓ 浏览器启动成功")
-
-                                            # 获取项目基础URL（同步操作）
-                                            base_url = await sync_to_async(lambda: test_case.project.base_url)()
-
-                                            # 导航到项目基础URL
-                                            if base_url:
-                                                success, nav_log = await engine.navigate(base_url)
-                                                execution_logs.append(nav_log)
-                                                if not success:
-                                                    execution_result['status'] = 'failed'
-                                                    execution_result['error_message'] = "导航到测试页面失败"
-                                                    return False
-
-                                            # 执行测试步骤
-                                            for i, step_info in enumerate(steps_data, 1):
-                                                step = step_info['step']
-                                                action_type = step_info['action_type']
-                                                element_data = step_info['element_data']
-
-                                                success, step_log, screenshot_base64 = await engine.execute_step(step,
-                                                                                                                 element_data or {})
-
-                                                step_results.append({
-                                                    'step_number': i,
-                                                    'action_type': action_type,
-                                                    'description': step_info['description'] or '',
-                                                    'success': success,
-                                                    'error': None if success else step_log
-                                                })
-
-                                                if not success:
-                                                    execution_result['status'] = 'failed'
-                                                    execution_result['error_message'] = step_log
-
-                                                    if not screenshot_base64:
-                                                        screenshot_base64 = await engine.capture_screenshot()
-
-                                                    if screenshot_base64:
-                                                        screenshots.append({
-                                                            'url': screenshot_base64,
-                                                            'description': f'步骤 {i} 失败截图',
-                                                            'step_number': i,
-                                                            'timestamp': timezone.now().isoformat()
-                                                        })
-
-                                                    return False
-
-                                                if action_type == 'screenshot' and screenshot_base64:
-                                                    screenshots.append({
-                                                        'url': screenshot_base64,
-                                                        'description': f'步骤 {i}: {step_info["description"] or "手动截图"}',
-                                                        'step_number': i,
-                                                        'timestamp': timezone.now().isoformat()
-                                                    })
-
-                                            return True
-
-                                        finally:
-                                            await engine.stop()
-
-                                    # 在新的事件循环中运行Playwright测试
-                                    loop = asyncio.new_event_loop()
-                                    asyncio.set_event_loop(loop)
-                                    try:
-                                        loop.run_until_complete(run_playwright_test())
-                                    finally:
-                                        loop.close()
-
-                                # 计算执行时间
-                                total_time = round(time.time() - start_time, 2)
-
-                                # 保存执行结果
-                                execution.status = execution_result['status']
-                                execution.error_message = execution_result['error_message'] or ''
-                                execution.execution_logs = json.dumps(step_results, ensure_ascii=False)
-                                execution.execution_time = total_time
-                                execution.screenshots = screenshots
-                                execution.finished_at = timezone.now()
-                                execution.save()
-
-                                if execution.status == 'passed':
-                                    success_count += 1
-                                    logger.info(f"测试用例 {test_case.name} 执行成功")
-                                else:
-                                    failed_count += 1
-                                    logger.warning(f"测试用例 {test_case.name} 执行失败: {execution.error_message}")
-
-                            except Exception as e:
-                                logger.error(f"执行测试用例 {test_case.name} 时发生异常: {str(e)}")
-                                execution.status = 'failed'
-                                execution.error_message = str(e)
-                                execution.finished_at = timezone.now()
-                                execution.save()
-                                failed_count += 1
-
-                        # 更新任务执行结果
-                        if failed_count == 0:
-                            task.successful_runs += 1
-                            task.last_result = {
-                                'status': 'success',
-                                'message': f'执行完成: {success_count}个成功',
-                                'success_count': success_count,
-                                'failed_count': failed_count
-                            }
-                            task.error_message = ''
-                            task.save()
-
-                            # 发送成功通知
-                            self._send_task_notification(task, success=True)
-                        else:
-                            task.failed_runs += 1
-                            task.last_result = {
-                                'status': 'partial',
-                                'message': f'执行完成: {success_count}个成功, {failed_count}个失败',
-                                'success_count': success_count,
-                                'failed_count': failed_count
-                            }
-                            task.error_message = f'{failed_count}个测试用例执行失败'
-                            task.save()
-
-                            # 发送失败通知
-                            self._send_task_notification(task, success=False)
-
-                    except Exception as e:
-                        logger.error(f"执行定时任务测试用例时发生异常: {str(e)}")
-                        task.failed_runs += 1
-                        task.last_result = {'status': 'failed', 'message': str(e)}
-                        task.error_message = str(e)
-                        task.save()
-
-                        # 发送失败通知
-                        self._send_task_notification(task, success=False)
-
-                # 启动后台线程执行测试
-                thread = threading.Thread(target=run_test_cases)
-                thread.daemon = True
-                thread.start()
+                self._submit_task(task)
 
                 log_operation('run', 'scheduled_task', task.id, task.name, request.user)
 
@@ -2511,6 +2152,17 @@ class UiScheduledTaskViewSet(viewsets.ModelViewSet):
                 'error': f'执行失败: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _submit_task(self, task):
+        """投递到 browser 队列立即执行，手动执行优先于定时调度；TASK_EXECUTION_BACKEND 为 thread 时在进程内执行池中执行"""
+        from .tasks import execute_scheduled_ui_task, run_scheduled_ui_task
+
+        if use_celery():
+            execute_scheduled_ui_task.apply_async(args=[task.id], priority=PRIORITY_HIGH)
+        else:
+            get_executor_pool().submit(
+                'UI', lambda: run_scheduled_ui_task(task), priority=PRIORITY_HIGH, name=task.name
+            )
+
     def _send_task_notification(self, task, success):
         """发送任务执行通知"""
         try:
@@ -0,0 +1,234 @@
+"""
+WebDriver 驱动注册表
+启动 Selenium 时不再每次调用 webdriver_manager 的 install()（解析版本、检查缓存目录，首次还需要联网）：
+驱动路径按 浏览器 + 浏览器主版本号 解析并校验一次，保存在进程内和 UI_WEBDRIVER_DIR/registry.json 中，
+之后的执行直接使用；浏览器升级后主版本号变化，新的执行进程会重新解析。
+chromedriver / msedgedriver 的主版本号必须与浏览器一致；执行进程运行期间浏览器自动升级导致会话创建失败时，
+start_driver 会重新解析驱动再试一次。识别不到浏览器版本时解析结果只保存在进程内，不写入 registry.json。
+
+解析顺序：registry.json 中的记录 → UI_WEBDRIVER_DIR 中预先放置的驱动 → webdriver_manager 下载。
+开启 UI_WEBDRIVER_OFFLINE 后不联网，只使用预先放置的驱动，目录结构：
+    UI_WEBDRIVER_DIR/chrome/120/chromedriver    按浏览器主版本号
+    UI_WEBDRIVER_DIR/chromedriver               不区分版本
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_DRIVER_BINARIES = {
+    'chrome': 'chromedriver',
+    'firefox': 'geckodriver',
+    'edge': 'msedgedriver',
+}
+
+_BROWSER_BINARIES = {
+    'chrome': (
+        'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser',
+        '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+    ),
+    'firefox': ('firefox', '/Applications/Firefox.app/Contents/MacOS/firefox'),
+    'edge': (
+        'microsoft-edge', 'microsoft-edge-stable',
+        '/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge',
+    ),
+}
+
+# 驱动主版本号与浏览器主版本号对应的浏览器（geckodriver 的版本号与 Firefox 无关）
+_VERSION_MATCHED = ('chrome', 'edge')
+
+_VERSION_PATTERN = re.compile(r'(\d+)\.\d+')
+
+_lock = threading.Lock()
+# 本进程已解析的驱动 {浏览器: (主版本号, 驱动路径)}
+_resolved = {}
+
+
+def _binary_name(browser):
+    name = _DRIVER_BINARIES[browser]
+    return f'{name}.exe' if os.name == 'nt' else name
+
+
+def _major_version(executable):
+    """执行 `<executable> --version` 并返回主版本号，失败返回None"""
+    try:
+        output = subprocess.run(
+            [executable, '--version'], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION_PATTERN.search(output or '')
+    return match.group(1) if match else None
+
+
+def browser_major_version(browser):
+    """已安装浏览器的主版本号，找不到浏览器或无法识别版本（如 Windows）时返回None"""
+    for candidate in _BROWSER_BINARIES.get(browser, ()):
+        path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if path and os.path.exists(path):
+            version = _major_version(path)
+            if version:
+                return version
+    return None
+
+
+def _verify(path, browser, version):
+    """驱动文件存在、可执行并且能输出版本号；已知浏览器主版本号时，驱动的主版本号必须一致"""
+    if not (path and os.path.isfile(path) and os.access(path, os.X_OK)):
+        return False
+    driver_version = _major_version(path)
+    if driver_version is None:
+        return False
+    if version and browser in _VERSION_MATCHED and driver_version != version:
+        logger.warning(f"{browser} 驱动主版本 {driver_version} 与浏览器主版本 {version} 不一致: {path}")
+        return False
+    return True
+
+
+def _index_path():
+    return os.path.join(settings.UI_WEBDRIVER_DIR, 'registry.json')
+
+
+def _load_index():
+    try:
+        with open(_index_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index):
+    path = _index_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"保存驱动注册表失败: {e}")
+
+
+def _preseeded(browser, version):
+    """UI_WEBDRIVER_DIR 中预先放置的驱动"""
+    binary = _binary_name(browser)
+    candidates = [os.path.join(settings.UI_WEBDRIVER_DIR, binary)]
+    if version:
+        candidates.insert(0, os.path.join(settings.UI_WEBDRIVER_DIR, browser, version, binary))
+    return next((path for path in candidates if _verify(path, browser, version)), None)
+
+
+def _download(browser):
+    """通过 webdriver_manager 下载驱动（已下载过时使用 ~/.wdm 缓存）"""
+    os.environ['WDM_LOG_LEVEL'] = '0'  # 减少日志输出
+    os.environ['WDM_PRINT_FIRST_LINE'] = 'False'  # 不打印首行信息
+    if browser == 'chrome':
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    if browser == 'firefox':
+        from webdriver_manager.firefox import GeckoDriverManager
+        return GeckoDriverManager().install()
+    from webdriver_manager.microsoft import EdgeChromiumDriverManager
+    return EdgeChromiumDriverManager().install()
+
+
+def resolve_driver_path(browser, refresh=False):
+    """
+    返回浏览器对应的驱动路径
+
+    Args:
+        browser: 浏览器类型 (chrome, firefox, edge)
+        refresh: 忽略已记录的路径重新解析
+
+    Returns:
+        驱动文件路径；不需要单独驱动的浏览器（safari）返回None
+    """
+    if browser not in _DRIVER_BINARIES:
+        return None
+    with _lock:
+        cached = _resolved.get(browser)
+        if cached and not refresh and os.path.isfile(cached[1]):
+            return cached[1]
+
+        version = browser_major_version(browser)
+        # 识别不到浏览器版本时无法判断记录是否仍然匹配，不读写 registry.json
+        key = f"{browser}:{version}" if version else None
+        index = _load_index() if key else {}
+        path = None if refresh or key is None else index.get(key)
+        if path and not _verify(path, browser, version):
+            logger.warning(f"驱动注册表中的 {key} 驱动已失效，重新解析: {path}")
+            path = None
+        if path is None:
+            path = _preseeded(browser, version)
+        if path is None:
+            if settings.UI_WEBDRIVER_OFFLINE:
+                target_dir = os.path.join(settings.UI_WEBDRIVER_DIR, browser, version or '')
+                raise Exception(
+                    f"离线模式下未找到 {browser} 浏览器（主版本 {version or '未知'}）的驱动，"
+                    f"请将 {_binary_name(browser)} 放到 {target_dir} 目录"
+                )
+            path = _download(browser)
+            if not _verify(path, browser, version):
+                raise Exception(f"{browser} 驱动无法执行或与浏览器版本不一致: {path}")
+
+        if key and index.get(key) != path:
+            index[key] = path
+            _save_index(index)
+        _resolved[browser] = (version, path)
+        logger.info(f"{browser} 驱动: {path}（浏览器主版本 {version or '未知'}）")
+        return path
+
+
+def driver_service(browser):
+    """创建使用注册表中驱动路径的 Selenium Service"""
+    if browser == 'firefox':
+        from selenium.webdriver.firefox.service import Service
+    elif browser == 'edge':
+        from selenium.webdriver.edge.service import Service
+    else:
+        from selenium.webdriver.chrome.service import Service
+        browser = 'chrome'
+    return Service(resolve_driver_path(browser))
+
+
+def start_driver(browser, factory):
+    """
+    使用注册表中的驱动创建 WebDriver 会话
+
+    Args:
+        browser: 浏览器类型 (chrome, firefox, edge)
+        factory: 接收 Service 返回 WebDriver 的函数
+
+    会话创建失败（通常是浏览器自动升级后驱动版本不再匹配）时重新解析驱动再试一次
+    """
+    from selenium.common.exceptions import SessionNotCreatedException
+
+    try:
+        return factory(driver_service(browser))
+    except SessionNotCreatedException as e:
+        logger.warning(f"{browser} 会话创建失败，重新解析驱动后重试: {e}")
+        resolve_driver_path(browser, refresh=True)
+        return factory(driver_service(browser))
+
+
+def preload_drivers(browsers=None):
+    """在后台线程中提前解析并校验驱动，执行进程启动时调用，不阻塞启动"""
+    browsers = list(browsers if browsers is not None else settings.UI_WEBDRIVER_PRELOAD)
+    if not browsers:
+        return
+
+    def run():
+        for browser in browsers:
+            try:
+                resolve_driver_path(browser)
+            except Exception as e:
+                logger.warning(f"预加载 {browser} 驱动失败，将在首次执行时重试: {e}")
+
+    threading.Thread(target=run, name='webdriver-preload', daemon=True).start()
@@ -285,6 +285,18 @@ SPECTACULAR_SETTINGS = {
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://:1234@127.0.0.1:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://:1234@127.0.0.1:6379/0')
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+CELERY_TASK_TRACK_STARTED = True  # 记录任务开始执行状态，便于跟踪执行结果
+CELERY_RESULT_EXPIRES = config('CELERY_RESULT_EXPIRES', default=86400, cast=int)  # 任务结果保留秒数
+CELERY_BROKER_TRANSPORT_OPTIONS = {'priority_steps': list(range(10))}  # Redis 消息优先级 0-9，数值越小越先执行
+# 按执行类型路由到独立队列：api（API测试）、browser（UI自动化）、device（APP自动化）
+CELERY_TASK_ROUTES = {
+    'apps.api_testing.tasks.*': {'queue': 'api'},
+    'apps.ui_automation.tasks.*': {'queue': 'browser'},
+    'apps.app_automation.tasks.*': {'queue': 'device'},
+}
+CELERY_API_TASK_TIME_LIMIT = config('CELERY_API_TASK_TIME_LIMIT', default=1800, cast=int)  # API测试任务执行时限（秒）
+CELERY_BROWSER_TASK_TIME_LIMIT = config('CELERY_BROWSER_TASK_TIME_LIMIT', default=7200, cast=int)  # UI自动化任务执行时限（秒）
+CELERY_DEVICE_TASK_TIME_LIMIT = config('CELERY_DEVICE_TASK_TIME_LIMIT', default=7200, cast=int)  # APP自动化任务执行时限（秒）
 
 # Channels Configuration
 CHANNEL_LAYERS = {
@@ -305,6 +317,64 @@ CACHES = {
     }
 }
 
+# API测试 HTTP 连接池配置
+API_HTTP_POOL_SIZE = config('API_HTTP_POOL_SIZE', default=20, cast=int)  # 每个会话的最大连接数
+API_HTTP_KEEPALIVE_EXPIRY = config('API_HTTP_KEEPALIVE_EXPIRY', default=30.0, cast=float)  # 空闲连接保持秒数
+API_HTTP2_ENABLED = config('API_HTTP2_ENABLED', default=True, cast=bool)  # 安装 h2 时启用 HTTP/2
+API_HTTP_SHARE_ENVIRONMENT_SESSIONS = config('API_HTTP_SHARE_ENVIRONMENT_SESSIONS', default=False, cast=bool)  # 同一环境跨执行复用连接
+API_RESPONSE_INLINE_MAX_BYTES = config('API_RESPONSE_INLINE_MAX_BYTES', default=256 * 1024, cast=int)  # 超过该大小的响应体写入外部文件
+API_STREAM_CHUNK_SIZE = config('API_STREAM_CHUNK_SIZE', default=64 * 1024, cast=int)  # 流式断言每次读取的字节数
+API_STREAM_PREVIEW_BYTES = config('API_STREAM_PREVIEW_BYTES', default=64 * 1024, cast=int)  # 流式断言保存的响应预览大小
+API_HISTORY_BULK_BATCH_SIZE = config('API_HISTORY_BULK_BATCH_SIZE', default=200, cast=int)  # 套件执行请求历史批量写入大小
+
+# 定时任务调度器配置
+SCHEDULER_MAX_SLEEP = config('SCHEDULER_MAX_SLEEP', default=60, cast=int)  # 调度器最长休眠秒数（未收到唤醒时的兜底轮询间隔）
+SCHEDULER_HEAP_SIZE = config('SCHEDULER_HEAP_SIZE', default=100, cast=int)  # 每个模块预加载到调度堆中的任务数
+SCHEDULER_LEASE_SECONDS = config('SCHEDULER_LEASE_SECONDS', default=300, cast=int)  # 调度租约有效期，超时未释放由其他调度器接管
+SCHEDULER_CLAIM_BATCH_SIZE = config('SCHEDULER_CLAIM_BATCH_SIZE', default=50, cast=int)  # 每批领取的到期任务数
+SCHEDULER_METRICS_RETENTION_SECONDS = config('SCHEDULER_METRICS_RETENTION_SECONDS', default=86400, cast=int)  # 调度器指标保留秒数
+SCHEDULER_METRICS_MAX_SAMPLES = config('SCHEDULER_METRICS_MAX_SAMPLES', default=20000, cast=int)  # 调度器指标最多保留的样本数（每类）
+SCHEDULER_REDIS_URL = config('REDIS_URL', default='redis://:1234@127.0.0.1:6379/0')  # 调度器唤醒消息、排队标记和运行指标使用的Redis
+
+# 定时任务执行池配置
+TASK_EXECUTION_BACKEND = config('TASK_EXECUTION_BACKEND', default='thread')  # 定时任务执行方式：thread（进程内执行池）或 celery（投递到独立队列，需部署 api / browser / device Worker）
+TASK_EXECUTOR_MAX_WORKERS = config('TASK_EXECUTOR_MAX_WORKERS', default=8, cast=int)  # 全局最大并发执行任务数
+TASK_EXECUTOR_API_LIMIT = config('TASK_EXECUTOR_API_LIMIT', default=6, cast=int)  # API测试任务最大并发数
+TASK_EXECUTOR_UI_LIMIT = config('TASK_EXECUTOR_UI_LIMIT', default=2, cast=int)  # UI自动化任务最大并发数（每个任务占用一个浏览器）
+TASK_EXECUTOR_MAX_QUEUE_SIZE = config('TASK_EXECUTOR_MAX_QUEUE_SIZE', default=500, cast=int)  # 最大排队任务数，0表示不限制
+
+# 数据工厂流式导出配置
+DATA_FACTORY_EXPORT_CHUNK_SIZE = config('DATA_FACTORY_EXPORT_CHUNK_SIZE', default=10000, cast=int)  # 每批生成的行数
+DATA_FACTORY_EXPORT_MAX_ROWS = config('DATA_FACTORY_EXPORT_MAX_ROWS', default=10000000, cast=int)  # 单次导出最大行数
+
+# UI自动化执行配置
+UI_PARALLEL_MAX_WORKERS = config('UI_PARALLEL_MAX_WORKERS', default=4, cast=int)  # 单个套件并行执行时最多同时启动的浏览器数
+UI_BROWSER_POOL_SIZE = config('UI_BROWSER_POOL_SIZE', default=4, cast=int)  # 每个进程常驻的预热浏览器数，0 表示每次执行冷启动
+UI_BROWSER_POOL_IDLE_TIMEOUT = config('UI_BROWSER_POOL_IDLE_TIMEOUT', default=600, cast=int)  # 预热浏览器空闲多少秒后关闭
+UI_BROWSER_POOL_MAX_REUSE = config('UI_BROWSER_POOL_MAX_REUSE', default=50, cast=int)  # 单个预热浏览器最多复用次数，达到后关闭重建
+UI_BROWSER_POOL_HEALTH_INTERVAL = config('UI_BROWSER_POOL_HEALTH_INTERVAL', default=30, cast=int)  # 浏览器池健康检查间隔（秒）
+UI_LOGIN_STATE_CACHE_TTL = config('UI_LOGIN_STATE_CACHE_TTL', default=1800, cast=int)  # 缓存的登录状态有效期（秒）
+UI_SCREENSHOT_FORMAT = config('UI_SCREENSHOT_FORMAT', default='webp')  # 执行截图保存格式：webp / jpeg
+UI_SCREENSHOT_QUALITY = config('UI_SCREENSHOT_QUALITY', default=80, cast=int)  # 执行截图压缩质量（1-100）
+UI_SCREENSHOT_THUMBNAIL_WIDTH = config('UI_SCREENSHOT_THUMBNAIL_WIDTH', default=320, cast=int)  # 执行截图缩略图宽度（像素）
+UI_AUTO_WAIT = config('UI_AUTO_WAIT', default=True, cast=bool)  # 智能等待：步骤中的固定等待作为上限，页面稳定后提前继续
+UI_AUTO_WAIT_QUIET_MS = config('UI_AUTO_WAIT_QUIET_MS', default=150, cast=int)  # 无请求且 DOM 持续多少毫秒无变化视为页面稳定
+UI_ADAPTIVE_TIMEOUT = config('UI_ADAPTIVE_TIMEOUT', default=True, cast=bool)  # 根据项目历史步骤耗时自动放宽元素等待超时
+UI_ADAPTIVE_TIMEOUT_FACTOR = config('UI_ADAPTIVE_TIMEOUT_FACTOR', default=3.0, cast=float)  # 自适应超时 = 历史耗时 P95 × 该系数
+UI_ADAPTIVE_TIMEOUT_MAX = config('UI_ADAPTIVE_TIMEOUT_MAX', default=30, cast=int)  # 自适应超时上限（秒）
+UI_ADAPTIVE_TIMEOUT_MIN_SAMPLES = config('UI_ADAPTIVE_TIMEOUT_MIN_SAMPLES', default=20, cast=int)  # 历史样本数达到该值后才启用自适应超时
+UI_NETWORK_BLOCK_RESOURCE_TYPES = config('UI_NETWORK_BLOCK_RESOURCE_TYPES', default='',
+                                         cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])  # 所有项目默认拦截的资源类型，如 font,media
+UI_NETWORK_BLOCK_URL_PATTERNS = config('UI_NETWORK_BLOCK_URL_PATTERNS', default='',
+                                       cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])  # 所有项目默认拦截的URL通配符，如 *google-analytics.com*
+UI_LOCATOR_HEALING = config('UI_LOCATOR_HEALING', default=True, cast=bool)  # 元素配置了备用定位器时同时尝试主/备用定位器，记住实际生效的定位器
+UI_LOCATOR_HEALING_CACHE_TTL = config('UI_LOCATOR_HEALING_CACHE_TTL', default=7 * 24 * 3600, cast=int)  # 生效定位器记录的有效期（秒）
+UI_NETWORK_HAR_DIR = config('UI_NETWORK_HAR_DIR', default=os.path.join(MEDIA_ROOT, 'ui_har'))  # 静态资源回放使用的 HAR 文件目录
+UI_WEBDRIVER_DIR = config('UI_WEBDRIVER_DIR', default=os.path.join(BASE_DIR, 'webdrivers'))  # 预置 WebDriver 驱动目录，同时保存驱动注册表 registry.json
+UI_WEBDRIVER_OFFLINE = config('UI_WEBDRIVER_OFFLINE', default=False, cast=bool)  # 离线模式：只使用预置目录中的驱动，不通过 webdriver_manager 下载
+UI_WEBDRIVER_PRELOAD = config('UI_WEBDRIVER_PRELOAD', default='chrome',
+                              cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])  # 执行进程启动时预先解析驱动的浏览器，留空不预加载
+
 # Email Configuration
 EMAIL_BACKEND = 'apps.api_testing.custom_email_backend.CustomEmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
@@ -63,3 +63,14 @@ export function getActiveNotificationConfigs() {
     method: 'get'
   })
 }
+
+// ==================== 定时任务调度器指标 ====================
+
+// 获取调度器运行指标（调度延迟、每轮耗时、到期任务数、队列深度）
+export function getSchedulerMetrics(params) {
+  return request({
+    url: '/core/scheduler-metrics/',
+    method: 'get',
+    params
+  })
+}
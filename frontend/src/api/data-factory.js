@@ -51,6 +51,26 @@ export function batchGenerate(data) {
   })
 }
 
+// 流式导出批量数据（csv / ndjson / json）
+export function exportData(data) {
+  return request({
+    url: '/data-factory/export/',
+    method: 'post',
+    data,
+    responseType: 'blob',
+    timeout: 0
+  })
+}
+
+// 下载记录关联的导出文件
+export function downloadExport(id) {
+  return request({
+    url: `/data-factory/${id}/download/`,
+    method: 'get',
+    responseType: 'blob'
+  })
+}
+
 // 获取变量函数列表（用于变量助手）
 export function getVariableFunctions() {
   return request({